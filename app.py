@@ -3,12 +3,11 @@ app.py — Entry point dell'app Beach Volley Tournament Manager
 Avvia con: streamlit run app.py
 """
 import streamlit as st
-from data_manager import load_state, save_state
+from data_manager import (
+    ArchivioCondiviso, save_state, salva_se_modificato, STATISTICHE_AUTOSAVE,
+    descrizione_archivio, top_ranking, fase_raggiunta, classifica_girone, sincronizza_partite,
+)
 from ui_components import inject_css, render_header
-from fase_setup import render_setup
-from fase_gironi import render_gironi
-from fase_eliminazione import render_eliminazione
-from fase_proclamazione import render_proclamazione, render_ranking_globale, render_schede_carriera
 
 # ─── CONFIGURAZIONE PAGINA ───────────────────────────────────────────────────
 
@@ -20,10 +19,18 @@ st.set_page_config(
 )
 
 # ─── CARICAMENTO STATO (prima del CSS per usare theme) ──────────────────────
+@st.cache_resource
+def archivio_condiviso():
+    """Uno per processo: archivio letto una volta e storico atleti comune a tutte le sessioni."""
+    return ArchivioCondiviso()
+
+
 if "state" not in st.session_state:
-    st.session_state.state = load_state()
+    st.session_state.state = archivio_condiviso().nuova_sessione()
 
 state = st.session_state.state
+archivio_condiviso().aggiorna_sessione(state)   # storico atleti salvato da altre sessioni
+sincronizza_partite(state)   # risultati confermati da altri dispositivi (shard partite)
 
 # ─── CSS GLOBALE (tema da state, senza crash) ───────────────────────────────
 theme = state.get("theme", "dazn_dark")
@@ -52,7 +59,7 @@ with st.sidebar:
     
     fase_corrente = state["fase"]
     ordine = ["setup", "gironi", "eliminazione", "proclamazione"]
-    idx_attuale = ordine.index(fase_corrente) if fase_corrente in ordine else 0
+    idx_attuale = ordine.index(fase_raggiunta(state))   # anche da Profili / Previsioni / Calendario
     
     for i, (k, label) in enumerate([
         ("setup", "⚙️ Setup"),
@@ -77,6 +84,27 @@ with st.sidebar:
         save_state(state)
         st.rerun()
 
+    # Previsioni Monte Carlo — disponibili appena ci sono partite
+    if st.button("🔮 Previsioni", use_container_width=True, disabled=idx_attuale == 0,
+                 type="primary" if fase_corrente == "previsioni" else "secondary", key="nav_previsioni"):
+        state["fase"] = "previsioni"
+        save_state(state)
+        st.rerun()
+
+    # Calendario dei campi — disponibile appena ci sono partite
+    if st.button("🗓️ Calendario Campi", use_container_width=True, disabled=idx_attuale == 0,
+                 type="primary" if fase_corrente == "calendario" else "secondary", key="nav_calendario"):
+        state["fase"] = "calendario"
+        save_state(state)
+        st.rerun()
+
+    # Segnapunti live per monitor / maxi-schermo — disponibile appena ci sono partite
+    if st.button("🧮 Segnapunti Live", use_container_width=True, disabled=idx_attuale == 0,
+                 type="primary" if fase_corrente == "segnapunti" else "secondary", key="nav_segnapunti"):
+        state["fase"] = "segnapunti"
+        save_state(state)
+        st.rerun()
+
     st.divider()
     
     # Info torneo
@@ -89,15 +117,22 @@ with st.sidebar:
         st.caption(f"👥 {len(state['squadre'])} squadre")
         
         st.divider()
+
+    # Qualificate provvisorie per girone (classifica mantenuta, niente riordino)
+    if fase_raggiunta(state) == "gironi" and not state["gironi"][0].get("svizzera"):
+        passano = state["torneo"].get("passano_per_girone", 2)
+        st.markdown("**📊 Qualificate provvisorie**")
+        for g in state["gironi"]:
+            prime = classifica_girone(state, g)[:passano]
+            st.caption(f"{g['nome']}: " + " · ".join(f"{sq['nome']} ({sq['punti_classifica']})" for sq in prime))
+
+        st.divider()
     
-    # Ranking rapido in sidebar
-    atleti_con_dati = [a for a in state["atleti"] if a["stats"]["tornei"] > 0]
-    if atleti_con_dati:
+    # Ranking rapido in sidebar (classifica già ordinata in ranking_globale)
+    top_atleti = top_ranking(state, 5)
+    if top_atleti:
         st.markdown("**🏅 Top Atleti**")
-        atleti_sorted = sorted(atleti_con_dati, key=lambda a: -(
-            sum({1:100,2:70,3:50}.get(p,20) for _,p in a["stats"]["storico_posizioni"])
-        ))
-        for i, a in enumerate(atleti_sorted[:5]):
+        for i, a in enumerate(top_atleti):
             medals = {0:"🥇",1:"🥈",2:"🥉"}
             icon = medals.get(i,"•")
             st.caption(f"{icon} {a['nome']}")
@@ -113,14 +148,26 @@ with st.sidebar:
     with col2:
         with st.expander("⚠️"):
             if st.button("🔴 RESET", use_container_width=True):
-                from data_manager import empty_state
-                st.session_state.state = empty_state()
-                save_state(st.session_state.state)
+                from data_manager import empty_state, azzera_partite
+                azzera_partite()
+                save_state(empty_state())   # stato non tracciato: riscrive torneo e storico
+                st.session_state.state = archivio_condiviso().nuova_sessione()
                 for k in list(st.session_state.keys()):
                     if k != "state":
                         del st.session_state[k]
                 st.rerun()
     
+    # Controllo: statistiche e classifiche incrementali contro ricalcolo completo
+    if st.button("🧮 Verifica coerenza", use_container_width=True, key="verifica_coerenza"):
+        from data_manager import verifica_coerenza
+        errori = verifica_coerenza(state)
+        if errori:
+            st.error(f"{len(errori)} differenze trovate")
+            for err in errori[:10]:
+                st.caption(f"• {err}")
+        else:
+            st.success("Statistiche e classifiche coerenti con i risultati.")
+
     # Tema (accesso rapido; personalizzazione completa in Setup → Personalizzazione tema)
     st.markdown("**🎨 Tema**")
     theme_opts = ["dazn_dark", "dazn_red", "dark_blue", "dark_green"]
@@ -139,36 +186,58 @@ with st.sidebar:
         st.rerun()
     st.caption("Altre opzioni in Setup → Personalizzazione tema")
 
-    st.caption("Dati salvati su: beach_volley_data.json")
+    st.caption(f"Dati salvati su: {descrizione_archivio()}")
+    st.caption(f"💾 Autosave: {STATISTICHE_AUTOSAVE['eseguiti']} eseguiti · "
+               f"{STATISTICHE_AUTOSAVE['saltati']} saltati (nessuna modifica)")
 
 
 # ─── HEADER PRINCIPALE ───────────────────────────────────────────────────────
 render_header(state)
 
 # ─── ROUTING FASI ────────────────────────────────────────────────────────────
+# Il modulo di una pagina si importa solo quando la pagina viene mostrata:
+# all'avvio non si caricano le altre fasi (né numpy/pandas che si portano
+# dietro); dal rerun successivo l'import è già in sys.modules.
 fase = state["fase"]
 
 if fase == "setup":
+    from fase_setup import render_setup
     render_setup(state)
 
 elif fase == "gironi":
+    from fase_gironi import render_gironi
     render_gironi(state)
 
 elif fase == "eliminazione":
+    from fase_eliminazione import render_eliminazione
     render_eliminazione(state)
 
 elif fase == "proclamazione":
+    from fase_proclamazione import render_proclamazione
     render_proclamazione(state)
 
 elif fase == "profili":
+    from fase_proclamazione import render_schede_carriera
     st.markdown("## 👤 Profili Giocatori — Carte Carriera")
     st.caption("Carte in stile FC26 Ultimate Team: Overall e tier (Bronzo → GOAT) calcolati da tornei e statistiche.")
     st.divider()
     render_schede_carriera(state)
 
+elif fase == "previsioni":
+    from previsioni_page import render_previsioni
+    render_previsioni(state)
+
+elif fase == "calendario":
+    from calendario_page import render_calendario
+    render_calendario(state)
+
+elif fase == "segnapunti":
+    from segnapunti_live import render_segnapunti_live
+    render_segnapunti_live(state)
+
 else:
     st.error(f"Fase sconosciuta: {fase}")
 
 # ─── AUTOSAVE SILENZIOSO ─────────────────────────────────────────────────────
-# Salva ad ogni ciclo per garantire persistenza
-save_state(state)
+# Salva solo se qualcosa è cambiato dall'ultimo salvataggio (versione tracciata)
+salva_se_modificato(state)
@@ -0,0 +1,89 @@
+"""
+bench_avulsa.py — Classifica avulsa su un girone unico da 36 squadre
+
+Gioca tutte le 630 partite con pochi punti in palio per set (molti pari
+punti) e, a ogni conferma, confronta classifica_girone (matrice degli
+scontri diretti aggiornata in modo incrementale) con un riferimento che
+ricalcola la mini-classifica rileggendo tutte le partite del girone.
+Riporta il tempo medio per lettura della classifica delle due versioni.
+Avvio: python benchmarks/bench_avulsa.py
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from data_manager import (
+    empty_state, new_squadra, genera_gironi, traccia_stato, get_squadra_by_id,
+    aggiorna_classifica_squadra, classifica_girone, chiave_classifica,
+)
+
+N_SQUADRE = 36
+
+
+def avulsa_riferimento(state, girone):
+    """Stessi criteri, ricalcolati da zero scandendo le partite a ogni livello."""
+    def ordina(pari):
+        ids = {sq["id"] for sq in pari}
+        tot = {sid: [0, 0, 0] for sid in ids}
+        for p in girone["partite"]:
+            if p["confermata"] and p["sq1"] in ids and p["sq2"] in ids:
+                p1 = sum(x[0] for x in p["punteggi"])
+                p2 = sum(x[1] for x in p["punteggi"])
+                vince_1 = p["vincitore"] == p["sq1"]
+                for sid, pti, ds, dp in ((p["sq1"], 3 if vince_1 else 1, p["set_sq1"] - p["set_sq2"], p1 - p2),
+                                         (p["sq2"], 1 if vince_1 else 3, p["set_sq2"] - p["set_sq1"], p2 - p1)):
+                    tot[sid][0] += pti; tot[sid][1] += ds; tot[sid][2] += dp
+        chiave = {sid: (-t[0], -t[1], -t[2]) for sid, t in tot.items()}
+        if len(set(chiave.values())) == 1:
+            return sorted(pari, key=chiave_classifica)
+        risultato, gruppo = [], []
+        for sq in sorted(pari, key=lambda s: (chiave[s["id"]], chiave_classifica(s))):
+            if gruppo and chiave[gruppo[0]["id"]] != chiave[sq["id"]]:
+                risultato += ordina(gruppo) if len(gruppo) > 1 else gruppo
+                gruppo = []
+            gruppo.append(sq)
+        return risultato + (ordina(gruppo) if len(gruppo) > 1 else gruppo)
+
+    squadre = sorted((get_squadra_by_id(state, sid) for sid in girone["squadre"]), key=chiave_classifica)
+    finale, i = [], 0
+    while i < len(squadre):
+        j = i
+        while j < len(squadre) and squadre[j]["punti_classifica"] == squadre[i]["punti_classifica"]:
+            j += 1
+        finale += ordina(squadre[i:j])
+        i = j
+    return finale
+
+
+if __name__ == "__main__":
+    random.seed(5)
+    state = empty_state()
+    state["torneo"]["criterio_passaggio"] = "avulsa"
+    state["squadre"] = [new_squadra(f"Team {i}", f"a{2 * i}", f"a{2 * i + 1}") for i in range(N_SQUADRE)]
+    for i, sq in enumerate(state["squadre"]):
+        sq["id"] = f"sq_{i}"
+    state["gironi"] = genera_gironi([s["id"] for s in state["squadre"]], girone_unico=True)
+    state = traccia_stato(state)
+    girone = state["gironi"][0]
+
+    t_inc = t_rif = 0.0
+    for p in girone["partite"]:
+        a, b = random.choice([(3, 1), (1, 3)])   # set corti: tanti arrivi a pari punti
+        p.update(punteggi=[(a, b)], set_sq1=int(a > b), set_sq2=int(b > a),
+                 vincitore=p["sq1"] if a > b else p["sq2"], confermata=True)
+        aggiorna_classifica_squadra(state, p)
+        t0 = time.perf_counter()
+        incrementale = [sq["id"] for sq in classifica_girone(state, girone)]
+        t_inc += time.perf_counter() - t0
+        t0 = time.perf_counter()
+        riferimento = [sq["id"] for sq in avulsa_riferimento(state, girone)]
+        t_rif += time.perf_counter() - t0
+        assert incrementale == riferimento, p["id"]
+
+    n = len(girone["partite"])
+    print(f"{N_SQUADRE} squadre, {n} partite: classifica identica al riferimento dopo ogni conferma")
+    print(f"matrice scontri diretti : {1e3 * t_inc / n:6.3f} ms per lettura")
+    print(f"rilettura delle partite : {1e3 * t_rif / n:6.3f} ms per lettura")
@@ -0,0 +1,119 @@
+"""
+bench_avvio.py — Avvio a freddo dell'app per fase
+
+Per ogni fase (setup, gironi, eliminazione, proclamazione, profili) si
+prepara un archivio in una cartella temporanea con il torneo arrivato a
+quel punto, poi in un processo Python nuovo si misura:
+- import: i moduli importati in cima ad app.py;
+- primo render: il primo AppTest.run() di app.py (con gli import delle
+  pagine fatti al volo).
+Prima: app.py importava in cima tutte le pagine, con numpy (motore di
+simulazione) e pandas (grafico delle schede carriera). Dopo: solo la pagina
+della fase attiva, numpy quando si simula e pandas quando si disegna il
+grafico. Mediana su RIPETIZIONI processi; si riporta anche se pandas e numpy
+risultano caricati alla fine del primo render.
+Avvio: python benchmarks/bench_avvio.py
+"""
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+RADICE = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+sys.path.insert(0, RADICE)
+
+FASI = ("setup", "gironi", "eliminazione", "proclamazione", "profili")
+RIPETIZIONI = 3
+# Import in cima al vecchio app.py (e quelli che le pagine si portavano dietro)
+IMPORT_PRIMA = ("fase_setup", "fase_gironi", "fase_eliminazione", "fase_proclamazione", "previsioni_page",
+                "calendario_page", "segnapunti_live", "motore_simulazione", "pandas")
+
+
+def prepara(fase, cartella):
+    """Archivio con il torneo arrivato alla fase indicata."""
+    from data_manager import (
+        empty_state, new_atleta, new_squadra, genera_gironi, genera_bracket_da_gironi, traccia_stato,
+        save_state, simula_partita, aggiorna_classifica_squadra, avanza_vincitore, podio_bracket,
+        trasferisci_al_ranking, ricostruisci_ranking,
+    )
+    os.chdir(cartella)
+    random.seed(4)
+    state = empty_state()
+    state["torneo"]["nome"] = "Bench avvio"
+    state["atleti"] = [new_atleta(f"Atleta {i}") for i in range(64)]
+    for a in state["atleti"]:                # storico: grafico nelle schede carriera
+        for t in range(5):
+            pos = random.randint(1, 8)
+            a["stats"]["storico_posizioni"].append((f"Torneo {t}", pos))
+            a["stats"]["tornei"] += 1
+            a["stats"]["vittorie" if pos == 1 else "sconfitte"] += 1
+    ricostruisci_ranking(state)
+    state["squadre"] = [new_squadra(f"Team {i}", state["atleti"][2 * i]["id"], state["atleti"][2 * i + 1]["id"])
+                        for i in range(32)]
+    state = traccia_stato(state)
+    if fase != "setup":
+        state["gironi"] = genera_gironi([s["id"] for s in state["squadre"]], num_gironi=8)
+        partite = [p for g in state["gironi"] for p in g["partite"]]
+        for partita in partite if fase != "gironi" else partite[::2]:
+            simula_partita(state, partita)
+            aggiorna_classifica_squadra(state, partita)
+    if fase not in ("setup", "gironi"):
+        state["bracket"] = genera_bracket_da_gironi(state)
+    if fase in ("proclamazione", "profili"):
+        while pronte := [p for p in state["bracket"]
+                         if not p["confermata"] and p["sq1"] is not None and p["sq2"] is not None]:
+            for partita in pronte:
+                simula_partita(state, partita)
+                avanza_vincitore(state, partita)
+        state["podio"] = podio_bracket(state)
+        state["vincitore"] = state["podio"][0][1]
+        trasferisci_al_ranking(state, state["podio"])
+    state["fase"] = fase
+    save_state(state)
+
+
+def misura(modo):
+    """Eseguito nel processo figlio, nella cartella dell'archivio: dizionario dei tempi in ms."""
+    from streamlit.testing.v1 import AppTest   # infrastruttura di test, fuori dalle misure
+    t0 = time.perf_counter()
+    import data_manager, ui_components       # noqa: F401 — in cima ad app.py in entrambi i casi
+    if modo == "prima":
+        for nome in IMPORT_PRIMA:
+            __import__(nome)
+    t_import = time.perf_counter() - t0
+    at = AppTest.from_file(os.path.join(RADICE, "app.py"), default_timeout=120)
+    t0 = time.perf_counter()
+    at.run()
+    t_render = time.perf_counter() - t0
+    assert not at.exception, at.exception
+    return {"import": 1000 * t_import, "render": 1000 * t_render,
+            "pandas": "pandas" in sys.modules, "numpy": "numpy" in sys.modules}
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 3:                  # processo figlio
+        os.chdir(sys.argv[2])
+        print(json.dumps(misura(sys.argv[1])))
+        sys.exit(0)
+
+    print(f"avvio a freddo per fase, mediana su {RIPETIZIONI} processi (ms)")
+    for fase in FASI:
+        righe = []
+        for modo in ("prima", "dopo"):
+            esiti = []
+            for _ in range(RIPETIZIONI):
+                cartella = tempfile.mkdtemp()   # archivio fuori dal repository, uno per processo
+                prepara(fase, cartella)
+                out = subprocess.run([sys.executable, os.path.abspath(__file__), modo, cartella],
+                                     capture_output=True, text=True, check=True).stdout
+                esiti.append(json.loads(out.strip().splitlines()[-1]))
+            t_import = statistics.median(e["import"] for e in esiti)
+            t_render = statistics.median(e["render"] for e in esiti)
+            librerie = "+".join(n for n in ("numpy", "pandas") if esiti[-1][n]) or "—"
+            righe.append(f"{modo}: import {t_import:6.1f} · primo render {t_render:6.1f} "
+                         f"· totale {t_import + t_render:6.1f} ({librerie})")
+        print(f"{fase:13} " + " | ".join(righe))
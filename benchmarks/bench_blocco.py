@@ -0,0 +1,86 @@
+"""
+bench_blocco.py — Conferma in blocco dei referti di un girone
+
+Girone unico da 12 squadre (66 partite), Best of 3: referti validi generati
+a regola (21 a 2 punti di scarto, tie-break a 15). Confronta la conferma una
+partita alla volta (aggiorna_classifica_squadra + salva_partita per ognuna,
+come dallo scoreboard) con conferma_risultati (validazione di tutte le righe,
+stesso aggiornamento, un solo salvataggio). Verifica che classifiche e
+statistiche coincidano e che una riga non valida blocchi tutto il blocco.
+Avvio: python benchmarks/bench_blocco.py
+"""
+import copy
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from data_manager import (
+    empty_state, new_squadra, genera_gironi, traccia_stato, save_state, salva_partita,
+    aggiorna_classifica_squadra, conferma_risultati, valida_punteggi, verifica_coerenza,
+)
+
+
+def set_a_regola(limite):
+    vince = random.randint(limite, limite + 5)
+    perde = vince - 2 if vince > limite else random.randint(0, limite - 2)
+    return (vince, perde) if random.random() < 0.5 else (perde, vince)
+
+
+def referto():
+    punteggi = [set_a_regola(21), set_a_regola(21)]
+    if (punteggi[0][0] > punteggi[0][1]) != (punteggi[1][0] > punteggi[1][1]):
+        punteggi.append(set_a_regola(15))
+    return punteggi
+
+
+def nuovo_stato():
+    state = empty_state()
+    state["torneo"]["formato_set"] = "Best of 3"
+    state["squadre"] = [new_squadra(f"Team {i}", f"a{2 * i}", f"a{2 * i + 1}") for i in range(12)]
+    for i, sq in enumerate(state["squadre"]):
+        sq["id"] = f"sq_{i}"
+    state["gironi"] = genera_gironi([s["id"] for s in state["squadre"]], girone_unico=True)
+    state = traccia_stato(state)
+    save_state(state)
+    return state
+
+
+if __name__ == "__main__":
+    os.chdir(tempfile.mkdtemp())      # journal fuori dal repository
+    random.seed(2)
+    uno = nuovo_stato()
+    blocco = traccia_stato(copy.deepcopy(dict(uno)))
+    referti = [referto() for _ in uno["gironi"][0]["partite"]]
+
+    t0 = time.perf_counter()
+    for partita, punteggi in zip(uno["gironi"][0]["partite"], referti):
+        punteggi, s1, s2 = valida_punteggi(uno["torneo"], punteggi)
+        partita.update(punteggi=punteggi, set_sq1=s1, set_sq2=s2, confermata=True,
+                       vincitore=partita["sq1"] if s1 > s2 else partita["sq2"])
+        aggiorna_classifica_squadra(uno, partita)
+        salva_partita(uno, partita)
+    t_uno = time.perf_counter() - t0
+    os.chdir(tempfile.mkdtemp())      # seconda copia con archivio e shard propri
+
+    # Una riga sbagliata: nulla confermato
+    prima = copy.deepcopy(dict(blocco))
+    sbagliati = list(zip(blocco["gironi"][0]["partite"], referti))
+    sbagliati[7] = (sbagliati[7][0], [(21, 20), (21, 15)])
+    errori = conferma_risultati(blocco, sbagliati)
+    assert list(errori) == [blocco["gironi"][0]["partite"][7]["id"]], errori
+    assert copy.deepcopy(dict(blocco)) == prima
+
+    t0 = time.perf_counter()
+    assert conferma_risultati(blocco, list(zip(blocco["gironi"][0]["partite"], referti))) == {}
+    t_blocco = time.perf_counter() - t0
+
+    assert blocco["gironi"][0]["classifica"] == uno["gironi"][0]["classifica"]
+    assert blocco["squadre"] == uno["squadre"] and not verifica_coerenza(blocco)
+    n = len(referti)
+    print(f"{n} referti Best of 3 · riga non valida: \"{errori[sbagliati[7][0]['id']]}\", nessuna conferma")
+    print(f"una alla volta : {1000 * t_uno:6.1f} ms ({n} salvataggi)")
+    print(f"in blocco      : {1000 * t_blocco:6.1f} ms (1 salvataggio) · classifica identica")
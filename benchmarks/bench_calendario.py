@@ -0,0 +1,116 @@
+"""
+bench_calendario.py — Calendario di un torneo da 48 squadre su più campi
+
+8 gironi da 6 (120 partite) + tabellone a 16 (15 partite + finale 3º-4º).
+Per ogni numero di campi confronta la durata totale con l'assegnazione in
+ordine di lista (primo campo libero, stessi vincoli) e con il limite inferiore
+(minuti di gioco / campi), controlla i vincoli (niente sovrapposizioni sui
+campi, riposo minimo, tabellone dopo le partite che lo alimentano) e misura
+la ripianificazione dal vivo dopo uno sforamento.
+Avvio: python benchmarks/bench_calendario.py
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from data_manager import empty_state, new_squadra, genera_gironi, genera_tabellone, simula_partita
+from calendario import pianifica, configurazione, utilizzo_campi, _partite
+
+N_SQUADRE = 48
+
+
+def costruisci_stato(campi):
+    random.seed(3)
+    state = empty_state()
+    state["squadre"] = [new_squadra(f"Team {i}", f"a{2 * i}", f"a{2 * i + 1}") for i in range(N_SQUADRE)]
+    for i, sq in enumerate(state["squadre"]):
+        sq["id"] = f"sq_{i}"
+    state["gironi"] = genera_gironi([s["id"] for s in state["squadre"]], num_gironi=8)
+    state["bracket"] = genera_tabellone([f"sq_{i}" for i in range(16)])
+    state["torneo"]["campi"] = campi
+    return state
+
+
+def in_ordine_di_lista(state):
+    """Riferimento: partite nell'ordine dell'app, ognuna sul primo campo libero."""
+    conf = configurazione(state)
+    campi = [0] * conf["campi"]
+    pronto, fine_partita = {}, {}
+    partite = _partite(state)
+    fine_gironi = 0
+    for p in partite:
+        c = min(range(len(campi)), key=campi.__getitem__)
+        dipendenze = [fine_partita[q["id"]] + conf["riposo"] for q in partite
+                      if q.get("next_id") == p["id"] or q.get("loser_id") == p["id"]]
+        inizio = max([campi[c], pronto.get(p["sq1"], 0), pronto.get(p["sq2"], 0)] + dipendenze
+                     + ([fine_gironi + conf["riposo"]] if p["fase"] != "girone" else []))
+        fine_partita[p["id"]] = campi[c] = inizio + conf["durata"]
+        if p["fase"] == "girone":
+            fine_gironi = max(fine_gironi, campi[c])
+        for sid in (p["sq1"], p["sq2"]):
+            if sid:
+                pronto[sid] = campi[c] + conf["riposo"]
+    return max(campi)
+
+
+def verifica(state, calendario):
+    riposo = calendario["riposo"]
+    slot = calendario["slot"]
+    partite = _partite(state)
+    assert len(slot) == len(partite), "partite senza orario"
+    per_campo = {}
+    per_squadra = {}
+    for p in partite:
+        s = slot[p["id"]]
+        per_campo.setdefault(s["campo"], []).append((s["inizio"], s["fine"]))
+        for sid in (p["sq1"], p["sq2"]):
+            if sid:
+                per_squadra.setdefault(sid, []).append((s["inizio"], s["fine"]))
+        for campo_id in ("next_id", "loser_id"):
+            if p.get(campo_id) in slot:
+                assert slot[p[campo_id]]["inizio"] >= s["fine"] + riposo, "tabellone prima del turno precedente"
+    for intervalli in per_campo.values():
+        intervalli.sort()
+        assert all(a[1] <= b[0] for a, b in zip(intervalli, intervalli[1:])), "campo sovrapposto"
+    for intervalli in per_squadra.values():
+        intervalli.sort()
+        assert all(a[1] + riposo <= b[0] for a, b in zip(intervalli, intervalli[1:])), "riposo non rispettato"
+
+
+if __name__ == "__main__":
+    for campi in (2, 4, 6, 8):
+        state = costruisci_stato(campi)
+        t0 = time.perf_counter()
+        calendario = pianifica(state)
+        t_piano = time.perf_counter() - t0
+        verifica(state, calendario)
+        conf = configurazione(state)
+        limite = -(-len(_partite(state)) * conf["durata"] // campi)
+        print(f"{campi} campi: fine {calendario['fine_prevista']:4d} min "
+              f"(ordine di lista {in_ordine_di_lista(state):4d}, limite inferiore {limite:4d}) · "
+              f"utilizzo {100 * utilizzo_campi(calendario):3.0f}% · {1000 * t_piano:5.1f} ms")
+
+    # Ripianificazione dal vivo: metà gironi giocati, una partita in corso sfora di 20 minuti
+    state = costruisci_stato(4)
+    state["calendario"] = pianifica(state)
+    slot = state["calendario"]["slot"]
+    adesso = state["calendario"]["fine_prevista"] // 4
+    in_corso = None
+    for p in _partite(state):
+        s = slot[p["id"]]
+        if s["fine"] <= adesso:
+            simula_partita(state, p)
+        elif s["inizio"] <= adesso and in_corso is None:
+            in_corso = p
+    t0 = time.perf_counter()
+    nuovo = pianifica(state, adesso=adesso, fine_stimata={in_corso["id"]: adesso + 20})
+    t_ripiano = time.perf_counter() - t0
+    verifica(state, nuovo)
+    assert nuovo["slot"][in_corso["id"]]["fine"] == adesso + 20
+    assert all(s == nuovo["slot"][pid] for pid, s in slot.items() if slot[pid]["fine"] <= adesso)
+    print(f"ripianificazione a {adesso} min con sforamento di 20 min: fine "
+          f"{state['calendario']['fine_prevista']} → {nuovo['fine_prevista']} min · {1000 * t_ripiano:.1f} ms")
+    print("OK — vincoli rispettati")
@@ -0,0 +1,70 @@
+"""
+bench_css.py — Peso HTML e tempo di esecuzione delle pagine Gironi e Profili
+
+Esegue app.py con streamlit.testing (AppTest) su un torneo a gironi da 16
+squadre e sulla pagina Profili, con il foglio di stile in linea a ogni rerun
+(servizio statico disattivato: comportamento precedente) e con il CSS statico
+importato (solo @import + variabili del tema). Riporta i byte di markdown/HTML
+inviati per rerun e il tempo medio di un rerun.
+Avvio: python benchmarks/bench_css.py
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+RADICE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, RADICE)
+
+from streamlit import config
+from streamlit.testing.v1 import AppTest
+
+from data_manager import (
+    empty_state, new_atleta, new_squadra, genera_gironi, simula_partita, aggiorna_classifica_squadra,
+)
+
+N_RERUN = 10
+
+
+def stato(fase):
+    random.seed(4)
+    state = empty_state()
+    state["torneo"]["nome"] = "Bench CSS"
+    state["atleti"] = [new_atleta(f"Atleta {i}") for i in range(32)]
+    for a in state["atleti"]:
+        a["stats"].update(tornei=3, vittorie=random.randint(0, 3), set_vinti=random.randint(5, 20))
+        a["stats"]["storico_posizioni"] = [(f"T{t}", random.randint(1, 8)) for t in range(3)]
+    state["squadre"] = [new_squadra(f"Team {i}", state["atleti"][2 * i]["id"], state["atleti"][2 * i + 1]["id"])
+                        for i in range(16)]
+    state["gironi"] = genera_gironi([s["id"] for s in state["squadre"]], num_gironi=4)
+    for g in state["gironi"]:
+        for p in g["partite"][:3]:
+            simula_partita(state, p)
+            aggiorna_classifica_squadra(state, p)
+    state["fase"] = fase
+    return state
+
+
+def misura(fase, statico):
+    config.set_option("server.enableStaticServing", statico)
+    at = AppTest.from_file(os.path.join(RADICE, "app.py"), default_timeout=60)
+    at.session_state["state"] = stato(fase)
+    at.run()
+    assert not at.exception, at.exception
+    t0 = time.perf_counter()
+    for _ in range(N_RERUN):
+        at.run()
+    tempo = (time.perf_counter() - t0) / N_RERUN
+    byte = sum(len(m.value.encode("utf-8")) for m in at.markdown)
+    css = max(len(m.value.encode("utf-8")) for m in at.markdown if m.value.startswith("<style>"))
+    return byte, css, tempo
+
+
+if __name__ == "__main__":
+    os.chdir(tempfile.mkdtemp())      # salvataggi del torneo fuori dal repository
+    for fase, nome in (("gironi", "Gironi"), ("profili", "Profili")):
+        for statico, etichetta in ((False, "CSS in linea  "), (True, "CSS statico   ")):
+            byte, css, tempo = misura(fase, statico)
+            print(f"{nome:8s} {etichetta}: {byte / 1024:6.1f} KB di HTML per rerun "
+                  f"(di cui <style> {css / 1024:5.1f} KB) · {1000 * tempo:6.1f} ms per rerun")
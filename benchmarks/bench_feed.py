@@ -0,0 +1,145 @@
+"""
+bench_feed.py — Feed live per i maxi-schermi: latenza con molti iscritti
+
+Torneo da 32 squadre in 8 gironi salvato in una cartella temporanea; il
+feed (feed_live.avvia_server) gira su una porta libera e N_ISCRITTI schermi
+simulati restano collegati a /eventi (un thread e una connessione ciascuno).
+Si confermano N_CONFERME partite una alla volta come fa lo scoreboard
+(aggiorna_classifica_squadra + salva_partita) e si misura il tempo tra il
+salvataggio e l'arrivo dell'evento su tutti gli schermi. Alla fine ogni
+schermo deve avere la stessa vista di /stato, che con l'ETag risponde 304.
+Avvio: python benchmarks/bench_feed.py
+"""
+import http.client
+import json
+import os
+import random
+import socket
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from data_manager import (
+    empty_state, new_squadra, genera_gironi, traccia_stato, save_state, salva_partita,
+    simula_partita, aggiorna_classifica_squadra,
+)
+from feed_live import avvia_server
+
+N_ISCRITTI = 50
+N_CONFERME = 20
+LIMITE = 1.0                # secondi entro cui l'aggiornamento deve arrivare
+
+
+class Schermo(threading.Thread):
+    """Iscritto SSE: tiene la propria copia delle partite e l'ora di arrivo di ogni versione."""
+
+    def __init__(self, porta):
+        super().__init__(daemon=True)
+        self.porta = porta
+        self.partite = {}
+        self.arrivi = {}
+        self.versione = -1
+        self.pronto = threading.Event()
+
+    def run(self):
+        conn = http.client.HTTPConnection("127.0.0.1", self.porta)
+        conn.request("GET", "/eventi")
+        risposta = conn.getresponse()
+        evento, dati = None, None
+        while True:
+            riga = risposta.fp.readline()
+            if not riga:
+                return
+            riga = riga.decode("utf-8").rstrip("\n")
+            if riga.startswith("event: "):
+                evento = riga[7:]
+            elif riga.startswith("data: "):
+                dati = json.loads(riga[6:])
+            elif riga == "" and evento:
+                if evento == "stato":
+                    self.partite = {p["id"]: p for p in dati["partite"]}
+                else:
+                    self.partite.update((p["id"], p) for p in dati["partite"])
+                self.versione = dati["versione"]
+                self.arrivi[self.versione] = time.perf_counter()
+                self.pronto.set()
+                evento = None
+
+
+def porta_libera():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def nuovo_stato():
+    random.seed(5)
+    state = empty_state()
+    state["torneo"]["nome"] = "Bench feed"
+    state["squadre"] = [new_squadra(f"Team {i}", f"a{2 * i}", f"a{2 * i + 1}") for i in range(32)]
+    state["gironi"] = genera_gironi([s["id"] for s in state["squadre"]], num_gironi=8)
+    state["fase"] = "gironi"
+    state = traccia_stato(state)
+    save_state(state)
+    return state
+
+
+def attendi_tutti(schermi, versione, limite=5.0):
+    fine = time.perf_counter() + limite
+    while any(s.versione < versione for s in schermi):
+        assert time.perf_counter() < fine, "aggiornamento non arrivato a tutti gli schermi"
+        time.sleep(0.005)
+
+
+if __name__ == "__main__":
+    os.chdir(tempfile.mkdtemp())      # archivio fuori dal repository
+    state = nuovo_stato()
+    porta = porta_libera()
+    server, feed, fermo = avvia_server(porta, "127.0.0.1")
+
+    schermi = [Schermo(porta) for _ in range(N_ISCRITTI)]
+    for s in schermi:
+        s.start()
+    for s in schermi:
+        assert s.pronto.wait(5), "schermo senza stato iniziale"
+
+    partite = [p for g in state["gironi"] for p in g["partite"]]
+    latenze, peggiori = [], []
+    for partita in random.sample(partite, N_CONFERME):
+        versione = feed.versione
+        simula_partita(state, partita)
+        aggiorna_classifica_squadra(state, partita)
+        t0 = time.perf_counter()
+        salva_partita(state, partita)
+        attendi_tutti(schermi, versione + 1)
+        arrivi = [s.arrivi[versione + 1] - t0 for s in schermi]
+        latenze.extend(arrivi)
+        peggiori.append(max(arrivi))
+        assert all(s.partite[partita["id"]]["confermata"] for s in schermi)
+        time.sleep(random.uniform(0, 0.1))
+
+    vista = {p["id"]: p for p in feed.stato()["partite"]}
+    assert all(s.partite == vista for s in schermi), "schermi non allineati al feed"
+
+    conn = http.client.HTTPConnection("127.0.0.1", porta)
+    conn.request("GET", "/stato")
+    risposta = conn.getresponse()
+    etag, corpo = risposta.getheader("ETag"), json.loads(risposta.read())
+    assert {p["id"]: p for p in corpo["partite"]} == vista
+    conn.request("GET", "/stato", headers={"If-None-Match": etag})
+    risposta = conn.getresponse()
+    risposta.read()
+    assert risposta.status == 304
+
+    fermo.set()
+    server.shutdown()
+    latenze.sort()
+    print(f"{N_ISCRITTI} schermi collegati, {N_CONFERME} conferme, {feed.letture} letture dell'archivio")
+    print(f"latenza salvataggio → schermo: p50 {1000 * statistics.median(latenze):5.1f} ms · "
+          f"p99 {1000 * latenze[int(0.99 * (len(latenze) - 1))]:5.1f} ms · max {1000 * max(peggiori):5.1f} ms")
+    assert max(peggiori) < LIMITE, f"aggiornamento oltre {LIMITE} s"
+    print(f"tutti gli schermi allineati a /stato (versione {corpo['versione']}), 304 con ETag")
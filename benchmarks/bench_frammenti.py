@@ -0,0 +1,78 @@
+"""
+bench_frammenti.py — Costo di un tasto nello scoreboard: app intera vs frammento
+
+Torneo da 32 squadre in 8 gironi (48 partite), metà giocate. Prima: ogni
+input del punteggio rifaceva girare tutto app.py (CSS, sidebar, tutte le
+match card di tutti i tab, autosave) — misurato con AppTest cambiando un
+punteggio. Dopo: l'input rifà girare solo il frammento della partita
+(_render_partita: match card + scoreboard), misurato da solo.
+Avvio: python benchmarks/bench_frammenti.py
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+RADICE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, RADICE)
+
+from streamlit.testing.v1 import AppTest
+
+from data_manager import (
+    empty_state, new_atleta, new_squadra, genera_gironi, simula_partita, aggiorna_classifica_squadra,
+)
+
+N_TASTI = 10
+
+
+def stato():
+    random.seed(8)
+    state = empty_state()
+    state["torneo"]["nome"] = "Bench frammenti"
+    state["atleti"] = [new_atleta(f"Atleta {i}") for i in range(64)]
+    state["squadre"] = [new_squadra(f"Team {i}", state["atleti"][2 * i]["id"], state["atleti"][2 * i + 1]["id"])
+                        for i in range(32)]
+    state["gironi"] = genera_gironi([s["id"] for s in state["squadre"]], num_gironi=8)
+    partite = [p for g in state["gironi"] for p in g["partite"]]
+    for p in partite[::2]:
+        simula_partita(state, p)
+        aggiorna_classifica_squadra(state, p)
+    state["fase"] = "gironi"
+    return state, len(partite)
+
+
+def una_partita():
+    import streamlit as st
+    from fase_gironi import _render_partita
+    state = st.session_state.state
+    partita = state["gironi"][0]["partite"][1]
+    _render_partita(state, partita, "Girone A · Match 2", "g0_p1")
+
+
+def tempo_tasti(at, chiave):
+    t0 = time.perf_counter()
+    for tasto in range(1, N_TASTI + 1):
+        at.number_input(key=chiave).set_value(tasto).run()
+        assert not at.exception, at.exception
+    return (time.perf_counter() - t0) / N_TASTI
+
+
+if __name__ == "__main__":
+    os.chdir(tempfile.mkdtemp())      # autosave fuori dal repository
+    state, n_partite = stato()
+
+    app = AppTest.from_file(os.path.join(RADICE, "app.py"), default_timeout=60)
+    app.session_state["state"] = state
+    app.run()
+    assert not app.exception, app.exception
+    intera = tempo_tasti(app, "g0_p1_s0_p1")
+
+    frammento = AppTest.from_function(una_partita, default_timeout=60)
+    frammento.session_state["state"] = state
+    frammento.run()
+    solo = tempo_tasti(frammento, "g0_p1_s0_p1")
+
+    print(f"{n_partite} partite in {len(state['gironi'])} gironi, media su {N_TASTI} tasti")
+    print(f"rerun dell'intera app : {1000 * intera:6.1f} ms per tasto")
+    print(f"rerun del frammento   : {1000 * solo:6.1f} ms per tasto ({intera / solo:.0f}× più veloce)")
@@ -0,0 +1,55 @@
+"""
+bench_indici.py — Match card HTML con indici id → oggetto vs scansione lineare
+
+Torneo da 64 squadre (8 gironi da 8) con 5.000 atleti registrati:
+genera l'HTML di tutte le match card dei gironi.
+Avvio: python benchmarks/bench_indici.py
+"""
+import copy
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from data_manager import empty_state, new_atleta, new_squadra, genera_gironi, traccia_stato
+from ui_components import match_card_html
+
+N_ATLETI = 5000
+N_SQUADRE = 64
+RIPETIZIONI = 5
+
+
+def costruisci_stato():
+    random.seed(42)
+    state = empty_state()
+    state["atleti"] = [new_atleta(f"Atleta {i}") for i in range(N_ATLETI)]
+    # Le squadre usano atleti sparsi su tutta la lista (caso peggiore per la scansione)
+    scelti = random.sample(state["atleti"], 2 * N_SQUADRE)
+    state["squadre"] = [
+        new_squadra(f"Team {i}", scelti[2 * i]["id"], scelti[2 * i + 1]["id"])
+        for i in range(N_SQUADRE)
+    ]
+    state["gironi"] = genera_gironi([s["id"] for s in state["squadre"]], num_gironi=8)
+    return state
+
+
+def cronometra(state):
+    partite = [p for g in state["gironi"] for p in g["partite"]]
+    t0 = time.perf_counter()
+    for _ in range(RIPETIZIONI):
+        for i, p in enumerate(partite):
+            match_card_html(state, p, label=f"Match {i + 1}")
+    return (time.perf_counter() - t0) / RIPETIZIONI, len(partite)
+
+
+if __name__ == "__main__":
+    lineare = costruisci_stato()               # liste semplici → scansione lineare
+    indicizzato = traccia_stato(copy.deepcopy(lineare))
+    t_lin, n = cronometra(lineare)
+    t_idx, _ = cronometra(indicizzato)
+    print(f"{n} match card, {N_SQUADRE} squadre, {N_ATLETI} atleti")
+    print(f"scansione lineare : {t_lin * 1000:8.2f} ms per pagina")
+    print(f"indice id         : {t_idx * 1000:8.2f} ms per pagina")
+    print(f"speedup           : {t_lin / t_idx:8.1f}x")
@@ -0,0 +1,132 @@
+"""
+bench_memoria.py — Memoria del processo con molte sessioni aperte
+
+Archivio in una cartella temporanea con uno storico grande (N_ATLETI atleti
+con STORICO tornei ciascuno, ranking completo) e un torneo da 32 squadre in
+corso. Per 1, 10 e 50 sessioni simulate, ognuna in un processo nuovo, si
+misura la memoria residente (VmRSS) dopo aver creato gli stati di sessione.
+Prima: un load_state per sessione (lettura completa e copia dello storico
+per ognuna). Dopo: ArchivioCondiviso.nuova_sessione, una lettura per
+processo e storico atleti condiviso in sola lettura.
+Verifica poi il copy-on-write: senza storico_modificabile la modifica è
+rifiutata, con storico_modificabile resta privata finché non è salvata e
+dopo il salvataggio tutte le sessioni vedono lo stesso storico aggiornato.
+Avvio: python benchmarks/bench_memoria.py
+"""
+import gc
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+RADICE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, RADICE)
+
+from data_manager import (
+    empty_state, new_atleta, new_squadra, genera_gironi, traccia_stato, save_state, salva_modifiche,
+    ricostruisci_ranking, ArchivioCondiviso, StoricoInSolaLettura, storico_modificabile,
+)
+
+N_ATLETI = 5000
+STORICO = 20                     # tornei nello storico di ogni atleta
+SESSIONI = (1, 10, 50)
+
+
+def prepara(cartella):
+    os.chdir(cartella)
+    random.seed(3)
+    state = empty_state()
+    state["torneo"]["nome"] = "Bench memoria"
+    state["atleti"] = [new_atleta(f"Atleta {i}") for i in range(N_ATLETI)]
+    for a in state["atleti"]:
+        s = a["stats"]
+        for t in range(STORICO):
+            pos = random.randint(1, 16)
+            s["storico_posizioni"].append((f"Torneo {t}", pos))
+            s["tornei"] += 1
+            s["vittorie" if pos == 1 else "sconfitte"] += 1
+            s["set_vinti"] += random.randint(0, 8)
+            s["set_persi"] += random.randint(0, 8)
+            s["punti_fatti"] += random.randint(50, 300)
+            s["punti_subiti"] += random.randint(50, 300)
+    ricostruisci_ranking(state)
+    state["squadre"] = [new_squadra(f"Team {i}", state["atleti"][2 * i]["id"], state["atleti"][2 * i + 1]["id"])
+                        for i in range(32)]
+    state["gironi"] = genera_gironi([s["id"] for s in state["squadre"]], num_gironi=8)
+    state["fase"] = "gironi"
+    save_state(traccia_stato(state))
+
+
+def rss_kb():
+    with open("/proc/self/status") as f:
+        for riga in f:
+            if riga.startswith("VmRSS:"):
+                return int(riga.split()[1])
+    return 0
+
+
+def misura(modo, n):
+    """Eseguito nel processo figlio: (kB in più dopo n sessioni, ms per sessione)."""
+    from data_manager import load_state
+    archivio = ArchivioCondiviso()
+    gc.collect()
+    base = rss_kb()
+    t0 = time.perf_counter()
+    sessioni = [load_state() if modo == "prima" else archivio.nuova_sessione() for _ in range(n)]
+    tempo = time.perf_counter() - t0
+    gc.collect()
+    assert all(s["atleti"][-1]["nome"] == f"Atleta {N_ATLETI - 1}" for s in sessioni)
+    return rss_kb() - base, 1000 * tempo / n
+
+
+def verifica_copy_on_write(cartella):
+    os.chdir(cartella)
+    archivio = ArchivioCondiviso()
+    a, b = archivio.nuova_sessione(), archivio.nuova_sessione()
+    assert a["atleti"] is b["atleti"] and a["ranking_globale"] is b["ranking_globale"]
+    assert a["squadre"] is not b["squadre"], "il torneo deve restare privato per sessione"
+    try:
+        a["atleti"].append(new_atleta("Senza copia"))
+        raise AssertionError("modifica dello storico condiviso non rifiutata")
+    except StoricoInSolaLettura:
+        pass
+    assert len(b["atleti"]) == N_ATLETI
+    storico_modificabile(a)
+    a["atleti"].append(new_atleta("Nuovo iscritto"))
+    assert a["atleti"] is not b["atleti"] and len(b["atleti"]) == N_ATLETI
+    archivio.aggiorna_sessione(a)           # modifica non salvata: resta la copia privata
+    assert a["atleti"][-1]["nome"] == "Nuovo iscritto"
+    salva_modifiche(a, atleti=[a["atleti"][-1]])
+    letture = archivio.letture
+    archivio.aggiorna_sessione(a)
+    archivio.aggiorna_sessione(b)
+    assert a["atleti"] is b["atleti"] and b["atleti"][-1]["nome"] == "Nuovo iscritto"
+    archivio.aggiorna_sessione(b)
+    assert archivio.letture == letture + 1, "archivio riletto più di una volta per modifica"
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 4:                  # processo figlio
+        os.chdir(sys.argv[3])
+        kb, ms = misura(sys.argv[1], int(sys.argv[2]))
+        print(kb, ms)
+        sys.exit(0)
+
+    cartella = tempfile.mkdtemp()           # archivio fuori dal repository
+    prepara(cartella)
+    mb = os.path.getsize(os.path.join(cartella, "beach_volley_atleti.json")) / 2**20
+    print(f"storico: {N_ATLETI} atleti × {STORICO} tornei ({mb:.1f} MB su disco), torneo da 32 squadre")
+    for n in SESSIONI:
+        riga = []
+        for modo in ("prima", "dopo"):
+            out = subprocess.run([sys.executable, os.path.abspath(__file__), modo, str(n), cartella],
+                                 capture_output=True, text=True, check=True).stdout.split()
+            kb, ms = int(out[0]), float(out[1])
+            riga.append(f"{modo}: {kb / 1024:7.1f} MB ({ms:6.1f} ms/sessione)")
+        print(f"{n:3} sessioni · " + " · ".join(riga))
+
+    verifica_copy_on_write(cartella)
+    print("copy-on-write: storico condiviso, modifica senza copia rifiutata, "
+          "copia privata fino al salvataggio, poi di nuovo condiviso")
@@ -0,0 +1,65 @@
+"""
+bench_previsioni.py — Tempo delle previsioni Monte Carlo su un torneo da 32 squadre
+
+4 gironi da 8 (passano 2 → quarti), un terzo delle partite di girone già giocate.
+Avvio: python benchmarks/bench_previsioni.py [n_simulazioni]
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from data_manager import (
+    empty_state, new_atleta, new_squadra, genera_gironi, simula_partita,
+    aggiorna_classifica_squadra, traccia_stato,
+)
+from previsioni import prevedi_torneo
+
+N_SQUADRE = 32
+
+
+def costruisci_stato():
+    random.seed(7)
+    state = empty_state()
+    state["torneo"]["num_gironi"] = 4
+    state["torneo"]["passano_per_girone"] = 2
+    state["atleti"] = [new_atleta(f"Atleta {i}") for i in range(2 * N_SQUADRE)]
+    for i, a in enumerate(state["atleti"]):
+        a["stats"]["tornei"] = i % 9
+        a["stats"]["vittorie"] = i % 5
+    state["squadre"] = [
+        new_squadra(f"Team {i}", state["atleti"][2 * i]["id"], state["atleti"][2 * i + 1]["id"])
+        for i in range(N_SQUADRE)
+    ]
+    state["gironi"] = genera_gironi([s["id"] for s in state["squadre"]], num_gironi=4)
+    state = traccia_stato(state)
+    for g in state["gironi"]:
+        for p in g["partite"][: len(g["partite"]) // 3]:
+            simula_partita(state, p)
+            aggiorna_classifica_squadra(state, p)
+    return state
+
+
+def cronometra(state, n, **kwargs):
+    t0 = time.perf_counter()
+    ris = prevedi_torneo(state, n_simulazioni=n, seed=2024, **kwargs)
+    return time.perf_counter() - t0, ris
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    state = costruisci_stato()
+    t_seq, ris_seq = cronometra(state, n, max_workers=1)
+    t_pool, ris_pool = cronometra(state, n)
+    t_forza, ris_forza = cronometra(state, n, modello_forza=True)
+    print(f"{n} tornei simulati, {N_SQUADRE} squadre, {os.cpu_count()} CPU")
+    print(f"un processo          : {t_seq:6.2f} s")
+    print(f"process pool         : {t_pool:6.2f} s")
+    print(f"pool + modello forza : {t_forza:6.2f} s")
+    print("stesso seed, stesso risultato:", ris_seq["squadre"] == ris_pool["squadre"])
+    print("\nTop 5 (modello forza): squadra, forza, qualificazione, finale, vittoria")
+    for s in ris_forza["squadre"][:5]:
+        print(f"  {s['nome']:10s} {s['forza']:5.1f} {s['qualificazione']:6.1%} "
+              f"{s['finale']:6.1%} {s['vittoria']:6.1%}")
@@ -0,0 +1,108 @@
+"""
+bench_rally.py — Punteggio rally per rally: correttezza e costo per punto
+
+Gioca migliaia di partite (Set Unico e Best of 3) un rally alla volta con
+annullamenti casuali dell'ultimo punto. Dopo ogni partita lo stato
+incrementale deve coincidere con quello ricalcolato rigiocando il registro,
+il risultato deve passare valida_punteggi e il servizio deve seguire le
+regole. Misura il costo medio di segna_punto all'inizio e alla fine delle
+partite (deve restare costante) e la dimensione del registro.
+Misura poi il salvataggio di ogni punto in un archivio temporaneo. Prima:
+salva_partita a ogni punto (shard, generazione e journal con tutto il
+registro). Dopo: salva_rally dentro il set (una riga di journal costante) e
+salva_partita solo a fine set. Controlla che load_state ricostruisca la
+partita identica.
+Avvio: python benchmarks/bench_rally.py
+"""
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from data_manager import (
+    empty_state, new_partita, new_squadra, valida_punteggi, genera_gironi, traccia_stato, save_state,
+    load_state, salva_partita, salva_rally, JOURNAL_FILE,
+)
+from punteggio_live import segna_punto, annulla_punto, ricostruisci_rally, avvia_rally
+
+N_PARTITE = 2000
+
+
+def gioca(torneo, adesso):
+    partita = new_partita("sq_a", "sq_b")
+    avvia_rally(partita, battuta=random.choice((1, 2)), adesso=adesso)
+    tempi = []
+    forza = random.uniform(0.4, 0.6)
+    while not partita["rally"]["fine"]:
+        if partita["rally"]["log"] and random.random() < 0.03:
+            annulla_punto(partita)
+            continue
+        adesso += random.randint(5, 40)
+        t0 = time.perf_counter()
+        segna_punto(torneo, partita, 1 if random.random() < forza else 2, adesso=adesso)
+        tempi.append(time.perf_counter() - t0)
+    return partita, tempi
+
+
+def salva_per_punto(modo):
+    """Partita Best of 3 segnata e salvata punto per punto: (ms primo decimo, ms ultimo decimo, byte journal)."""
+    os.chdir(tempfile.mkdtemp())            # archivio fuori dal repository
+    random.seed(7)
+    state = empty_state()
+    state["torneo"]["formato_set"] = "Best of 3"
+    state["squadre"] = [new_squadra(f"Team {i}", f"a{2 * i}", f"a{2 * i + 1}") for i in range(8)]
+    state["gironi"] = genera_gironi([s["id"] for s in state["squadre"]], num_gironi=2)
+    state["fase"] = "gironi"
+    save_state(traccia_stato(state))
+    state = load_state()
+    partita = state["gironi"][0]["partite"][0]
+    avvia_rally(partita, battuta=1)
+    salva_partita(state, partita)
+    tempi = []
+    while not partita["rally"]["fine"]:
+        t0 = time.perf_counter()
+        evento = segna_punto(state["torneo"], partita, 1 if random.random() < 0.52 else 2)
+        if modo == "prima" or evento["fine_set"]:
+            salva_partita(state, partita)
+        else:
+            salva_rally(state, partita)
+        tempi.append(time.perf_counter() - t0)
+    riletta = load_state()["gironi"][0]["partite"][0]
+    for campo in ("punteggi", "set_sq1", "set_sq2", "in_battuta", "rally"):
+        assert json.loads(json.dumps(riletta[campo])) == json.loads(json.dumps(partita[campo])), campo
+    dieci = max(1, len(tempi) // 10)
+    return 1000 * sum(tempi[:dieci]) / dieci, 1000 * sum(tempi[-dieci:]) / dieci, os.path.getsize(JOURNAL_FILE)
+
+
+if __name__ == "__main__":
+    random.seed(6)
+    inizio, fine, punti, byte = 0.0, 0.0, 0, 0
+    conteggi = 0
+    for formato in ("Set Unico", "Best of 3"):
+        torneo = empty_state()["torneo"]
+        torneo["formato_set"] = formato
+        for _ in range(N_PARTITE // 2):
+            partita, tempi = gioca(torneo, 1_700_000_000)
+            copia = ricostruisci_rally(torneo, partita)
+            for campo in ("punteggi", "set_sq1", "set_sq2", "in_battuta"):
+                assert copia[campo] == partita[campo], campo
+            assert copia["rally"]["prime"] == partita["rally"]["prime"]
+            valida_punteggi(torneo, partita["punteggi"])
+            dieci = max(1, len(tempi) // 10)
+            inizio += sum(tempi[:dieci]) / dieci
+            fine += sum(tempi[-dieci:]) / dieci
+            conteggi += 1
+            punti += len(partita["rally"]["log"])
+            byte += len(json.dumps(partita["rally"]["log"]))
+    print(f"{conteggi} partite, {punti:,} rally: stato incrementale = registro rigiocato, risultati validi")
+    print(f"segna_punto: {1e6 * inizio / conteggi:.2f} µs a inizio partita, "
+          f"{1e6 * fine / conteggi:.2f} µs a fine partita")
+    print(f"registro: {byte / punti:.1f} byte JSON per rally")
+    for modo in ("prima", "dopo"):
+        inizio, fine, journal = salva_per_punto(modo)
+        print(f"salvataggio per punto, {modo}: {inizio:.2f} ms a inizio partita, {fine:.2f} ms a fine partita, "
+              f"journal {journal / 1024:.1f} kB (partita riletta identica)")
@@ -0,0 +1,106 @@
+"""
+bench_scenari.py — Scenari di qualificazione: tempi e confronto con la forza bruta
+
+- Girone da 6 squadre con 10 partite aperte (5 giocate), Set Unico e Best of 3
+  con e senza classi di punteggio: tempo di scenari_girone e confronto degli
+  stati (qualificata / eliminata / in corsa) con l'enumerazione completa senza
+  potature. Con le classi 2-0 / 2-1 gli stati decisi devono coincidere e si
+  contano le squadre lasciate in corsa per prudenza.
+- Girone unico da 12 squadre con 40 partite aperte: passaggio al campionamento.
+Avvio: python benchmarks/bench_scenari.py
+"""
+import itertools
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from data_manager import (
+    empty_state, new_squadra, genera_gironi, traccia_stato, simula_partita, aggiorna_classifica_squadra,
+)
+from scenari import scenari_girone, BYE_ID
+
+
+def costruisci(n_squadre, giocate, formato, seed):
+    random.seed(seed)
+    state = empty_state()
+    state["torneo"]["formato_set"] = formato
+    state["torneo"]["passano_per_girone"] = 2
+    state["squadre"] = [new_squadra(f"Team {i}", f"a{2 * i}", f"a{2 * i + 1}") for i in range(n_squadre)]
+    for i, sq in enumerate(state["squadre"]):
+        sq["id"] = f"sq_{i}"
+    state["gironi"] = genera_gironi([s["id"] for s in state["squadre"]], girone_unico=True)
+    state = traccia_stato(state)
+    for p in random.sample(list(state["gironi"][0]["partite"]), giocate):
+        simula_partita(state, p)
+        aggiorna_classifica_squadra(state, p)
+    return state
+
+
+def forza_bruta(state, girone, classi_set):
+    """Tutti gli scenari (nel Best of 3 con classi anche 2-0 / 2-1), nessuna potatura né stima."""
+    squadre = [next(s for s in state["squadre"] if s["id"] == sid) for sid in girone["squadre"]]
+    indice = {sq["id"]: t for t, sq in enumerate(squadre)}
+    aperte = [(indice[p["sq1"]], indice[p["sq2"]]) for p in girone["partite"]
+              if not p["confermata"] and BYE_ID not in (p["sq1"], p["sq2"])]
+    formato = state["torneo"]["formato_set"]
+    margini = (1,) if formato == "Set Unico" else (2, 1) if classi_set else (0,)
+    livelli = 2 if margini == (0,) else 3
+    passano = state["torneo"]["passano_per_girone"]
+    esiti = [(v, m) for v in (True, False) for m in margini]
+    possibile = [[False, False] for _ in squadre]
+    for scelte in itertools.product(esiti, repeat=len(aperte)):
+        stat = [[sq["punti_classifica"], sq["vittorie"], sq["set_vinti"] - sq["set_persi"]] for sq in squadre]
+        for (i, j), (vince_1, m) in zip(aperte, scelte):
+            v, p = (i, j) if vince_1 else (j, i)
+            stat[v][0] += 3; stat[v][1] += 1; stat[v][2] += m
+            stat[p][0] += 1; stat[p][2] -= m
+        chiavi = [tuple(x[:livelli]) for x in stat]
+        for t in range(len(squadre)):
+            sopra = sum(1 for c in chiavi if c > chiavi[t])
+            pari = sum(1 for c in chiavi if c == chiavi[t]) - 1
+            possibile[t][0] |= sopra < passano
+            possibile[t][1] |= sopra + pari >= passano
+    return ["qualificata" if not f else "eliminata" if not d else "in corsa" for d, f in possibile]
+
+
+def confronta(stati, esatti):
+    """Stati decisi sempre corretti; restituisce quante squadre restano prudentemente in corsa."""
+    for s, e in zip(stati, esatti):
+        assert s == e or s == "in corsa", (stati, esatti)
+    return sum(s != e for s, e in zip(stati, esatti))
+
+
+if __name__ == "__main__":
+    for formato, classi in (("Set Unico", False), ("Best of 3", False), ("Best of 3", True)):
+        peggiore, controllati, prudenti = 0.0, 0, 0
+        for seed in range(20):
+            state = costruisci(6, 5, formato, seed)
+            girone = state["gironi"][0]
+            t0 = time.perf_counter()
+            ris = scenari_girone(state, girone, classi_set=classi)
+            peggiore = max(peggiore, time.perf_counter() - t0)
+            assert ris["esatto"]
+            if seed < 5:
+                stati = [s["stato"] for s in ris["squadre"]]
+                if not classi:
+                    assert stati == forza_bruta(state, girone, classi), seed
+                else:
+                    # 4 classi per partita: forza bruta su 8 partite aperte (65.536 scenari)
+                    ridotto = costruisci(6, 7, formato, seed)
+                    stati = [s["stato"] for s in scenari_girone(ridotto, ridotto["gironi"][0], classi_set=True)["squadre"]]
+                    prudenti += confronta(stati, forza_bruta(ridotto, ridotto["gironi"][0], True))
+                controllati += 1
+        print(f"6 squadre, 10 partite aperte, {formato}{' con classi di set' if classi else ''}: "
+              f"{ris['scenari']:,} scenari, caso peggiore {1000 * peggiore:.0f} ms "
+              f"({controllati} gironi confrontati con la forza bruta"
+              f"{f', {prudenti} squadre lasciate in corsa per prudenza' if classi else ''})")
+
+    state = costruisci(12, 26, "Set Unico", 1)
+    t0 = time.perf_counter()
+    ris = scenari_girone(state, state["gironi"][0], seed=1)
+    stati = {s["stato"] for s in ris["squadre"]}
+    print(f"12 squadre, 40 partite aperte: esatto={ris['esatto']}, {ris['scenari']:,} scenari, "
+          f"{time.perf_counter() - t0:.2f} s, stati {sorted(stati)}")
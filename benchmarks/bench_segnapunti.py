@@ -0,0 +1,108 @@
+"""
+bench_segnapunti.py — Aggiornamento del Segnapunti Live su maxi-schermo
+
+Torneo da 64 squadre in 8 gironi (224 partite), archivio in una cartella
+temporanea. Ogni AppTest.run() è un giro di aggiornamento dello schermo.
+Prima: ogni giro ridisegnava da zero tutte le match card (render_match_card
+su ogni partita). Dopo (render_segnapunti_live con aggiornamento automatico):
+a firma dell'archivio invariata si ripetono le card già pronte; quando un
+altro dispositivo conferma una partita (salva_partita) si rilegge l'archivio
+e si rigenera solo la card cambiata. Verifica che le card mostrate siano
+identiche a quelle generate da zero.
+Avvio: python benchmarks/bench_segnapunti.py
+"""
+import os
+import random
+import sys
+import tempfile
+import textwrap
+import time
+
+RADICE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, RADICE)
+
+from streamlit.testing.v1 import AppTest
+
+from data_manager import (
+    empty_state, new_atleta, new_squadra, genera_gironi, traccia_stato, save_state, salva_partita,
+    simula_partita, aggiorna_classifica_squadra,
+)
+from ui_components import match_card_html
+
+N_GIRI = 20
+
+
+def stato():
+    random.seed(6)
+    state = empty_state()
+    state["torneo"]["nome"] = "Bench segnapunti"
+    state["atleti"] = [new_atleta(f"Atleta {i}") for i in range(128)]
+    state["squadre"] = [new_squadra(f"Team {i}", state["atleti"][2 * i]["id"], state["atleti"][2 * i + 1]["id"])
+                        for i in range(64)]
+    state["gironi"] = genera_gironi([s["id"] for s in state["squadre"]], num_gironi=8)
+    state["fase"] = "segnapunti"
+    state = traccia_stato(state)
+    save_state(state)
+    return state
+
+
+def vista_prima():
+    import streamlit as st
+    from ui_components import render_match_card
+    state = st.session_state.state
+    for g in state["gironi"]:
+        st.markdown(f"#### {g['nome']}")
+        for i, partita in enumerate(g.get("partite", [])):
+            render_match_card(state, partita, label=f"{g['nome']} · Match {i+1}")
+
+
+def vista_dopo():
+    import streamlit as st
+    from segnapunti_live import render_segnapunti_live
+    render_segnapunti_live(st.session_state.state)
+
+
+def giri(at, state, da_confermare):
+    """(ms per giro senza novità, ms per giro con una partita confermata)."""
+    fermo = cambiato = 0.0
+    for _ in range(N_GIRI):
+        t0 = time.perf_counter()
+        at.run()
+        fermo += time.perf_counter() - t0
+        assert not at.exception, at.exception
+        partita = da_confermare.pop()
+        simula_partita(state, partita)
+        aggiorna_classifica_squadra(state, partita)
+        salva_partita(state, partita)
+        t0 = time.perf_counter()
+        at.run()
+        cambiato += time.perf_counter() - t0
+        assert not at.exception, at.exception
+    return 1000 * fermo / N_GIRI, 1000 * cambiato / N_GIRI
+
+
+def card(at):
+    """Card mostrate, una per voce (anche se unite in un blocco per girone)."""
+    return [c for m in at.markdown if "match-card" in m.value
+            for c in m.value.split("\n\n") if "match-card" in c]
+
+
+if __name__ == "__main__":
+    risultati = {}
+    for nome, vista in (("prima", vista_prima), ("dopo", vista_dopo)):
+        os.chdir(tempfile.mkdtemp())  # archivio fuori dal repository, uno per prova
+        state = stato()
+        partite = [p for g in state["gironi"] for p in g["partite"]]
+        random.shuffle(partite)
+        at = AppTest.from_function(vista, default_timeout=60)
+        at.session_state["state"] = state
+        at.run()
+        risultati[nome] = giri(at, state, partite)
+        attese = [textwrap.dedent(match_card_html(state, p, f"{g['nome']} · Match {i+1}")).strip()
+                  for g in state["gironi"] for i, p in enumerate(g["partite"])]
+        assert card(at) == attese, "card diverse da quelle generate da zero"
+
+    n = len(attese)
+    print(f"{n} match card, media su {N_GIRI} giri di aggiornamento")
+    for nome, (fermo, cambiato) in risultati.items():
+        print(f"{nome:5}: {fermo:6.1f} ms senza novità · {cambiato:6.1f} ms con una partita confermata")
@@ -0,0 +1,49 @@
+"""
+bench_simulazione.py — Set simulati al secondo: ciclo per rally vs motore vettoriale
+
+Avvio: python benchmarks/bench_simulazione.py
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from data_manager import simula_set
+from motore_simulazione import nuovo_rng, simula_set_batch, simula_partite_batch
+
+N_CICLO = 50_000
+N_BATCH = 2_000_000
+PMAX = 21
+
+
+def set_al_secondo_ciclo():
+    random.seed(1)
+    t0 = time.perf_counter()
+    for _ in range(N_CICLO):
+        simula_set(PMAX)
+    return N_CICLO / (time.perf_counter() - t0)
+
+
+def set_al_secondo_batch():
+    rng = nuovo_rng(1)
+    t0 = time.perf_counter()
+    simula_set_batch(N_BATCH, PMAX, rng=rng)
+    return N_BATCH / (time.perf_counter() - t0)
+
+
+def partite_al_secondo_batch(formato):
+    rng = nuovo_rng(1)
+    t0 = time.perf_counter()
+    simula_partite_batch(N_BATCH // 2, PMAX, formato, rng=rng)
+    return (N_BATCH // 2) / (time.perf_counter() - t0)
+
+
+if __name__ == "__main__":
+    ciclo = set_al_secondo_ciclo()
+    batch = set_al_secondo_batch()
+    print(f"simula_set (ciclo per rally) : {ciclo:14,.0f} set/s")
+    print(f"simula_set_batch (NumPy)     : {batch:14,.0f} set/s  ({batch / ciclo:.0f}x)")
+    print(f"partite Set Unico (batch)    : {partite_al_secondo_batch('Set Unico'):14,.0f} partite/s")
+    print(f"partite Best of 3 (batch)    : {partite_al_secondo_batch('Best of 3'):14,.0f} partite/s")
@@ -0,0 +1,57 @@
+"""
+bench_svizzera.py — Tempo di accoppiamento del sistema svizzero per campi grandi
+
+Per 40, 200, 500 e 1000 squadre gioca tutti i turni col simulatore e misura
+il tempo medio per generare un turno; controlla che non ci siano rivincite,
+che ogni squadra giochi una volta per turno e che nessuno riceva due BYE.
+Avvio: python benchmarks/bench_svizzera.py
+"""
+import math
+import os
+import random
+import sys
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from data_manager import (
+    BYE_ID, empty_state, new_squadra, traccia_stato, aggiorna_classifica_squadra,
+    nuovo_girone_svizzero, accoppia_turno_svizzera, classifica_svizzera,
+)
+from motore_simulazione import nuovo_rng, simula_partite
+
+
+def gioca(n_squadre, rng):
+    state = empty_state()
+    state["squadre"] = [new_squadra(f"Team {i}", f"a{2 * i}", f"a{2 * i + 1}") for i in range(n_squadre)]
+    for i, sq in enumerate(state["squadre"]):
+        sq["id"] = f"sq_{i}"   # id casuali a 5 cifre: con centinaia di squadre possono collidere
+    state = traccia_stato(state)
+    state["gironi"] = [nuovo_girone_svizzero([sq["id"] for sq in state["squadre"]])]
+    girone = state["gironi"][0]
+    turni = math.ceil(math.log2(n_squadre)) + 2
+    tempo = 0.0
+    for _ in range(turni):
+        t0 = time.perf_counter()
+        nuove = accoppia_turno_svizzera(state, girone)
+        tempo += time.perf_counter() - t0
+        presenti = Counter(sid for p in nuove for sid in (p["sq1"], p["sq2"]) if sid != BYE_ID)
+        assert len(presenti) == n_squadre and max(presenti.values()) == 1
+        da_giocare = [p for p in nuove if not p["confermata"]]
+        simula_partite(state, da_giocare, rng=rng)
+        for p in da_giocare:
+            aggiorna_classifica_squadra(state, p)
+    coppie = Counter(frozenset((p["sq1"], p["sq2"])) for p in girone["partite"] if BYE_ID not in (p["sq1"], p["sq2"]))
+    rivincite = sum(c - 1 for c in coppie.values())
+    assert len(girone["bye"]) == len(set(girone["bye"]))
+    classifica_svizzera(state, girone)
+    return turni, tempo / turni, rivincite
+
+
+if __name__ == "__main__":
+    random.seed(5)
+    rng = nuovo_rng(5)
+    for n in (40, 41, 200, 500, 1000):
+        turni, medio, rivincite = gioca(n, rng)
+        print(f"{n:5d} squadre, {turni:2d} turni: {medio * 1000:7.1f} ms per turno, rivincite {rivincite}")
@@ -0,0 +1,115 @@
+"""
+stress_shard.py — Più dispositivi che confermano risultati in contemporanea (multiprocesso)
+
+N_PROCESSI processi, ognuno con la propria copia dello stato caricata dallo
+stesso archivio (come più tablet su una stessa app), partono insieme e
+confermano partite: ognuno le sue (campi diversi) più N_CONTESE partite che
+tutti provano a confermare. Dopo ogni conferma c'è l'autosave (save_state
+della propria copia completa), e alla fine ogni processo salva ancora.
+Prima: solo save_state, l'ultimo che scrive cancella le conferme degli
+altri. Dopo: salva_partita scrive lo shard della partita con controllo di
+versione. Alla fine si ricarica l'archivio e si verifica che nessuna
+conferma sia andata persa, che ogni partita contesa sia stata scritta una
+sola volta (gli altri respinti con ConflittoPartita) e che statistiche e
+classifiche tornino con il ricalcolo completo (verifica_coerenza).
+Avvio: python benchmarks/stress_shard.py
+"""
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import shard_partite
+from data_manager import (
+    empty_state, new_squadra, genera_gironi, traccia_stato, load_state, save_state, salva_partita,
+    simula_partita, aggiorna_classifica_squadra, verifica_coerenza, ConflittoPartita,
+)
+
+N_PROCESSI = 8
+N_CONTESE = 6
+
+
+def prepara(cartella):
+    os.chdir(cartella)
+    random.seed(9)
+    state = empty_state()
+    state["torneo"]["nome"] = "Stress shard"
+    state["squadre"] = [new_squadra(f"Team {i}", f"a{2 * i}", f"a{2 * i + 1}") for i in range(48)]
+    state["gironi"] = genera_gironi([s["id"] for s in state["squadre"]], num_gironi=8)
+    state["fase"] = "gironi"
+    save_state(traccia_stato(state))
+    return [p["id"] for g in state["gironi"] for p in g["partite"]]
+
+
+def dispositivo(cartella, k, ids, shard, barriera, risultati):
+    os.chdir(cartella)
+    random.seed(k)
+    state = load_state()
+    partite = {p["id"]: p for g in state["gironi"] for p in g["partite"]}
+    contese, mie = ids[:N_CONTESE], ids[N_CONTESE + k::N_PROCESSI]
+    da_fare = mie + contese
+    random.shuffle(da_fare)
+    confermate, respinte = [], 0
+    barriera.wait()
+    for pid in da_fare:
+        partita = partite[pid]
+        if partita["confermata"]:
+            continue                # già arrivata da un altro dispositivo
+        simula_partita(state, partita)
+        aggiorna_classifica_squadra(state, partita)
+        try:
+            if shard:
+                salva_partita(state, partita)
+            confermate.append(pid)
+        except ConflittoPartita:
+            respinte += 1
+        save_state(state)           # autosave di fine rerun: copia completa del dispositivo
+        time.sleep(random.uniform(0, 0.005))
+    save_state(state)
+    risultati.put((k, confermate, respinte))
+
+
+def esegui(shard):
+    cartella = tempfile.mkdtemp()
+    ids = prepara(cartella)
+    barriera = multiprocessing.Barrier(N_PROCESSI)
+    risultati = multiprocessing.Queue()
+    processi = [multiprocessing.Process(target=dispositivo, args=(cartella, k, ids, shard, barriera, risultati))
+                for k in range(N_PROCESSI)]
+    t0 = time.perf_counter()
+    for p in processi:
+        p.start()
+    esiti = [risultati.get(timeout=120) for _ in processi]
+    for p in processi:
+        p.join()
+    tempo = time.perf_counter() - t0
+
+    os.chdir(cartella)
+    state = load_state()
+    finali = {p["id"]: p for g in state["gironi"] for p in g["partite"]}
+    confermate = [pid for _, c, _ in esiti for pid in c]
+    perse = [pid for pid in set(confermate) if not finali[pid]["confermata"]]
+    return state, finali, confermate, perse, sum(r for *_, r in esiti), tempo
+
+
+if __name__ == "__main__":
+    _, _, confermate, perse, _, _ = esegui(shard=False)
+    print(f"prima (solo save_state): {len(set(confermate))} partite confermate, {len(perse)} perse "
+          f"({len(confermate) - len(set(confermate))} partite contese confermate più volte)")
+
+    state, finali, confermate, perse, respinte, tempo = esegui(shard=True)
+    assert not perse, f"{len(perse)} conferme perse"
+    assert len(confermate) == len(set(confermate)) == len(finali), "partita confermata due volte o mancante"
+    assert all(shard_partite.leggi_shard(pid)["versione"] == 1 for pid in finali), "shard sovrascritto"
+    for pid, p in finali.items():
+        doc = shard_partite.leggi_shard(pid)
+        assert [list(x) for x in p["punteggi"]] == [list(x) for x in doc["punteggi"]]
+    errori = verifica_coerenza(state)
+    assert not errori, errori[:5]
+    print(f"dopo (shard per partita): {len(confermate)} conferme su {len(finali)} partite, 0 perse, "
+          f"{respinte} conferme contese respinte con ConflittoPartita, {tempo:.1f} s con {N_PROCESSI} processi")
+    print("statistiche e classifiche coerenti con il ricalcolo completo")
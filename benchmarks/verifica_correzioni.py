@@ -0,0 +1,141 @@
+"""
+verifica_correzioni.py — Correzioni casuali di risultati confermati + verifica_coerenza
+
+- Gironi (4 da 8, criterio avulsa): tutte le partite giocate, poi centinaia di
+  correzioni casuali; dopo ognuna statistiche, classifiche e scontri diretti
+  devono coincidere con il ricalcolo completo (verifica_coerenza).
+- Tabellone generato dai gironi: le correzioni che cambiano le qualificate lo
+  rigenerano finché nessuna partita è giocata; poi sono rifiutate.
+- Eliminazione diretta e doppia eliminazione: una correzione che cambia la
+  vincitrice aggiorna la partita successiva se non è ancora giocata,
+  altrimenti viene rifiutata senza modificare nulla.
+Riporta il tempo medio di una correzione.
+Avvio: python benchmarks/verifica_correzioni.py
+"""
+import copy
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from data_manager import (
+    BYE_ID, empty_state, new_squadra, genera_gironi, genera_bracket_da_gironi, genera_tabellone,
+    genera_doppia_eliminazione, traccia_stato, simula_partita, aggiorna_classifica_squadra,
+    avanza_vincitore, correggi_risultato, verifica_coerenza, podio_bracket,
+)
+
+
+def punteggio_casuale(formato):
+    """Risultato valido: Set Unico o Best of 3 (2-0 / 2-1)."""
+    vince_1 = random.random() < 0.5
+    set_vincitrice = 1 if formato == "Set Unico" else 2
+    esiti = [vince_1] * set_vincitrice
+    if set_vincitrice == 2 and random.random() < 0.4:
+        esiti.insert(random.randint(0, 1), not vince_1)
+    return [(21, random.randint(0, 19)) if v else (random.randint(0, 19), 21) for v in esiti]
+
+
+def nuovo_stato(n_squadre, formato="Set Unico"):
+    state = empty_state()
+    state["torneo"]["formato_set"] = formato
+    state["torneo"]["criterio_passaggio"] = "avulsa"
+    state["torneo"]["num_gironi"] = 4
+    state["torneo"]["passano_per_girone"] = 2
+    state["squadre"] = [new_squadra(f"Team {i}", f"a{2 * i}", f"a{2 * i + 1}") for i in range(n_squadre)]
+    for i, sq in enumerate(state["squadre"]):
+        sq["id"] = f"sq_{i}"
+    return state
+
+
+def gioca(state, partita):
+    simula_partita(state, partita)
+    aggiorna_classifica_squadra(state, partita)
+
+
+def prova_rifiuto(state, partita, punteggi):
+    """La correzione deve fallire lasciando lo stato identico."""
+    prima = copy.deepcopy(dict(state))
+    try:
+        correggi_risultato(state, partita, punteggi)
+    except ValueError:
+        assert copy.deepcopy(dict(state)) == prima, "correzione rifiutata ma stato modificato"
+        return True
+    return False
+
+
+def verifica_gironi(n_correzioni=400):
+    state = nuovo_stato(32, "Best of 3")
+    state["gironi"] = genera_gironi([s["id"] for s in state["squadre"]], num_gironi=4)
+    state = traccia_stato(state)
+    partite = [p for g in state["gironi"] for p in g["partite"]]
+    for p in partite:
+        gioca(state, p)
+    tempo = 0.0
+    for _ in range(n_correzioni):
+        p = random.choice(partite)
+        t0 = time.perf_counter()
+        correggi_risultato(state, p, punteggio_casuale("Best of 3"))
+        tempo += time.perf_counter() - t0
+        assert not verifica_coerenza(state), verifica_coerenza(state)[:3]
+
+    # Tabellone generato: le correzioni lo rigenerano finché non si gioca
+    state["bracket"] = genera_bracket_da_gironi(state)
+    rigenerati = 0
+    for _ in range(100):
+        prima = [(p["sq1"], p["sq2"]) for p in state["bracket"]]
+        correggi_risultato(state, random.choice(partite), punteggio_casuale("Best of 3"))
+        rigenerati += prima != [(p["sq1"], p["sq2"]) for p in state["bracket"]]
+        assert state["bracket"] == genera_bracket_da_gironi(state)
+    gioca(state, state["bracket"][0])
+    avanza_vincitore(state, state["bracket"][0])
+    rifiutate = sum(prova_rifiuto(state, p, punteggio_casuale("Best of 3")) for p in random.sample(partite, 40))
+    assert rifiutate == 40 and not verifica_coerenza(state)
+    print(f"gironi: {n_correzioni} correzioni coerenti, {1e3 * tempo / n_correzioni:.3f} ms l'una; "
+          f"tabellone rigenerato {rigenerati} volte, {rifiutate} correzioni rifiutate a tabellone iniziato")
+
+
+def verifica_tabellone(doppia, n):
+    ids = [f"sq_{i}" for i in range(n)]
+    state = nuovo_stato(n)
+    state["bracket"] = genera_doppia_eliminazione(ids) if doppia else genera_tabellone(ids)
+    state = traccia_stato(state)
+    corrette = rifiutate = 0
+    while True:
+        pronte = [p for p in state["bracket"]
+                  if not p["confermata"] and p["sq1"] is not None and p["sq2"] is not None]
+        if not pronte:
+            break
+        for p in pronte:
+            gioca(state, p)
+            avanza_vincitore(state, p)
+        # Correzione casuale di una partita già giocata
+        giocate = [p for p in state["bracket"] if p["confermata"] and BYE_ID not in (p["sq1"], p["sq2"])]
+        p = random.choice(giocate)
+        ribaltato = [(b, a) for a, b in p["punteggi"]]
+        if prova_rifiuto(state, p, ribaltato):
+            rifiutate += 1
+        else:
+            corrette += 1
+            succ = next((q for q in state["bracket"] if q["id"] == p.get("next_id")), None)
+            if succ is not None:
+                assert succ[p["next_slot"]] == p["vincitore"], "vincitrice corretta non propagata"
+        assert not verifica_coerenza(state), verifica_coerenza(state)[:3]
+    assert all(p["confermata"] for p in state["bracket"])
+    assert len(dict(podio_bracket(state))) == 4
+    return corrette, rifiutate
+
+
+if __name__ == "__main__":
+    random.seed(11)
+    verifica_gironi()
+    for doppia in (False, True):
+        tot_c = tot_r = 0
+        for n in range(4, 33):
+            c, r = verifica_tabellone(doppia, n)
+            tot_c += c
+            tot_r += r
+        nome = "doppia eliminazione" if doppia else "eliminazione diretta"
+        print(f"{nome}: {tot_c} vincitrici ribaltate e propagate, {tot_r} rifiutate (partita successiva già giocata)")
+    print("OK")
@@ -0,0 +1,75 @@
+"""
+verifica_doppia_eliminazione.py — Gioca tabelloni a doppia eliminazione completi col simulatore
+
+Per ogni numero di squadre da 4 a 64 (con e senza reset della finalissima)
+simula il torneo turno per turno e controlla:
+- tutte le partite chiuse e podio completo (1º-4º, squadre distinte);
+- ogni squadra eliminata ha esattamente 2 sconfitte, il campione al massimo 1
+  (senza reset anche la seconda classificata può averne una sola);
+- nessuna squadra è attesa in due partite aperte nello stesso momento;
+- ogni conferma tocca un numero costante di partite (avanza_vincitore).
+Avvio: python benchmarks/verifica_doppia_eliminazione.py
+"""
+import os
+import random
+import sys
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from data_manager import (
+    BYE_ID, traccia_stato, genera_doppia_eliminazione, avanza_vincitore, podio_bracket,
+)
+from motore_simulazione import nuovo_rng, simula_partite
+
+TORNEO = {"punteggio_max": 21, "formato_set": "Set Unico"}
+
+
+def gioca(n, reset, rng):
+    ids = [f"sq_{i}" for i in range(n)]
+    state = traccia_stato({"torneo": TORNEO, "squadre": [],
+                           "bracket": genera_doppia_eliminazione(ids, reset=reset)})
+    max_toccate = 0
+    while True:
+        pronte = [p for p in state["bracket"]
+                  if not p["confermata"] and p["sq1"] is not None and p["sq2"] is not None]
+        if not pronte:
+            break
+        attese = Counter(sid for p in state["bracket"] if not p["confermata"]
+                         for sid in (p["sq1"], p["sq2"]) if sid and sid != BYE_ID)
+        doppie = [sid for sid, c in attese.items() if c > 1]
+        assert not doppie, f"{n} squadre: {doppie} in due partite aperte"
+        simula_partite(state, pronte, rng=rng)
+        for p in pronte:
+            max_toccate = max(max_toccate, len(avanza_vincitore(state, p)))
+
+    assert all(p["confermata"] for p in state["bracket"]), f"{n}: partite non chiuse"
+    sconfitte = Counter()
+    for p in state["bracket"]:
+        if BYE_ID in (p["sq1"], p["sq2"]):
+            continue
+        sconfitte[p["sq2"] if p["vincitore"] == p["sq1"] else p["sq1"]] += 1
+    podio = dict(podio_bracket(state))
+    assert sorted(podio) == [1, 2, 3, 4] and len(set(podio.values())) == 4, f"{n}: podio {podio}"
+    campione = podio[1]
+    assert sconfitte[campione] <= 1, f"{n}: il campione ha {sconfitte[campione]} sconfitte"
+    # Senza reset chi perde la finalissima arrivando dai vincenti ha una sola sconfitta
+    eccezioni = {campione} if reset else {campione, podio[2]}
+    assert all(sconfitte[sid] == 2 for sid in ids if sid not in eccezioni), f"{n}: sconfitte {sconfitte}"
+    return len(state["bracket"]), max_toccate
+
+
+if __name__ == "__main__":
+    random.seed(0)
+    rng = nuovo_rng(0)
+    t0 = time.perf_counter()
+    casi = 0
+    for n in range(4, 65):
+        for reset in (True, False):
+            for _ in range(5):
+                partite, toccate = gioca(n, reset, rng)
+                casi += 1
+        if n in (4, 8, 12, 16, 24, 32, 48, 64):
+            print(f"{n:3d} squadre: {partite:4d} partite, max {toccate} partite toccate per conferma")
+    print(f"OK — {casi} tornei completi in {time.perf_counter() - t0:.1f} s")
@@ -0,0 +1,275 @@
+"""
+calendario.py — Calendario delle partite sui campi disponibili
+
+Assegna ogni partita (girone e tabellone) a un campo e a un orario:
+- durata media per formato_set (configurabile in torneo["durata_partita"]);
+- riposo minimo per ogni squadra tra due partite;
+- nel tabellone una partita parte solo dopo quelle che la alimentano
+  (next_id / loser_id), anche se le squadre non sono ancora note;
+- nel sistema svizzero i turni non ancora accoppiati occupano posti
+  segnaposto (squadre da definire), ciascuno dopo la fine del turno prima.
+Algoritmo a lista (list scheduling): il campo che si libera per primo prende
+la partita che può iniziare prima; a parità, quella con il percorso critico
+più lungo fino alla finale e poi quella delle squadre con più partite da
+giocare. Con adesso/fine_stimata lo stesso calcolo ripianifica dal vivo:
+partite concluse e in corso restano dove sono, le altre ripartono da adesso.
+Nessun import di streamlit: la vista è calendario_page.
+"""
+import heapq
+
+from data_manager import BYE_ID
+
+DURATA_PARTITA = {"Set Unico": 25, "Best of 3": 50}   # minuti, cambio campo incluso
+RIPOSO_MINIMO = 10                                    # minuti tra due partite della stessa squadra
+CAMPI = 2
+ORA_INIZIO = "09:00"
+MARGINE_SFORAMENTO = 5     # minuti concessi a una partita in corso oltre la fine prevista
+
+
+# ─── ORARI ───────────────────────────────────────────────────────────────────
+
+def minuti_da_ora(ora_inizio, ora):
+    """'HH:MM' → minuti dall'inizio del torneo."""
+    h0, m0 = map(int, ora_inizio.split(":"))
+    h, m = map(int, ora.split(":"))
+    return (h * 60 + m) - (h0 * 60 + m0)
+
+
+def ora_da_minuti(ora_inizio, minuti):
+    """Minuti dall'inizio del torneo → 'HH:MM'."""
+    h0, m0 = map(int, ora_inizio.split(":"))
+    totale = h0 * 60 + m0 + int(round(minuti))
+    return f"{totale // 60 % 24:02d}:{totale % 60:02d}"
+
+
+# ─── PARTITE DA PIANIFICARE ──────────────────────────────────────────────────
+
+def configurazione(state):
+    """Campi, durata di una partita, riposo e ora d'inizio dal torneo (con i default)."""
+    torneo = state["torneo"]
+    durate = {**DURATA_PARTITA, **(torneo.get("durata_partita") or {})}
+    return {
+        "campi": max(1, int(torneo.get("campi", CAMPI))),
+        "durata": durate.get(torneo["formato_set"], DURATA_PARTITA["Set Unico"]),
+        "riposo": max(0, int(torneo.get("riposo_minimo", RIPOSO_MINIMO))),
+        "ora_inizio": torneo.get("ora_inizio", ORA_INIZIO),
+    }
+
+
+def _partite(state):
+    """Tutte le partite che occupano un campo (niente BYE), nell'ordine dell'app."""
+    tutte = [p for g in state.get("gironi", []) for p in g["partite"]]
+    tutte += _turni_svizzeri_futuri(state)
+    tutte += state.get("bracket", [])
+    return [p for p in tutte if BYE_ID not in (p["sq1"], p["sq2"])]
+
+
+def _turni_svizzeri_futuri(state):
+    """
+    Segnaposto per i turni del sistema svizzero non ancora accoppiati: una
+    partita per coppia (il BYE non occupa campi), id stabili "sv_t{turno}_{i}".
+    Quando il turno vero viene generato i segnaposto spariscono e le sue
+    partite risultano da pianificare (partite_non_pianificate).
+    """
+    gironi = state.get("gironi") or []
+    if not gironi or not gironi[0].get("svizzera") or state.get("bracket"):
+        return []
+    girone = gironi[0]
+    turni = state["torneo"].get("turni_svizzera", 5)
+    return [
+        {"id": f"sv_t{t}_{i}", "sq1": None, "sq2": None, "fase": "girone", "girone": 0,
+         "turno": t, "confermata": False, "segnaposto": True}
+        for t in range(girone["turno"] + 1, turni + 1)
+        for i in range(len(girone["squadre"]) // 2)
+    ]
+
+
+def partite_non_pianificate(state):
+    """Partite ancora da giocare senza posto in calendario (es. tabellone appena generato)."""
+    slot = (state.get("calendario") or {}).get("slot", {})
+    return sum(1 for p in _partite(state) if not p["confermata"] and p["id"] not in slot)
+
+
+# ─── PIANIFICAZIONE ──────────────────────────────────────────────────────────
+
+def pianifica(state, adesso=0, fine_stimata=None):
+    """
+    Calendario di tutte le partite sui campi del torneo.
+    adesso: minuti dall'inizio; nessuna partita nuova parte prima.
+    fine_stimata: {partita_id: minuti} per le partite in corso che sforano.
+    Le partite confermate e quelle già iniziate (inizio <= adesso) restano sul
+    loro campo; una partita in corso oltre la fine prevista occupa il campo
+    almeno fino ad adesso + MARGINE_SFORAMENTO.
+    Restituisce il dict da salvare in state["calendario"].
+    """
+    conf = configurazione(state)
+    durata, riposo = conf["durata"], conf["riposo"]
+    fine_stimata = fine_stimata or {}
+    precedente = (state.get("calendario") or {}).get("slot", {})
+    partite = _partite(state)
+    per_id = {p["id"]: p for p in partite}
+
+    # Vincoli del tabellone: chi alimenta chi (vincente e perdente)
+    successori = {pid: [] for pid in per_id}
+    da_attendere = {pid: 0 for pid in per_id}
+    for p in partite:
+        for campo_id in ("next_id", "loser_id"):
+            succ = p.get(campo_id)
+            if succ in per_id:
+                successori[p["id"]].append(succ)
+                da_attendere[succ] += 1
+    # Sistema svizzero: un turno si accoppia solo quando il precedente è finito
+    per_turno = {}
+    for p in partite:
+        if p["fase"] == "girone" and p.get("turno"):
+            per_turno.setdefault(p["turno"], []).append(p["id"])
+    for turno, ids in per_turno.items():
+        for prec in per_turno.get(turno - 1, ()):
+            successori[prec].extend(ids)
+            for pid in ids:
+                da_attendere[pid] += 1
+    # Il tabellone parte solo a gironi finiti
+    gironi_aperti = [p["id"] for p in partite if p["fase"] == "girone" and not p["confermata"]]
+    for p in partite:
+        if p["fase"] != "girone" and da_attendere[p["id"]] == 0:
+            for pid in gironi_aperti:
+                successori[pid].append(p["id"])
+                da_attendere[p["id"]] += 1
+
+    slot = {}
+    pronto_squadra = {}      # squadra → minuto da cui può rigiocare
+    fine_campo = [adesso] * conf["campi"]
+
+    def occupa(p, campo, inizio, fine):
+        slot[p["id"]] = {"campo": campo, "inizio": inizio, "fine": fine}
+        for sid in (p["sq1"], p["sq2"]):
+            if sid is not None:
+                pronto_squadra[sid] = max(pronto_squadra.get(sid, 0), fine + riposo)
+
+    # Partite fisse: già giocate o in corso. Una partita conta come iniziata
+    # solo se il suo campo era libero all'orario previsto: dietro una partita
+    # che sfora non è mai partita e si ripianifica con le altre
+    fisse = sorted(((p, precedente[p["id"]]) for p in partite
+                    if p["id"] in precedente and precedente[p["id"]]["campo"] <= conf["campi"]),
+                   key=lambda x: x[1]["inizio"])
+    for p, vecchio in fisse:
+        campo = vecchio["campo"]
+        if p["confermata"]:
+            occupa(p, campo, vecchio["inizio"], min(vecchio["fine"], max(adesso, vecchio["inizio"])))
+        elif vecchio["inizio"] <= adesso and fine_campo[campo - 1] <= max(vecchio["inizio"], adesso):
+            fine = fine_stimata.get(p["id"], vecchio["fine"])
+            if fine <= adesso:
+                fine = adesso + MARGINE_SFORAMENTO
+            occupa(p, campo, vecchio["inizio"], fine)
+            fine_campo[campo - 1] = max(fine_campo[campo - 1], fine)
+
+    # Percorso critico: minuti di gioco da qui alla fine del torneo
+    coda = {}
+    for pid in reversed(_ordine_topologico(per_id, successori, da_attendere)):
+        coda[pid] = durata + max((coda[s] for s in successori[pid]), default=0)
+
+    residue = {}
+    for p in partite:
+        if p["id"] not in slot:
+            for sid in (p["sq1"], p["sq2"]):
+                if sid is not None:
+                    residue[sid] = residue.get(sid, 0) + 1
+
+    attese = dict(da_attendere)
+    pronto_dipendenze = {pid: adesso for pid in per_id}
+    ordine = {p["id"]: i for i, p in enumerate(partite)}
+    pronte = {}
+    for p in partite:
+        if p["id"] in slot:
+            _sblocca(p["id"], slot[p["id"]]["fine"] + riposo, successori, attese, pronto_dipendenze)
+        elif p["confermata"]:     # giocata prima di avere un calendario
+            _sblocca(p["id"], adesso, successori, attese, pronto_dipendenze)
+    for p in partite:
+        if p["id"] not in slot and not p["confermata"] and attese[p["id"]] == 0:
+            pronte[p["id"]] = ordine[p["id"]]
+
+    liberi = [(t, c + 1) for c, t in enumerate(fine_campo)]
+    heapq.heapify(liberi)
+    while pronte:
+        libero, campo = heapq.heappop(liberi)
+        migliore, chiave_migliore = None, None
+        for pid in pronte:
+            p = per_id[pid]
+            inizio = max(libero, pronto_dipendenze[pid],
+                         pronto_squadra.get(p["sq1"], 0), pronto_squadra.get(p["sq2"], 0))
+            chiave = (inizio, -coda[pid], -(residue.get(p["sq1"], 0) + residue.get(p["sq2"], 0)), ordine[pid])
+            if chiave_migliore is None or chiave < chiave_migliore:
+                migliore, chiave_migliore = pid, chiave
+        del pronte[migliore]
+        p = per_id[migliore]
+        inizio = chiave_migliore[0]
+        occupa(p, campo, inizio, inizio + durata)
+        for sid in (p["sq1"], p["sq2"]):
+            if sid in residue:
+                residue[sid] -= 1
+        for succ in _sblocca(migliore, inizio + durata + riposo, successori, attese, pronto_dipendenze):
+            if not per_id[succ]["confermata"] and succ not in slot:
+                pronte[succ] = ordine[succ]
+        heapq.heappush(liberi, (inizio + durata, campo))
+
+    return {
+        "campi": conf["campi"],
+        "ora_inizio": conf["ora_inizio"],
+        "durata": durata,
+        "riposo": riposo,
+        "adesso": adesso,
+        "fine_prevista": max((s["fine"] for s in slot.values()), default=adesso),
+        "slot": slot,
+    }
+
+
+def _sblocca(pid, pronto, successori, attese, pronto_dipendenze):
+    """Partita pid pianificata: aggiorna i successori e restituisce quelli senza altre attese."""
+    liberati = []
+    for succ in successori[pid]:
+        attese[succ] -= 1
+        pronto_dipendenze[succ] = max(pronto_dipendenze[succ], pronto)
+        if attese[succ] == 0:
+            liberati.append(succ)
+    return liberati
+
+
+def _ordine_topologico(per_id, successori, da_attendere):
+    attese = dict(da_attendere)
+    coda = [pid for pid, n in attese.items() if n == 0]
+    ordine = []
+    while coda:
+        pid = coda.pop()
+        ordine.append(pid)
+        for succ in successori[pid]:
+            attese[succ] -= 1
+            if attese[succ] == 0:
+                coda.append(succ)
+    return ordine
+
+
+# ─── VISTA PER CAMPO ─────────────────────────────────────────────────────────
+
+def programma_per_campo(state):
+    """{campo: [(slot, partita), ...]} in ordine di orario, dal calendario salvato."""
+    calendario = state.get("calendario") or {}
+    slot = calendario.get("slot", {})
+    programma = {c: [] for c in range(1, calendario.get("campi", 0) + 1)}
+    for p in _partite(state):
+        s = slot.get(p["id"])
+        if s and s["campo"] in programma:
+            programma[s["campo"]].append((s, p))
+    for righe in programma.values():
+        righe.sort(key=lambda r: r[0]["inizio"])
+    return programma
+
+
+def utilizzo_campi(calendario):
+    """Quota del tempo (inizio → fine prevista) in cui i campi sono occupati."""
+    slot = (calendario or {}).get("slot", {})
+    if not slot:
+        return 0.0
+    inizio = min(s["inizio"] for s in slot.values())
+    arco = calendario["fine_prevista"] - inizio
+    occupato = sum(s["fine"] - s["inizio"] for s in slot.values())
+    return occupato / (arco * calendario["campi"]) if arco > 0 else 0.0
@@ -0,0 +1,116 @@
+"""
+calendario_page.py — Vista Calendario: programma per campo e ripianificazione dal vivo
+"""
+from datetime import datetime, time as dtime
+
+import streamlit as st
+from data_manager import get_squadra_by_id
+from calendario import (
+    DURATA_PARTITA, RIPOSO_MINIMO, CAMPI, ORA_INIZIO,
+    pianifica, partite_non_pianificate, programma_per_campo, utilizzo_campi,
+    minuti_da_ora, ora_da_minuti,
+)
+
+COLONNE_PER_RIGA = 4
+
+
+def render_calendario(state):
+    st.markdown("## 🗓️ Calendario Campi")
+    st.caption("Ogni partita ha un campo e un orario; se una partita sfora si ripianifica il resto della giornata.")
+
+    if not state.get("gironi") and not state.get("bracket"):
+        st.info("Nessuna partita generata. Completa il Setup e avvia il torneo.")
+        return
+
+    torneo = state["torneo"]
+    with st.expander("⚙️ Campi e tempi", expanded=not state.get("calendario")):
+        c1, c2, c3, c4 = st.columns(4)
+        with c1:
+            torneo["campi"] = st.number_input("Campi disponibili", 1, 32, torneo.get("campi", CAMPI), key="cal_campi")
+        with c2:
+            durate = {**DURATA_PARTITA, **(torneo.get("durata_partita") or {})}
+            formato = torneo["formato_set"]
+            durate[formato] = st.number_input(f"Durata media ({formato}, min)", 5, 180,
+                                              durate[formato], step=5, key="cal_durata")
+            torneo["durata_partita"] = durate
+        with c3:
+            torneo["riposo_minimo"] = st.number_input("Riposo minimo (min)", 0, 120,
+                                                      torneo.get("riposo_minimo", RIPOSO_MINIMO), step=5,
+                                                      key="cal_riposo")
+        with c4:
+            h, m = map(int, torneo.get("ora_inizio", ORA_INIZIO).split(":"))
+            inizio = st.time_input("Ora d'inizio", dtime(h, m), key="cal_inizio")
+            torneo["ora_inizio"] = inizio.strftime("%H:%M")
+        if st.button("📅 GENERA CALENDARIO", use_container_width=True, type="primary"):
+            state["calendario"] = None
+            state["calendario"] = pianifica(state)
+            st.rerun()
+
+    calendario = state.get("calendario")
+    if not calendario:
+        st.info("Imposta campi e tempi, poi genera il calendario.")
+        return
+
+    ora_inizio = calendario["ora_inizio"]
+    mancanti = partite_non_pianificate(state)
+    if mancanti:
+        st.warning(f"{mancanti} partite ancora senza orario (es. tabellone appena generato): ripianifica.")
+
+    # ─── RIPIANIFICAZIONE DAL VIVO ───────────────────────────────────────────
+    with st.expander("⏱️ Ripianifica dal vivo", expanded=bool(mancanti)):
+        r1, r2, r3 = st.columns([1, 2, 1])
+        with r1:
+            adesso_ora = st.time_input("Ora attuale", datetime.now().time().replace(second=0, microsecond=0),
+                                       key="cal_adesso")
+        adesso = minuti_da_ora(ora_inizio, adesso_ora.strftime("%H:%M"))
+        in_corso = [(s, p) for righe in programma_per_campo(state).values() for s, p in righe
+                    if not p["confermata"] and s["inizio"] <= adesso]
+        with r2:
+            sforamento = st.selectbox(
+                "Partita che sfora (opzionale)",
+                [None] + [p["id"] for _, p in in_corso],
+                format_func=lambda pid: "— nessuna —" if pid is None else _descrizione(
+                    state, next(p for _, p in in_corso if p["id"] == pid)),
+                key="cal_sforamento",
+            )
+        with r3:
+            extra = st.number_input("Minuti ancora", 0, 120, 10, step=5, key="cal_extra")
+        if st.button("🔁 RIPIANIFICA DA ADESSO", use_container_width=True):
+            fine_stimata = {sforamento: adesso + extra} if sforamento else None
+            state["calendario"] = pianifica(state, adesso=adesso, fine_stimata=fine_stimata)
+            st.rerun()
+
+    m1, m2, m3 = st.columns(3)
+    m1.metric("Fine prevista", ora_da_minuti(ora_inizio, calendario["fine_prevista"]))
+    m2.metric("Utilizzo campi", f"{100 * utilizzo_campi(calendario):.0f}%")
+    m3.metric("Partite in calendario", len(calendario["slot"]))
+
+    # ─── PROGRAMMA PER CAMPO ─────────────────────────────────────────────────
+    programma = programma_per_campo(state)
+    campi = list(programma)
+    for i in range(0, len(campi), COLONNE_PER_RIGA):
+        colonne = st.columns(COLONNE_PER_RIGA)
+        for col, campo in zip(colonne, campi[i:i + COLONNE_PER_RIGA]):
+            with col:
+                st.markdown(f"### 🏟️ Campo {campo}")
+                for s, p in programma[campo]:
+                    icona = "✅" if p["confermata"] else ("🟠" if s["inizio"] <= calendario["adesso"] else "🕒")
+                    st.markdown(f"{icona} **{ora_da_minuti(ora_inizio, s['inizio'])}–"
+                                f"{ora_da_minuti(ora_inizio, s['fine'])}**  \n{_descrizione(state, p)}")
+
+
+def _descrizione(state, partita):
+    """'Squadra A vs Squadra B · Girone A' (squadre non ancora note: 'da definire')."""
+    nomi = []
+    for sid in (partita["sq1"], partita["sq2"]):
+        sq = get_squadra_by_id(state, sid) if sid else None
+        nomi.append(sq["nome"] if sq else "da definire")
+    if partita["fase"] == "girone":
+        gironi = state.get("gironi", [])
+        indice = partita.get("girone") or 0
+        fase = gironi[indice]["nome"] if indice < len(gironi) else "Girone"
+        if partita.get("turno"):
+            fase += f" · Turno {partita['turno']}"
+    else:
+        fase = "Playoff"
+    return f"{nomi[0]} vs {nomi[1]} · {fase}"
@@ -1,17 +1,32 @@
 """
 data_manager.py — Gestione persistenza JSON e modelli dati
 """
-import json, os, random
+import bisect, json, os, random, threading
+from contextlib import contextmanager
 from datetime import datetime
 from pathlib import Path
 
-DATA_FILE = "beach_volley_data.json"
+import shard_partite
+from punteggio_live import segna_punto, annulla_punto
+from shard_partite import ConflittoPartita
+
+DATA_FILE = "beach_volley_data.json"         # torneo in corso (piccolo, scritto spesso)
+STORICO_FILE = "beach_volley_atleti.json"    # atleti + ranking (cresce, scritto di rado)
+JOURNAL_FILE = "beach_volley_journal.jsonl"   # modifiche in append dopo l'ultimo snapshot
+LOCK_FILE = "beach_volley.lock"              # lock degli scrittori JSON + ultima revisione assegnata
+SOGLIA_COMPATTAZIONE = 256 * 1024            # byte di journal oltre i quali si riscrive lo snapshot
+# Backend di persistenza: "json" (snapshot + journal) oppure "sqlite" (storage_sqlite.py)
+STORAGE_BACKEND = os.environ.get("BVL_STORAGE", "json")
+# Sezioni dello stato che vivono nello storico atleti e non nel file del torneo
+SEZIONI_STORICO = ("atleti", "ranking_globale")
+# Liste di primo livello con indice id → oggetto in memoria (mai salvato su disco)
+SEZIONI_INDICIZZATE = ("atleti", "squadre", "ranking_globale", "bracket")
 
 # ─── STRUTTURA DATI DEFAULT ──────────────────────────────────────────────────
 
 def empty_state():
     return {
-        "fase": "setup",          # setup | gironi | eliminazione | proclamazione
+        "fase": "setup",          # setup | gironi | eliminazione | proclamazione | profili | previsioni | calendario | segnapunti
         "torneo": {
             "nome": "",
             "sede": "",                     # opzionale: luogo/sede
@@ -25,34 +40,961 @@ def empty_state():
             "passano_per_girone": 2,
             "criterio_passaggio": "classifica",
             "girone_unico": False,
+            "reset_finale": True,           # doppia eliminazione: seconda finale se vince chi viene dai perdenti
+            "turni_svizzera": 5,            # sistema svizzero: turni prima dei playoff
+            "qualificate_svizzera": 8,      # sistema svizzero: squadre ammesse ai playoff
+            "campi": 2,                     # calendario: campi disponibili
+            "riposo_minimo": 10,            # calendario: minuti tra due partite della stessa squadra
+            "ora_inizio": "09:00",
+            "durata_partita": {"Set Unico": 25, "Best of 3": 50},   # minuti medi per formato_set
         },
         "theme": "dazn_dark",     # tema UI (dazn_dark, ecc.) — non tocca DB
         "atleti": [],             # lista globale atleti: {id, nome, stats}
         "squadre": [],            # {id, nome, atleti:[id,id]}
         "gironi": [],             # [{nome, squadre:[id], partite:[...]}]
         "bracket": [],            # partite eliminazione diretta
-        "ranking_globale": [],    # storico tornei per atleta
+        "calendario": None,       # {campi, slot: {partita_id: {campo, inizio, fine}}, ...} (calendario.py)
+        "ranking_globale": [],    # classifica atleti ordinata (vedi RANKING GLOBALE)
         "vincitore": None,
         "simulazione_al_ranking": True,
     }
 
+FASI_TORNEO = ("setup", "gironi", "eliminazione", "proclamazione")
+
+
+def fase_raggiunta(state):
+    """
+    Fase del torneo in corso, anche quando si è su una vista laterale
+    (profili, previsioni, calendario, segnapunti) che sovrascrive state["fase"].
+    """
+    if state["fase"] in FASI_TORNEO:
+        return state["fase"]
+    if state.get("vincitore"):
+        return "proclamazione"
+    if state.get("bracket"):
+        return "eliminazione"
+    if state.get("gironi"):
+        return "gironi"
+    return "setup"
+
+# ─── TRACCIAMENTO MODIFICHE ──────────────────────────────────────────────────
+# Lo stato caricato è avvolto in dict/list "tracciati": ogni modifica reale
+# (assegnazione di un valore diverso, append, pop, ...) incrementa un contatore
+# di versione condiviso. L'autosave scrive su disco solo se la versione è
+# cambiata dall'ultimo salvataggio.
+# Le modifiche dentro un oggetto con id (partita, squadra, atleta) sono
+# segnate per oggetto: salva_modifiche, che ne registra solo alcuni nel
+# journal, toglie solo quelli e lascia il resto all'autosave. Classifica e
+# scontri dei gironi sono dati derivati, ricostruiti al caricamento.
+
+CHIAVI_DERIVATE = ("classifica", "scontri")   # chiavi di un girone ricostruite da load_state
+DERIVATO = "~derivato"                        # "oggetto" delle modifiche ai dati derivati
+
+# Contatori di processo per l'autosave (mostrati in sidebar)
+STATISTICHE_AUTOSAVE = {"eseguiti": 0, "saltati": 0}
+
+
+class StoricoInSolaLettura(RuntimeError):
+    """Modifica dello storico atleti condiviso tra le sessioni senza storico_modificabile(state)."""
+
+
+class _Traccia:
+    """Versione condivisa da tutti i contenitori di uno stesso stato."""
+    __slots__ = ("versione", "versione_salvata", "sezioni", "oggetti", "revisione", "generazione",
+                 "sola_lettura")
+
+    def __init__(self):
+        self.versione = 0
+        self.versione_salvata = 0
+        self.sezioni = set()   # chiavi di primo livello modificate fuori da un oggetto con id
+        self.oggetti = {}      # sezione → id degli oggetti modificati dall'ultimo salvataggio
+        self.revisione = 0     # revisione su disco (snapshot + record di journal)
+        self.generazione = None   # ultima generazione degli shard partite applicata
+        self.sola_lettura = False  # storico condiviso da ArchivioCondiviso: si rifiuta prima di modificare
+
+    def segna(self, sezione, oggetto=None):
+        if self.sola_lettura:
+            raise StoricoInSolaLettura(f"'{sezione}' è condiviso tra le sessioni: "
+                                       "chiamare storico_modificabile(state) prima di modificarlo")
+        self.versione += 1
+        if oggetto is None:
+            self.sezioni.add(sezione)
+        else:
+            self.oggetti.setdefault(sezione, set()).add(oggetto)
+
+    def modificata(self):
+        return bool(self.sezioni or self.oggetti)
+
+
+def _avvolgi(valore, traccia, sezione, oggetto=None):
+    """
+    Converte dict/list annidati in contenitori tracciati (ricorsivo). `oggetto`
+    è l'id dell'oggetto che li contiene (il primo dict con "id" risalendo).
+    """
+    if isinstance(valore, dict):
+        if isinstance(valore, DictTracciato) and getattr(valore, "_traccia", None) is traccia:
+            return valore
+        if oggetto is None and sezione is not None:
+            oggetto = valore.get("id")
+        d = DictTracciato()
+        d._traccia, d._sezione, d._oggetto = traccia, sezione, oggetto
+        for k, v in valore.items():
+            dict.__setitem__(d, k, _avvolgi(v, traccia, sezione, d._oggetto_di(k)))
+        return d
+    if isinstance(valore, list):
+        if isinstance(valore, ListaTracciata) and getattr(valore, "_traccia", None) is traccia:
+            return valore
+        lst = ListaTracciata()
+        lst._traccia, lst._sezione, lst._oggetto = traccia, sezione, oggetto
+        list.extend(lst, (_avvolgi(v, traccia, sezione, oggetto) for v in valore))
+        return lst
+    return valore
+
+
+def _uguale(vecchio, nuovo):
+    if vecchio is nuovo:
+        return True
+    if isinstance(vecchio, (dict, list)) or isinstance(nuovo, (dict, list)):
+        return False
+    return type(vecchio) is type(nuovo) and vecchio == nuovo
+
+
+class DictTracciato(dict):
+    """dict che segnala ogni modifica alla _Traccia dello stato."""
+    __slots__ = ("_traccia", "_sezione", "_oggetto")
+
+    def _oggetto_di(self, key):
+        oggetto = getattr(self, "_oggetto", None)
+        if oggetto is None and self._sezione == "gironi" and key in CHIAVI_DERIVATE:
+            return DERIVATO
+        return oggetto
+
+    def _prepara(self, key, value):
+        traccia = getattr(self, "_traccia", None)
+        if traccia is None:
+            return value
+        sezione = key if self._sezione is None else self._sezione
+        oggetto = self._oggetto_di(key)
+        traccia.segna(sezione, oggetto)
+        value = _avvolgi(value, traccia, sezione, oggetto)
+        if self._sezione is None and isinstance(value, ListaTracciata):
+            value._segna_inseriti(traccia, value)   # sezione sostituita: tutti i suoi oggetti
+        if self._sezione is None and key in SEZIONI_INDICIZZATE:
+            _indicizza(value)
+        return value
+
+    def __setitem__(self, key, value):
+        if key in self and _uguale(dict.__getitem__(self, key), value):
+            return
+        dict.__setitem__(self, key, self._prepara(key, value))
+
+    def __delitem__(self, key):
+        if key in self:
+            self._prepara(key, None)
+        dict.__delitem__(self, key)
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+        return dict.__getitem__(self, key)
+
+    def update(self, *args, **kwargs):
+        for k, v in dict(*args, **kwargs).items():
+            self[k] = v
+
+    def pop(self, key, *default):
+        if key in self:
+            self._prepara(key, None)
+        return dict.pop(self, key, *default)
+
+    def popitem(self):
+        if self:
+            self._prepara(next(reversed(self)), None)
+        return dict.popitem(self)
+
+    def clear(self):
+        for k in list(self.keys()):
+            del self[k]
+
+
+class ListaTracciata(list):
+    """
+    list che segnala ogni modifica alla _Traccia dello stato.
+    Le liste di SEZIONI_INDICIZZATE mantengono anche `_indice` (id → oggetto),
+    aggiornato da append/insert/rimozioni: ricerca per id in O(1).
+    """
+    __slots__ = ("_traccia", "_sezione", "_oggetto", "_indice")
+
+    def _segna(self):
+        traccia = getattr(self, "_traccia", None)
+        if traccia is not None:
+            traccia.segna(self._sezione, self._oggetto)
+        return traccia
+
+    def _wrap(self, value, traccia):
+        return value if traccia is None else _avvolgi(value, traccia, self._sezione, self._oggetto)
+
+    def _segna_inseriti(self, traccia, values):
+        """Oggetti con id entrati in una lista di sezione: modificati anche loro (salvataggio per oggetto)."""
+        if traccia is not None and getattr(self, "_oggetto", None) is None:
+            for v in values:
+                if isinstance(v, dict) and "id" in v:
+                    traccia.segna(self._sezione, v["id"])
+
+    def _aggiungi_a_indice(self, values, in_coda=True):
+        indice = getattr(self, "_indice", None)
+        if indice is not None:
+            for v in values:
+                if isinstance(v, dict) and "id" in v:
+                    if in_coda or v["id"] not in indice:
+                        indice.setdefault(v["id"], v)
+                    else:
+                        self._riallinea_id(v["id"])     # id ripetuto: vince il primo nella lista
+
+    def _togli_da_indice(self, value):
+        """Dopo la rimozione di `value`: se era indicizzato l'id passa all'eventuale doppione."""
+        indice = getattr(self, "_indice", None)
+        if indice is not None and isinstance(value, dict) and indice.get(value.get("id")) is value:
+            self._riallinea_id(value["id"])
+
+    def _riallinea_id(self, oid):
+        primo = next((x for x in list.__iter__(self) if isinstance(x, dict) and x.get("id") == oid), None)
+        if primo is None:
+            del self._indice[oid]
+        else:
+            self._indice[oid] = primo
+
+    def _ricostruisci_indice(self):
+        if getattr(self, "_indice", None) is not None:
+            _indicizza(self)
+
+    def __setitem__(self, idx, value):
+        traccia = self._segna()
+        if isinstance(idx, slice):
+            value = [self._wrap(v, traccia) for v in value]
+            self._segna_inseriti(traccia, value)
+            list.__setitem__(self, idx, value)
+            self._ricostruisci_indice()
+            return
+        value = self._wrap(value, traccia)
+        self._segna_inseriti(traccia, (value,))
+        vecchio = list.__getitem__(self, idx)
+        list.__setitem__(self, idx, value)
+        self._togli_da_indice(vecchio)
+        self._aggiungi_a_indice((value,), in_coda=False)
+
+    def __delitem__(self, idx):
+        self._segna()
+        if isinstance(idx, slice):
+            list.__delitem__(self, idx)
+            self._ricostruisci_indice()
+            return
+        vecchio = list.__getitem__(self, idx)
+        list.__delitem__(self, idx)
+        self._togli_da_indice(vecchio)
+
+    def __iadd__(self, other):
+        self.extend(other)
+        return self
+
+    def append(self, value):
+        traccia = self._segna()
+        value = self._wrap(value, traccia)
+        self._segna_inseriti(traccia, (value,))
+        list.append(self, value)
+        self._aggiungi_a_indice((value,))
+
+    def extend(self, values):
+        traccia = self._segna()
+        values = [self._wrap(v, traccia) for v in values]
+        self._segna_inseriti(traccia, values)
+        list.extend(self, values)
+        self._aggiungi_a_indice(values)
+
+    def insert(self, idx, value):
+        traccia = self._segna()
+        value = self._wrap(value, traccia)
+        self._segna_inseriti(traccia, (value,))
+        list.insert(self, idx, value)
+        self._aggiungi_a_indice((value,), in_coda=False)
+
+    def pop(self, idx=-1):
+        self._segna()
+        value = list.pop(self, idx)
+        self._togli_da_indice(value)
+        return value
+
+    def remove(self, value):
+        del self[self.index(value)]
+
+    def clear(self):
+        self._segna()
+        list.clear(self)
+        self._ricostruisci_indice()
+
+    def sort(self, *args, **kwargs):
+        self._segna()
+        list.sort(self, *args, **kwargs)
+        self._ricostruisci_indice()     # con id ripetuti cambia quale viene prima
+
+    def reverse(self):
+        self._segna()
+        list.reverse(self)
+        self._ricostruisci_indice()
+
+
+def _indicizza(lista):
+    """Costruisce l'indice id → oggetto (il primo vince, come nella scansione lineare)."""
+    if isinstance(lista, ListaTracciata):
+        indice = {}
+        for x in lista:
+            if isinstance(x, dict) and "id" in x:
+                indice.setdefault(x["id"], x)
+        lista._indice = indice
+
+
+def _cerca_per_id(lista, oid):
+    indice = getattr(lista, "_indice", None)
+    if indice is not None:
+        return indice.get(oid)
+    for x in lista:
+        if x["id"] == oid:
+            return x
+    return None
+
+
+def traccia_stato(state):
+    """Restituisce lo stato avvolto nei contenitori tracciati (idempotente)."""
+    if isinstance(state, DictTracciato) and getattr(state, "_traccia", None) is not None:
+        return state
+    traccia = _Traccia()
+    root = DictTracciato()
+    root._traccia, root._sezione, root._oggetto = traccia, None, None
+    for k, v in state.items():
+        dict.__setitem__(root, k, _avvolgi(v, traccia, k))
+        if k in SEZIONI_INDICIZZATE:
+            _indicizza(dict.__getitem__(root, k))
+    return root
+
+
+def _traccia_di(state):
+    return getattr(state, "_traccia", None)
+
+
+def versione_stato(state):
+    """Versione in memoria dello stato (cresce a ogni modifica reale)."""
+    traccia = _traccia_di(state)
+    return traccia.versione if traccia else 0
+
+
+def stato_modificato(state):
+    traccia = _traccia_di(state)
+    return traccia is None or traccia.versione != traccia.versione_salvata
+
+
+def sezioni_modificate(state):
+    """Chiavi di primo livello (atleti, squadre, gironi, ...) modificate dall'ultimo salvataggio."""
+    traccia = _traccia_di(state)
+    return traccia.sezioni.union(traccia.oggetti) if traccia else set(state.keys())
+
+
+def oggetti_modificati(state, sezione):
+    """Id degli oggetti di `sezione` modificati (o aggiunti) dall'ultimo salvataggio; None = stato non tracciato."""
+    traccia = _traccia_di(state)
+    return set(traccia.oggetti.get(sezione, ())) if traccia else None
+
+
+def _segna_salvato(state):
+    traccia = _traccia_di(state)
+    if traccia:
+        traccia.versione_salvata = traccia.versione
+        traccia.sezioni.clear()
+        traccia.oggetti.clear()
+
+
+def _segna_registrati(state, oggetti, sezioni=()):
+    """
+    Dopo un record di journal: puliti solo gli oggetti registrati ({sezione: id})
+    e le `sezioni` riscritte per intero. Lo stato torna "salvato" solo se non
+    resta altro da scrivere, altrimenti ci pensa l'autosave.
+    """
+    traccia = _traccia_di(state)
+    if not traccia:
+        return
+    traccia.sezioni.difference_update(sezioni)
+    for sezione in sezioni:
+        traccia.oggetti.pop(sezione, None)
+    for sezione, ids in oggetti.items():
+        rimasti = traccia.oggetti.get(sezione)
+        if rimasti is not None:
+            rimasti.difference_update(ids)
+            if not rimasti:
+                del traccia.oggetti[sezione]
+    if not traccia.modificata():
+        traccia.versione_salvata = traccia.versione
+
 # ─── LOAD / SAVE ─────────────────────────────────────────────────────────────
+# Persistenza = snapshot JSON + journal JSONL in append, su due file:
+# - DATA_FILE: torneo in corso (torneo, squadre, gironi, bracket, fase, ...);
+# - STORICO_FILE: atleti e ranking_globale, riscritto solo quando cambiano
+#   (gestione atleti in Setup, trasferisci_al_ranking).
+# - save_state scrive gli snapshot in modo atomico (file temporaneo + rename)
+#   e svuota il journal.
+# - salva_modifiche/salva_partita aggiungono UN record piccolo al journal
+#   (partite, squadre, atleti toccati): costo costante per conferma.
+# - load_state rilegge lo snapshot e riapplica i record con revisione più
+#   recente; una riga finale troncata da un crash viene ignorata.
+# - Le revisioni vengono da disco (LOCK_FILE), non dalla sessione: ogni
+#   scrittura prende il lock e la revisione successiva, così snapshot e
+#   record di sessioni diverse hanno un solo ordine e il filtro sulla
+#   revisione non scarta i record scritti dopo lo snapshot di un'altra.
+# - I risultati delle partite vivono anche negli shard (shard_partite.py), uno
+#   per partita con versione: salva_partita li scrive con controllo ottimistico
+#   e ogni sessione vi allinea la propria copia (sincronizza_partite), così
+#   lo snapshot di un dispositivo non cancella le conferme di un altro.
 
-def load_state():
-    base = empty_state()
+def _scrivi_atomico(path, testo):
+    # file temporaneo per scrittore: più sessioni/processi possono salvare insieme
+    tmp = f"{path}.{os.getpid()}-{threading.get_ident()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(testo)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def _prossima_revisione(state):
+    traccia = _traccia_di(state)
+    if traccia is None:
+        return 0
+    traccia.revisione += 1
+    return traccia.revisione
+
+
+def _ultima_revisione_su_disco():
+    """Revisione più alta tra snapshot e journal (archivio senza LOCK_FILE)."""
+    revisione = 0
     if Path(DATA_FILE).exists():
         with open(DATA_FILE, "r", encoding="utf-8") as f:
-            data = json.load(f)
-        for k, v in base.items():
-            data.setdefault(k, v)
-        for tk, tv in base["torneo"].items():
-            data["torneo"].setdefault(tk, tv)
-        return data
-    return base
+            revisione = json.load(f).get("revisione", 0)
+    records, _ = _leggi_journal()
+    return max([revisione] + [r.get("rev", 0) for r in records])
+
+
+@contextmanager
+def _archivio_bloccato(state):
+    """
+    Lock esclusivo sull'archivio JSON (sessioni e processi) e prossima
+    revisione presa da disco. Dentro il lock nessun record può finire tra
+    uno snapshot e lo svuotamento del journal.
+    """
+    with shard_partite.blocco_file(LOCK_FILE) as f:
+        f.seek(0)
+        testo = f.read().strip()
+        revisione = (int(testo) if testo else _ultima_revisione_su_disco()) + 1
+        f.truncate(0)
+        f.write(str(revisione).encode("ascii"))
+        f.flush()
+        traccia = _traccia_di(state)
+        if traccia:
+            traccia.revisione = revisione
+        yield revisione
+
+
+def _leggi_journal():
+    """
+    Record validi del journal, in ordine, e flag di integrità.
+    Si ferma alla prima riga illeggibile (scrittura interrotta da un crash).
+    """
+    if not Path(JOURNAL_FILE).exists():
+        return [], True
+    records = []
+    with open(JOURNAL_FILE, "r", encoding="utf-8") as f:
+        for riga in f:
+            try:
+                records.append(json.loads(riga))
+            except json.JSONDecodeError:
+                return records, False
+    return records, True
+
+
+def _upsert_per_id(lista, obj):
+    for i, x in enumerate(lista):
+        if x.get("id") == obj.get("id"):
+            lista[i] = obj
+            return
+    lista.append(obj)
+
+
+def _applica_record(state, record):
+    """Riapplica un record di journal sullo stato (idempotente)."""
+    if record.get("partite"):
+        posizioni = {}
+        for g in state["gironi"]:
+            for i, p in enumerate(g["partite"]):
+                posizioni[p["id"]] = (g["partite"], i)
+        for i, p in enumerate(state["bracket"]):
+            posizioni[p["id"]] = (state["bracket"], i)
+        for p in record["partite"]:
+            if p["id"] in posizioni:
+                lista, i = posizioni[p["id"]]
+                lista[i] = p
+            elif p.get("fase") == "eliminazione":
+                state["bracket"].append(p)
+                posizioni[p["id"]] = (state["bracket"], len(state["bracket"]) - 1)
+    for sq in record.get("squadre", []):
+        _upsert_per_id(state["squadre"], sq)
+    for a in record.get("atleti", []):
+        _upsert_per_id(state["atleti"], a)
+    rimosse = set(record.get("squadre_rimosse", []))
+    if rimosse:
+        state["squadre"] = [sq for sq in state["squadre"] if sq["id"] not in rimosse]
+    if record.get("rally"):
+        _applica_rally(state, record["rally"])
+
+
+def _carica_json():
+    """
+    (dati, revisione, da_riscrivere) da snapshot JSON + storico atleti + journal;
+    dati=None se non esiste ancora nulla. Un DATA_FILE nel vecchio formato a
+    file unico (con dentro gli atleti) viene migrato: da_riscrivere=True.
+    """
+    if not Path(DATA_FILE).exists():
+        return None, 0, False
+    with open(DATA_FILE, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    revisione = data.pop("revisione", 0)
+    da_migrare = False
+    if Path(STORICO_FILE).exists():
+        with open(STORICO_FILE, "r", encoding="utf-8") as f:
+            storico = json.load(f)
+        for k in SEZIONI_STORICO:
+            data[k] = storico.get(k, [])
+    else:
+        da_migrare = any(k in data for k in SEZIONI_STORICO)
+    records, integro = _leggi_journal()
+    for record in records:
+        if record.get("rev", 0) > revisione:
+            _applica_record(data, record)
+            revisione = record["rev"]
+    # Coda troncata o journal troppo lungo: si riparte da uno snapshot pulito
+    da_compattare = not integro or (Path(JOURNAL_FILE).exists()
+                                    and os.path.getsize(JOURNAL_FILE) > SOGLIA_COMPATTAZIONE)
+    return data, revisione, da_compattare or da_migrare
+
+
+def leggi_stato_salvato():
+    """
+    (dati, revisione) dall'archivio in sola lettura: niente compattazione né
+    traccia, per i lettori esterni (feed_live). dati=None se non c'è nulla.
+    """
+    if STORAGE_BACKEND == "sqlite":
+        import storage_sqlite
+        data = storage_sqlite.carica(storico=False)    # ai lettori serve il torneo, non le carriere
+        revisione = data.pop("revisione", 0) if data else 0
+    else:
+        data, revisione, _ = _carica_json()
+    if data is not None:
+        _applica_shard(data)
+    return data, revisione
+
+
+def _applica_shard(data):
+    """
+    Risultati degli shard più recenti copiati nelle partite dei dati letti da
+    disco (senza statistiche). Restituisce la generazione degli shard.
+    """
+    generazione, shard = shard_partite.cambiate_dal(None)
+    for p in _partite_con_shard(data, shard):
+        p.update((k, shard[p["id"]][k]) for k in shard_partite.CAMPI_RISULTATO)
+        p["versione"] = shard[p["id"]]["versione"]
+    return generazione
+
+
+def firma_archivio():
+    """Dimensione e data di modifica dei file dell'archivio: cambia a ogni salvataggio."""
+    if STORAGE_BACKEND == "sqlite":
+        import storage_sqlite
+        files = (storage_sqlite.DB_FILE, storage_sqlite.DB_FILE + "-wal")
+    else:
+        files = (DATA_FILE, JOURNAL_FILE)
+    files += (os.path.join(shard_partite.SHARD_DIR, shard_partite.GENERAZIONE_FILE),)
+    firma = []
+    for path in files:
+        try:
+            st_ = os.stat(path)
+            firma.append((st_.st_mtime_ns, st_.st_size))
+        except OSError:
+            firma.append(None)
+    return tuple(firma)
+
+
+def _prepara_dati():
+    """
+    (dati, revisione, generazione, da_salvare) dall'archivio, completati con i
+    default, i risultati degli shard e le classifiche dei gironi; dati=None se
+    non c'è ancora nulla. da_salvare: sezioni da riscrivere subito (migrazione,
+    journal da compattare, ranking ricostruito).
+    """
+    base = empty_state()
+    if STORAGE_BACKEND == "sqlite":
+        import storage_sqlite
+        data = storage_sqlite.carica()
+        revisione = data.pop("revisione", 0) if data else 0
+        da_compattare = False
+    else:
+        data, revisione, da_compattare = _carica_json()
+    if data is None:
+        return None, 0, None, set()
+    for k, v in base.items():
+        data.setdefault(k, v)
+    for tk, tv in base["torneo"].items():
+        data["torneo"].setdefault(tk, tv)
+    generazione = _applica_shard(data)
+    if generazione:
+        # Snapshot e journal di più dispositivi possono avere statistiche
+        # squadra non aggiornate: fanno fede i risultati delle partite
+        attese = _statistiche_da_risultati(data)
+        for sq in data["squadre"]:
+            sq.update(attese[sq["id"]])
+    for g in data["gironi"]:   # il journal non registra classifiche e scontri dei gironi
+        if not g.get("svizzera"):
+            ricostruisci_classifica_girone(data, g)
+            ricostruisci_scontri(g)
+    da_salvare = {"fase"} if da_compattare else set()
+    if ranking_da_ricostruire(data):
+        ricostruisci_ranking(data)
+        da_salvare.add("ranking_globale")
+    return data, revisione, generazione, da_salvare
+
+
+def _salva_preparati(state, da_salvare):
+    if da_salvare:
+        state._traccia.sezioni.update(da_salvare)
+        save_state(state)
+
+
+def load_state():
+    data, revisione, generazione, da_salvare = _prepara_dati()
+    if data is not None:
+        state = traccia_stato(data)
+        state._traccia.revisione = revisione
+        state._traccia.generazione = generazione
+        _salva_preparati(state, da_salvare)
+        return state
+    state = traccia_stato(empty_state())
+    state._traccia.segna("fase")   # primo avvio: il file va creato
+    return state
 
 def save_state(state):
-    with open(DATA_FILE, "w", encoding="utf-8") as f:
-        json.dump(state, f, ensure_ascii=False, indent=2)
+    """Snapshot completo (atomico) + azzeramento del journal."""
+    if STORAGE_BACKEND == "sqlite":
+        import storage_sqlite
+        # Su DB esistente si riscrivono solo le tabelle delle sezioni modificate
+        sezioni = sezioni_modificate(state) if storage_sqlite.esiste() else None
+        storage_sqlite.salva(state, _prossima_revisione(state), sezioni,
+                             atleti_modificati=oggetti_modificati(state, "atleti"))
+    else:
+        with _archivio_bloccato(state) as revisione:
+            sezioni = sezioni_modificate(state)
+            if sezioni.intersection(SEZIONI_STORICO) or not Path(STORICO_FILE).exists():
+                _salva_storico(state)
+            doc = {k: v for k, v in state.items() if k not in SEZIONI_STORICO}
+            doc["revisione"] = revisione
+            _scrivi_atomico(DATA_FILE, json.dumps(doc, ensure_ascii=False))
+            open(JOURNAL_FILE, "w", encoding="utf-8").close()
+    _segna_salvato(state)
+
+def _salva_storico(state):
+    doc = {k: state.get(k, []) for k in SEZIONI_STORICO}
+    _scrivi_atomico(STORICO_FILE, json.dumps(doc, ensure_ascii=False))
+
+def salva_modifiche(state, partite=(), squadre=(), atleti=(), squadre_rimosse=()):
+    """
+    Aggiunge un record al journal con gli oggetti modificati (scrittura in append,
+    costo indipendente dalla dimensione del torneo). Oltre SOGLIA_COMPATTAZIONE
+    il journal viene compattato in un nuovo snapshot. Le modifiche agli atleti
+    riscrivono lo storico atleti, che non passa dal journal. Restano da salvare
+    (autosave) le modifiche fuori dagli oggetti registrati.
+    """
+    record = {"ts": datetime.now().isoformat(timespec="seconds")}
+    if partite: record["partite"] = list(partite)
+    if squadre: record["squadre"] = list(squadre)
+    if squadre_rimosse: record["squadre_rimosse"] = list(squadre_rimosse)
+    ids_partite = {p["id"] for p in partite}
+    registrati = {"gironi": ids_partite, "bracket": ids_partite,
+                  "squadre": {sq["id"] for sq in squadre}, "atleti": {a["id"] for a in atleti}}
+    if ids_partite:
+        registrati["gironi"] = ids_partite | {DERIVATO}   # classifiche ricostruite al caricamento
+    _scrivi_record(state, record, registrati, atleti)
+
+
+def _scrivi_record(state, record, registrati, atleti=()):
+    """Record nel journal (o nel database SQLite) e pulizia degli oggetti registrati."""
+    if STORAGE_BACKEND == "sqlite":
+        import storage_sqlite
+        if atleti: record["atleti"] = list(atleti)
+        record["rev"] = _prossima_revisione(state)
+        storage_sqlite.salva_record(record, torneo=state["torneo"]["nome"])
+        _segna_registrati(state, registrati)
+        return
+    storico = ()
+    with _archivio_bloccato(state) as revisione:
+        if atleti or sezioni_modificate(state).intersection(SEZIONI_STORICO):
+            _salva_storico(state)
+            storico = SEZIONI_STORICO
+        riga = json.dumps({"rev": revisione, **record}, ensure_ascii=False) + "\n"
+        with open(JOURNAL_FILE, "a", encoding="utf-8") as f:
+            f.write(riga)
+            f.flush()
+            os.fsync(f.fileno())
+    _segna_registrati(state, registrati, storico)
+    if os.path.getsize(JOURNAL_FILE) > SOGLIA_COMPATTAZIONE:
+        save_state(state)
+
+
+def salva_rally(state, partita, annullato=False):
+    """
+    Registra solo l'ultimo rally di `partita` (o il suo annullamento): una riga
+    di journal di dimensione costante, senza shard né generazione. Il
+    segnapunti la usa a ogni punto dentro un set; inizio, fine set e fine
+    partita passano da salva_partita. Con SQLite si aggiorna la sola riga
+    della partita (il database non ha journal).
+    """
+    if STORAGE_BACKEND == "sqlite":
+        salva_modifiche(state, partite=[partita])
+        return
+    delta = {"id": partita["id"]}
+    if annullato:
+        delta["annulla"] = True
+    else:
+        delta["codice"] = partita["rally"]["log"][-1]
+    record = {"ts": datetime.now().isoformat(timespec="seconds"), "rally": delta}
+    _scrivi_record(state, record, {"gironi": {partita["id"]}, "bracket": {partita["id"]}})
+
+
+def _applica_rally(state, delta):
+    """Riapplica un rally registrato da salva_rally (stesso codice, stesso istante)."""
+    partite = [p for g in state.get("gironi", []) for p in g["partite"]] + list(state.get("bracket", []))
+    partita = next((p for p in partite if p["id"] == delta["id"]), None)
+    if partita is None or not partita.get("rally") or partita["confermata"]:
+        return
+    if delta.get("annulla"):
+        annulla_punto(partita)
+    else:
+        codice = delta["codice"]
+        segna_punto(state["torneo"], partita, (codice & 1) + 1, adesso=partita["rally"]["t0"] + (codice >> 2))
+
+
+def salva_partita(state, *partite):
+    """
+    Registra le partite indicate negli shard (controllo di versione) e nel
+    journal con le squadre che le hanno giocate. ConflittoPartita se un altro
+    dispositivo ha già scritto una di queste partite: nulla viene salvato e la
+    copia in memoria torna al risultato su disco.
+    """
+    traccia = _traccia_di(state)
+    try:
+        precedente, generazione = shard_partite.scrivi(partite)
+    except ConflittoPartita:
+        sincronizza_partite(state)
+        raise
+    if traccia and traccia.generazione == precedente:
+        traccia.generazione = generazione   # nessun altro dispositivo ha scritto nel frattempo
+    else:
+        sincronizza_partite(state)          # risultati altrui nelle statistiche prima del journal
+    squadre = {}
+    for p in partite:
+        for sid in (p.get("sq1"), p.get("sq2")):
+            sq = get_squadra_by_id(state, sid)
+            if sq:
+                squadre[sid] = sq
+    salva_modifiche(state, partite=partite, squadre=squadre.values())
+
+@contextmanager
+def annulla_se_in_conflitto(state):
+    """
+    Per le modifiche in memoria salvate poi con salva_partita (simulazioni in
+    blocco, correzioni, avanzamento nel tabellone): se il salvataggio va in
+    ConflittoPartita, gironi, tabellone e squadre tornano come prima del blocco
+    e si riallineano agli shard scritti dagli altri; l'eccezione prosegue.
+    """
+    prima = {k: json.loads(json.dumps(state.get(k) or [])) for k in ("gironi", "bracket", "squadre")}
+    traccia = _traccia_di(state)
+    generazione = traccia.generazione if traccia else None
+    try:
+        yield
+    except ConflittoPartita:
+        for k, v in prima.items():
+            state[k] = v
+        if traccia:
+            traccia.generazione = generazione   # shard altrui da riapplicare sullo stato ripristinato
+        sincronizza_partite(state)
+        raise
+
+
+def _partite_con_shard(state, shard):
+    """Partite dello stato con uno shard più recente e compatibile (stesse squadre, o slot ancora vuoti)."""
+    if not shard:
+        return []
+    partite = [p for g in state.get("gironi", []) for p in g["partite"]] + list(state.get("bracket", []))
+    return [p for p in partite
+            if p["id"] in shard and shard[p["id"]]["versione"] > p.get("versione", 0)
+            and all(p.get(k) in (None, shard[p["id"]][k]) for k in ("sq1", "sq2"))]
+
+
+def sincronizza_partite(state):
+    """
+    Porta nello stato i risultati scritti da altre sessioni o dispositivi
+    (shard più recenti della copia in memoria): il vecchio contributo della
+    partita alla classifica viene tolto e quello nuovo sommato, come in
+    correggi_risultato. Restituisce le partite aggiornate.
+    """
+    traccia = _traccia_di(state)
+    generazione, shard = shard_partite.cambiate_dal(traccia.generazione if traccia else None)
+    if traccia:
+        traccia.generazione = generazione
+    aggiornate = _partite_con_shard(state, shard)
+    for p in aggiornate:
+        doc = shard[p["id"]]
+        if _conteggiata(p):
+            aggiorna_classifica_squadra(state, p, -1)
+        p.update((k, doc[k]) for k in shard_partite.CAMPI_RISULTATO if k != "conteggiata")
+        p["conteggiata"] = False
+        p["versione"] = doc["versione"]
+        if doc.get("conteggiata", doc["confermata"]):
+            aggiorna_classifica_squadra(state, p)
+    return aggiornate
+
+
+def azzera_partite():
+    """Nuovo torneo o reset: via gli shard del torneo precedente (gli id delle partite si ripetono)."""
+    shard_partite.azzera()
+
+
+def descrizione_archivio():
+    """Nome del file dati del backend attivo (per la sidebar)."""
+    if STORAGE_BACKEND == "sqlite":
+        import storage_sqlite
+        return f"{storage_sqlite.DB_FILE} + {shard_partite.SHARD_DIR}/"
+    return f"{DATA_FILE} + {STORICO_FILE} + {shard_partite.SHARD_DIR}/"
+
+def salva_se_modificato(state):
+    """Autosave: scrive il file solo se lo stato è cambiato. Restituisce True se ha salvato."""
+    if not stato_modificato(state):
+        STATISTICHE_AUTOSAVE["saltati"] += 1
+        return False
+    save_state(state)
+    STATISTICHE_AUTOSAVE["eseguiti"] += 1
+    return True
+
+# ─── STATO CONDIVISO TRA SESSIONI ────────────────────────────────────────────
+# Con molte sessioni aperte (tablet, maxi-schermi, spettatori) ognuna faceva
+# il proprio load_state: una lettura completa dell'archivio e una copia dello
+# storico atleti per sessione. ArchivioCondiviso (uno per processo, creato da
+# app.py con st.cache_resource) rilegge l'archivio una volta per modifica:
+# - lo storico atleti (atleti + ranking_globale, la parte che cresce) è un
+#   solo oggetto in sola lettura messo in tutte le sessioni; chi lo modifica
+#   chiama prima storico_modificabile(state) e lavora su una copia privata
+#   (copy-on-write), che torna quella condivisa dopo il salvataggio;
+# - il torneo (piccolo, modificato da quasi ogni pagina) resta privato per
+#   sessione, ricavato dai dati già letti senza rileggere i file.
+
+def _firma_storico():
+    """Firma dei file da cui viene lo storico atleti (col DB è l'intero archivio)."""
+    if STORAGE_BACKEND == "sqlite":
+        return firma_archivio()
+    try:
+        st_ = os.stat(STORICO_FILE)
+        return st_.st_mtime_ns, st_.st_size
+    except OSError:
+        return None
+
+
+def storico_modificabile(state):
+    """
+    Copy-on-write dello storico atleti: se la sessione usa quello condiviso
+    (sola lettura) ne prende una copia privata. Da chiamare prima di
+    modificare atleti o ranking_globale.
+    """
+    traccia = _traccia_di(state)
+    if traccia is None:
+        return
+    for k in SEZIONI_STORICO:
+        condiviso = dict.get(state, k)
+        if getattr(condiviso, "_traccia", None) is not None and condiviso._traccia.sola_lettura:
+            copia = _avvolgi(condiviso, traccia, k)   # altra traccia: contenitori nuovi
+            _indicizza(copia)
+            dict.__setitem__(state, k, copia)
+
+
+class ArchivioCondiviso:
+    """Archivio letto una volta per modifica e condiviso da tutte le sessioni del processo."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # (firma archivio, firma storico, torneo, storico, revisione, generazione):
+        # sostituita in blocco, chi l'ha già presa continua a leggere la sua
+        self._dati = None
+        self.letture = 0
+
+    def _dati_correnti(self, solo_storico=False):
+        def valido(dati):
+            if dati is None:
+                return False
+            return dati[1] == _firma_storico() if solo_storico else dati[0] == firma_archivio()
+        dati = self._dati
+        if valido(dati):
+            return dati
+        with self._lock:
+            if not valido(self._dati):      # un'altra sessione può averlo appena riletto
+                self._dati = self._leggi()
+            return self._dati
+
+    def _leggi(self):
+        # Firme prese prima di leggere: un salvataggio a metà lettura fa rileggere la volta dopo
+        firma, firma_storico = firma_archivio(), _firma_storico()
+        data, revisione, generazione, da_salvare = _prepara_dati()
+        self.letture += 1
+        if data is None:
+            return firma, firma_storico, None, {}, 0, None
+        if da_salvare:
+            state = traccia_stato(data)
+            state._traccia.revisione = revisione
+            _salva_preparati(state, da_salvare)
+            revisione = state._traccia.revisione
+            firma, firma_storico = firma_archivio(), _firma_storico()
+        traccia = _Traccia()
+        storico = {}
+        for k in SEZIONI_STORICO:
+            storico[k] = _avvolgi(data.pop(k, []), traccia, k)
+            _indicizza(storico[k])
+        traccia.sola_lettura = True
+        return firma, firma_storico, data, storico, revisione, generazione
+
+    def nuova_sessione(self):
+        """Stato tracciato per una nuova sessione: torneo privato, storico condiviso."""
+        _, _, torneo, storico, revisione, generazione = self._dati_correnti()
+        if torneo is None:
+            return load_state()             # archivio vuoto: primo avvio
+        state = traccia_stato(torneo)       # contenitori nuovi, valori in comune con torneo
+        for k, v in storico.items():
+            dict.__setitem__(state, k, v)
+        state._traccia.revisione = revisione
+        state._traccia.generazione = generazione
+        return state
+
+    def aggiorna_sessione(self, state):
+        """
+        A ogni rerun: la sessione passa all'ultimo storico condiviso, anche
+        lasciando la propria copia privata se le sue modifiche sono già salvate.
+        """
+        traccia = _traccia_di(state)
+        if traccia is None or sezioni_modificate(state).intersection(SEZIONI_STORICO):
+            return                          # modifiche allo storico non ancora salvate
+        for k, v in self._dati_correnti(solo_storico=True)[3].items():
+            if dict.get(state, k) is not v:
+                dict.__setitem__(state, k, v)
 
 # ─── ATLETI ──────────────────────────────────────────────────────────────────
 
@@ -73,10 +1015,11 @@ def new_atleta(nome):
     }
 
 def get_atleta_by_id(state, aid):
-    for a in state["atleti"]:
-        if a["id"] == aid:
-            return a
-    return None
+    return _cerca_per_id(state["atleti"], aid)
+
+
+PUNTI_POSIZIONE_OVERALL = {1: 25, 2: 18, 3: 12}   # punti carta per piazzamento
+PUNTI_PARTECIPAZIONE_OVERALL = 3                    # 4º posto e oltre
 
 
 def compute_overall(atleta):
@@ -94,8 +1037,9 @@ def compute_overall(atleta):
     if tornei == 0 and vittorie == 0 and set_vinti == 0 and punti_fatti == 0:
         return 40  # Nuovo giocatore: carta Overall 40 Bronzo Raro
 
-    # Punti da medaglie/posizioni (1°=25, 2°=18, 3°=12, altri=3)
-    pts_pos = sum({1: 25, 2: 18, 3: 12}.get(pos, 3) for _, pos in storico)
+    # Punti da medaglie/posizioni: scala storica delle carte, distinta dai punti
+    # ranking (100/70/50/20) perché l'Overall dei profili salvati non cambi
+    pts_pos = sum(PUNTI_POSIZIONE_OVERALL.get(pos, PUNTI_PARTECIPAZIONE_OVERALL) for _, pos in storico)
     # Punti da vittorie e set
     pts_vittorie = vittorie * 4
     pts_set = min(set_vinti * 2, 30)
@@ -159,10 +1103,7 @@ def new_squadra(nome, atleta1_id, atleta2_id):
     }
 
 def get_squadra_by_id(state, sid):
-    for s in state["squadre"]:
-        if s["id"] == sid:
-            return s
-    return None
+    return _cerca_per_id(state["squadre"], sid)
 
 def nome_squadra(state, sid):
     s = get_squadra_by_id(state, sid)
@@ -184,6 +1125,7 @@ def new_partita(sq1_id, sq2_id, fase="girone", girone=None, round_elim=0, label_
         "punteggi": [],
         "in_battuta": 1,
         "confermata": False,
+        "conteggiata": False,       # risultato sommato alle statistiche squadra (aggiorna_classifica_squadra)
         "vincitore": None,
     }
 
@@ -231,17 +1173,167 @@ def simula_partita(state, partita):
     return partita
 
 # ─── CLASSIFICA GIRONE ───────────────────────────────────────────────────────
+# girone["classifica"] è la lista degli id squadra già ordinata (migliore
+# prima). aggiorna_classifica_squadra sposta solo le due squadre della partita
+# (ricerca binaria); l'ordinamento completo serve solo per gironi nuovi o
+# al caricamento (il journal non registra i gironi). Il sistema svizzero ha
+# la sua classifica (Buchholz dipende anche dagli avversari).
+
+def chiave_classifica(sq):
+    """Punti, vittorie, differenza set, differenza punti; a parità nome e id."""
+    return (
+        -sq["punti_classifica"], -sq["vittorie"],
+        -(sq["set_vinti"] - sq["set_persi"]),
+        -(sq["punti_fatti"] - sq["punti_subiti"]),
+        sq["nome"].lower(), sq["id"],
+    )
+
+
+def ricostruisci_classifica_girone(state, girone):
+    """Ordinamento completo (girone nuovo, caricamento, dati incoerenti)."""
+    squadre = (get_squadra_by_id(state, sid) for sid in girone["squadre"])
+    girone["classifica"] = [sq["id"] for sq in sorted((sq for sq in squadre if sq), key=chiave_classifica)]
+
+
+def classifica_girone(state, girone):
+    """
+    Squadre del girone (dict) in ordine di classifica, dalla classifica mantenuta.
+    Con criterio_passaggio "avulsa" le squadre a pari punti sono ordinate
+    dagli scontri diretti (vedi CLASSIFICA AVULSA).
+    """
+    if len(girone.get("classifica") or ()) != len(girone["squadre"]):
+        ricostruisci_classifica_girone(state, girone)
+    squadre = [sq for sq in (get_squadra_by_id(state, sid) for sid in girone["classifica"]) if sq]
+    if state["torneo"].get("criterio_passaggio") == "avulsa" and not girone.get("svizzera"):
+        squadre = _applica_avulsa(girone, squadre)
+    return squadre
+
+
+def _riposiziona_in_classifica(state, girone, ids):
+    """
+    Toglie le squadre dalla classifica e le reinserisce con ricerca binaria
+    (prima tutte fuori: le loro statistiche sono già cambiate).
+    """
+    classifica = girone["classifica"]
+    for sid in ids:
+        classifica.remove(sid)
+    for sid in ids:
+        chiave = chiave_classifica(get_squadra_by_id(state, sid))
+        lo, hi = 0, len(classifica)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if chiave_classifica(get_squadra_by_id(state, classifica[mid])) < chiave:
+                lo = mid + 1
+            else:
+                hi = mid
+        classifica.insert(lo, sid)
+
+
+def _aggiorna_classifiche_gironi(state, partita, segno=1):
+    """Riposiziona le squadre della partita nella classifica del loro girone."""
+    gironi = state.get("gironi") or []
+    indice = partita.get("girone") or 0
+    if partita.get("fase") == "girone" and indice < len(gironi):
+        candidati = [gironi[indice]]
+    else:   # playoff: le statistiche cambiano anche per la classifica del girone
+        candidati = gironi
+    for girone in candidati:
+        ids = [sid for sid in (partita["sq1"], partita["sq2"]) if sid in girone["squadre"]]
+        if not ids or girone.get("svizzera"):
+            continue
+        if partita.get("fase") == "girone":
+            _registra_scontro(girone, partita, segno)
+        if len(girone.get("classifica") or ()) != len(girone["squadre"]):
+            ricostruisci_classifica_girone(state, girone)
+        else:
+            _riposiziona_in_classifica(state, girone, ids)
+
+
+# ─── CLASSIFICA AVULSA ───────────────────────────────────────────────────────
+# girone["scontri"][a][b] = [punti_classifica, set_vinti, set_persi,
+# punti_fatti, punti_subiti] di a contro b, aggiornato a ogni conferma.
+# A pari punti la mini-classifica si calcola solo tra le squadre coinvolte
+# leggendo la matrice (niente scansione delle partite); i sottogruppi ancora
+# pari si rivalutano ricorsivamente tra loro, e se gli scontri diretti non
+# separano nessuno valgono i criteri generali (chiave_classifica).
+
+def _registra_scontro(girone, partita, segno=1):
+    """Aggiunge (segno=-1: toglie) il risultato di una partita di girone agli scontri diretti."""
+    if "scontri" not in girone:
+        ricostruisci_scontri(girone)
+        return   # la ricostruzione segue già il flag "conteggiata"
+    sq1, sq2 = partita["sq1"], partita["sq2"]
+    s1v, s2v = partita["set_sq1"], partita["set_sq2"]
+    p1 = sum(p[0] for p in partita["punteggi"])
+    p2 = sum(p[1] for p in partita["punteggi"])
+    vince_1 = partita["vincitore"] == sq1
+    for sid, avv, pti, sv, sp, pf, ps in (
+        (sq1, sq2, 3 if vince_1 else 1, s1v, s2v, p1, p2),
+        (sq2, sq1, 1 if vince_1 else 3, s2v, s1v, p2, p1),
+    ):
+        riga = girone["scontri"].setdefault(sid, {})
+        cella = riga.setdefault(avv, [0, 0, 0, 0, 0])
+        for i, v in enumerate((pti, sv, sp, pf, ps)):
+            cella[i] += segno * v
+
+
+def ricostruisci_scontri(girone):
+    """Matrice degli scontri diretti dalle partite conteggiate (caricamento o migrazione)."""
+    girone["scontri"] = {}
+    for p in girone["partite"]:
+        if _conteggiata(p) and BYE_ID not in (p["sq1"], p["sq2"]):
+            _registra_scontro(girone, p)
+
+
+def _applica_avulsa(girone, squadre):
+    """squadre ordinate per chiave_classifica → blocchi a pari punti risolti con gli scontri diretti."""
+    if "scontri" not in girone:
+        ricostruisci_scontri(girone)
+    ordinate, i = [], 0
+    while i < len(squadre):
+        j = i + 1
+        while j < len(squadre) and squadre[j]["punti_classifica"] == squadre[i]["punti_classifica"]:
+            j += 1
+        ordinate.extend(_ordina_avulsa(girone["scontri"], squadre[i:j]) if j - i > 1 else squadre[i:j])
+        i = j
+    return ordinate
+
+
+def _ordina_avulsa(scontri, pari):
+    """Mini-classifica tra le squadre `pari`: punti, differenza set, differenza punti negli scontri diretti."""
+    ids = {sq["id"] for sq in pari}
+    chiavi = {}
+    for sq in pari:
+        tot = [0, 0, 0, 0, 0]
+        for avv, cella in scontri.get(sq["id"], {}).items():
+            if avv in ids:
+                for k in range(5):
+                    tot[k] += cella[k]
+        chiavi[sq["id"]] = (-tot[0], -(tot[1] - tot[2]), -(tot[3] - tot[4]))
+    if len(set(chiavi.values())) == 1:
+        return sorted(pari, key=chiave_classifica)   # scontri diretti non decisivi
+    ordinate = []
+    gruppi = {}
+    for sq in sorted(pari, key=lambda s: (chiavi[s["id"]], chiave_classifica(s))):
+        gruppi.setdefault(chiavi[sq["id"]], []).append(sq)
+    for gruppo in gruppi.values():
+        ordinate.extend(_ordina_avulsa(scontri, gruppo) if len(gruppo) > 1 else gruppo)
+    return ordinate
 
-def aggiorna_classifica_squadra(state, partita):
-    """Aggiorna stats squadra dopo conferma risultato."""
+
+def aggiorna_classifica_squadra(state, partita, segno=1):
+    """
+    Aggiorna stats squadra dopo conferma risultato.
+    segno=-1 toglie il contributo della partita (correzione risultato).
+    """
     sq1 = get_squadra_by_id(state, partita["sq1"])
     sq2 = get_squadra_by_id(state, partita["sq2"])
     if not sq1 or not sq2:
         return
 
-    s1v, s2v = partita["set_sq1"], partita["set_sq2"]
-    p1_tot = sum(p[0] for p in partita["punteggi"])
-    p2_tot = sum(p[1] for p in partita["punteggi"])
+    s1v, s2v = segno * partita["set_sq1"], segno * partita["set_sq2"]
+    p1_tot = segno * sum(p[0] for p in partita["punteggi"])
+    p2_tot = segno * sum(p[1] for p in partita["punteggi"])
 
     sq1["set_vinti"] += s1v; sq1["set_persi"] += s2v
     sq2["set_vinti"] += s2v; sq2["set_persi"] += s1v
@@ -249,17 +1341,294 @@ def aggiorna_classifica_squadra(state, partita):
     sq2["punti_fatti"] += p2_tot; sq2["punti_subiti"] += p1_tot
 
     if partita["vincitore"] == partita["sq1"]:
-        sq1["vittorie"] += 1; sq1["punti_classifica"] += 3
-        sq2["sconfitte"] += 1; sq2["punti_classifica"] += 1
+        sq1["vittorie"] += segno; sq1["punti_classifica"] += 3 * segno
+        sq2["sconfitte"] += segno; sq2["punti_classifica"] += segno
     else:
-        sq2["vittorie"] += 1; sq2["punti_classifica"] += 3
-        sq1["sconfitte"] += 1; sq1["punti_classifica"] += 1
+        sq2["vittorie"] += segno; sq2["punti_classifica"] += 3 * segno
+        sq1["sconfitte"] += segno; sq1["punti_classifica"] += segno
+    partita["conteggiata"] = segno > 0
+    _aggiorna_classifiche_gironi(state, partita, segno)
+
+# ─── CORREZIONE RISULTATI ────────────────────────────────────────────────────
+# Una partita confermata si corregge togliendo il suo contributo (segno -1) e
+# sommando quello nuovo: costo costante, classifica e scontri diretti inclusi.
+# Se cambia la vincitrice si aggiorna ciò che sta a valle (partita successiva
+# del tabellone o tabellone generato dai gironi), ma solo se nulla di quello
+# che ne dipende è già stato giocato: i gironi si correggono finché il
+# tabellone non è iniziato.
+
+_STATS_SQUADRA = ("punti_classifica", "vittorie", "sconfitte",
+                  "set_vinti", "set_persi", "punti_fatti", "punti_subiti")
+
+
+def _conteggiata(partita):
+    """Partite salvate prima del flag: conteggiate se confermate."""
+    return partita.get("conteggiata", partita["confermata"])
+
+
+def correggi_risultato(state, partita, punteggi):
+    """
+    Sostituisce il risultato di una partita già confermata con `punteggi`
+    [(p1, p2), ...]. Restituisce le partite modificate (da salvare);
+    ValueError se la correzione non è possibile (nulla viene modificato).
+    """
+    if not partita["confermata"] or BYE_ID in (partita["sq1"], partita["sq2"]):
+        raise ValueError("Si possono correggere solo partite confermate (BYE esclusi).")
+    if state.get("vincitore"):
+        raise ValueError("Torneo già proclamato: i dati sono già passati al ranking.")
+    punteggi = [(int(a), int(b)) for a, b in punteggi if a or b]
+    if not punteggi:
+        raise ValueError("Inserisci almeno un set.")
+    if any(a == b for a, b in punteggi):
+        raise ValueError("Un set non può finire in parità.")
+    set_1 = sum(1 for a, b in punteggi if a > b)
+    set_2 = len(punteggi) - set_1
+    if set_1 == set_2:
+        raise ValueError("Set vinti in parità: manca il set decisivo.")
+    vincitore = partita["sq1"] if set_1 > set_2 else partita["sq2"]
+    cambia = vincitore != partita["vincitore"]
+    if cambia and partita.get("fase") != "girone":
+        da_riaprire = _a_valle_tabellone(state, partita)   # ValueError se già giocate
+    if partita.get("fase") == "girone":
+        if _tabellone_iniziato(state):
+            # le statistiche squadra comprendono già i playoff: qualificate non più ricalcolabili
+            raise ValueError("Tabellone già iniziato: i risultati dei gironi non si possono più correggere.")
+        if cambia:
+            _controlla_turni_svizzera(state, partita)
+
+    conteggiata = _conteggiata(partita)
+    if conteggiata:
+        aggiorna_classifica_squadra(state, partita, -1)
+    partita.update(punteggi=punteggi, set_sq1=set_1, set_sq2=set_2, vincitore=vincitore)
+    if conteggiata:
+        aggiorna_classifica_squadra(state, partita)
+    modificate = [partita]
+    if not cambia and partita.get("fase") != "girone":
+        return modificate
+    if partita.get("fase") != "girone":
+        for p in da_riaprire:
+            p["confermata"] = False      # BYE chiusi a cascata: avanza_vincitore li richiude
+        gf2 = _cerca_per_id(state["bracket"], "de_gf2") if partita.get("reset") else None
+        if gf2 is not None:
+            state["bracket"].remove(gf2)     # avanza_vincitore la ricrea se serve
+        return modificate + avanza_vincitore(state, partita)
+    return modificate + _rigenera_tabellone(state)
+
+
+def _tabellone_iniziato(state):
+    return any(p["confermata"] and BYE_ID not in (p["sq1"], p["sq2"]) for p in state.get("bracket", []))
+
+
+def _a_valle_tabellone(state, partita):
+    """
+    Partite che ricevono vincitore/perdente di `partita`: nessuna deve essere
+    già giocata (i BYE chiusi in automatico si riaprono, seguendo la cascata).
+    """
+    if "next_id" not in partita:
+        if any(p.get("round_elim", 0) > partita.get("round_elim", 0) for p in state["bracket"]):
+            raise ValueError("Tabellone di vecchio formato: turno successivo già generato.")
+        return []
+    da_riaprire = []
+    for dest in (partita.get("next_id"), partita.get("loser_id")):
+        succ = _cerca_per_id(state["bracket"], dest) if dest else None
+        if succ is None or not succ["confermata"]:
+            continue
+        if BYE_ID not in (succ["sq1"], succ["sq2"]):
+            raise ValueError("La partita successiva del tabellone è già stata giocata: correggi prima quella.")
+        da_riaprire.append(succ)
+        da_riaprire.extend(_a_valle_tabellone(state, succ))
+    if partita.get("reset"):
+        gf2 = _cerca_per_id(state["bracket"], "de_gf2")
+        if gf2 is not None and gf2["confermata"]:
+            raise ValueError("La finalissima di reset è già stata giocata: correggi prima quella.")
+    return da_riaprire
+
+
+def _controlla_turni_svizzera(state, partita):
+    """Nel sistema svizzero i turni successivi sono accoppiati sui punti: vincitrice bloccata."""
+    gironi = state.get("gironi") or []
+    girone = gironi[partita.get("girone") or 0] if gironi else None
+    if girone and girone.get("svizzera") and partita.get("turno", 0) < girone["turno"]:
+        raise ValueError("Turno successivo già accoppiato: si può correggere il punteggio, non la vincitrice.")
+
+
+def _rigenera_tabellone(state):
+    """
+    Dopo una correzione nei gironi: se il tabellone è già stato generato (e
+    non ancora iniziato) e le qualificate o gli accoppiamenti cambiano, lo
+    rigenera. Restituisce le partite nuove.
+    """
+    if not state.get("bracket"):
+        return []
+    def primo_turno(bracket):
+        return [(p["sq1"], p["sq2"]) for p in bracket if p.get("round_elim", 0) == 0]
+
+    nuovo = genera_bracket_da_gironi(state)
+    if primo_turno(nuovo) == primo_turno(state["bracket"]):
+        return []
+    state["bracket"] = riprendi_versioni(nuovo)
+    return list(state["bracket"])
+
+
+def riprendi_versioni(partite):
+    """
+    Partite nuove con id già usati (e_r0_0, e_finale_12, ... di un tabellone
+    rigenerato): partono dalla versione dello shard su disco, così il loro
+    salvataggio sostituisce le vecchie invece di risultare in conflitto.
+    """
+    for p in partite:
+        doc = shard_partite.leggi_shard(p["id"])
+        if doc:
+            p["versione"] = max(p.get("versione", 0), doc["versione"])
+    return partite
+
+
+def _statistiche_da_risultati(state, errori=None):
+    """
+    {id squadra: statistiche} ricalcolate da zero dai punteggi delle partite
+    conteggiate; in `errori` i set vinti che non tornano con i punteggi.
+    """
+    attese = {sq["id"]: dict.fromkeys(_STATS_SQUADRA, 0) for sq in state["squadre"]}
+    partite = [p for g in state.get("gironi", []) for p in g["partite"]] + list(state.get("bracket", []))
+    for p in partite:
+        if BYE_ID in (p["sq1"], p["sq2"]):
+            if p["confermata"] and p.get("fase") == "girone" and p["vincitore"] in attese:
+                t = attese[p["vincitore"]]        # BYE del sistema svizzero: vittoria a tavolino
+                t["punti_classifica"] += 3; t["vittorie"] += 1; t["set_vinti"] += 1
+            continue
+        if not _conteggiata(p) or p["sq1"] not in attese or p["sq2"] not in attese:
+            continue
+        set_1 = sum(1 for a, b in p["punteggi"] if a > b)
+        set_2 = sum(1 for a, b in p["punteggi"] if b > a)
+        if errori is not None and (set_1, set_2) != (p["set_sq1"], p["set_sq2"]):
+            errori.append(f"Partita {p['id']}: set {p['set_sq1']}-{p['set_sq2']}, dai punteggi {set_1}-{set_2}")
+        vince_1 = p["vincitore"] == p["sq1"]
+        for sid, vince, sv, sp, pf, ps in (
+            (p["sq1"], vince_1, set_1, set_2, sum(a for a, _ in p["punteggi"]), sum(b for _, b in p["punteggi"])),
+            (p["sq2"], not vince_1, set_2, set_1, sum(b for _, b in p["punteggi"]), sum(a for a, _ in p["punteggi"])),
+        ):
+            t = attese[sid]
+            t["punti_classifica"] += 3 if vince else 1
+            t["vittorie" if vince else "sconfitte"] += 1
+            t["set_vinti"] += sv; t["set_persi"] += sp
+            t["punti_fatti"] += pf; t["punti_subiti"] += ps
+    return attese
+
+
+def verifica_coerenza(state):
+    """
+    Ricalcola da zero, dai punteggi delle partite conteggiate, statistiche
+    squadra, classifiche e scontri diretti dei gironi e li confronta con quelli
+    mantenuti in modo incrementale. Restituisce l'elenco delle differenze
+    (vuoto = tutto coerente).
+    """
+    errori = []
+    attese = _statistiche_da_risultati(state, errori)
+    for sq in state["squadre"]:
+        for k, v in attese[sq["id"]].items():
+            if sq.get(k, 0) != v:
+                errori.append(f"{sq['nome']}: {k} = {sq.get(k, 0)}, ricalcolato {v}")
+    for g in state.get("gironi", []):
+        if g.get("svizzera"):
+            continue
+        if "classifica" in g:
+            ordinate = sorted((get_squadra_by_id(state, sid) for sid in g["squadre"]), key=chiave_classifica)
+            if list(g["classifica"]) != [sq["id"] for sq in ordinate]:
+                errori.append(f"{g['nome']}: classifica non ordinata")
+        if "scontri" in g:
+            ricalcolo = {"partite": g["partite"]}
+            ricostruisci_scontri(ricalcolo)
+            mantenuti = {a: {b: list(c) for b, c in riga.items() if any(c)} for a, riga in g["scontri"].items()}
+            mantenuti = {a: riga for a, riga in mantenuti.items() if riga}
+            if mantenuti != ricalcolo["scontri"]:
+                errori.append(f"{g['nome']}: scontri diretti diversi dal ricalcolo")
+    return errori
+
+# ─── INSERIMENTO IN BLOCCO ───────────────────────────────────────────────────
+# I segnapunti consegnano i referti su carta, a gruppi: tutte le righe di un
+# girone si validano prima di toccare lo stato, poi si confermano in un solo
+# passaggio con un unico salvataggio nel journal.
+
+def valida_punteggi(torneo, punteggi):
+    """
+    Controlla un risultato [(p1, p2), ...] con le regole del beach volley:
+    set a punteggio_max (terzo set del Best of 3 a punteggio_tie_break) con
+    2 punti di scarto, oltre il limite si chiude esattamente a +2; Set Unico
+    un solo set, Best of 3 si ferma a 2 set vinti.
+    Restituisce (punteggi, set_sq1, set_sq2); ValueError con il motivo.
+    """
+    punteggi = [(int(a), int(b)) for a, b in punteggi if a or b]
+    if not punteggi:
+        raise ValueError("nessun set inserito")
+    set_da_vincere = 1 if torneo["formato_set"] == "Set Unico" else 2
+    set_1 = set_2 = 0
+    for n, (a, b) in enumerate(punteggi, start=1):
+        if set_1 == set_da_vincere or set_2 == set_da_vincere:
+            raise ValueError(f"set {n} di troppo: la partita era già chiusa")
+        tie_break = set_da_vincere == 2 and set_1 == set_2 == 1
+        limite = torneo.get("punteggio_tie_break", 15) if tie_break else torneo["punteggio_max"]
+        alto, basso = max(a, b), min(a, b)
+        if alto < limite:
+            raise ValueError(f"set {n} ({a}-{b}): si vince a {limite}")
+        if alto - basso < 2 or (alto > limite and alto - basso != 2):
+            raise ValueError(f"set {n} ({a}-{b}): servono 2 punti di scarto")
+        if a > b:
+            set_1 += 1
+        else:
+            set_2 += 1
+    if max(set_1, set_2) < set_da_vincere:
+        raise ValueError(f"partita incompleta ({set_1}-{set_2} nei set)")
+    return punteggi, set_1, set_2
+
+
+def conferma_risultati(state, risultati):
+    """
+    Conferma in blocco [(partita, punteggi), ...] di partite non ancora
+    confermate. Tutto o niente: con anche una sola riga non valida (o già
+    scritta da un altro dispositivo) restituisce {partita id: motivo} senza
+    modificare nulla; altrimenti aggiorna classifiche e scontri diretti
+    partita per partita, salva una volta sola e restituisce {}.
+    """
+    errori, validi = {}, []
+    for pid in shard_partite.conflitti([p for p, _ in risultati]):
+        errori[pid] = "già modificata da un altro dispositivo"
+    for partita, punteggi in risultati:
+        if partita["id"] in errori:
+            continue
+        if partita["confermata"]:
+            errori[partita["id"]] = "già confermata"
+            continue
+        try:
+            validi.append((partita, *valida_punteggi(state["torneo"], punteggi)))
+        except ValueError as e:
+            errori[partita["id"]] = str(e)
+    if errori:
+        return errori
+    prima = {p["id"]: {k: p[k] for k in ("punteggi", "set_sq1", "set_sq2", "vincitore")} for p, *_ in validi}
+    for partita, punteggi, set_1, set_2 in validi:
+        partita.update(punteggi=punteggi, set_sq1=set_1, set_sq2=set_2,
+                       vincitore=partita["sq1"] if set_1 > set_2 else partita["sq2"], confermata=True)
+        aggiorna_classifica_squadra(state, partita)
+    if validi:
+        try:
+            salva_partita(state, *(p for p, *_ in validi))
+        except ConflittoPartita as e:
+            # scritta da altri tra il controllo e il salvataggio: le righe
+            # in conflitto sono già riallineate, le altre si annullano
+            for partita, *_ in validi:
+                if partita["id"] not in e.ids:
+                    aggiorna_classifica_squadra(state, partita, -1)
+                    partita.update(prima[partita["id"]], confermata=False)
+            return {pid: "già modificata da un altro dispositivo" for pid in e.ids}
+    return {}
+
 
 # ─── TRASFERIMENTO RANKING ATLETI ────────────────────────────────────────────
 
 def trasferisci_al_ranking(state, podio):
     """podio = [(1, sq_id), (2, sq_id), (3, sq_id)]"""
     nome_torneo = state["torneo"]["nome"]
+    storico_modificabile(state)
     for pos, sq_id in podio:
         sq = get_squadra_by_id(state, sq_id)
         if not sq: continue
@@ -275,6 +1644,111 @@ def trasferisci_al_ranking(state, podio):
             s["punti_subiti"] += sq["punti_subiti"]
             if pos == 1: s["vittorie"] += 1
             else: s["sconfitte"] += 1
+            aggiorna_ranking_atleta(state, atleta)
+
+# ─── RANKING GLOBALE ─────────────────────────────────────────────────────────
+# state["ranking_globale"] è la classifica atleti già ordinata (migliore prima):
+# una voce per atleta con almeno un torneo. trasferisci_al_ranking sposta solo
+# le voci degli atleti del podio (ricerca binaria), senza riordinare tutto.
+
+PUNTI_POSIZIONE = {1: 100, 2: 70, 3: 50}   # punti ranking per piazzamento
+PUNTI_PARTECIPAZIONE = 20                    # 4º posto e oltre
+
+
+def punti_ranking(storico):
+    """Punti ranking da storico_posizioni [(torneo, posizione)]."""
+    return sum(PUNTI_POSIZIONE.get(pos, PUNTI_PARTECIPAZIONE) for _, pos in storico)
+
+
+def _voce_ranking(atleta):
+    s = atleta["stats"]
+    return {
+        "id": atleta["id"],
+        "nome": atleta["nome"],
+        "rank_pts": punti_ranking(s["storico_posizioni"]),
+        "tornei": s["tornei"],
+        "vittorie": s["vittorie"],
+        "sconfitte": s["sconfitte"],
+        "set_vinti": s["set_vinti"],
+        "set_persi": s["set_persi"],
+        "quoziente": round(s["punti_fatti"] / max(s["set_vinti"], 1), 2),
+        "win_rate": round(s["vittorie"] / max(s["tornei"], 1) * 100, 1),
+    }
+
+
+def _chiave_ranking(voce):
+    return (-voce["rank_pts"], voce["nome"].lower(), voce["id"])
+
+
+def _bisect_ranking(ranking, chiave):
+    """Prima posizione con chiave >= chiave (ricerca binaria)."""
+    lo, hi = 0, len(ranking)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if _chiave_ranking(ranking[mid]) < chiave:
+            lo = mid + 1
+        else:
+            hi = mid
+    return lo
+
+
+def ricostruisci_ranking(state):
+    """Ricalcolo completo (migrazione o dati incoerenti)."""
+    voci = [_voce_ranking(a) for a in state["atleti"] if a["stats"]["tornei"] > 0]
+    voci.sort(key=_chiave_ranking)
+    state["ranking_globale"] = voci
+
+
+def ranking_da_ricostruire(state):
+    ranking = state.get("ranking_globale") or []
+    if any("rank_pts" not in v for v in ranking):
+        return True
+    return len(ranking) != sum(1 for a in state["atleti"] if a["stats"]["tornei"] > 0)
+
+
+def aggiorna_ranking_atleta(state, atleta):
+    """Riposiziona la voce di un atleta nella classifica: O(log n) ricerche."""
+    ranking = state["ranking_globale"]
+    vecchia = _cerca_per_id(ranking, atleta["id"])
+    if vecchia is not None:
+        pos = _bisect_ranking(ranking, _chiave_ranking(vecchia))
+        while ranking[pos] is not vecchia:   # stessa chiave solo per stesso id
+            pos += 1
+        ranking.pop(pos)
+    if atleta["stats"]["tornei"] == 0:
+        return
+    voce = _voce_ranking(atleta)
+    ranking.insert(_bisect_ranking(ranking, _chiave_ranking(voce)), voce)
+
+
+def voci_ranking(state, k=None):
+    """
+    Voci della classifica (le prime k) con il nome attuale dell'atleta: la voce
+    ha il nome del momento in cui è stata calcolata, e un atleta poi rinominato
+    o cancellato non deve lasciare righe vecchie o orfane.
+    """
+    voci = []
+    for voce in state.get("ranking_globale", []):
+        if k is not None and len(voci) == k:
+            break
+        atleta = get_atleta_by_id(state, voce["id"])
+        if atleta is not None:
+            voci.append(voce if voce["nome"] == atleta["nome"] else dict(voce, nome=atleta["nome"]))
+    return voci
+
+
+def top_ranking(state, k):
+    """Le prime k voci della classifica."""
+    return voci_ranking(state, k)
+
+
+def posizione_ranking(state, aid):
+    """Posizione (1 = primo) di un atleta nella classifica, None se non classificato."""
+    ranking = state["ranking_globale"]
+    voce = _cerca_per_id(ranking, aid)
+    if voce is None:
+        return None
+    return _bisect_ranking(ranking, _chiave_ranking(voce)) + 1
 
 # ─── GENERAZIONE GIRONI ──────────────────────────────────────────────────────
 
@@ -313,64 +1787,200 @@ def genera_gironi(squadre_ids, num_gironi=2, girone_unico=False):
 BYE_ID = "sq_BYE"
 
 
-def _classifica_girone(state, girone):
-    """Restituisce lista di squadra_id ordinate per classifica (migliori prime)."""
-    squadre_dati = []
-    for sid in girone["squadre"]:
-        sq = get_squadra_by_id(state, sid)
-        if sq:
-            squadre_dati.append(sq)
-    return sorted(
-        squadre_dati,
-        key=lambda s: (
-            -s["punti_classifica"], -s["vittorie"],
-            -(s["set_vinti"] - s["set_persi"]),
-            -(s["punti_fatti"] - s["punti_subiti"]),
-        ),
-    )
-
-
 def genera_bracket_da_gironi(state):
     """
     Qualificate dalle gironi (classifica reale), passano_per_girone per girone.
-    Se dispari, BYE: una squadra passa con vittoria a tavolino.
-    Restituisce primo round (quarti o semifinali).
+    Teste di serie: prima tutte le prime classificate (ordinate tra loro per
+    classifica), poi le seconde, ecc. Nel sistema svizzero: le prime
+    qualificate_svizzera della classifica finale. Restituisce il tabellone
+    completo (vedi genera_tabellone); i BYE vanno alle teste di serie migliori.
     """
-    gironi = state["gironi"]
+    if state["gironi"] and state["gironi"][0].get("svizzera"):
+        n = state["torneo"].get("qualificate_svizzera", 8)
+        return genera_tabellone([sq["id"] for sq in classifica_svizzera(state, state["gironi"][0])[:n]])
     passano = state["torneo"].get("passano_per_girone", 2)
+    ordinate = [classifica_girone(state, g) for g in state["gironi"]]
+    return genera_tabellone(teste_di_serie_dai_gironi(ordinate, passano))
+
+
+def teste_di_serie_dai_gironi(ordinate, passano, chiave=chiave_classifica):
+    """
+    Id delle qualificate dalle classifiche dei gironi: tutte le prime (ordinate
+    tra loro con `chiave`), poi le seconde, ... Le previsioni passano una chiave
+    equivalente già calcolata per il torneo simulato.
+    """
     teste_di_serie = []
-    for g in gironi:
-        ordinate = _classifica_girone(state, g)
-        for sq in ordinate[:passano]:
-            teste_di_serie.append(sq["id"])
-
-    # BYE: se dispari, aggiungi squadra fantasma
-    if len(teste_di_serie) % 2 == 1:
-        teste_di_serie.append(BYE_ID)
-
-    random.shuffle(teste_di_serie)
-    bracket = []
-    for i in range(0, len(teste_di_serie), 2):
-        a, b = teste_di_serie[i], teste_di_serie[i + 1]
-        if a == BYE_ID or b == BYE_ID:
-            vincitore = b if a == BYE_ID else a
-            p = new_partita(a, b, "eliminazione", round_elim=0)
-            p["confermata"] = True
-            p["vincitore"] = vincitore
-            p["set_sq1"] = 1 if vincitore == a else 0
-            p["set_sq2"] = 1 if vincitore == b else 0
-            p["punteggi"] = [(21, 0)] if vincitore == a else [(0, 21)]
-            bracket.append(p)
-        else:
-            bracket.append(new_partita(a, b, "eliminazione", round_elim=0))
+    for pos in range(passano):
+        fascia = [o[pos] for o in ordinate if pos < len(o)]
+        teste_di_serie.extend(sq["id"] for sq in sorted(fascia, key=chiave))
+    return teste_di_serie
+
+
+# ─── TABELLONE AD ELIMINAZIONE DIRETTA ───────────────────────────────────────
+# Albero esplicito: ogni partita conosce la successiva (next_id/next_slot) e le
+# semifinali anche la finale 3-4 (loser_id/loser_slot). Id deterministici:
+# "e_r{turno}_{posizione}", "e_finale_12", "e_finale_34". Le partite dei turni
+# successivi esistono da subito con sq1/sq2 = None ("squadra da definire").
+
+NOMI_TURNO = {2: "Finale", 4: "Semifinali", 8: "Quarti", 16: "Ottavi",
+              32: "Sedicesimi", 64: "Trentaduesimi"}
+
+
+def nome_turno(n_squadre):
+    """Nome del turno in base alle squadre che lo giocano (16 → Ottavi)."""
+    return NOMI_TURNO.get(n_squadre, f"Turno a {n_squadre}")
+
+
+def ordine_teste_di_serie(n):
+    """Teste di serie (1-based) nell'ordine delle posizioni di un tabellone da n: 1, n, n/2+1, ..."""
+    ordine = [1]
+    while len(ordine) < n:
+        m = 2 * len(ordine) + 1
+        ordine = [x for s in ordine for x in (s, m - s)]
+    return ordine
+
+
+def _chiudi_bye(partita):
+    """Vittoria a tavolino contro il BYE (BYE contro BYE: passa il BYE)."""
+    a, b = partita["sq1"], partita["sq2"]
+    vincitore = b if a == BYE_ID else a
+    partita["vincitore"] = vincitore
+    partita["set_sq1"] = 1 if vincitore == a and a != BYE_ID else 0
+    partita["set_sq2"] = 1 if vincitore == b and b != BYE_ID else 0
+    partita["punteggi"] = [(21, 0)] if partita["set_sq1"] else [(0, 21)] if partita["set_sq2"] else []
+    partita["confermata"] = True
+
+
+def genera_tabellone(teste_di_serie, finale_34=True):
+    """
+    Tabellone completo per qualsiasi numero di qualificate (ordinate, migliore
+    prima): dimensione = potenza di 2 successiva, posti vuoti = BYE. Le partite
+    col BYE sono già chiuse e il vincitore è già avanzato.
+    """
+    n = len(teste_di_serie)
+    if n == 0:
+        return []
+    dim = 2
+    while dim < n:
+        dim *= 2
+    n_turni = dim.bit_length() - 1
+    slot = [teste_di_serie[s - 1] if s <= n else BYE_ID for s in ordine_teste_di_serie(dim)]
+
+    turni = []
+    for r in range(n_turni):
+        turno = []
+        for i in range(dim >> (r + 1)):
+            finale = r == n_turni - 1
+            p = new_partita(None, None, "eliminazione", round_elim=r,
+                            label_elim="finale_12" if finale else "")
+            p["id"] = "e_finale_12" if finale else f"e_r{r}_{i}"
+            p["next_id"], p["next_slot"] = None, None
+            turno.append(p)
+        turni.append(turno)
+    for r in range(n_turni - 1):
+        for i, p in enumerate(turni[r]):
+            p["next_id"] = turni[r + 1][i // 2]["id"]
+            p["next_slot"] = "sq1" if i % 2 == 0 else "sq2"
+    if finale_34 and n_turni >= 2:
+        f34 = new_partita(None, None, "eliminazione", round_elim=n_turni - 1, label_elim="finale_34")
+        f34["id"] = "e_finale_34"
+        f34["next_id"], f34["next_slot"] = None, None
+        for i, p in enumerate(turni[-2]):
+            p["loser_id"], p["loser_slot"] = f34["id"], "sq1" if i % 2 == 0 else "sq2"
+        turni[-1].append(f34)
+
+    for i, p in enumerate(turni[0]):
+        p["sq1"], p["sq2"] = slot[2 * i], slot[2 * i + 1]
+    bracket = [p for t in turni for p in t]
+    tabellone = {"bracket": bracket}
+    for p in turni[0]:
+        if BYE_ID in (p["sq1"], p["sq2"]):
+            _chiudi_bye(p)
+            avanza_vincitore(tabellone, p)
     return bracket
 
 
+def avanza_vincitore(state, partita):
+    """
+    Dopo la conferma di `partita`: porta il vincitore nella partita successiva
+    e il perdente di una semifinale nella finale 3-4 (lookup per id, costo
+    costante). Le partite che restano contro un BYE si chiudono a cascata.
+    Restituisce le partite modificate (da salvare insieme a `partita`).
+    """
+    if "next_id" not in partita:   # tabellone creato prima dell'albero esplicito
+        n_prima = len(state["bracket"])
+        _aggiungi_turno_legacy(state)
+        return list(state["bracket"][n_prima:])
+
+    vincitore = partita["vincitore"]
+    perdente = partita["sq2"] if vincitore == partita["sq1"] else partita["sq1"]
+    toccate = []
+    for dest, slot, sid in ((partita.get("next_id"), partita.get("next_slot"), vincitore),
+                            (partita.get("loser_id"), partita.get("loser_slot"), perdente)):
+        succ = _cerca_per_id(state["bracket"], dest) if dest else None
+        if succ is None:
+            continue
+        succ[slot] = sid
+        toccate.append(succ)
+        if (succ["sq1"] is not None and succ["sq2"] is not None and not succ["confermata"]
+                and BYE_ID in (succ["sq1"], succ["sq2"])):
+            _chiudi_bye(succ)
+            toccate.extend(avanza_vincitore(state, succ))
+    if partita.get("reset"):
+        toccate.extend(_reset_finale(state, partita))
+    return toccate
+
+
+def _partita_finale(state, label):
+    """Finale 1-2 / 3-4: lookup per id; scansione solo per i tabelloni legacy."""
+    p = _cerca_per_id(state["bracket"], f"e_{label}")
+    if p is None:
+        p = next((x for x in state["bracket"] if x.get("label_elim") == label), None)
+    return p
+
+
+def podio_bracket(state):
+    """Podio [(posizione, squadra_id)] dalle finali confermate (BYE esclusi)."""
+    gf = _cerca_per_id(state["bracket"], "de_gf")
+    if gf is not None:
+        return _podio_doppia(state, gf)
+    podio = []
+    for label, posizioni in (("finale_12", (1, 2)), ("finale_34", (3, 4))):
+        p = _partita_finale(state, label)
+        if not p or not p["confermata"]:
+            continue
+        perdente = p["sq2"] if p["vincitore"] == p["sq1"] else p["sq1"]
+        for pos, sid in zip(posizioni, (p["vincitore"], perdente)):
+            if sid and sid != BYE_ID:
+                podio.append((pos, sid))
+    return podio
+
+
 def aggiungi_semifinali_e_finali(state):
     """
+    Compatibilità: avanza i vincitori di tutte le partite confermate non
+    ancora propagate. Con il tabellone ad albero basta avanza_vincitore sulla
+    singola partita; i tabelloni legacy (senza next_id) aggiungono il turno dopo.
+    """
+    bracket = state["bracket"]
+    if bracket and "next_id" not in bracket[0]:
+        _aggiungi_turno_legacy(state)
+        return
+    for p in list(bracket):
+        if not p["confermata"]:
+            continue
+        for dest, slot in ((p.get("next_id"), p.get("next_slot")), (p.get("loser_id"), p.get("loser_slot"))):
+            succ = _cerca_per_id(bracket, dest) if dest else None
+            if succ is not None and succ[slot] is None:
+                avanza_vincitore(state, p)
+                break
+
+
+def _aggiungi_turno_legacy(state):
+    """
+    Tabelloni salvati prima dell'albero esplicito (solo 2 o 4 partite al primo turno).
     Quando il round 0 è tutto confermato: aggiunge semifinali (round 1).
     Quando il round 1 è tutto confermato: aggiunge finale 1-2 e finale 3-4 (round 2).
-    Chiamata da fase_eliminazione dopo conferma risultato.
     """
     bracket = state["bracket"]
     by_round = {}
@@ -404,3 +2014,271 @@ def aggiungi_semifinali_e_finali(state):
             return
         state["bracket"].append(new_partita(vincitori[0], vincitori[1], "eliminazione", round_elim=2, label_elim="finale_12"))
         state["bracket"].append(new_partita(perdenti[0], perdenti[1], "eliminazione", round_elim=2, label_elim="finale_34"))
+
+# ─── DOPPIA ELIMINAZIONE ─────────────────────────────────────────────────────
+# Stesso albero esplicito del tabellone singolo, su tre tabelloni ("tabellone"):
+# W = vincenti, L = perdenti, F = finalissima. Id: "de_w{turno}_{i}",
+# "de_l{turno}_{i}", "de_gf" e, se serve, "de_gf2" (reset).
+# Turni perdenti per tabellone da 2^k: 2k-2. I turni dispari accolgono i
+# perdenti del turno vincenti (t+1)//2, in ordine invertito a turni alterni
+# per ritardare le rivincite; i turni pari dimezzano.
+
+def teste_di_serie_per_overall(state, squadre_ids):
+    """Ordina le squadre per Overall medio della coppia (pari merito in ordine casuale)."""
+    ids = list(squadre_ids)
+    random.shuffle(ids)
+
+    def overall(sid):
+        sq = get_squadra_by_id(state, sid)
+        valori = [compute_overall(a) for a in (get_atleta_by_id(state, aid) for aid in sq["atleti"]) if a]
+        return sum(valori) / len(valori) if valori else 40
+
+    return sorted(ids, key=overall, reverse=True)
+
+
+def _partita_doppia(pid, tabellone, turno):
+    p = new_partita(None, None, "eliminazione", round_elim=turno)
+    p["id"] = pid
+    p["tabellone"] = tabellone
+    p["next_id"], p["next_slot"] = None, None
+    return p
+
+
+def genera_doppia_eliminazione(teste_di_serie, reset=True):
+    """
+    Tabellone a doppia eliminazione completo (almeno 4 squadre, ordinate
+    migliore prima, BYE alle teste di serie). reset=True: se vince la
+    finalissima chi arriva dai perdenti, si gioca una seconda finale.
+    """
+    n = len(teste_di_serie)
+    if n < 4:
+        raise ValueError("La doppia eliminazione richiede almeno 4 squadre")
+    dim = 4
+    while dim < n:
+        dim *= 2
+    k = dim.bit_length() - 1
+    slot = [teste_di_serie[s - 1] if s <= n else BYE_ID for s in ordine_teste_di_serie(dim)]
+
+    vincenti = [[_partita_doppia(f"de_w{w}_{i}", "W", w) for i in range(dim >> (w + 1))]
+                for w in range(k)]
+    perdenti = [[_partita_doppia(f"de_l{t}_{i}", "L", t) for i in range(dim >> (t // 2 + 2))]
+                for t in range(2 * k - 2)]
+    gf = _partita_doppia("de_gf", "F", 0)
+    gf["label_elim"] = "finale_12"
+    gf["reset"] = reset
+    gf["terzo_id"] = perdenti[-1][0]["id"]     # finale perdenti → 3º posto
+    gf["quarto_id"] = perdenti[-2][0]["id"]    # semifinale perdenti → 4º posto
+
+    def collega(p, dest, slot, perdente=False):
+        if perdente:
+            p["loser_id"], p["loser_slot"] = dest["id"], slot
+        else:
+            p["next_id"], p["next_slot"] = dest["id"], slot
+
+    for w, turno in enumerate(vincenti):
+        for i, p in enumerate(turno):
+            if w < k - 1:
+                collega(p, vincenti[w + 1][i // 2], "sq1" if i % 2 == 0 else "sq2")
+            else:
+                collega(p, gf, "sq1")
+            if w == 0:
+                collega(p, perdenti[0][i // 2], "sq1" if i % 2 == 0 else "sq2", perdente=True)
+            else:
+                j = len(turno) - 1 - i if w % 2 == 1 else i
+                collega(p, perdenti[2 * w - 1][j], "sq2", perdente=True)
+    for t, turno in enumerate(perdenti):
+        for i, p in enumerate(turno):
+            if t == len(perdenti) - 1:
+                collega(p, gf, "sq2")
+            elif t % 2 == 0:
+                collega(p, perdenti[t + 1][i], "sq1")
+            else:
+                collega(p, perdenti[t + 1][i // 2], "sq1" if i % 2 == 0 else "sq2")
+
+    for i, p in enumerate(vincenti[0]):
+        p["sq1"], p["sq2"] = slot[2 * i], slot[2 * i + 1]
+    bracket = [p for t in vincenti for p in t] + [p for t in perdenti for p in t] + [gf]
+    tabellone = {"bracket": bracket}
+    for p in vincenti[0]:
+        if BYE_ID in (p["sq1"], p["sq2"]):
+            _chiudi_bye(p)
+            avanza_vincitore(tabellone, p)
+    return bracket
+
+
+def _reset_finale(state, gf):
+    """Seconda finale se la finalissima la vince chi arriva dal tabellone perdenti."""
+    if not gf.get("reset") or gf["vincitore"] != gf["sq2"] or _cerca_per_id(state["bracket"], "de_gf2"):
+        return []
+    gf2 = _partita_doppia("de_gf2", "F", 1)
+    gf2["label_elim"] = "finale_12"
+    gf2["sq1"], gf2["sq2"] = gf["sq1"], gf["sq2"]
+    state["bracket"].append(gf2)
+    return [gf2]
+
+
+def _podio_doppia(state, gf):
+    """Podio: finalissima (o reset), poi perdenti di finale e semifinale del tabellone perdenti."""
+    finale = _cerca_per_id(state["bracket"], "de_gf2") or gf
+    if not finale["confermata"] or (finale is gf and gf.get("reset") and gf["vincitore"] == gf["sq2"]):
+        return []   # finalissima da giocare o reset ancora aperto
+    podio = []
+    for pid, posizioni in ((finale["id"], (1, 2)), (gf["terzo_id"], (None, 3)), (gf["quarto_id"], (None, 4))):
+        p = _cerca_per_id(state["bracket"], pid)
+        if not p or not p["confermata"]:
+            continue
+        perdente = p["sq2"] if p["vincitore"] == p["sq1"] else p["sq1"]
+        for pos, sid in zip(posizioni, (p["vincitore"], perdente)):
+            if pos and sid and sid != BYE_ID:
+                podio.append((pos, sid))
+    return podio
+
+# ─── SISTEMA SVIZZERO ────────────────────────────────────────────────────────
+# Un solo girone con "svizzera": True; le partite hanno il campo "turno" e i
+# turni si generano uno alla volta dalla classifica corrente. Il BYE vale
+# come vittoria 1-0 a tavolino (3 punti) e si riceve al massimo una volta.
+
+TIPO_SVIZZERA = "Sistema Svizzero"
+MAX_PASSI_SVIZZERA = 200_000   # tentativi di accoppiamento per turno (tutti i candidati al BYE)
+
+
+def nuovo_girone_svizzero(squadre_ids):
+    """Girone del sistema svizzero, ancora senza turni (ordine iniziale casuale)."""
+    ids = list(squadre_ids)
+    random.shuffle(ids)
+    return {"nome": "Sistema Svizzero", "squadre": ids, "partite": [],
+            "svizzera": True, "turno": 0, "bye": []}
+
+
+def _avversari_svizzera(girone):
+    """squadra_id → set degli avversari già incontrati (BYE esclusi)."""
+    avversari = {sid: set() for sid in girone["squadre"]}
+    for p in girone["partite"]:
+        if BYE_ID not in (p["sq1"], p["sq2"]):
+            avversari[p["sq1"]].add(p["sq2"])
+            avversari[p["sq2"]].add(p["sq1"])
+    return avversari
+
+
+def classifica_svizzera(state, girone):
+    """
+    Squadre ordinate per punti, Buchholz (somma dei punti degli avversari
+    incontrati), vittorie, differenza set e differenza punti.
+    """
+    squadre = {sid: get_squadra_by_id(state, sid) for sid in girone["squadre"]}
+    squadre = {sid: sq for sid, sq in squadre.items() if sq}
+    avversari = _avversari_svizzera(girone)
+    buchholz = {sid: sum(squadre[a]["punti_classifica"] for a in avversari[sid] if a in squadre)
+                for sid in squadre}
+    ordinate = sorted(squadre.values(), key=lambda sq: (
+        -sq["punti_classifica"], -buchholz[sq["id"]], -sq["vittorie"],
+        -(sq["set_vinti"] - sq["set_persi"]),
+        -(sq["punti_fatti"] - sq["punti_subiti"]),
+    ))
+    return [dict(sq, buchholz=buchholz[sq["id"]]) for sq in ordinate]
+
+
+def _preferenze_svizzera(libere, punti):
+    """
+    Avversari per libere[0] in ordine di preferenza (libere: indici di classifica
+    ordinati). Stesso punteggio prima, metà alta contro metà bassa (1ª contro
+    la prima della metà inferiore); poi le squadre dei punteggi successivi.
+    """
+    gruppo = 1
+    while gruppo < len(libere) and punti[libere[gruppo]] == punti[libere[0]]:
+        gruppo += 1
+    meta = gruppo // 2 or 1
+    return libere[meta:gruppo] + libere[1:meta][::-1] + libere[gruppo:]
+
+
+def _accoppia_svizzera(ordine, punti, avversari, rivincite=False, budget=None):
+    """
+    Coppie senza rivincite per le squadre `ordine` (indici di classifica).
+    Ricerca in profondità iterativa: la prima squadra libera prova gli
+    avversari in ordine di preferenza, con backtracking se il resto non si
+    può accoppiare. None se non esiste (o se finiscono i passi del budget).
+    budget: [passi rimasti], consumato sul posto e condiviso tra più ricerche.
+    rivincite=True: le rivincite sono ammesse ma provate per ultime.
+    """
+    budget = budget if budget is not None else [MAX_PASSI_SVIZZERA]
+    libere = sorted(ordine)
+    coppie, pila = [], []
+    while libere:
+        t = libere[0]
+        preferenze = _preferenze_svizzera(libere, punti)
+        candidati = [x for x in preferenze if x not in avversari[t]]
+        if rivincite:
+            candidati += [x for x in preferenze if x in avversari[t]]
+        pila.append([t, candidati, 0])
+        while True:
+            budget[0] -= 1
+            if budget[0] < 0:
+                return None
+            squadra, candidati, i = pila[-1]
+            if i < len(candidati):
+                pila[-1][2] += 1
+                avv = candidati[i]
+                libere.pop(bisect.bisect_left(libere, squadra))
+                libere.pop(bisect.bisect_left(libere, avv))
+                coppie.append((squadra, avv))
+                break
+            pila.pop()   # vicolo cieco: annulla la coppia precedente e prova il candidato dopo
+            if not pila:
+                return None
+            a, b = coppie.pop()
+            bisect.insort(libere, a)
+            bisect.insort(libere, b)
+    return coppie
+
+
+def accoppia_turno_svizzera(state, girone):
+    """
+    Genera il turno successivo: accoppia squadre con lo stesso punteggio
+    senza rivincite; se dispari, BYE alla peggiore in classifica che non
+    l'ha ancora avuto. Se nessun accoppiamento evita tutte le rivincite (turni
+    quasi pari al numero di squadre) le ammette, ma solo dove servono. Le
+    ricerche per i vari candidati al BYE condividono MAX_PASSI_SVIZZERA passi.
+    Restituisce le nuove partite (già aggiunte al girone).
+    """
+    ordinate = [sq["id"] for sq in classifica_svizzera(state, girone)]
+    punti = [get_squadra_by_id(state, sid)["punti_classifica"] for sid in ordinate]
+    pos = {sid: i for i, sid in enumerate(ordinate)}
+    gia_incontrati = _avversari_svizzera(girone)
+    avversari = [{pos[a] for a in gia_incontrati[sid] if a in pos} for sid in ordinate]
+    n = len(ordinate)
+
+    candidati_bye = [i for i in range(n - 1, -1, -1) if ordinate[i] not in girone["bye"]] if n % 2 else [None]
+    coppie, bye = None, None
+    for senza_rivincite in (True, False):
+        budget = [MAX_PASSI_SVIZZERA]
+        for bye in candidati_bye or [n - 1]:
+            ordine = [i for i in range(n) if i != bye]
+            coppie = _accoppia_svizzera(ordine, punti, avversari, rivincite=not senza_rivincite,
+                                        budget=budget)
+            if coppie is not None:
+                break
+        if coppie is not None:
+            break
+
+    girone["turno"] += 1
+    nuove = []
+    for a, b in coppie:
+        p = new_partita(ordinate[a], ordinate[b], "girone", 0)
+        p["turno"] = girone["turno"]
+        nuove.append(p)
+    if bye is not None:
+        p = new_partita(ordinate[bye], BYE_ID, "girone", 0)
+        p["turno"] = girone["turno"]
+        _chiudi_bye(p)
+        sq = get_squadra_by_id(state, ordinate[bye])
+        sq["punti_classifica"] += 3
+        sq["vittorie"] += 1
+        sq["set_vinti"] += 1
+        girone["bye"].append(ordinate[bye])
+        nuove.append(p)
+    girone["partite"].extend(nuove)
+    return nuove
+
+
+def turno_svizzero_completo(girone):
+    return all(p["confermata"] for p in girone["partite"])
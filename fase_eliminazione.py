@@ -3,14 +3,17 @@ fase_eliminazione.py — Fase 3: Eliminazione Diretta / Playoffs
 """
 import streamlit as st
 from data_manager import (
-    save_state, simula_partita, aggiorna_classifica_squadra,
-    get_squadra_by_id, new_partita, aggiungi_semifinali_e_finali,
+    save_state, salva_partita, simula_partita, aggiorna_classifica_squadra,
+    get_squadra_by_id, avanza_vincitore, podio_bracket, nome_turno, annulla_se_in_conflitto,
+    ConflittoPartita, BYE_ID,
 )
-from ui_components import render_match_card
+from ui_components import render_match_card, render_correzione
+from segnapunti_live import render_rally
 
 
 def render_eliminazione(state):
-    st.markdown("## ⚡ Eliminazione Diretta")
+    doppia = state["torneo"].get("tipo_tabellone") == "Doppia Eliminazione"
+    st.markdown("## ⚡ Doppia Eliminazione" if doppia else "## ⚡ Eliminazione Diretta")
     
     bracket = state["bracket"]
     
@@ -33,46 +36,80 @@ def render_eliminazione(state):
         st.markdown(f"### {round_name}")
         
         for i, partita in enumerate(partite):
-            render_match_card(state, partita, label=round_name)
-            
-            if not partita["confermata"]:
-                _render_scoreboard_playoff(state, partita, f"pl_{partita['id']}")
-            else:
-                # Mostra vincitore
-                sq = get_squadra_by_id(state, partita["vincitore"])
-                if sq:
-                    st.success(f"✅ Vincitore: **{sq['nome']}** → avanza al turno successivo")
-            
-            st.markdown("---")
+            _render_partita(state, partita, round_name)
     
     # Controlla se c'è una finale completata
     _check_finale(state)
 
 
+@st.fragment
+def _render_partita(state, partita, round_name):
+    """Match card + scoreboard: un input ridisegna solo questa partita (st.rerun() alla conferma)."""
+    render_match_card(state, partita, label=round_name)
+    
+    if not partita["confermata"]:
+        key_prefix = f"pl_{partita['id']}"
+        giocabile = partita.get("sq1") and partita.get("sq2") and BYE_ID not in (partita["sq1"], partita["sq2"])
+        if giocabile and st.toggle("🏐 Live rally per rally", value=bool(partita.get("rally")),
+                                   key=f"{key_prefix}_rally_on"):
+            render_rally(state, partita, key_prefix)
+        else:
+            _render_scoreboard_playoff(state, partita, key_prefix)
+    else:
+        # Mostra vincitore
+        sq = get_squadra_by_id(state, partita["vincitore"])
+        if sq:
+            st.success(f"✅ Vincitore: **{sq['nome']}** → avanza al turno successivo")
+        render_correzione(state, partita, f"pl_{partita['id']}")
+    
+    st.markdown("---")
+
+
 def _raggruppa_round(bracket):
-    """Raggruppa partite per round_elim e label_elim (Semifinali, Finale 1-2, Finale 3-4)."""
+    """
+    Raggruppa partite per round_elim (nome dal numero di squadre del turno:
+    Ottavi, Quarti, Semifinali...) con Finale 1-2 e Finale 3-4 separate.
+    """
     if not bracket:
         return {}
+    if any(p.get("tabellone") for p in bracket):
+        return _raggruppa_doppia(bracket)
     by_round = {}
     for p in bracket:
-        r = p.get("round_elim", 0)
-        label = p.get("label_elim", "")
-        if r == 1:
-            name = "🥇 SEMIFINALI"
-        elif r == 2 and label == "finale_12":
-            name = "🏆 FINALE 1º-2º POSTO"
-        elif r == 2 and label == "finale_34":
-            name = "🥉 FINALE 3º-4º POSTO"
+        by_round.setdefault(p.get("round_elim", 0), []).append(p)
+    rounds = {}
+    for r in sorted(by_round):
+        turno = [p for p in by_round[r] if not p.get("label_elim")]
+        if turno:
+            icon = "🥇" if len(turno) == 2 else "⚡"
+            rounds[f"{icon} {nome_turno(2 * len(turno)).upper()}"] = turno
+        for label, name in (("finale_12", "🏆 FINALE 1º-2º POSTO"), ("finale_34", "🥉 FINALE 3º-4º POSTO")):
+            finali = [p for p in by_round[r] if p.get("label_elim") == label]
+            if finali:
+                rounds[name] = finali
+    return rounds
+
+
+def _raggruppa_doppia(bracket):
+    """Doppia eliminazione: turni vincenti, poi turni perdenti, poi finalissima (e reset)."""
+    per_turno = {}
+    for p in bracket:
+        per_turno.setdefault((p["tabellone"], p.get("round_elim", 0)), []).append(p)
+    ultimo_l = max((r for t, r in per_turno if t == "L"), default=-1)
+    rounds = {}
+    for (tab, r) in sorted(per_turno, key=lambda k: ("WLF".index(k[0]), k[1])):
+        partite = per_turno[(tab, r)]
+        if tab == "W":
+            name = f"🟢 VINCENTI · {nome_turno(2 * len(partite)).upper()}"
+        elif tab == "L":
+            name = "🔻 FINALE PERDENTI" if r == ultimo_l else f"🔻 PERDENTI · TURNO {r + 1}"
         else:
-            name = "⚡ QUARTI / TURNO 1"
-        by_round.setdefault(name, []).append(p)
-    # Ordine: quarti, semi, finale 1-2, finale 3-4
-    order = ["⚡ QUARTI / TURNO 1", "🥇 SEMIFINALI", "🏆 FINALE 1º-2º POSTO", "🥉 FINALE 3º-4º POSTO"]
-    return {k: by_round[k] for k in order if k in by_round}
+            name = "🏆 FINALISSIMA" if r == 0 else "🔁 FINALISSIMA (RESET)"
+        rounds[name] = partite
+    return rounds
 
 
 def _render_scoreboard_playoff(state, partita, key_prefix):
-    from data_manager import BYE_ID
     sq1 = get_squadra_by_id(state, partita["sq1"]) if partita.get("sq1") != BYE_ID else None
     sq2 = get_squadra_by_id(state, partita["sq2"]) if partita.get("sq2") != BYE_ID else None
     if not sq1 or not sq2:
@@ -107,33 +144,56 @@ def _render_scoreboard_playoff(state, partita, key_prefix):
                 st.error("Inserisci almeno un set.")
                 return
             
-            partita["punteggi"] = punteggi_validi
-            partita["set_sq1"] = s1v
-            partita["set_sq2"] = s2v
-            partita["vincitore"] = partita["sq1"] if s1v > s2v else partita["sq2"]
-            partita["confermata"] = True
-            aggiorna_classifica_squadra(state, partita)
-            
-            aggiungi_semifinali_e_finali(state)
-            save_state(state)
+            try:
+                with annulla_se_in_conflitto(state):
+                    partita["punteggi"] = punteggi_validi
+                    partita["set_sq1"] = s1v
+                    partita["set_sq2"] = s2v
+                    partita["vincitore"] = partita["sq1"] if s1v > s2v else partita["sq2"]
+                    partita["confermata"] = True
+                    aggiorna_classifica_squadra(state, partita)
+                    salva_partita(state, partita, *avanza_vincitore(state, partita))
+            except ConflittoPartita as e:
+                st.error(str(e))
+                return
             st.rerun()
 
         if st.button("🎲 Simula", key=f"{key_prefix}_sim"):
-            simula_partita(state, partita)
-            if state["simulazione_al_ranking"]:
-                aggiorna_classifica_squadra(state, partita)
-            aggiungi_semifinali_e_finali(state)
-            save_state(state)
+            try:
+                with annulla_se_in_conflitto(state):
+                    simula_partita(state, partita)
+                    if state["simulazione_al_ranking"]:
+                        aggiorna_classifica_squadra(state, partita)
+                    salva_partita(state, partita, *avanza_vincitore(state, partita))
+            except ConflittoPartita as e:
+                st.error(str(e))
+                return
             st.rerun()
 
 
 def _simula_tutti_playoff(state):
-    for partita in state["bracket"]:
-        if not partita["confermata"]:
-            simula_partita(state, partita)
-            if state["simulazione_al_ranking"]:
-                aggiorna_classifica_squadra(state, partita)
-    save_state(state)
+    """Simula turno dopo turno (un batch per turno) fino alla finale."""
+    from motore_simulazione import simula_partite   # numpy solo quando si simula
+    modificate = {}
+    try:
+        with annulla_se_in_conflitto(state):     # in conflitto: tabellone e classifiche come prima
+            while True:
+                pronte = [p for p in state["bracket"]
+                          if not p["confermata"] and p["sq1"] is not None and p["sq2"] is not None]
+                if not pronte:
+                    break
+                simula_partite(state, pronte)
+                for partita in pronte:
+                    if state["simulazione_al_ranking"]:
+                        aggiorna_classifica_squadra(state, partita)
+                    modificate[partita["id"]] = partita
+                    for p in avanza_vincitore(state, partita):
+                        modificate[p["id"]] = p
+            if modificate:
+                salva_partita(state, *modificate.values())
+    except ConflittoPartita as e:
+        st.error(str(e))
+        return
     st.rerun()
 
 
@@ -148,8 +208,8 @@ def _check_finale(state):
         st.divider()
         col1, col2 = st.columns([3, 1])
         
-        vincitori = [p["vincitore"] for p in bracket]
-        finale_winner = vincitori[-1] if vincitori else None
+        podio = podio_bracket(state)
+        finale_winner = podio[0][1] if podio else None
         
         with col1:
             if finale_winner:
@@ -160,33 +220,6 @@ def _check_finale(state):
         with col2:
             if st.button("🏆 PROCLAMAZIONE →", use_container_width=True):
                 state["vincitore"] = finale_winner
-                # Podio: da Finale 1-2 e Finale 3-4 se presenti
-                podio = []
-                f12 = [p for p in bracket if p.get("label_elim") == "finale_12" and p.get("confermata")]
-                f34 = [p for p in bracket if p.get("label_elim") == "finale_34" and p.get("confermata")]
-                if f12:
-                    w = f12[0]["vincitore"]
-                    l = f12[0]["sq1"] if f12[0]["vincitore"] == f12[0]["sq2"] else f12[0]["sq2"]
-                    podio = [(1, w), (2, l)]
-                else:
-                    perdenti = [p["sq1"] if p["vincitore"] == p["sq2"] else p["sq2"] for p in bracket]
-                    podio = [(1, finale_winner)]
-                    if perdenti:
-                        podio.append((2, perdenti[-1]))
-                    if len(perdenti) > 1:
-                        podio.append((3, perdenti[-2]))
-                if f34:
-                    w3 = f34[0]["vincitore"]
-                    l4 = f34[0]["sq1"] if f34[0]["vincitore"] == f34[0]["sq2"] else f34[0]["sq2"]
-                    podio.append((3, w3))
-                    podio.append((4, l4))
-                elif len(podio) == 2:
-                    # Nessuna finale 3-4: 3° = perdente altra semi
-                    semi = [p for p in bracket if p.get("round_elim") == 1]
-                    perdenti_semi = [p["sq1"] if p["vincitore"] == p["sq2"] else p["sq2"] for p in semi if p.get("confermata")]
-                    if perdenti_semi:
-                        podio.append((3, perdenti_semi[0]))
-                
                 state["podio"] = podio
                 if state["simulazione_al_ranking"]:
                     from data_manager import trasferisci_al_ranking
@@ -3,15 +3,23 @@ fase_gironi.py — Fase 2: Fase a Gironi con scoreboard live
 """
 import streamlit as st
 from data_manager import (
-    save_state, simula_partita, aggiorna_classifica_squadra,
-    get_squadra_by_id, nome_squadra, genera_bracket_da_gironi
+    save_state, salva_partita, simula_partita, aggiorna_classifica_squadra,
+    get_squadra_by_id, nome_squadra, genera_bracket_da_gironi, riprendi_versioni,
+    accoppia_turno_svizzera, classifica_svizzera, classifica_girone, versione_stato,
+    conferma_risultati, annulla_se_in_conflitto, ConflittoPartita, BYE_ID,
 )
-from ui_components import render_match_card
+from scenari import scenari_girone
+from ui_components import render_match_card, render_correzione
+from segnapunti_live import render_rally
 
 
 def render_gironi(state):
     st.markdown("## 🔵 Fase a Gironi")
     
+    if not state["gironi"]:
+        st.info("Questo torneo non ha fase a gironi (es. Doppia Eliminazione): vai all'eliminazione.")
+        return
+    
     # Controllo simulatore ON/OFF
     col_a, col_b, col_c = st.columns([2, 2, 2])
     with col_a:
@@ -29,9 +37,15 @@ def render_gironi(state):
             for g in state["gironi"]
             for p in g["partite"]
         )
-        if tutti_confermati:
+        svizzero = state["gironi"][0] if state["gironi"][0].get("svizzera") else None
+        if svizzero and tutti_confermati and svizzero["turno"] < state["torneo"].get("turni_svizzera", 5):
+            if st.button(f"➡️ GENERA TURNO {svizzero['turno'] + 1} →", use_container_width=True):
+                accoppia_turno_svizzera(state, svizzero)
+                save_state(state)
+                st.rerun()
+        elif tutti_confermati:
             if st.button("⚡ AVANZA ALL'ELIMINAZIONE →", use_container_width=True):
-                state["bracket"] = genera_bracket_da_gironi(state)
+                state["bracket"] = riprendi_versioni(genera_bracket_da_gironi(state))
                 state["fase"] = "eliminazione"
                 save_state(state)
                 st.rerun()
@@ -40,6 +54,10 @@ def render_gironi(state):
     
     st.divider()
     
+    if svizzero:
+        _render_svizzera(state, svizzero)
+        return
+    
     # Tabs per girone
     nomi_gironi = [g["nome"] for g in state["gironi"]]
     nomi_gironi.append("📊 Classifiche")
@@ -53,16 +71,99 @@ def render_gironi(state):
         _render_classifiche_gironi(state)
 
 
-def _render_girone(state, girone, girone_idx):
-    st.markdown(f"### {girone['nome']}")
+def _render_svizzera(state, girone):
+    """Sistema svizzero: un tab per turno (il più recente per primo) + classifica."""
+    turni = list(range(girone["turno"], 0, -1))
+    tabs = st.tabs([f"Turno {t}" for t in turni] + ["📊 Classifica"])
+    for tab, t in zip(tabs, turni):
+        with tab:
+            _render_girone(state, girone, 0, turno=t)
+    with tabs[-1]:
+        _render_classifica_svizzera(state, girone)
+
+
+def _render_girone(state, girone, girone_idx, turno=None):
+    st.markdown(f"### {girone['nome']}" + (f" · Turno {turno}" if turno else ""))
+    _render_inserimento_blocco(state, girone, girone_idx, turno)
     
     for j, partita in enumerate(girone["partite"]):
-        render_match_card(state, partita, label=f"{girone['nome']} · Match {j+1}")
-        
-        if not partita["confermata"]:
-            _render_scoreboard_live(state, partita, f"g{girone_idx}_p{j}")
+        if turno is not None and partita.get("turno") != turno:
+            continue
+        _render_partita(state, partita, f"{girone['nome']} · Match {j+1}", f"g{girone_idx}_p{j}")
+
+
+def _render_inserimento_blocco(state, girone, girone_idx, turno=None):
+    """Griglia con tutte le partite da confermare: un solo invio, una sola conferma."""
+    aperte = [(j, p) for j, p in enumerate(girone["partite"])
+              if not p["confermata"] and BYE_ID not in (p["sq1"], p["sq2"])
+              and (turno is None or p.get("turno") == turno)]
+    if not aperte:
+        return
+    # Toggle e non expander: la griglia si costruisce solo quando serve
+    if not st.toggle("📋 Inserimento in blocco (referti)", key=f"blocco_g{girone_idx}_t{turno}_on"):
+        return
+    n_set = 1 if state["torneo"]["formato_set"] == "Set Unico" else 3
+    colonne_set = [f"S{s+1} {lato}" for s in range(n_set) for lato in ("sq1", "sq2")]
+    
+    with st.container(border=True):
+        griglia = {
+            "Match": [f"Match {j+1}" for j, _ in aperte],
+            "Squadra 1": [nome_squadra(state, p["sq1"]) for _, p in aperte],
+            "Squadra 2": [nome_squadra(state, p["sq2"]) for _, p in aperte],
+            **{c: [0] * len(aperte) for c in colonne_set},
+        }
+        # La chiave cambia con le partite aperte: le modifiche non finiscono su righe nuove.
+        # Fatta dagli id (hash() di stringhe cambia a ogni processo: widget persi al riavvio)
+        chiave = f"blocco_g{girone_idx}_t{turno}_" + "_".join(p["id"] for _, p in aperte)
+        with st.form(f"{chiave}_form"):
+            dati = st.data_editor(
+                griglia, key=chiave, hide_index=True, use_container_width=True,
+                disabled=["Match", "Squadra 1", "Squadra 2"],
+                column_config={c: st.column_config.NumberColumn(c, min_value=0, max_value=99, step=1)
+                               for c in colonne_set},
+            )
+            invia = st.form_submit_button("✅ CONFERMA TUTTI I RISULTATI", use_container_width=True)
+        st.caption("Le righe lasciate a zero restano da giocare. Se una riga non è valida non si conferma nulla.")
+        if not invia:
+            return
         
-        st.markdown("---")
+        risultati = []
+        for r, (_, partita) in enumerate(aperte):
+            punteggi = [(dati[f"S{s+1} sq1"][r] or 0, dati[f"S{s+1} sq2"][r] or 0) for s in range(n_set)]
+            if any(a or b for a, b in punteggi):
+                risultati.append((partita, punteggi))
+        if not risultati:
+            st.warning("Nessun risultato inserito.")
+            return
+        errori = conferma_risultati(state, risultati)
+        if errori:
+            for j, partita in aperte:
+                if partita["id"] in errori:
+                    st.error(f"Match {j+1} · {nome_squadra(state, partita['sq1'])} vs "
+                             f"{nome_squadra(state, partita['sq2'])}: {errori[partita['id']]}")
+            return
+        st.success(f"✅ {len(risultati)} risultati confermati e classifica aggiornata!")
+        st.rerun()
+
+
+@st.fragment
+def _render_partita(state, partita, label, key_prefix):
+    """
+    Match card + scoreboard in un frammento: un input rifà girare solo questa
+    partita. Conferma, simulazione e correzione chiamano st.rerun() (intera
+    app) così classifiche, header e sidebar si aggiornano solo allora.
+    """
+    render_match_card(state, partita, label=label)
+    
+    if not partita["confermata"]:
+        if st.toggle("🏐 Live rally per rally", value=bool(partita.get("rally")), key=f"{key_prefix}_rally_on"):
+            render_rally(state, partita, key_prefix)
+        else:
+            _render_scoreboard_live(state, partita, key_prefix)
+    else:
+        render_correzione(state, partita, key_prefix)
+    
+    st.markdown("---")
 
 
 def _render_scoreboard_live(state, partita, key_prefix):
@@ -112,40 +213,72 @@ def _render_scoreboard_live(state, partita, key_prefix):
                 st.error("Inserisci almeno un set con punteggio.")
                 return
             
-            partita["punteggi"] = punteggi_validi
-            partita["set_sq1"] = s1v
-            partita["set_sq2"] = s2v
-            partita["vincitore"] = partita["sq1"] if s1v > s2v else partita["sq2"]
-            partita["confermata"] = True
-            aggiorna_classifica_squadra(state, partita)
-            save_state(state)
+            try:
+                with annulla_se_in_conflitto(state):
+                    partita["punteggi"] = punteggi_validi
+                    partita["set_sq1"] = s1v
+                    partita["set_sq2"] = s2v
+                    partita["vincitore"] = partita["sq1"] if s1v > s2v else partita["sq2"]
+                    partita["confermata"] = True
+                    aggiorna_classifica_squadra(state, partita)
+                    salva_partita(state, partita)
+            except ConflittoPartita as e:
+                st.error(str(e))
+                return
             st.success("✅ Risultato confermato e classifica aggiornata!")
             st.rerun()
         
         if st.button("🎲 Simula questo match", key=f"{key_prefix}_sim"):
-            simula_partita(state, partita)
-            if state["simulazione_al_ranking"]:
-                aggiorna_classifica_squadra(state, partita)
-            save_state(state)
+            try:
+                with annulla_se_in_conflitto(state):
+                    simula_partita(state, partita)
+                    if state["simulazione_al_ranking"]:
+                        aggiorna_classifica_squadra(state, partita)
+                    salva_partita(state, partita)
+            except ConflittoPartita as e:
+                st.error(str(e))
+                return
             st.rerun()
 
 
+def _render_classifica_svizzera(state, girone):
+    turni_tot = state["torneo"].get("turni_svizzera", 5)
+    qualificate = state["torneo"].get("qualificate_svizzera", 8)
+    st.markdown(f"### 📊 Classifica Sistema Svizzero · Turno {girone['turno']} di {turni_tot}")
+    html = """
+    <table class="rank-table">
+    <tr>
+        <th>#</th><th>SQUADRA</th><th>PTS</th><th>BUC</th><th>V</th><th>P</th>
+        <th>SV</th><th>SP</th><th>PF</th><th>PS</th>
+    </tr>"""
+    pos_cls = {1: "gold", 2: "silver", 3: "bronze"}
+    for i, sq in enumerate(classifica_svizzera(state, girone)):
+        pos = i + 1
+        qualif = "🟢" if pos <= qualificate else ""
+        bye = " · BYE" if sq["id"] in girone["bye"] else ""
+        html += f"""
+        <tr>
+            <td><span class="rank-pos {pos_cls.get(pos, '')}">{pos}</span></td>
+            <td style="text-align:left;font-weight:600">{qualif} {sq['nome']}<span style="color:#666">{bye}</span></td>
+            <td style="font-weight:700;color:var(--accent-gold)">{sq['punti_classifica']}</td>
+            <td>{sq['buchholz']}</td>
+            <td style="color:var(--green)">{sq['vittorie']}</td>
+            <td style="color:var(--accent-red)">{sq['sconfitte']}</td>
+            <td>{sq['set_vinti']}</td><td>{sq['set_persi']}</td>
+            <td>{sq['punti_fatti']}</td><td>{sq['punti_subiti']}</td>
+        </tr>"""
+    html += "</table>"
+    st.markdown(html, unsafe_allow_html=True)
+    st.caption(f"🟢 Le prime {qualificate} ai Playoff · BUC = Buchholz, somma dei punti degli avversari incontrati")
+
+
 def _render_classifiche_gironi(state):
-    for girone in state["gironi"]:
+    passano = state["torneo"].get("passano_per_girone", 2)
+    for idx, girone in enumerate(state["gironi"]):
         st.markdown(f"### 📊 Classifica {girone['nome']}")
         
-        # Calcola classifica dal vivo
-        squadre_dati = []
-        for sid in girone["squadre"]:
-            sq = get_squadra_by_id(state, sid)
-            if sq:
-                squadre_dati.append(sq)
-        
-        squadre_ord = sorted(squadre_dati, key=lambda s: (
-            -s["punti_classifica"], -s["vittorie"],
-            -(s["set_vinti"] - s["set_persi"]),
-            -(s["punti_fatti"] - s["punti_subiti"])
-        ))
+        # Classifica mantenuta a ogni conferma (aggiorna_classifica_squadra)
+        squadre_ord = classifica_girone(state, girone)
         
         # HTML table
         html = """
@@ -159,7 +292,7 @@ def _render_classifiche_gironi(state):
         for i, sq in enumerate(squadre_ord):
             pos = i + 1
             cls = pos_cls.get(pos, "")
-            qualif = "🟢" if pos <= 2 else ""
+            qualif = "🟢" if pos <= passano else ""
             html += f"""
             <tr>
                 <td><span class="rank-pos {cls}">{pos}</span></td>
@@ -173,17 +306,57 @@ def _render_classifiche_gironi(state):
         
         html += "</table>"
         st.markdown(html, unsafe_allow_html=True)
-        st.caption("🟢 Le prime 2 qualificate ai Playoff")
+        st.caption(f"🟢 Le prime {passano} qualificate ai Playoff"
+                   + (" · a pari punti decide la classifica avulsa (scontri diretti)"
+                      if state["torneo"].get("criterio_passaggio") == "avulsa" else ""))
+        _render_scenari(state, girone, idx)
         st.markdown("---")
 
 
+def _render_scenari(state, girone, idx):
+    """Chi è già qualificato/eliminato e cosa serve alle squadre in corsa."""
+    if all(p["confermata"] for p in girone["partite"]):
+        return
+    with st.expander("🔍 Scenari di qualificazione"):
+        classi = False
+        if state["torneo"]["formato_set"] == "Best of 3":
+            classi = st.toggle("Distingui 2-0 / 2-1", value=True, key=f"scenari_classi_{idx}",
+                               help="Usa la differenza set delle classi di punteggio per sciogliere le parità")
+        # Cache per versione dello stato: si ricalcola solo dopo una conferma
+        cache = st.session_state.setdefault("scenari_cache", {"versione": None, "risultati": {}})
+        versione = versione_stato(state)
+        if cache["versione"] != versione:
+            cache["versione"], cache["risultati"] = versione, {}
+        chiave = (idx, classi)
+        if chiave not in cache["risultati"]:
+            cache["risultati"][chiave] = scenari_girone(state, girone, classi_set=classi)
+        risultato = cache["risultati"][chiave]
+
+        icone = {"qualificata": "🟢", "eliminata": "🔴", "in corsa": "🟡"}
+        for sq in risultato["squadre"]:
+            st.markdown(f"{icone[sq['stato']]} **{sq['nome']}** — {sq['stato']}")
+            for condizione in sq["condizioni"]:
+                st.caption(f"↳ {condizione}")
+        if risultato["esatto"]:
+            st.caption(f"{risultato['scenari']:,} scenari esaminati · le parità non decidibili restano in corsa")
+        else:
+            st.caption(f"Troppi scenari: stima su {risultato['scenari']:,} campioni casuali, "
+                       "qualificate/eliminate solo se già decise dai punti")
+
+
 def _simula_tutti(state):
-    for girone in state["gironi"]:
-        for partita in girone["partite"]:
-            if not partita["confermata"]:
-                simula_partita(state, partita)
+    from motore_simulazione import simula_partite   # numpy solo quando si simula
+    simulate = [p for g in state["gironi"] for p in g["partite"] if not p["confermata"]]
+    try:
+        with annulla_se_in_conflitto(state):     # in conflitto: nessuna simulazione resta in memoria
+            simula_partite(state, simulate)   # motore vettoriale: tutte le partite in un colpo
+            for partita in simulate:
                 if state["simulazione_al_ranking"]:
                     aggiorna_classifica_squadra(state, partita)
-    save_state(state)
+            if simulate:
+                salva_partita(state, *simulate)
+    except ConflittoPartita as e:
+        st.error(str(e))
+        return
     st.success("🎲 Tutti i match simulati!")
     st.rerun()
@@ -2,9 +2,8 @@
 fase_proclamazione.py — Fase 4: Proclamazione vincitori e Ranking globale
 """
 import streamlit as st
-import pandas as pd
 from data_manager import (
-    save_state, get_squadra_by_id, get_atleta_by_id
+    save_state, get_squadra_by_id, get_atleta_by_id, voci_ranking
 )
 from ui_components import render_winner_banner, render_podio, render_career_card
 
@@ -47,39 +46,13 @@ def render_ranking_globale(state):
         st.info("Nessun dato disponibile. Completa un torneo per generare il ranking.")
         return
     
-    # Costruisci dati ranking
-    atleti_stats = []
-    for a in state["atleti"]:
-        s = a["stats"]
-        if s["tornei"] == 0:
-            continue
-        quoziente = round(s["punti_fatti"] / max(s["set_vinti"], 1), 2)
-        win_rate = round(s["vittorie"] / max(s["tornei"], 1) * 100, 1)
-        
-        # Punteggio ranking: punti per posizioni
-        rank_pts = 0
-        for _, pos in s["storico_posizioni"]:
-            rank_pts += {1: 100, 2: 70, 3: 50}.get(pos, 20)
-        
-        atleti_stats.append({
-            "atleta": a,
-            "nome": a["nome"],
-            "tornei": s["tornei"],
-            "vittorie": s["vittorie"],
-            "sconfitte": s["sconfitte"],
-            "set_vinti": s["set_vinti"],
-            "set_persi": s["set_persi"],
-            "quoziente": quoziente,
-            "win_rate": win_rate,
-            "rank_pts": rank_pts,
-        })
+    # Classifica già ordinata, mantenuta da trasferisci_al_ranking (nomi attuali degli atleti)
+    atleti_stats = voci_ranking(state)
     
     if not atleti_stats:
         st.info("Completa il torneo e trasferisci i dati al ranking per visualizzarli.")
         return
     
-    atleti_stats.sort(key=lambda x: -x["rank_pts"])
-    
     # Podio graficoo top 3
     if len(atleti_stats) >= 3:
         st.markdown("#### 🏅 Top 3 Atleti")
@@ -163,6 +136,7 @@ def render_schede_carriera(state):
             "Torneo": [t for t, _ in storico],
             "Posizione": [p for _, p in storico],
         }
+        import pandas as pd   # solo quando c'è un grafico da disegnare (~0,4 s di import)
         df = pd.DataFrame(df_data)
         
         # Line chart (posizione invertita: 1° = più alto)
@@ -188,7 +162,7 @@ def _render_nuovo_torneo(state):
     st.info("Iniziare un nuovo torneo manterrà gli atleti e il ranking esistente, ma resetterà squadre e partite.")
     
     if st.button("🆕 NUOVO TORNEO", use_container_width=True, type="primary"):
-        from data_manager import empty_state
+        from data_manager import empty_state, azzera_partite
         
         # Preserva atleti con le loro statistiche accumulate
         atleti_preservati = state["atleti"]
@@ -202,5 +176,6 @@ def _render_nuovo_torneo(state):
         for key in list(st.session_state.keys()):
             del st.session_state[key]
         
+        azzera_partite()
         save_state(nuovo)
         st.rerun()
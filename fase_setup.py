@@ -4,7 +4,9 @@ fase_setup.py — Fase 1: Configurazione torneo strutturata + iscrizione squadre
 import streamlit as st
 from data_manager import (
     new_atleta, new_squadra, get_atleta_by_id,
-    save_state, genera_gironi
+    save_state, salva_modifiche, storico_modificabile, genera_gironi, azzera_partite,
+    genera_doppia_eliminazione, teste_di_serie_per_overall,
+    TIPO_SVIZZERA, nuovo_girone_svizzero, accoppia_turno_svizzera,
 )
 
 
@@ -44,13 +46,15 @@ def render_setup(state):
     with st.expander("🏐 2. Formato di gioco", expanded=True):
         c1, c2, c3 = st.columns(3)
         with c1:
-            tipo_opts = ["Gironi + Playoff", "Doppia Eliminazione", "Girone Unico"]
+            tipo_opts = ["Gironi + Playoff", "Doppia Eliminazione", "Girone Unico", TIPO_SVIZZERA]
             tipo_idx = tipo_opts.index(state["torneo"].get("tipo_tabellone", "Gironi + Playoff")) if state["torneo"].get("tipo_tabellone") in tipo_opts else 0
             tipo = st.selectbox(
                 "Tipo tabellone",
                 tipo_opts,
                 index=tipo_idx,
-                help="Girone Unico = un solo girone all'italiana"
+                help="Girone Unico = un solo girone all'italiana · Doppia Eliminazione = niente gironi, "
+                     "si esce alla seconda sconfitta · Sistema Svizzero = pochi turni accoppiando "
+                     "squadre con lo stesso punteggio, ideale per campi grandi"
             )
             state["torneo"]["tipo_tabellone"] = tipo
             state["torneo"]["girone_unico"] = (tipo == "Girone Unico")
@@ -83,7 +87,41 @@ def render_setup(state):
     # ─── 3. GIRONI E QUALIFICAZIONE ──────────────────────────────────────────
     with st.expander("🔵 3. Gironi e qualificazione", expanded=not state["torneo"].get("girone_unico")):
         girone_unico = state["torneo"].get("girone_unico", False)
-        if girone_unico:
+        if state["torneo"]["tipo_tabellone"] == "Doppia Eliminazione":
+            st.info("Doppia eliminazione: nessun girone. Tabellone vincenti + perdenti, teste di serie "
+                    "per Overall medio della coppia; i BYE vanno alle teste di serie migliori.")
+            state["torneo"]["reset_finale"] = st.toggle(
+                "🔁 Reset della finalissima",
+                value=state["torneo"].get("reset_finale", True),
+                key="reset_finale_setup",
+                help="Se la finalissima la vince chi arriva dal tabellone perdenti, si gioca una seconda finale"
+            )
+        elif state["torneo"]["tipo_tabellone"] == TIPO_SVIZZERA:
+            st.info("Sistema svizzero: a ogni turno si affrontano squadre con lo stesso punteggio, "
+                    "senza rivincite; con squadre dispari una riceve il BYE (vittoria a tavolino, una sola volta).")
+            n_sq = len(state["squadre"])
+            r1, r2 = st.columns(2)
+            with r1:
+                state["torneo"]["turni_svizzera"] = st.number_input(
+                    "Numero di turni",
+                    min_value=1,
+                    max_value=max(1, n_sq - 1),
+                    value=min(state["torneo"].get("turni_svizzera", 5), max(1, n_sq - 1)),
+                    key="turni_svizzera_setup",
+                    help="Di solito log2(squadre) + 1 o 2: con 40 squadre 6-7 turni"
+                )
+            with r2:
+                state["torneo"]["qualificate_svizzera"] = st.number_input(
+                    "Squadre ammesse ai playoff",
+                    min_value=2,
+                    max_value=max(2, min(64, n_sq)),
+                    value=min(state["torneo"].get("qualificate_svizzera", 8), max(2, min(64, n_sq))),
+                    key="qualificate_svizzera_setup"
+                )
+            if n_sq:
+                st.caption(f"→ **{n_sq // 2 * state['torneo']['turni_svizzera']}** partite di qualificazione "
+                           f"invece di {n_sq * (n_sq - 1) // 2} del girone all'italiana")
+        elif girone_unico:
             st.info("Girone unico attivo: tutte le squadre in un solo girone. Le qualificate ai playoff dipendono dal numero di squadre.")
             state["torneo"]["num_gironi"] = 1
             n_sq = len(state["squadre"])
@@ -183,10 +221,22 @@ def render_setup(state):
         if n_squadre >= 4 and state["torneo"]["nome"]:
             if st.button("🚀 AVVIA TORNEO →", use_container_width=True, type="primary"):
                 ids = [s["id"] for s in state["squadre"]]
-                num_gironi = state["torneo"].get("num_gironi", max(2, n_squadre // 4))
-                girone_unico = state["torneo"].get("girone_unico", False)
-                state["gironi"] = genera_gironi(ids, num_gironi=num_gironi, girone_unico=girone_unico)
-                state["fase"] = "gironi"
+                if state["torneo"]["tipo_tabellone"] == "Doppia Eliminazione":
+                    state["gironi"] = []
+                    state["bracket"] = genera_doppia_eliminazione(
+                        teste_di_serie_per_overall(state, ids),
+                        reset=state["torneo"].get("reset_finale", True))
+                    state["fase"] = "eliminazione"
+                elif state["torneo"]["tipo_tabellone"] == TIPO_SVIZZERA:
+                    state["gironi"] = [nuovo_girone_svizzero(ids)]
+                    accoppia_turno_svizzera(state, state["gironi"][0])
+                    state["fase"] = "gironi"
+                else:
+                    num_gironi = state["torneo"].get("num_gironi", max(2, n_squadre // 4))
+                    girone_unico = state["torneo"].get("girone_unico", False)
+                    state["gironi"] = genera_gironi(ids, num_gironi=num_gironi, girone_unico=girone_unico)
+                    state["fase"] = "gironi"
+                azzera_partite()            # shard del torneo precedente: id ripetibili
                 save_state(state)
                 st.rerun()
 
@@ -198,8 +248,9 @@ def _render_atleti_manager(state):
         nuovo_nome = st.text_input("Nome atleta", key="new_atleta_name", placeholder="Nome Cognome")
         if st.button("Aggiungi atleta", key="btn_add_atleta"):
             if nuovo_nome.strip() and nuovo_nome.strip() not in nomi_esistenti:
+                storico_modificabile(state)   # storico condiviso tra le sessioni: copia privata
                 state["atleti"].append(new_atleta(nuovo_nome.strip()))
-                save_state(state)
+                salva_modifiche(state, atleti=[state["atleti"][-1]])
                 st.success(f"✅ {nuovo_nome} aggiunto!")
                 st.rerun()
             elif nuovo_nome.strip() in nomi_esistenti:
@@ -252,7 +303,7 @@ def _render_squadre_manager(state):
             else:
                 sq = new_squadra(nome_sq, a1_obj["id"], a2_obj["id"])
                 state["squadre"].append(sq)
-                save_state(state)
+                salva_modifiche(state, squadre=[state["squadre"][-1]])
                 st.success(f"✅ Squadra **{nome_sq}** iscritta!")
                 st.rerun()
 
@@ -265,6 +316,6 @@ def _render_squadre_manager(state):
                 st.markdown(f"**{sq['nome']}** — {' / '.join(a_names)}")
             with col_btn:
                 if st.button("🗑️", key=f"del_sq_{i}"):
-                    state["squadre"].pop(i)
-                    save_state(state)
+                    rimossa = state["squadre"].pop(i)
+                    salva_modifiche(state, squadre_rimosse=[rimossa["id"]])
                     st.rerun()
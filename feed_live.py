@@ -0,0 +1,253 @@
+"""
+feed_live.py — Feed in sola lettura dei punteggi per i maxi-schermi (solo libreria standard)
+
+Gira accanto all'app, nella stessa cartella dell'archivio:
+    python feed_live.py --porta 8765
+Un solo thread osserva l'archivio (firma_archivio: dimensione e data dei
+file, ogni INTERVALLO secondi) e lo rilegge solo quando cambia, guidato
+dalla revisione salvata (cresce a ogni save_state / salva_partita); ogni
+cambiamento visibile pubblica una nuova versione. Gli schermi non fanno
+polling:
+- GET /eventi  server-sent events: all'apertura "stato" con tutte le
+  partite, poi "partite" con le sole partite cambiate a ogni nuova versione
+  (id evento = versione; con Last-Event-ID aggiornato non si rimanda nulla);
+- GET /stato   JSON completo (ETag = versione, 304 se invariato);
+- GET /        pagina minima per il maxi-schermo (EventSource).
+"""
+import argparse
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from data_manager import leggi_stato_salvato, firma_archivio, BYE_ID
+
+INTERVALLO = 0.1            # secondi tra due controlli della firma dell'archivio
+KEEPALIVE = 15              # secondi tra due commenti SSE a vuoto
+STORIA_DIFF = 32            # versioni di cui si tengono le differenze
+RIPROVE = 10                # letture con revisione all'indietro prima di accettarla
+
+
+# ─── VISTA DELLE PARTITE ─────────────────────────────────────────────────────
+
+def vista_partite(state):
+    """{id partita: dict compatto per gli schermi} (BYE esclusi)."""
+    nomi = {sq["id"]: sq["nome"] for sq in state.get("squadre", [])}
+    vista = {}
+
+    def aggiungi(p, etichetta):
+        if BYE_ID in (p.get("sq1"), p.get("sq2")):
+            return
+        rally = p.get("rally") or {}
+        vista[p["id"]] = {
+            "id": p["id"],
+            "etichetta": etichetta,
+            "sq1": nomi.get(p.get("sq1"), "da definire"),
+            "sq2": nomi.get(p.get("sq2"), "da definire"),
+            "set": [p.get("set_sq1", 0), p.get("set_sq2", 0)],
+            "punteggi": [list(x) for x in p.get("punteggi", [])],
+            "in_corso": None if p.get("confermata") or rally.get("fine") else rally.get("corrente"),
+            "in_battuta": p.get("in_battuta", 1),
+            "confermata": bool(p.get("confermata")),
+        }
+
+    for g in state.get("gironi", []):
+        for i, p in enumerate(g["partite"]):
+            aggiungi(p, f"{g['nome']} · Match {i + 1}")
+    for i, p in enumerate(state.get("bracket", [])):
+        aggiungi(p, p.get("label_elim") or f"Playoff {i + 1}")
+    return vista
+
+
+# ─── OSSERVATORE DELL'ARCHIVIO ───────────────────────────────────────────────
+
+class Feed:
+    """Ultima vista pubblicata + differenze recenti; gli iscritti attendono sulla condition."""
+
+    def __init__(self):
+        self.condition = threading.Condition()
+        self.versione = 0           # versione pubblicata (id degli eventi)
+        self.revisione = -1         # revisione dell'archivio letta per ultima
+        self.partite = {}
+        self.nome_torneo = ""
+        self.diff = {}              # versione → (versione precedente, partite cambiate | None)
+        self._firma = None
+        self._indietro = 0
+        self.letture = 0
+
+    def aggiorna(self):
+        """Rilegge l'archivio se la firma è cambiata; True se è uscita una nuova versione."""
+        firma = firma_archivio()
+        if firma == self._firma:
+            return False
+        state, revisione = leggi_stato_salvato()
+        self.letture += 1
+        if state is None:
+            return False
+        if revisione < self.revisione and self._indietro < RIPROVE:
+            # Lettura a cavallo di un salvataggio (snapshot vecchio, journal già
+            # svuotato): si riprova; se persiste l'archivio è stato davvero azzerato
+            self._indietro += 1
+            return False
+        self._indietro = 0
+        self._firma, self.revisione = firma, revisione
+        partite = vista_partite(state)
+        nome = state.get("torneo", {}).get("nome", "")
+        if partite == self.partite and nome == self.nome_torneo:
+            return False            # nulla di visibile sugli schermi (atleti, impostazioni...)
+        cambiate = [p for pid, p in partite.items() if self.partite.get(pid) != p]
+        # Partite sparite (tabellone rigenerato, reset) o nome cambiato: si rimanda tutto
+        completo = bool(set(self.partite) - set(partite)) or nome != self.nome_torneo
+        with self.condition:
+            self.versione += 1
+            self.diff[self.versione] = (self.versione - 1, None if completo else cambiate)
+            self.diff.pop(self.versione - STORIA_DIFF, None)
+            self.partite, self.nome_torneo = partite, nome
+            self.condition.notify_all()
+        return True
+
+    def osserva(self, fermo):
+        while not fermo.is_set():
+            try:
+                self.aggiorna()
+            except (OSError, ValueError):
+                pass                # archivio in scrittura: si riprova al giro dopo
+            fermo.wait(INTERVALLO)
+
+    def stato(self):
+        with self.condition:
+            return {"versione": self.versione, "torneo": self.nome_torneo,
+                    "partite": list(self.partite.values())}
+
+    def attendi(self, versione, timeout):
+        """Blocca finché esce una versione > `versione` (o timeout); restituisce (nuova, evento, dati)."""
+        with self.condition:
+            self.condition.wait_for(lambda: self.versione > versione, timeout)
+            if self.versione <= versione:
+                return versione, None, None
+            precedente, cambiate = self.diff.get(self.versione, (None, None))
+            if precedente == versione and cambiate is not None:
+                return self.versione, "partite", {"versione": self.versione, "partite": cambiate}
+        return self.versione, "stato", self.stato()
+
+
+# ─── SERVER HTTP ─────────────────────────────────────────────────────────────
+
+PAGINA = """<!doctype html><meta charset="utf-8"><title>🏐 Live</title>
+<style>body{background:#0a0a0f;color:#fff;font-family:sans-serif;margin:24px}
+.p{display:flex;justify-content:space-between;border-bottom:1px solid #2a2a3a;padding:10px 0;font-size:1.6rem}
+.e{color:#a0a0b0;font-size:.9rem}.s{font-weight:800;color:#ffd700}</style>
+<h1 id="t">🏐 Live</h1><div id="l"></div><script>
+const P = {};
+function draw(){document.getElementById('l').innerHTML = Object.values(P).filter(p => !p.confermata)
+ .map(p => `<div class="p"><span>${p.sq1}<br><span class="e">${p.etichetta}</span></span>
+ <span class="s">${p.set[0]}–${p.set[1]} ${p.in_corso ? '(' + p.in_corso.join('-') + ')' : ''}</span>
+ <span>${p.sq2}</span></div>`).join('')}
+const es = new EventSource('eventi');
+es.addEventListener('stato', e => {const d = JSON.parse(e.data);
+ for (const k in P) delete P[k]; d.partite.forEach(p => P[p.id] = p);
+ document.getElementById('t').textContent = '🏐 ' + (d.torneo || 'Live'); draw()});
+es.addEventListener('partite', e => {JSON.parse(e.data).partite.forEach(p => P[p.id] = p); draw()});
+</script>"""
+
+
+def crea_handler(feed):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass                    # niente log per richiesta: gli schermi restano collegati ore
+
+        def do_GET(self):
+            if self.path == "/stato":
+                self._stato()
+            elif self.path == "/eventi":
+                self._eventi()
+            elif self.path == "/":
+                self._invia(200, "text/html; charset=utf-8", PAGINA.encode("utf-8"))
+            else:
+                self._invia(404, "text/plain", b"not found")
+
+        def _invia(self, codice, tipo, corpo, intestazioni=()):
+            self.send_response(codice)
+            self.send_header("Content-Type", tipo)
+            self.send_header("Content-Length", str(len(corpo)))
+            self.send_header("Access-Control-Allow-Origin", "*")
+            for k, v in intestazioni:
+                self.send_header(k, v)
+            self.end_headers()
+            self.wfile.write(corpo)
+
+        def _stato(self):
+            stato = feed.stato()
+            etag = f'"{stato["versione"]}"'
+            if self.headers.get("If-None-Match") == etag:
+                self._invia(304, "application/json", b"", [("ETag", etag)])
+                return
+            corpo = json.dumps(stato, ensure_ascii=False).encode("utf-8")
+            self._invia(200, "application/json; charset=utf-8", corpo, [("ETag", etag)])
+
+        def _eventi(self):
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Cache-Control", "no-cache")
+            self.send_header("Access-Control-Allow-Origin", "*")
+            self.send_header("Connection", "close")
+            self.end_headers()
+            self.close_connection = True
+            try:
+                versione = int(self.headers.get("Last-Event-ID", -1))
+            except ValueError:
+                versione = -1
+            try:
+                stato = feed.stato()
+                if stato["versione"] != versione:
+                    versione = stato["versione"]
+                    self._evento(versione, "stato", stato)
+                while True:
+                    nuova, tipo, dati = feed.attendi(versione, KEEPALIVE)
+                    if tipo is None:
+                        self.wfile.write(b": keepalive\n\n")
+                        self.wfile.flush()
+                        continue
+                    versione = nuova
+                    self._evento(versione, tipo, dati)
+            except (BrokenPipeError, ConnectionResetError):
+                pass                # schermo scollegato
+
+        def _evento(self, versione, tipo, dati):
+            testo = f"id: {versione}\nevent: {tipo}\ndata: {json.dumps(dati, ensure_ascii=False)}\n\n"
+            self.wfile.write(testo.encode("utf-8"))
+            self.wfile.flush()
+
+    return Handler
+
+
+def avvia_server(porta=8765, host="0.0.0.0"):
+    """Server e thread di osservazione avviati; restituisce (server, feed, fermo)."""
+    feed = Feed()
+    fermo = threading.Event()
+    feed.aggiorna()
+    threading.Thread(target=feed.osserva, args=(fermo,), daemon=True).start()
+    server = ThreadingHTTPServer((host, porta), crea_handler(feed))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, feed, fermo
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Feed live dei punteggi (server-sent events)")
+    parser.add_argument("--porta", type=int, default=8765)
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--cartella", default=".", help="cartella dell'archivio (dove gira app.py)")
+    args = parser.parse_args()
+    os.chdir(args.cartella)
+    server, feed, fermo = avvia_server(args.porta, args.host)
+    print(f"🏐 Feed live su http://{args.host}:{args.porta}/ (eventi: /eventi, JSON: /stato)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        fermo.set()
+        server.shutdown()
@@ -0,0 +1,154 @@
+"""
+motore_simulazione.py — Simulazione vettoriale (NumPy) di set e partite
+
+Stesse regole di data_manager.simula_set / simula_partita:
+- set a `pmax` punti con 2 di scarto, terzo set (tie-break) a 15 in Best of 3;
+- cap: ai vantaggi, il primo che supera pmax+6 chiude il set, e il punteggio
+  viene restituito col maggiore per primo (come nel ciclo originale).
+
+Invece di estrarre un rally alla volta, il punteggio "regolamentare" di un set
+è campionato direttamente dalla sua distribuzione esatta (binomiale negativa:
+il vincitore arriva a L mentre l'altro è fermo a k <= L-2, oppure si arriva
+sul L-1 pari). I vantaggi sono una geometrica sulle coppie di rally pareggiate.
+Un unico generatore `numpy.random.Generator` con seed esplicito rende i
+risultati riproducibili.
+"""
+from math import comb
+
+import numpy as np
+
+TIE_BREAK = 15       # punti del terzo set in Best of 3
+CAP_VANTAGGI = 7     # coppie di rally pari dopo L-1 pari prima del cap (pmax+6 superato)
+
+
+def nuovo_rng(seed=None):
+    """Generatore NumPy riproducibile (seed=None → entropia di sistema)."""
+    return np.random.default_rng(seed)
+
+
+def _probabilita_regolamentari(limit, p):
+    """
+    Matrice (n, 2L-1) delle probabilità degli esiti prima dei vantaggi:
+    colonne 0..L-2 → A vince L-k; L-1..2L-3 → B vince L-k; ultima → L-1 pari.
+    """
+    p = np.atleast_1d(np.asarray(p, dtype=float))[:, None]
+    q = 1.0 - p
+    k = np.arange(limit - 1)
+    coeff = np.array([comb(limit - 1 + i, i) for i in k], dtype=float)
+    vince_a = coeff * p ** limit * q ** k
+    vince_b = coeff * q ** limit * p ** k
+    pari = comb(2 * limit - 2, limit - 1) * (p * q) ** (limit - 1)
+    return np.hstack([vince_a, vince_b, pari])
+
+
+def simula_set_batch(n, pmax, tie_break=False, p=0.5, rng=None):
+    """
+    Simula n set. p = probabilità che la squadra A vinca un rally
+    (scalare o array di lunghezza n). Restituisce due array int (punti A, punti B).
+    """
+    rng = rng if rng is not None else nuovo_rng()
+    limit = TIE_BREAK if tie_break else pmax
+    if n == 0:
+        return np.empty(0, dtype=np.int32), np.empty(0, dtype=np.int32)
+    if np.ndim(p) == 0:
+        valori, inv = np.array([float(p)]), np.zeros(n, dtype=np.intp)
+    else:
+        valori, inv = np.unique(np.asarray(p, dtype=float), return_inverse=True)
+    p = valori[inv]
+
+    # Esito regolamentare per inversione della CDF: una CDF per ogni p distinto,
+    # sfalsate di +riga in un unico array crescente → una sola searchsorted
+    cdf = np.cumsum(_probabilita_regolamentari(limit, valori), axis=1)
+    cdf /= cdf[:, -1:]
+    n_esiti = cdf.shape[1]
+    piatta = (cdf + np.arange(len(valori))[:, None]).ravel()
+    esito = np.searchsorted(piatta, rng.random(n) + inv) - inv * n_esiti
+
+    a = np.empty(n, dtype=np.int32)
+    b = np.empty(n, dtype=np.int32)
+    vince_a = esito < limit - 1
+    vince_b = (esito >= limit - 1) & (esito < 2 * limit - 2)
+    a[vince_a], b[vince_a] = limit, esito[vince_a]
+    a[vince_b], b[vince_b] = esito[vince_b] - (limit - 1), limit
+
+    # Vantaggi da L-1 pari: coppie di rally finché una squadra non le vince entrambe
+    pari = ~(vince_a | vince_b)
+    if pari.any():
+        pp = p[pari]
+        decisiva = pp ** 2 + (1 - pp) ** 2
+        coppie_pari = np.minimum(rng.geometric(decisiva) - 1, CAP_VANTAGGI)
+        a_vince = rng.random(pp.size) < pp ** 2 / decisiva
+        base = limit - 1 + coppie_pari
+        va, vb = np.where(a_vince, base + 2, base), np.where(a_vince, base, base + 2)
+        cap = coppie_pari == CAP_VANTAGGI
+        va[cap], vb[cap] = limit + CAP_VANTAGGI, limit + CAP_VANTAGGI - 1
+        a[pari], b[pari] = va, vb
+    return a, b
+
+
+def probabilita_set(pmax, p=0.5, tie_break=False):
+    """Probabilità esatta che la squadra A vinca un set (p = rally vinto da A)."""
+    limit = TIE_BREAK if tie_break else pmax
+    prob = _probabilita_regolamentari(limit, p)
+    p = np.atleast_1d(np.asarray(p, dtype=float))
+    r = 2 * p * (1 - p)   # coppia di rally divisa ai vantaggi
+    # Vantaggi: A vince una coppia prima del cap; al cap il set va comunque ad A
+    vantaggi = p ** 2 * (1 - r ** CAP_VANTAGGI) / (1 - r) + r ** CAP_VANTAGGI
+    return prob[:, :limit - 1].sum(axis=1) + prob[:, -1] * vantaggi
+
+
+def probabilita_partita(pmax, formato="Set Unico", p=0.5):
+    """Probabilità esatta che la squadra A vinca la partita."""
+    s = probabilita_set(pmax, p)
+    if formato == "Set Unico":
+        return s
+    return s ** 2 + 2 * s * (1 - s) * probabilita_set(pmax, p, tie_break=True)
+
+
+def simula_partite_batch(n, pmax, formato="Set Unico", p=0.5, rng=None):
+    """
+    Simula n partite. Restituisce (punteggi, set_a, set_b):
+    punteggi è un array (n, 3, 2) con -1 per i set non giocati.
+    """
+    rng = rng if rng is not None else nuovo_rng()
+    punteggi = np.full((n, 3, 2), -1, dtype=np.int32)
+    a1, b1 = simula_set_batch(n, pmax, p=p, rng=rng)
+    punteggi[:, 0, 0], punteggi[:, 0, 1] = a1, b1
+    set_a = (a1 > b1).astype(np.int32)
+    set_b = 1 - set_a
+    if formato == "Set Unico":
+        return punteggi, set_a, set_b
+
+    a2, b2 = simula_set_batch(n, pmax, p=p, rng=rng)
+    punteggi[:, 1, 0], punteggi[:, 1, 1] = a2, b2
+    set_a += a2 > b2
+    set_b += a2 <= b2
+    terzo = set_a == 1   # 1-1 dopo due set
+    if terzo.any():
+        p3 = np.broadcast_to(np.asarray(p, dtype=float), (n,))[terzo]
+        a3, b3 = simula_set_batch(int(terzo.sum()), pmax, tie_break=True, p=p3, rng=rng)
+        punteggi[terzo, 2, 0], punteggi[terzo, 2, 1] = a3, b3
+        set_a[terzo] += a3 > b3
+        set_b[terzo] += a3 <= b3
+    return punteggi, set_a, set_b
+
+
+def simula_partite(state, partite, seed=None, rng=None, p=0.5):
+    """
+    Versione batch di data_manager.simula_partita: riempie in un colpo solo
+    punteggi, set, vincitore e conferma di tutte le partite indicate.
+    """
+    partite = list(partite)
+    if not partite:
+        return partite
+    rng = rng if rng is not None else nuovo_rng(seed)
+    torneo = state["torneo"]
+    punteggi, set_a, set_b = simula_partite_batch(
+        len(partite), torneo["punteggio_max"], torneo["formato_set"], p=p, rng=rng)
+    for i, partita in enumerate(partite):
+        partita["punteggi"] = [(int(x), int(y)) for x, y in punteggi[i] if x >= 0]
+        partita["set_sq1"] = int(set_a[i])
+        partita["set_sq2"] = int(set_b[i])
+        partita["vincitore"] = partita["sq1"] if set_a[i] > set_b[i] else partita["sq2"]
+        partita["confermata"] = True
+    return partite
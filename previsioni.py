@@ -0,0 +1,444 @@
+"""
+previsioni.py — Previsioni Monte Carlo sull'esito del torneo in corso
+
+Gioca il resto del torneo migliaia di volte a partire dallo stato attuale:
+- partite del girone ancora da confermare: simulate in blocco (motore_simulazione);
+- classifiche dei gironi: stesso ordinamento dell'app (chiave_classifica,
+  classifica avulsa) e stesse teste di serie (teste_di_serie_dai_gironi);
+- sistema svizzero: turni mancanti accoppiati in ogni torneo simulato con
+  accoppia_turno_svizzera, qualificate da classifica_svizzera;
+- fasi finali: tabellone modello di genera_tabellone costruito una volta per
+  blocco e giocato sui suoi collegamenti; a tabellone già iniziato le
+  funzioni dell'app (avanza_vincitore, podio_bracket).
+Le simulazioni sono divise in blocchi (ProcessPoolExecutor se ci sono più CPU);
+ogni blocco ha il suo seed, quindi a parità di seed il risultato non dipende
+dal numero di processi. Nessun import di streamlit: la vista è previsioni_page.
+"""
+import hashlib
+import json
+import os
+import random
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from data_manager import (
+    BYE_ID, compute_overall, get_atleta_by_id, genera_tabellone, teste_di_serie_dai_gironi,
+    avanza_vincitore, aggiungi_semifinali_e_finali, podio_bracket, chiave_classifica,
+    ricostruisci_scontri, _applica_avulsa, aggiorna_classifica_squadra, accoppia_turno_svizzera,
+    classifica_svizzera,
+)
+from motore_simulazione import nuovo_rng, simula_partite_batch, probabilita_partita
+
+RUN_PER_BLOCCO = 2500      # simulazioni per processo worker (unità di seed)
+MAX_RUN_SVIZZERA = 2000    # sistema svizzero: ogni torneo simulato accoppia i turni uno per uno
+MIN_RUN_POOL = 10000       # sotto questa soglia l'avvio del pool costa più di quanto fa risparmiare
+K_FORZA = 0.0015           # rally vinto: +0.15% per punto di Overall medio di differenza
+P_RALLY_MIN, P_RALLY_MAX = 0.40, 0.60
+
+_STATS_CLASSIFICA = ("punti_classifica", "vittorie", "sconfitte",
+                     "set_vinti", "set_persi", "punti_fatti", "punti_subiti")
+
+
+# ─── MODELLO DI FORZA ────────────────────────────────────────────────────────
+
+def forza_squadre(state):
+    """Overall medio (compute_overall) dei due atleti di ogni squadra."""
+    forze = {}
+    for sq in state["squadre"]:
+        overall = [compute_overall(a) for a in
+                   (get_atleta_by_id(state, aid) for aid in sq["atleti"]) if a]
+        forze[sq["id"]] = sum(overall) / len(overall) if overall else 40
+    return forze
+
+
+def probabilita_rally(forza1, forza2, k=K_FORZA):
+    """Probabilità che la squadra 1 vinca un rally, limitata a [0.40, 0.60]."""
+    return min(P_RALLY_MAX, max(P_RALLY_MIN, 0.5 + k * (forza1 - forza2)))
+
+
+# ─── STATO PER I WORKER ──────────────────────────────────────────────────────
+
+def stato_per_previsioni(state):
+    """
+    Copia semplice (dict/list, niente oggetti tracciati) delle sole sezioni
+    che servono alla simulazione: è quella che viene inviata ai processi.
+    """
+    sezioni = {k: state.get(k, []) for k in ("squadre", "gironi", "bracket")}
+    sezioni["torneo"] = state["torneo"]
+    return json.loads(json.dumps(sezioni))
+
+
+def firma_torneo(state):
+    """Impronta del contenuto simulato: cambia solo se cambiano squadre o risultati."""
+    testo = json.dumps(stato_per_previsioni(state), sort_keys=True)
+    return hashlib.sha1(testo.encode("utf-8")).hexdigest()
+
+
+# ─── SIMULAZIONE DI UN BLOCCO (eseguita nei worker) ──────────────────────────
+
+def _tabella_gironi(stato, n_run, p_rally, rng):
+    """
+    Simula in blocco le partite di girone non confermate per n_run tornei.
+    Restituisce (ids squadre, dict statistica → array (n_run, n_squadre),
+    partite simulate [(indice girone, sq1, sq2)], esiti per torneo simulato:
+    per partita (set_sq1, set_sq2, punti_sq1, punti_sq2)).
+    """
+    torneo = stato["torneo"]
+    ids = [sq["id"] for sq in stato["squadre"]]
+    pos = {sid: j for j, sid in enumerate(ids)}
+    tab = {k: np.tile([sq.get(k, 0) for sq in stato["squadre"]], (n_run, 1))
+           for k in _STATS_CLASSIFICA}
+
+    da_giocare = [(gi, p) for gi, g in enumerate(stato["gironi"]) for p in g["partite"]
+                  if not p["confermata"] and p["sq1"] in pos and p["sq2"] in pos]
+    partite = [(gi, pa["sq1"], pa["sq2"]) for gi, pa in da_giocare]
+    da_giocare = [pa for _, pa in da_giocare]
+    if not da_giocare:
+        return ids, tab, partite, [[] for _ in range(n_run)]
+
+    m = len(da_giocare)
+    p = 0.5 if p_rally is None else np.tile([p_rally(pa["sq1"], pa["sq2"]) for pa in da_giocare], n_run)
+    punteggi, set_a, set_b = simula_partite_batch(
+        n_run * m, torneo["punteggio_max"], torneo["formato_set"], p=p, rng=rng)
+    punti = np.where(punteggi >= 0, punteggi, 0).sum(axis=1)          # (n*m, 2)
+    punti_a, punti_b = punti[:, 0].reshape(n_run, m), punti[:, 1].reshape(n_run, m)
+    set_a, set_b = set_a.reshape(n_run, m), set_b.reshape(n_run, m)
+    vince_a = (set_a > set_b).astype(np.int64)
+
+    # Matrici di incidenza partita → squadra: una moltiplicazione per statistica
+    inc1 = np.zeros((m, len(ids)), dtype=np.int64)
+    inc2 = np.zeros((m, len(ids)), dtype=np.int64)
+    for i, pa in enumerate(da_giocare):
+        inc1[i, pos[pa["sq1"]]] = 1
+        inc2[i, pos[pa["sq2"]]] = 1
+
+    def somma(per_sq1, per_sq2):
+        return per_sq1 @ inc1 + per_sq2 @ inc2
+
+    tab["punti_classifica"] += somma(1 + 2 * vince_a, 3 - 2 * vince_a)
+    tab["vittorie"] += somma(vince_a, 1 - vince_a)
+    tab["sconfitte"] += somma(1 - vince_a, vince_a)
+    tab["set_vinti"] += somma(set_a, set_b)
+    tab["set_persi"] += somma(set_b, set_a)
+    tab["punti_fatti"] += somma(punti_a, punti_b)
+    tab["punti_subiti"] += somma(punti_b, punti_a)
+    esiti = np.stack([set_a, set_b, punti_a, punti_b], axis=2).tolist()
+    return ids, tab, partite, esiti
+
+
+def _scontri_simulati(base, partite, esiti, pari=None):
+    """
+    Scontri diretti di un torneo simulato (formato di girone["scontri"]): quelli
+    delle partite confermate più le partite di girone simulate nel torneo.
+    pari: solo le righe tra queste squadre (le sole lette dalla classifica avulsa).
+    """
+    scontri = {a: {b: list(c) for b, c in riga.items() if pari is None or b in pari}
+               for a, riga in base.items() if pari is None or a in pari}
+    for (_, sq1, sq2), (s1, s2, p1, p2) in zip(partite, esiti):
+        if pari is not None and (sq1 not in pari or sq2 not in pari):
+            continue
+        vince_1 = s1 > s2
+        for sid, avv, valori in ((sq1, sq2, (3 if vince_1 else 1, s1, s2, p1, p2)),
+                                 (sq2, sq1, (1 if vince_1 else 3, s2, s1, p2, p1))):
+            cella = scontri.setdefault(sid, {}).setdefault(avv, [0, 0, 0, 0, 0])
+            for i, v in enumerate(valori):
+                cella[i] += v
+    return scontri
+
+
+def _gioca_tabellone(stato, gioca):
+    """Gioca turno dopo turno le partite con entrambe le squadre note, fino alla finale."""
+    while True:
+        pronte = [p for p in stato["bracket"]
+                  if not p["confermata"] and p["sq1"] is not None and p["sq2"] is not None]
+        if not pronte:
+            return
+        for partita in pronte:
+            gioca(stato, partita)
+            avanza_vincitore(stato, partita)
+
+
+def _schema_tabellone(n_qualificate):
+    """
+    Tabellone modello, costruito una volta per blocco: genera_tabellone con le
+    teste di serie 0..n-1 (BYE già chiusi). Restituisce (slot iniziali {id: [sq1,
+    sq2]}, partite da giocare in ordine di turno come (id, successiva, perdente),
+    finale_12). Le destinazioni sono (id, 0|1); negli slot una testa di serie è
+    il suo indice, una squadra ancora da definire None.
+    """
+    bracket = genera_tabellone(list(range(n_qualificate)))
+    slot = {p["id"]: [p["sq1"], p["sq2"]] for p in bracket}
+    aperte = []
+    for p in bracket:
+        if p["confermata"]:
+            continue
+        dest = [(p[k + "_id"], 0 if p[k + "_slot"] == "sq1" else 1) if p.get(k + "_id") else None
+                for k in ("next", "loser")]
+        aperte.append((p["id"], *dest))
+    finale = next((p for p in bracket if p.get("label_elim") == "finale_12"), None)
+    return slot, aperte, finale
+
+
+def _gioca_schema(schema, teste_di_serie, vince_sq1):
+    """Un tabellone dal modello: (finaliste, vincitrice) con le squadre al posto degli indici."""
+    slot_iniziali, aperte, finale = schema
+    slot = {pid: [teste_di_serie[x] if type(x) is int else x for x in coppia]
+            for pid, coppia in slot_iniziali.items()}
+    vincitori = {}
+    for pid, successiva, perdente in aperte:
+        a, b = slot[pid]
+        if BYE_ID in (a, b):
+            v, s = (b, a) if a == BYE_ID else (a, b)
+        else:
+            v, s = (a, b) if vince_sq1(a, b) else (b, a)
+        vincitori[pid] = v
+        if successiva:
+            slot[successiva[0]][successiva[1]] = v
+        if perdente:
+            slot[perdente[0]][perdente[1]] = s
+    if finale is None:
+        return (), None
+    if finale["confermata"]:     # una sola qualificata: vince a tavolino
+        return (finale["vincitore"],), finale["vincitore"]
+    return tuple(slot[finale["id"]]), vincitori[finale["id"]]
+
+
+class _SquadreSimulate(list):
+    """Squadre di un torneo simulato con l'indice id → squadra usato da _cerca_per_id."""
+    __slots__ = ("_indice",)
+
+    def __init__(self, squadre):
+        super().__init__(dict(sq) for sq in squadre)
+        self._indice = {sq["id"]: sq for sq in self}
+
+
+def _simula_svizzera(stato, n_run, rng, vince_sq1, con_forze, conteggi):
+    """
+    Sistema svizzero: in ogni torneo simulato gioca il turno in corso e accoppia
+    i turni mancanti con accoppia_turno_svizzera, come l'app; le prime
+    qualificate_svizzera della classifica finale vanno al tabellone. I risultati
+    di girone vengono da un blocco di partite simulate a forze pari; col modello
+    di forza la vincitrice è estratta con vince_sq1 e il punteggio girato su di lei.
+    """
+    torneo = stato["torneo"]
+    girone = stato["gironi"][0]
+    turni_mancanti = max(0, torneo.get("turni_svizzera", 5) - girone["turno"])
+    per_torneo = (sum(1 for p in girone["partite"] if not p["confermata"])
+                  + turni_mancanti * (len(girone["squadre"]) // 2))
+    punteggi, set_a, set_b = simula_partite_batch(
+        n_run * per_torneo, torneo["punteggio_max"], torneo["formato_set"], rng=rng)
+    esiti = zip(punteggi.tolist(), set_a.tolist(), set_b.tolist())
+
+    def gioca_girone(run, partita):
+        righe, s1, s2 = next(esiti)
+        punti = [(a, b) for a, b in righe if a >= 0]
+        if con_forze and (s1 > s2) != vince_sq1(partita["sq1"], partita["sq2"]):
+            punti, s1, s2 = [(b, a) for a, b in punti], s2, s1
+        partita.update(punteggi=punti, set_sq1=s1, set_sq2=s2, confermata=True,
+                       vincitore=partita["sq1"] if s1 > s2 else partita["sq2"])
+        aggiorna_classifica_squadra(run, partita)
+
+    n_qualificate = min(torneo.get("qualificate_svizzera", 8), len(girone["squadre"]))
+    schema = _schema_tabellone(n_qualificate)
+    for _ in range(n_run):
+        g = dict(girone, partite=[p if p["confermata"] else dict(p) for p in girone["partite"]],
+                 bye=list(girone["bye"]))
+        run = {"torneo": torneo, "squadre": _SquadreSimulate(stato["squadre"]), "gironi": [g], "bracket": []}
+        for p in g["partite"]:
+            if not p["confermata"]:
+                gioca_girone(run, p)
+        for _ in range(turni_mancanti):
+            for p in accoppia_turno_svizzera(run, g):
+                if not p["confermata"]:
+                    gioca_girone(run, p)
+        teste_di_serie = [sq["id"] for sq in classifica_svizzera(run, g)[:n_qualificate]]
+        for sid in teste_di_serie:
+            conteggi[sid][0] += 1
+        finaliste, vincitrice = _gioca_schema(schema, teste_di_serie, vince_sq1)
+        for sid in finaliste:
+            conteggi[sid][1] += 1
+        if vincitrice in conteggi:
+            conteggi[vincitrice][2] += 1
+    return conteggi
+
+
+def _simula_blocco(stato, n_run, seed, forze=None, k=K_FORZA):
+    """
+    Worker: n_run tornei simulati con seed proprio (random + NumPy).
+    Restituisce {squadra_id: [qualificata, finalista, vincitrice]} (conteggi).
+    Nelle fasi finali conta solo chi vince: ogni partita è un'estrazione con la
+    probabilità esatta di vittoria (probabilita_partita), senza giocare i set.
+    """
+    random.seed(seed)
+    rng = nuovo_rng(seed)
+    torneo = stato["torneo"]
+
+    p_rally = None
+    p_vittoria = {}
+    if forze:
+        def p_rally(sq1, sq2):
+            return probabilita_rally(forze.get(sq1, 40), forze.get(sq2, 40), k)
+
+        def vince_sq1(sq1, sq2):
+            coppia = (sq1, sq2)
+            if coppia not in p_vittoria:
+                p_vittoria[coppia] = probabilita_partita(
+                    torneo["punteggio_max"], torneo["formato_set"], p_rally(*coppia)).item()
+            return random.random() < p_vittoria[coppia]
+    else:
+        p_pari = probabilita_partita(torneo["punteggio_max"], torneo["formato_set"]).item()
+
+        def vince_sq1(sq1, sq2):
+            return random.random() < p_pari
+
+    def gioca(_stato, partita):
+        vince = vince_sq1(partita["sq1"], partita["sq2"])
+        partita["vincitore"] = partita["sq1"] if vince else partita["sq2"]
+        partita["set_sq1"], partita["set_sq2"] = (1, 0) if vince else (0, 1)
+        partita["confermata"] = True
+
+    conteggi = {sq["id"]: [0, 0, 0] for sq in stato["squadre"]}
+    bracket_iniziale = stato["bracket"]
+    if bracket_iniziale:
+        # Fasi finali già iniziate (anche doppia eliminazione): le funzioni dell'app
+        for _ in range(n_run):
+            run = {"torneo": torneo, "gironi": stato["gironi"], "squadre": stato["squadre"],
+                   "bracket": [dict(p) for p in bracket_iniziale]}
+            aggiungi_semifinali_e_finali(run)   # vincitori confermati non ancora avanzati
+            primo_turno = min(p.get("round_elim", 0) for p in run["bracket"])
+            _gioca_tabellone(run, gioca)
+            for p in run["bracket"]:
+                if p.get("round_elim", 0) == primo_turno and p.get("tabellone", "W") == "W":
+                    for sid in (p["sq1"], p["sq2"]):
+                        if sid in conteggi:
+                            conteggi[sid][0] += 1
+            for pos, sid in podio_bracket(run):   # finalissima/reset inclusi in doppia eliminazione
+                if pos <= 2 and sid in conteggi:
+                    conteggi[sid][1] += 1
+                    if pos == 1:
+                        conteggi[sid][2] += 1
+        return conteggi
+
+    if stato["gironi"] and stato["gironi"][0].get("svizzera"):
+        return _simula_svizzera(stato, n_run, rng, vince_sq1, forze is not None, conteggi)
+
+    # Squadre del worker: copie le cui statistiche sono riscritte quando serve la classifica avulsa
+    squadre = [dict(sq) for sq in stato["squadre"]]
+    pos = {sq["id"]: j for j, sq in enumerate(squadre)}
+    gironi = stato["gironi"]
+    girone_di = {pos[sid]: gi for gi, g in enumerate(gironi) for sid in g["squadre"] if sid in pos}
+    _, tab, partite, esiti = _tabella_gironi(stato, n_run, p_rally, rng)
+
+    # Ordine di chiave_classifica per tutti i tornei simulati in una volta:
+    # ordine[r] = indici delle squadre dalla prima all'ultima nel torneo r
+    nomi = sorted(range(len(squadre)), key=lambda j: (squadre[j]["nome"].lower(), squadre[j]["id"]))
+    rango_nome = np.empty(len(squadre), dtype=np.int64)
+    rango_nome[nomi] = np.arange(len(squadre))
+    ordine = np.lexsort((
+        np.broadcast_to(rango_nome, (n_run, len(squadre))),
+        tab["punti_subiti"] - tab["punti_fatti"],
+        tab["set_persi"] - tab["set_vinti"],
+        -tab["vittorie"], -tab["punti_classifica"],
+    ), axis=1)
+    rango = np.empty_like(ordine)
+    np.put_along_axis(rango, ordine, np.arange(len(squadre))[None, :], axis=1)
+    ordine, rango = ordine.tolist(), rango.tolist()
+
+    # Classifica avulsa (come classifica_girone): a pari punti decidono gli scontri
+    # diretti, ricostruiti per girone dalle partite confermate + quelle simulate
+    avulsa = [torneo.get("criterio_passaggio") == "avulsa" and not g.get("svizzera") for g in gironi]
+    scontri_base, indici_girone = [], []
+    for gi, g in enumerate(gironi):
+        confermati = {"partite": g["partite"]}
+        ricostruisci_scontri(confermati)
+        scontri_base.append(confermati["scontri"])
+        indici_girone.append([j for j, pa in enumerate(partite) if pa[0] == gi])
+    if any(avulsa):
+        punti_classifica = tab["punti_classifica"].tolist()
+        righe = np.stack([tab[k] for k in _STATS_CLASSIFICA], axis=2).tolist()
+    passano = torneo.get("passano_per_girone", 2)
+    membri = Counter(girone_di.values())
+    schema = _schema_tabellone(sum(min(passano, membri[gi]) for gi in range(len(gironi))))
+
+    for r in range(n_run):
+        ordinate = [[] for _ in gironi]
+        for j in ordine[r]:
+            if j in girone_di:
+                ordinate[girone_di[j]].append(squadre[j])
+        for gi, classifica in enumerate(ordinate):
+            if not avulsa[gi]:
+                continue
+            punti_sq = {sq["id"]: punti_classifica[r][pos[sq["id"]]] for sq in classifica}
+            punti = Counter(punti_sq.values())
+            pari = {sid for sid, pt in punti_sq.items() if punti[pt] > 1}
+            if pari:
+                for sq in classifica:
+                    sq.update(zip(_STATS_CLASSIFICA, righe[r][pos[sq["id"]]]))
+                indici = indici_girone[gi]
+                scontri = _scontri_simulati(scontri_base[gi], [partite[j] for j in indici],
+                                            [esiti[r][j] for j in indici], pari)
+                ordinate[gi] = _applica_avulsa({"scontri": scontri}, classifica)
+        rango_r = rango[r]
+        teste_di_serie = teste_di_serie_dai_gironi(ordinate, passano, lambda sq: rango_r[pos[sq["id"]]])
+        for sid in teste_di_serie:
+            conteggi[sid][0] += 1
+        finaliste, vincitrice = _gioca_schema(schema, teste_di_serie, vince_sq1)
+        for sid in finaliste:
+            if sid in conteggi:
+                conteggi[sid][1] += 1
+        if vincitrice in conteggi:
+            conteggi[vincitrice][2] += 1
+    return conteggi
+
+
+# ─── API ─────────────────────────────────────────────────────────────────────
+
+def prevedi_torneo(state, n_simulazioni=20000, seed=None, modello_forza=False,
+                   k=K_FORZA, max_workers=None):
+    """
+    Probabilità di qualificazione, finale e vittoria per ogni squadra.
+    seed=None → seed casuale (riportato nel risultato per ripetere il calcolo).
+    max_workers=None → pool solo con più CPU e almeno MIN_RUN_POOL simulazioni;
+    max_workers=1 → tutto nel processo corrente (niente pool).
+    Sistema svizzero prima del tabellone: al massimo MAX_RUN_SVIZZERA simulazioni.
+    """
+    stato = stato_per_previsioni(state)
+    if stato["gironi"] and stato["gironi"][0].get("svizzera") and not stato["bracket"]:
+        n_simulazioni = min(n_simulazioni, MAX_RUN_SVIZZERA)
+    forze = forza_squadre(state) if modello_forza else None
+    seq = np.random.SeedSequence(seed)
+    n_blocchi = max(1, -(-n_simulazioni // RUN_PER_BLOCCO))
+    semi = [int(s.generate_state(1)[0]) for s in seq.spawn(n_blocchi)]
+    run = [RUN_PER_BLOCCO] * (n_blocchi - 1) + [n_simulazioni - RUN_PER_BLOCCO * (n_blocchi - 1)]
+
+    if max_workers is None:
+        cpu = os.cpu_count() or 1
+        max_workers = min(n_blocchi, cpu) if cpu > 1 and n_simulazioni >= MIN_RUN_POOL else 1
+    if max_workers == 1:
+        risultati = [_simula_blocco(stato, n, s, forze, k) for n, s in zip(run, semi)]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            risultati = list(pool.map(_simula_blocco, [stato] * n_blocchi, run, semi,
+                                      [forze] * n_blocchi, [k] * n_blocchi))
+
+    totali = {sq["id"]: [0, 0, 0] for sq in stato["squadre"]}
+    for conteggi in risultati:
+        for sid, c in conteggi.items():
+            for i in range(3):
+                totali[sid][i] += c[i]
+
+    squadre = [
+        {
+            "id": sq["id"],
+            "nome": sq["nome"],
+            "forza": round(forze[sq["id"]], 1) if forze else None,
+            "qualificazione": totali[sq["id"]][0] / n_simulazioni,
+            "finale": totali[sq["id"]][1] / n_simulazioni,
+            "vittoria": totali[sq["id"]][2] / n_simulazioni,
+        }
+        for sq in stato["squadre"] if sq["id"] != BYE_ID
+    ]
+    squadre.sort(key=lambda s: (-s["vittoria"], -s["finale"], -s["qualificazione"], s["nome"].lower()))
+    return {"n_simulazioni": n_simulazioni, "seed": seq.entropy, "squadre": squadre}
@@ -0,0 +1,66 @@
+"""
+previsioni_page.py — Vista Previsioni: probabilità Monte Carlo di qualificazione, finale e vittoria
+"""
+import streamlit as st
+import pandas as pd
+from data_manager import versione_stato, fase_raggiunta
+from previsioni import prevedi_torneo, firma_torneo
+
+
+def render_previsioni(state):
+    st.markdown("## 🔮 Previsioni Torneo")
+    st.caption("Il resto del torneo viene giocato migliaia di volte partendo dai risultati già confermati.")
+
+    if not state.get("gironi") and not state.get("bracket"):
+        st.info("Nessuna partita generata. Completa il Setup e avvia il torneo.")
+        return
+    if fase_raggiunta(state) == "proclamazione":
+        st.info("Torneo concluso: il vincitore è già stato proclamato.")
+        return
+
+    c1, c2, c3 = st.columns(3)
+    with c1:
+        n_sim = st.select_slider("Simulazioni", options=[5000, 10000, 20000, 50000, 100000],
+                                 value=20000, key="prev_n")
+    with c2:
+        forza = st.toggle("💪 Modello di forza (Overall)", value=False, key="prev_forza",
+                          help="Rally vinto con probabilità legata all'Overall medio della coppia")
+    with c3:
+        seed = st.number_input("Seed (0 = casuale)", min_value=0, value=0, step=1, key="prev_seed")
+
+    # Cache per versione dello stato; se la versione è cambiata per altro
+    # (fase, tema...) l'impronta di squadre e risultati evita il ricalcolo
+    cache = st.session_state.setdefault("previsioni_cache", {"versione": None, "firma": None, "risultati": {}})
+    versione = versione_stato(state)
+    if cache["versione"] != versione:
+        firma = firma_torneo(state)
+        if firma != cache["firma"]:
+            cache["firma"], cache["risultati"] = firma, {}
+        cache["versione"] = versione
+    chiave = (n_sim, forza, seed)
+    if chiave not in cache["risultati"]:
+        with st.spinner(f"Simulazione di {n_sim:,} tornei..."):
+            cache["risultati"][chiave] = prevedi_torneo(
+                state, n_simulazioni=n_sim, seed=seed or None, modello_forza=forza)
+    risultato = cache["risultati"][chiave]
+
+    righe = [
+        {
+            "Squadra": s["nome"],
+            **({"Forza": s["forza"]} if forza else {}),
+            "Qualificazione %": round(100 * s["qualificazione"], 1),
+            "Finale %": round(100 * s["finale"], 1),
+            "Vittoria %": round(100 * s["vittoria"], 1),
+        }
+        for s in risultato["squadre"]
+    ]
+    percentuale = {
+        c: st.column_config.ProgressColumn(c, format="%.1f%%", min_value=0, max_value=100)
+        for c in ("Qualificazione %", "Finale %", "Vittoria %")
+    }
+    st.dataframe(pd.DataFrame(righe), use_container_width=True, hide_index=True,
+                 column_config=percentuale)
+    st.caption(f"{risultato['n_simulazioni']:,} tornei simulati · seed {risultato['seed']}")
+    if risultato["n_simulazioni"] < n_sim:
+        st.caption("Sistema svizzero: ogni torneo simulato accoppia i turni mancanti come l'app, "
+                   "quindi le simulazioni sono limitate.")
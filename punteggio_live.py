@@ -0,0 +1,126 @@
+"""
+punteggio_live.py — Punteggio rally per rally (motore, senza streamlit)
+
+Ogni rally finisce nel registro compatto partita["rally"]["log"]: un intero
+per rally = (secondi dall'inizio << 2) | (battuta - 1) << 1 | (lato - 1).
+Lo stato della partita si aggiorna in modo incrementale a ogni punto (costo
+costante): set in corso in rally["corrente"], set chiusi in punteggi /
+set_sq1 / set_sq2 come a fine partita, in_battuta a chi ha vinto il rally.
+Regole: set a punteggio_max (tie-break a punteggio_tie_break nel terzo set
+del Best of 3) con 2 punti di scarto; cambio campo ogni 7 punti (5 nel
+tie-break); il primo servizio di un set va a chi ha ricevuto per primo nel
+set precedente. L'annullamento toglie l'ultimo rally, anche a cavallo di un
+set chiuso. La conferma resta esplicita (conferma_risultati).
+"""
+import time
+
+CAMBIO_CAMPO = 7            # punti tra un cambio campo e l'altro
+CAMBIO_CAMPO_TIE_BREAK = 5
+
+
+def _set_da_vincere(torneo):
+    return 1 if torneo["formato_set"] == "Set Unico" else 2
+
+
+def _tie_break(torneo, partita):
+    return _set_da_vincere(torneo) == 2 and partita["set_sq1"] == partita["set_sq2"] == 1
+
+
+def limite_set(torneo, partita):
+    """Punti per vincere il set in corso."""
+    if _tie_break(torneo, partita):
+        return torneo.get("punteggio_tie_break", 15)
+    return torneo["punteggio_max"]
+
+
+def avvia_rally(partita, battuta=None, adesso=None):
+    """Prepara il registro (idempotente): battuta iniziale di default partita['in_battuta']."""
+    if partita.get("rally"):
+        return partita["rally"]
+    battuta = battuta or partita.get("in_battuta", 1)
+    partita["in_battuta"] = battuta
+    partita["rally"] = {
+        "t0": int(adesso if adesso is not None else time.time()),
+        "log": [],
+        "corrente": [0, 0],     # punti del set in corso
+        "prime": [battuta],     # chi ha servito per primo in ogni set
+        "fine": False,          # partita conclusa (in attesa di conferma)
+    }
+    return partita["rally"]
+
+
+def segna_punto(torneo, partita, lato, adesso=None):
+    """
+    Rally vinto da `lato` (1 o 2). Restituisce {"fine_set", "fine_partita",
+    "cambio_campo"}; ValueError se la partita è chiusa o confermata.
+    """
+    if partita["confermata"]:
+        raise ValueError("Partita già confermata.")
+    rally = avvia_rally(partita, adesso=adesso)
+    if rally["fine"]:
+        raise ValueError("Partita conclusa: conferma il risultato o annulla l'ultimo punto.")
+    secondi = max(0, int((adesso if adesso is not None else time.time()) - rally["t0"]))
+    rally["log"].append((secondi << 2) | ((partita["in_battuta"] - 1) << 1) | (lato - 1))
+    corrente = rally["corrente"]
+    corrente[lato - 1] += 1
+    partita["in_battuta"] = lato            # chi vince il rally va al servizio
+
+    evento = {"fine_set": False, "fine_partita": False, "cambio_campo": False}
+    a, b = corrente
+    if max(a, b) >= limite_set(torneo, partita) and abs(a - b) >= 2:
+        _chiudi_set(torneo, partita, rally)
+        evento["fine_set"] = True
+        evento["fine_partita"] = rally["fine"]
+    else:
+        ogni = CAMBIO_CAMPO_TIE_BREAK if _tie_break(torneo, partita) else CAMBIO_CAMPO
+        evento["cambio_campo"] = (a + b) % ogni == 0
+    return evento
+
+
+def _chiudi_set(torneo, partita, rally):
+    a, b = rally["corrente"]
+    partita["punteggi"].append((a, b))
+    partita["set_sq1" if a > b else "set_sq2"] += 1
+    rally["corrente"] = [0, 0]
+    if max(partita["set_sq1"], partita["set_sq2"]) == _set_da_vincere(torneo):
+        rally["fine"] = True
+    else:
+        # Nuovo set: serve per prima la squadra che ha ricevuto per prima nel set appena chiuso
+        partita["in_battuta"] = 3 - rally["prime"][-1]
+        rally["prime"].append(partita["in_battuta"])
+
+
+def annulla_punto(partita):
+    """Toglie l'ultimo rally (anche se aveva chiuso un set o la partita)."""
+    rally = partita.get("rally")
+    if partita["confermata"] or not rally or not rally["log"]:
+        raise ValueError("Nessun punto da annullare.")
+    codice = rally["log"].pop()
+    lato, battuta = (codice & 1) + 1, ((codice >> 1) & 1) + 1
+    if rally["corrente"] == [0, 0]:
+        # L'ultimo rally aveva chiuso un set: si riapre
+        a, b = partita["punteggi"].pop()
+        partita["set_sq1" if a > b else "set_sq2"] -= 1
+        rally["corrente"] = [a, b]
+        if rally["fine"]:
+            rally["fine"] = False
+        else:
+            rally["prime"].pop()
+    rally["corrente"][lato - 1] -= 1
+    partita["in_battuta"] = battuta
+
+
+def registro(partita):
+    """Rally decodificati: [(lato, battuta, secondi dall'inizio), ...]."""
+    return [((c & 1) + 1, ((c >> 1) & 1) + 1, c >> 2) for c in (partita.get("rally") or {}).get("log", [])]
+
+
+def ricostruisci_rally(torneo, partita):
+    """Stato ricalcolato da zero rigiocando il registro (verifica dell'aggiornamento incrementale)."""
+    rally = partita["rally"]
+    copia = {"confermata": False, "punteggi": [], "set_sq1": 0, "set_sq2": 0, "in_battuta": rally["prime"][0]}
+    avvia_rally(copia, adesso=rally["t0"])
+    for lato, battuta, secondi in registro(partita):
+        assert copia["in_battuta"] == battuta, "servizio registrato diverso da quello atteso"
+        segna_punto(torneo, copia, lato, adesso=rally["t0"] + secondi)
+    return copia
@@ -0,0 +1,247 @@
+"""
+scenari.py — "Siamo già qualificati?": scenari di qualificazione di un girone
+
+Enumera gli esiti (vittoria/sconfitta) delle partite ancora da confermare con
+una ricerca in profondità che aggiorna punti, vittorie e differenza set in
+modo incrementale; nel Best of 3 le classi di punteggio (2-0 / 2-1) danno a
+ogni squadra un intervallo di differenza set invece di moltiplicare i rami.
+Per ogni squadra dice se è già qualificata, già eliminata o in corsa, e quali
+risultati delle sue partite bastano per passare o la eliminano.
+Le parità non risolvibili in anticipo (differenza punti, classifica avulsa,
+intervalli di differenza set sovrapposti) sono trattate in modo prudente: la
+squadra può finire sia sopra sia sotto, quindi "qualificata" ed "eliminata"
+sono sempre certe. Un sottoalbero si pota quando i limiti di punti decidono
+già tutte le squadre; oltre MAX_NODI nodi si passa al campionamento casuale
+(stima). Stesso ordinamento di chiave_classifica. Nessun import di streamlit.
+"""
+import random
+from bisect import bisect_right
+
+from data_manager import BYE_ID, get_squadra_by_id
+
+MAX_NODI = 40_000          # nodi della ricerca esatta prima del campionamento
+N_CAMPIONI = 2000          # scenari casuali nel campionamento
+
+# Esiti di una partita: (punti sq1, punti sq2, vittoria sq1, etichetta per sq1)
+ESITI = ((3, 1, 1, "vince"), (1, 3, 0, "perde"))
+
+PASSA, ESCE = 1, 2         # può passare / può essere eliminata
+_BIT = (0, 1, 1, 2)
+
+
+def _margini(formato, classi_set):
+    """Differenza set (minima, massima) di una vittoria; None se ignota."""
+    if formato == "Set Unico":
+        return (1, 1)
+    if classi_set:
+        return (1, 2)            # Best of 3: 2-1 oppure 2-0
+    return None
+
+
+class _Ricerca:
+    """Stato della ricerca: statistiche correnti e possibilità registrate."""
+
+    def __init__(self, squadre, aperte, margini, passano, avulsa=False):
+        self.n = len(squadre)
+        self.punti = [sq["punti_classifica"] for sq in squadre]
+        self.vittorie = [sq["vittorie"] for sq in squadre]
+        # Differenza set: intervallo [min, max] compatibile con le classi degli esiti
+        self.set_min = [sq["set_vinti"] - sq["set_persi"] for sq in squadre]
+        self.set_max = list(self.set_min)
+        self.aperte = aperte              # [(i, j)] indici squadra
+        self.margini = margini or (0, 0)
+        # Livelli della chiave noti: a pari punti l'avulsa decide sugli scontri diretti
+        self.livelli = 1 if avulsa else 3 if margini else 2
+        self.passano = passano
+        self.residue = [0] * self.n       # partite ancora da assegnare per squadra
+        for i, j in aperte:
+            self.residue[i] += 1
+            self.residue[j] += 1
+        # Stati come maschere di bit: PASSA | ESCE
+        self.possibile = [0] * self.n
+        # condizionato[k][lato]: due bit per esito della partita k (esito e ai bit 2e, 2e+1)
+        self.condizionato = [[0, 0] for _ in aperte]
+        self.da_completare = list(range(len(aperte)))   # partite con celle non ancora piene
+        self.scelte = [0] * len(aperte)
+        self.nodi = 0
+        self.da_scoprire = 2 * self.n + 8 * len(aperte)   # possibilità non ancora viste
+
+    def applica(self, k, e, segno):
+        i, j = self.aperte[k]
+        p1, p2, v1, _ = ESITI[e]
+        self.punti[i] += segno * p1; self.punti[j] += segno * p2
+        self.vittorie[i] += segno * v1; self.vittorie[j] += segno * (1 - v1)
+        vincente, perdente = (i, j) if v1 else (j, i)
+        minimo, massimo = self.margini
+        self.set_min[vincente] += segno * minimo; self.set_max[vincente] += segno * massimo
+        self.set_min[perdente] -= segno * massimo; self.set_max[perdente] -= segno * minimo
+        self.residue[i] -= segno; self.residue[j] -= segno
+
+    def esiti_foglia(self):
+        """Per ogni squadra PASSA e/o ESCE nello scenario corrente."""
+        if self.livelli == 1:
+            chiavi = self.punti
+        else:
+            chiavi = list(zip(self.punti, self.vittorie))
+        ordinate = sorted(chiavi)
+        gruppi = {}
+        for t, c in enumerate(chiavi):
+            gruppi.setdefault(c, []).append(t)
+        stati = []
+        for t, c in enumerate(chiavi):
+            pari = gruppi[c]
+            sopra = self.n - bisect_right(ordinate, c)
+            certe, forse = 0, len(pari) - 1
+            if self.livelli == 3 and forse:
+                # Classi di set indipendenti per squadra: stima prudente
+                certe = sum(1 for u in pari if self.set_min[u] > self.set_max[t])
+                forse = sum(1 for u in pari if u != t and self.set_max[u] >= self.set_min[t])
+            stati.append((PASSA if sopra + certe < self.passano else 0)
+                         | (ESCE if sopra + forse >= self.passano else 0))
+        return stati
+
+    def stati_da_limiti(self):
+        """Esito già deciso per ogni squadra nel sottoalbero (limiti di punti), None se incerto."""
+        minimo = [self.punti[t] + self.residue[t] for t in range(self.n)]
+        massimo = [self.punti[t] + 3 * self.residue[t] for t in range(self.n)]
+        stati = []
+        for t in range(self.n):
+            forse_sopra = sum(1 for u in range(self.n) if u != t and massimo[u] >= minimo[t])
+            sicuro_sopra = sum(1 for u in range(self.n) if minimo[u] > massimo[t])
+            if forse_sopra < self.passano:
+                stati.append(PASSA)
+            elif sicuro_sopra >= self.passano:
+                stati.append(ESCE)
+            else:
+                return None
+        return stati
+
+    def registra(self, stati, assegnate):
+        """Registra gli stati per lo scenario (o sottoalbero) con le prime `assegnate` partite fissate."""
+        possibile = self.possibile
+        for t, stato in enumerate(stati):
+            nuovi = stato & ~possibile[t]
+            if nuovi:
+                possibile[t] |= nuovi
+                self.da_scoprire -= _BIT[nuovi]
+        piene = False
+        for k in self.da_completare:
+            i, j = self.aperte[k]
+            # Partita fissata: solo i bit del suo esito; libera: entrambi gli esiti
+            spostamento, copia = (2 * self.scelte[k], 1) if k < assegnate else (0, 5)
+            celle = self.condizionato[k]
+            for lato, t in ((0, i), (1, j)):
+                nuovi = (stati[t] * copia << spostamento) & ~celle[lato]
+                if nuovi:
+                    celle[lato] |= nuovi
+                    self.da_scoprire -= bin(nuovi).count("1")
+                    piene |= celle[0] == celle[1] == 15
+        if piene:
+            self.da_completare = [k for k in self.da_completare if self.condizionato[k] != [15, 15]]
+        if self.da_scoprire == 0:
+            raise _Completa      # ogni possibilità già vista: inutile continuare
+
+    def esplora(self, k=0):
+        self.nodi += 1
+        if self.nodi > MAX_NODI:
+            raise _TroppiScenari
+        if k == len(self.aperte):
+            self.registra(self.esiti_foglia(), k)
+            return
+        stati = self.stati_da_limiti()
+        if stati is not None:
+            self.registra(stati, k)     # tutte le squadre già decise: sottoalbero potato
+            return
+        for e in range(len(ESITI)):
+            self.scelte[k] = e
+            self.applica(k, e, 1)
+            self.esplora(k + 1)
+            self.applica(k, e, -1)
+
+    def campiona(self, n_campioni, rng):
+        """Scenari casuali: stesse registrazioni della ricerca esatta, senza garanzie."""
+        for _ in range(n_campioni):
+            for k in range(len(self.aperte)):
+                self.scelte[k] = rng.randrange(len(ESITI))
+                self.applica(k, self.scelte[k], 1)
+            self.registra(self.esiti_foglia(), len(self.aperte))
+            for k in range(len(self.aperte)):
+                self.applica(k, self.scelte[k], -1)
+
+
+class _TroppiScenari(Exception):
+    pass
+
+
+class _Completa(Exception):
+    pass
+
+
+def scenari_girone(state, girone, classi_set=False, seed=None):
+    """
+    Scenari di qualificazione per un girone (non svizzero).
+    classi_set: nel Best of 3 usa le classi 2-0 / 2-1 per stimare la differenza set
+    (altrimenti a pari punti e vittorie la squadra resta in bilico).
+    Restituisce {"esatto", "scenari", "squadre": [{id, nome, stato, condizioni}]}
+    con stato "qualificata" | "eliminata" | "in corsa"; con esatto=False
+    (campionamento) "qualificata"/"eliminata" valgono solo se decisi dai limiti di punti.
+    """
+    torneo = state["torneo"]
+    passano = torneo.get("passano_per_girone", 2)
+    squadre = [sq for sq in (get_squadra_by_id(state, sid) for sid in girone["squadre"]) if sq]
+    indice = {sq["id"]: t for t, sq in enumerate(squadre)}
+    aperte = [(indice[p["sq1"]], indice[p["sq2"]]) for p in girone["partite"]
+              if not p["confermata"] and BYE_ID not in (p["sq1"], p["sq2"])
+              and p["sq1"] in indice and p["sq2"] in indice]
+    margini = _margini(torneo["formato_set"], classi_set)
+    avulsa = torneo.get("criterio_passaggio") == "avulsa"
+    ricerca = _Ricerca(squadre, aperte, margini, passano, avulsa)
+    radice = ricerca.stati_da_limiti()
+
+    esatto = True
+    try:
+        ricerca.esplora()
+    except _Completa:
+        pass
+    except _TroppiScenari:
+        esatto = False            # le possibilità già viste restano valide: si aggiungono campioni
+        try:
+            ricerca.campiona(N_CAMPIONI, random.Random(seed))
+        except _Completa:
+            pass
+
+    risultato = []
+    for t, sq in enumerate(squadre):
+        maschera = radice[t] if not esatto and radice is not None else ricerca.possibile[t]
+        dentro, fuori = maschera & PASSA, maschera & ESCE
+        stato = "qualificata" if not fuori else "eliminata" if not dentro else "in corsa"
+        if not esatto and radice is None:
+            stato = "in corsa"    # il campionamento non dimostra nulla
+        risultato.append({
+            "id": sq["id"],
+            "nome": sq["nome"],
+            "stato": stato,
+            "condizioni": _condizioni(ricerca, t, squadre) if stato == "in corsa" else [],
+        })
+    n_scenari = len(ESITI) ** len(aperte)
+    return {"esatto": esatto, "scenari": n_scenari if esatto else N_CAMPIONI, "squadre": risultato}
+
+
+def _condizioni(ricerca, t, squadre):
+    """Risultati delle partite di t che bastano per passare o che la eliminano."""
+    condizioni = []
+    for k, (i, j) in enumerate(ricerca.aperte):
+        if t not in (i, j):
+            continue
+        lato = 0 if t == i else 1
+        avversaria = squadre[j if lato == 0 else i]["nome"]
+        # Gli esiti sono scritti per sq1: dal punto di vista di sq2 si leggono al contrario
+        celle = [ricerca.condizionato[k][lato] >> (2 * e) & 3 for e in range(len(ESITI))]
+        if lato == 1:
+            celle = celle[::-1]
+        for (_, _, _, etichetta), cella in zip(ESITI, celle):
+            if cella == PASSA:
+                condizioni.append(f"qualificata se {etichetta} contro {avversaria}")
+            elif cella == ESCE:
+                condizioni.append(f"eliminata se {etichetta} contro {avversaria}")
+    return condizioni or ["dipende anche dagli altri risultati"]
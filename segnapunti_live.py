@@ -1,8 +1,16 @@
 """
-segnapunti_live.py — Vista segnapunti live full-screen
+segnapunti_live.py — Vista segnapunti live full-screen + pannello rally per rally
 """
 import streamlit as st
-from ui_components import render_match_card
+from data_manager import (
+    salva_partita, salva_rally, nome_squadra, conferma_risultati, avanza_vincitore,
+    versione_stato, leggi_stato_salvato, firma_archivio, annulla_se_in_conflitto, ConflittoPartita,
+)
+from punteggio_live import avvia_rally, segna_punto, annulla_punto, limite_set
+from ui_components import match_card_html_in_cache
+
+
+AGGIORNAMENTO = 3           # secondi tra due controlli dell'archivio (maxi-schermo)
 
 
 def render_segnapunti_live(state):
@@ -10,23 +18,168 @@ def render_segnapunti_live(state):
     st.markdown("## 🧮 Segnapunti Live")
     st.caption("Panoramica in tempo reale di tutti i match in corso e conclusi.")
 
-    gironi = state.get("gironi", [])
-    bracket = state.get("bracket", [])
+    if st.toggle("🔄 Aggiornamento automatico", value=True, key="segnapunti_auto",
+                 help=f"Ogni {AGGIORNAMENTO} s controlla l'archivio (anche i risultati inseriti da altri "
+                      "dispositivi) e ridisegna solo le partite cambiate."):
+        _tabellone_automatico(state)
+    else:
+        _render_tabellone(state, ("sessione", id(state), versione_stato(state)))
+
+
+@st.fragment(run_every=AGGIORNAMENTO)
+def _tabellone_automatico(state):
+    live, revisione = _stato_da_archivio()
+    if live is None:
+        _render_tabellone(state, ("sessione", id(state), versione_stato(state)))   # niente su disco
+    else:
+        _render_tabellone(live, ("archivio", revisione))
+
+
+def _stato_da_archivio():
+    """
+    (stato salvato, revisione), riletto solo quando cambia la firma dei file.
+    Una revisione all'indietro (lettura a cavallo di un salvataggio) si
+    accetta solo se la firma resta uguale al controllo successivo.
+    """
+    archivio = st.session_state.setdefault(
+        "segnapunti_archivio", {"firma": None, "tentativo": None, "revisione": -1, "state": None})
+    firma = firma_archivio()
+    if firma != archivio["firma"]:
+        try:
+            data, revisione = leggi_stato_salvato()
+        except (OSError, ValueError):
+            data = None                 # archivio in scrittura: si riprova al prossimo giro
+        if data is not None and (revisione >= archivio["revisione"] or firma == archivio["tentativo"]):
+            archivio.update(firma=firma, revisione=revisione, state=data)
+        else:
+            archivio["tentativo"] = firma
+    return archivio["state"], archivio["revisione"]
+
+
+def _anagrafica(state):
+    return (tuple((sq["id"], sq["nome"], tuple(sq.get("atleti", []))) for sq in state.get("squadre", [])),
+            tuple((a["id"], a["nome"]) for a in state.get("atleti", [])))
 
-    if not gironi and not bracket:
+
+def _render_tabellone(state, versione):
+    """
+    Match card di gironi e tabellone, un solo st.markdown per girone. A
+    versione invariata si ripetono i blocchi già pronti; altrimenti si
+    rigenerano solo le card delle partite cambiate (cache per partita in
+    session_state, svuotata se cambiano nomi di squadre o atleti).
+    """
+    cache = st.session_state.setdefault("segnapunti_card", {"versione": None, "blocchi": None, "card": {}})
+    if cache["versione"] != versione or cache["blocchi"] is None:
+        anagrafica = _anagrafica(state)
+        if anagrafica != cache.get("anagrafica"):
+            cache["card"], cache["anagrafica"] = {}, anagrafica
+        card = cache["card"]
+        blocchi = []
+        if state.get("gironi"):
+            blocchi.append("### 🔵 Fase a Gironi")
+            for g in state["gironi"]:
+                blocchi.append("\n\n".join([f"#### {g['nome']}"] + [
+                    match_card_html_in_cache(state, partita, f"{g['nome']} · Match {i+1}", card)
+                    for i, partita in enumerate(g.get("partite", []))]))
+        if state.get("bracket"):
+            blocchi.append("\n\n".join(["### ⚡ Fase Eliminazione"] + [
+                match_card_html_in_cache(state, partita, partita.get("label_elim") or f"Playoff {i+1}", card)
+                for i, partita in enumerate(state["bracket"])]))
+        cache.update(versione=versione, blocchi=blocchi)
+
+    if not cache["blocchi"]:
         st.info("Nessuna partita generata. Completa il Setup e avvia il torneo.")
         return
+    for blocco in cache["blocchi"]:
+        st.markdown(blocco, unsafe_allow_html=True)
+
+
+# ─── PUNTEGGIO RALLY PER RALLY ───────────────────────────────────────────────
+
+def render_rally(state, partita, key_prefix):
+    """
+    Pannello arbitro: un pulsante per squadra a ogni rally, annulla ultimo
+    punto, conferma a partita conclusa. Chiamato dentro il frammento della
+    partita: ogni punto ridisegna solo questa partita e va nel journal come
+    singolo rally (salva_rally); la partita intera si salva a inizio e fine
+    set (salva_partita) e quando l'annullamento riapre un set. I pulsanti
+    si gestiscono prima di disegnare il tabellone (riempito dopo nel
+    contenitore), così non serve un secondo rerun.
+    """
+    torneo = state["torneo"]
+    sq1, sq2 = nome_squadra(state, partita["sq1"]), nome_squadra(state, partita["sq2"])
+    if not partita.get("rally"):
+        prima = st.radio("🏐 Primo servizio", [sq1, sq2], horizontal=True, key=f"{key_prefix}_rally_battuta")
+        if not st.button("▶️ INIZIA PARTITA", key=f"{key_prefix}_rally_avvia", use_container_width=True):
+            return
+        avvia_rally(partita, battuta=1 if prima == sq1 else 2)
+        try:
+            salva_partita(state, partita)
+        except ConflittoPartita as e:
+            st.warning(str(e))
+            return
+
+    tabellone = st.container()
+    rally = partita["rally"]
+    c1, c2, c3 = st.columns([2, 1, 2])
+    with c1:
+        punto_1 = st.button(f"+1 {sq1}", key=f"{key_prefix}_rally_1", use_container_width=True, type="primary")
+    with c2:
+        annulla = st.button("↩️ Annulla", key=f"{key_prefix}_rally_annulla", use_container_width=True)
+    with c3:
+        punto_2 = st.button(f"+1 {sq2}", key=f"{key_prefix}_rally_2", use_container_width=True, type="primary")
+
+    try:
+        if (punto_1 or punto_2) and not rally["fine"]:
+            evento = segna_punto(torneo, partita, 1 if punto_1 else 2)
+            if evento["fine_set"]:
+                salva_partita(state, partita)
+            else:
+                salva_rally(state, partita)
+            if evento["cambio_campo"]:
+                st.toast("🔄 Cambio campo")
+            elif evento["fine_set"] and not evento["fine_partita"]:
+                st.toast("✅ Set concluso")
+        if annulla:
+            set_chiusi = len(partita["punteggi"])
+            annulla_punto(partita)
+            if len(partita["punteggi"]) != set_chiusi:
+                salva_partita(state, partita)       # set riaperto
+            else:
+                salva_rally(state, partita, annullato=True)
+    except ValueError as e:         # anche ConflittoPartita: partita ricaricata dal disco
+        st.warning(str(e))
+        rally = partita.get("rally")
+        if not rally or partita["confermata"]:
+            return
+
+    a, b = rally["corrente"]
+    battuta = partita["in_battuta"]
+    with tabellone:
+        c1, c2, c3 = st.columns([2, 1, 2])
+        with c1:
+            st.metric(("🏐 " if battuta == 1 else "") + sq1, a)
+        with c2:
+            st.metric("Set", f"{partita['set_sq1']}–{partita['set_sq2']}")
+        with c3:
+            st.metric(("🏐 " if battuta == 2 else "") + sq2, b)
+        if rally["fine"]:
+            st.success("🏁 Partita conclusa: " + " | ".join(f"{x}-{y}" for x, y in partita["punteggi"]))
+        else:
+            st.caption(f"Set {len(partita['punteggi']) + 1} a {limite_set(torneo, partita)} · "
+                       f"{len(rally['log'])} rally giocati")
 
-    if gironi:
-        st.markdown("### 🔵 Fase a Gironi")
-        for g in gironi:
-            st.markdown(f"#### {g['nome']}")
-            for i, partita in enumerate(g.get("partite", [])):
-                label = f"{g['nome']} · Match {i+1}"
-                render_match_card(state, partita, label=label)
-
-    if bracket:
-        st.markdown("### ⚡ Fase Eliminazione")
-        for i, partita in enumerate(bracket):
-            label = partita.get("label_elim") or f"Playoff {i+1}"
-            render_match_card(state, partita, label=label)
+    if rally["fine"] and st.button("✅ CONFERMA RISULTATO", key=f"{key_prefix}_rally_conferma",
+                                   use_container_width=True):
+        errori = conferma_risultati(state, [(partita, partita["punteggi"])])
+        if errori:
+            st.error(errori[partita["id"]])
+            return
+        if partita.get("fase") != "girone":
+            try:
+                with annulla_se_in_conflitto(state):
+                    salva_partita(state, *avanza_vincitore(state, partita))
+            except ConflittoPartita as e:
+                st.error(str(e))
+                return
+        st.rerun()
@@ -0,0 +1,173 @@
+"""
+shard_partite.py — Risultati delle partite in un file per partita (più dispositivi in scrittura)
+
+Ogni tablet/segnapunti ha la propria copia dello stato: con il solo
+snapshot l'ultimo salvataggio cancellava le conferme degli altri. Qui ogni
+partita salvata finisce in SHARD_DIR/<id>.json con un numero di versione:
+- le scritture passano da un lock su file (fcntl, msvcrt su Windows) e da un
+  controllo ottimistico: chi scrive dichiara la versione da cui è partito
+  (partita["versione"]); se nel frattempo un altro dispositivo ha scritto
+  quella partita la scrittura è rifiutata (ConflittoPartita), tutto o niente;
+- GENERAZIONE_FILE tiene un contatore globale e gli id scritti di recente:
+  chi sincronizza rilegge solo gli shard cambiati dall'ultima volta.
+Gli shard non portano statistiche: chi li applica (data_manager) toglie e
+rimette il contributo della partita alla classifica.
+"""
+import json
+import os
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:                 # Windows
+    fcntl = None
+    import msvcrt
+
+SHARD_DIR = "beach_volley_partite"
+GENERAZIONE_FILE = "_generazione.json"
+LOCK_FILE = "_lock"
+# Campi della partita che cambiano giocando (il resto è struttura del torneo)
+CAMPI_RISULTATO = ("sq1", "sq2", "punteggi", "set_sq1", "set_sq2", "vincitore",
+                   "confermata", "conteggiata", "in_battuta", "rally")
+STORIA = 512                        # id scritti di recente tenuti in GENERAZIONE_FILE
+
+
+class ConflittoPartita(ValueError):
+    """Una o più partite sono state scritte da un altro dispositivo dopo l'ultima lettura."""
+
+    def __init__(self, ids):
+        self.ids = list(ids)
+        super().__init__("Risultato già modificato da un altro dispositivo: partita ricaricata, "
+                         "controlla e riprova.")
+
+
+def _percorso(nome):
+    return os.path.join(SHARD_DIR, nome)
+
+
+@contextmanager
+def blocco_file(path):
+    """Lock esclusivo tra processi e thread su `path` (aperto in a+b, restituito)."""
+    with open(path, "a+b") as f:
+        if fcntl:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield f
+        finally:
+            if fcntl:
+                fcntl.flock(f, fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+@contextmanager
+def _lock():
+    os.makedirs(SHARD_DIR, exist_ok=True)
+    with blocco_file(_percorso(LOCK_FILE)):
+        yield
+
+
+def _leggi(nome):
+    try:
+        with open(_percorso(nome), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None             # shard perso in un crash: vale la copia del journal
+
+
+def _scrivi(nome, doc):
+    # Niente fsync per shard: la durabilità la dà il journal (fsync dopo gli
+    # shard); uno shard perso in un crash lascia valere la copia del journal
+    path = _percorso(nome)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(doc, f, ensure_ascii=False)
+    os.replace(tmp, path)
+
+
+def _generazione():
+    return _leggi(GENERAZIONE_FILE) or {"generazione": 0, "recenti": []}
+
+
+def leggi_shard(pid):
+    """{"id", "versione", "generazione", campi risultato} oppure None."""
+    return _leggi(f"{pid}.json")
+
+
+def conflitti(partite):
+    """Id delle partite che su disco hanno una versione più recente di quella in memoria."""
+    return [p["id"] for p in partite
+            if (leggi_shard(p["id"]) or {}).get("versione", 0) > p.get("versione", 0)]
+
+
+def scrivi(partite):
+    """
+    Scrive gli shard delle partite (tutto o niente) e aggiorna partita["versione"].
+    ConflittoPartita se qualcuna è stata scritta da altri dopo la versione in memoria.
+    Restituisce (generazione precedente, generazione nuova).
+    """
+    partite = list({p["id"]: p for p in partite}.values())
+    if not partite:
+        attuale = generazione_corrente()
+        return attuale, attuale
+    with _lock():
+        correnti = {p["id"]: (leggi_shard(p["id"]) or {}).get("versione", 0) for p in partite}
+        rifiutate = [p["id"] for p in partite if correnti[p["id"]] > p.get("versione", 0)]
+        if rifiutate:
+            raise ConflittoPartita(rifiutate)
+        stato = _generazione()
+        generazione = stato["generazione"] + 1
+        versioni = {}
+        for p in partite:
+            # versione in memoria più alta dello shard: cartella azzerata, si riparte da lì
+            versioni[p["id"]] = max(correnti[p["id"]], p.get("versione", 0)) + 1
+            doc = {k: p.get(k) for k in CAMPI_RISULTATO}
+            doc.update(id=p["id"], versione=versioni[p["id"]], generazione=generazione)
+            _scrivi(f"{p['id']}.json", doc)
+        recenti = stato["recenti"] + [[generazione, p["id"]] for p in partite]
+        _scrivi(GENERAZIONE_FILE, {"generazione": generazione, "recenti": recenti[-STORIA:]})
+    for p in partite:
+        p["versione"] = versioni[p["id"]]
+    return stato["generazione"], generazione
+
+
+def generazione_corrente():
+    return _generazione()["generazione"]
+
+
+def cambiate_dal(generazione):
+    """
+    (generazione attuale, {id: shard}) con gli shard scritti dopo `generazione`;
+    tutti se `generazione` è None o troppo vecchia per l'elenco dei recenti.
+    """
+    stato = _generazione()
+    attuale, recenti = stato["generazione"], stato["recenti"]
+    if generazione == attuale:
+        return attuale, {}
+    if generazione is not None and generazione < attuale and recenti and recenti[0][0] <= generazione + 1:
+        ids = {pid for g, pid in recenti if g > generazione}
+    elif os.path.isdir(SHARD_DIR):
+        ids = {nome[:-5] for nome in os.listdir(SHARD_DIR)
+               if nome.endswith(".json") and nome != GENERAZIONE_FILE}
+    else:
+        ids = set()
+    shard = {}
+    for pid in ids:
+        doc = leggi_shard(pid)
+        if doc:
+            shard[pid] = doc
+    return attuale, shard
+
+
+def azzera():
+    """Cancella tutti gli shard (reset o nuovo torneo: gli id delle partite si ripetono)."""
+    if not os.path.isdir(SHARD_DIR):
+        return
+    with _lock():
+        for nome in os.listdir(SHARD_DIR):
+            if nome != LOCK_FILE:
+                os.remove(_percorso(nome))
@@ -0,0 +1,380 @@
+"""
+storage_sqlite.py — Backend SQLite (solo stdlib) per data_manager
+
+Attivazione: variabile d'ambiente BVL_STORAGE=sqlite (default: JSON).
+Tabelle normalizzate con indici su id, torneo e fase:
+atleti, storico_posizioni, squadre, gironi, partite, set_punteggi, meta.
+I campi non previsti dallo schema finiscono nella colonna JSON `extra`,
+così i nuovi campi dei dict di stato sopravvivono al round-trip.
+"""
+import json
+import sqlite3
+from contextlib import closing
+from pathlib import Path
+
+DB_FILE = "beach_volley_data.db"
+
+SEZIONI_TABELLE = ("atleti", "squadre", "gironi", "bracket")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    chiave TEXT PRIMARY KEY,
+    valore TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS atleti (
+    id TEXT PRIMARY KEY,
+    ordine INTEGER NOT NULL,
+    nome TEXT NOT NULL,
+    tornei INTEGER DEFAULT 0,
+    vittorie INTEGER DEFAULT 0,
+    sconfitte INTEGER DEFAULT 0,
+    set_vinti INTEGER DEFAULT 0,
+    set_persi INTEGER DEFAULT 0,
+    punti_fatti INTEGER DEFAULT 0,
+    punti_subiti INTEGER DEFAULT 0,
+    extra TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_atleti_nome ON atleti(nome);
+CREATE TABLE IF NOT EXISTS storico_posizioni (
+    atleta_id TEXT NOT NULL,
+    n INTEGER NOT NULL,
+    torneo TEXT,
+    posizione INTEGER,
+    PRIMARY KEY (atleta_id, n)
+);
+CREATE INDEX IF NOT EXISTS idx_storico_torneo ON storico_posizioni(torneo);
+CREATE TABLE IF NOT EXISTS squadre (
+    id TEXT PRIMARY KEY,
+    ordine INTEGER NOT NULL,
+    nome TEXT,
+    atleta1 TEXT,
+    atleta2 TEXT,
+    punti_classifica INTEGER DEFAULT 0,
+    set_vinti INTEGER DEFAULT 0,
+    set_persi INTEGER DEFAULT 0,
+    punti_fatti INTEGER DEFAULT 0,
+    punti_subiti INTEGER DEFAULT 0,
+    vittorie INTEGER DEFAULT 0,
+    sconfitte INTEGER DEFAULT 0,
+    extra TEXT
+);
+CREATE TABLE IF NOT EXISTS gironi (
+    idx INTEGER PRIMARY KEY,
+    nome TEXT,
+    squadre TEXT,
+    extra TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_gironi_nome ON gironi(nome);
+CREATE TABLE IF NOT EXISTS partite (
+    id TEXT PRIMARY KEY,
+    torneo TEXT,
+    fase TEXT,
+    girone INTEGER,
+    ordine INTEGER NOT NULL,
+    sq1 TEXT,
+    sq2 TEXT,
+    round_elim INTEGER DEFAULT 0,
+    label_elim TEXT DEFAULT '',
+    set_sq1 INTEGER DEFAULT 0,
+    set_sq2 INTEGER DEFAULT 0,
+    in_battuta INTEGER DEFAULT 1,
+    confermata INTEGER DEFAULT 0,
+    vincitore TEXT,
+    extra TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_partite_torneo_fase ON partite(torneo, fase);
+CREATE INDEX IF NOT EXISTS idx_partite_girone ON partite(fase, girone);
+CREATE TABLE IF NOT EXISTS set_punteggi (
+    partita_id TEXT NOT NULL,
+    n INTEGER NOT NULL,
+    p1 INTEGER,
+    p2 INTEGER,
+    PRIMARY KEY (partita_id, n)
+);
+"""
+
+_STATS_ATLETA = ("tornei", "vittorie", "sconfitte", "set_vinti", "set_persi",
+                 "punti_fatti", "punti_subiti")
+_COLONNE_SQUADRA = ("punti_classifica", "set_vinti", "set_persi", "punti_fatti",
+                    "punti_subiti", "vittorie", "sconfitte")
+_COLONNE_PARTITA = ("fase", "girone", "sq1", "sq2", "round_elim", "label_elim",
+                    "set_sq1", "set_sq2", "in_battuta", "vincitore")
+
+
+def _connetti(path=None):
+    conn = sqlite3.connect(path or DB_FILE)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(_SCHEMA)
+    return conn
+
+
+def _extra(d, note):
+    resto = {k: v for k, v in d.items() if k not in note}
+    return json.dumps(resto, ensure_ascii=False) if resto else None
+
+
+def _da_extra(testo):
+    return json.loads(testo) if testo else {}
+
+# ─── RIGHE ↔ DICT ────────────────────────────────────────────────────────────
+
+def _scrivi_atleta(conn, a, ordine):
+    s = a.get("stats", {})
+    stats_extra = {k: v for k, v in s.items() if k not in _STATS_ATLETA and k != "storico_posizioni"}
+    extra = {k: v for k, v in a.items() if k not in ("id", "nome", "stats")}
+    if stats_extra:
+        extra["_stats"] = stats_extra
+    conn.execute(
+        "INSERT OR REPLACE INTO atleti VALUES (?,?,?,?,?,?,?,?,?,?,?)",
+        (a["id"], ordine, a["nome"], *(s.get(k, 0) for k in _STATS_ATLETA),
+         json.dumps(extra, ensure_ascii=False) if extra else None),
+    )
+    if "storico_posizioni" not in s:
+        return      # atleta letto senza storico (carica(storico=False)): quello su disco resta
+    conn.execute("DELETE FROM storico_posizioni WHERE atleta_id=?", (a["id"],))
+    conn.executemany(
+        "INSERT INTO storico_posizioni VALUES (?,?,?,?)",
+        [(a["id"], n, t, p) for n, (t, p) in enumerate(s["storico_posizioni"])],
+    )
+
+
+def _scrivi_atleti(conn, atleti, modificati=None):
+    """
+    Riscrive solo gli atleti `modificati` (id; None = tutti) e quelli nuovi;
+    degli altri aggiorna l'ordine se è cambiato. Gli atleti non più presenti
+    vengono cancellati con il loro storico.
+    """
+    su_disco = dict(conn.execute("SELECT id, ordine FROM atleti"))
+    for i, a in enumerate(atleti):
+        ordine = su_disco.pop(a["id"], None)
+        if modificati is None or ordine is None or a["id"] in modificati:
+            _scrivi_atleta(conn, a, i)
+        elif ordine != i:
+            conn.execute("UPDATE atleti SET ordine=? WHERE id=?", (i, a["id"]))
+    rimossi = [(aid,) for aid in su_disco]
+    conn.executemany("DELETE FROM atleti WHERE id=?", rimossi)
+    conn.executemany("DELETE FROM storico_posizioni WHERE atleta_id=?", rimossi)
+
+
+def _scrivi_squadra(conn, sq, ordine):
+    atleti = list(sq.get("atleti", [])) + [None, None]
+    conn.execute(
+        "INSERT OR REPLACE INTO squadre VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?)",
+        (sq["id"], ordine, sq.get("nome"), atleti[0], atleti[1],
+         *(sq.get(k, 0) for k in _COLONNE_SQUADRA),
+         _extra(sq, ("id", "nome", "atleti") + _COLONNE_SQUADRA)),
+    )
+
+
+def _scrivi_partita(conn, p, ordine, torneo):
+    conn.execute(
+        "INSERT OR REPLACE INTO partite VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?,?)",
+        (p["id"], torneo, p.get("fase"), p.get("girone"), ordine, p.get("sq1"), p.get("sq2"),
+         p.get("round_elim", 0), p.get("label_elim", ""), p.get("set_sq1", 0),
+         p.get("set_sq2", 0), p.get("in_battuta", 1), int(bool(p.get("confermata"))),
+         p.get("vincitore"),
+         _extra(p, ("id", "confermata", "punteggi") + _COLONNE_PARTITA)),
+    )
+    conn.execute("DELETE FROM set_punteggi WHERE partita_id=?", (p["id"],))
+    conn.executemany(
+        "INSERT INTO set_punteggi VALUES (?,?,?,?)",
+        [(p["id"], n, s[0], s[1]) for n, s in enumerate(p.get("punteggi", []))],
+    )
+
+
+def _leggi_partite(conn, where="", args=()):
+    punteggi = {}
+    for pid, p1, p2 in conn.execute(
+            "SELECT partita_id, p1, p2 FROM set_punteggi "
+            "JOIN partite ON partite.id = set_punteggi.partita_id " + where +
+            " ORDER BY partita_id, n", args):
+        punteggi.setdefault(pid, []).append([p1, p2])
+    righe = conn.execute(
+        "SELECT id, fase, girone, sq1, sq2, round_elim, label_elim, set_sq1, set_sq2, "
+        "in_battuta, vincitore, confermata, extra FROM partite " + where + " ORDER BY ordine",
+        args,
+    ).fetchall()
+    partite = []
+    for r in righe:
+        p = {"id": r[0]}
+        p.update(zip(_COLONNE_PARTITA, r[1:11]))
+        p["confermata"] = bool(r[11])
+        p["punteggi"] = punteggi.get(r[0], [])
+        p.update(_da_extra(r[12]))
+        partite.append(p)
+    return partite
+
+# ─── API BACKEND ─────────────────────────────────────────────────────────────
+
+def esiste(path=None):
+    return Path(path or DB_FILE).exists()
+
+
+def carica(path=None, storico=True):
+    """
+    Ricostruisce il dict di stato (con chiave 'revisione'), None se il DB non esiste.
+    storico=False: atleti senza storico_posizioni (lettori del solo torneo, es.
+    feed_live); lo storico di un atleta si legge con storico_atleta.
+    """
+    if not esiste(path):
+        return None
+    with closing(_connetti(path)) as conn:
+        state = {k: json.loads(v) for k, v in conn.execute("SELECT chiave, valore FROM meta")}
+
+        posizioni = {}
+        if storico:
+            for aid, t, p in conn.execute(
+                    "SELECT atleta_id, torneo, posizione FROM storico_posizioni ORDER BY atleta_id, n"):
+                posizioni.setdefault(aid, []).append([t, p])
+        atleti = []
+        for r in conn.execute("SELECT * FROM atleti ORDER BY ordine"):
+            extra = _da_extra(r[10])
+            stats = dict(zip(_STATS_ATLETA, r[3:10]))
+            stats.update(extra.pop("_stats", {}))
+            if storico:
+                stats["storico_posizioni"] = posizioni.get(r[0], [])
+            atleti.append({"id": r[0], "nome": r[2], "stats": stats, **extra})
+        state["atleti"] = atleti
+
+        squadre = []
+        for r in conn.execute("SELECT * FROM squadre ORDER BY ordine"):
+            sq = {"id": r[0], "nome": r[2], "atleti": [a for a in r[3:5] if a is not None]}
+            sq.update(zip(_COLONNE_SQUADRA, r[5:12]))
+            sq.update(_da_extra(r[12]))
+            squadre.append(sq)
+        state["squadre"] = squadre
+
+        gironi = []
+        for idx, nome, sq_json, extra in conn.execute("SELECT * FROM gironi ORDER BY idx"):
+            g = {"nome": nome, "squadre": json.loads(sq_json or "[]"), "partite": []}
+            g.update(_da_extra(extra))
+            gironi.append(g)
+        bracket = []
+        for p in _leggi_partite(conn):
+            if p.get("fase") == "eliminazione":
+                bracket.append(p)
+            elif p.get("girone") is not None and p["girone"] < len(gironi):
+                gironi[p["girone"]]["partite"].append(p)
+        state["gironi"] = gironi
+        state["bracket"] = bracket
+    return state
+
+
+def salva(state, revisione, sezioni=None, path=None, atleti_modificati=None):
+    """
+    Scrive lo stato in un'unica transazione. `sezioni` limita la riscrittura
+    alle tabelle delle sezioni modificate (None = tutto); la tabella meta
+    (torneo, fase, tema, ...) viene sempre aggiornata. atleti_modificati: id
+    degli atleti da riscrivere (None = tutti), con il loro storico.
+    """
+    tutte = sezioni is None
+    torneo = state.get("torneo", {}).get("nome", "")
+    with closing(_connetti(path)) as conn, conn:
+        # meta: si riscrivono solo le chiavi modificate (es. ranking_globale solo se cambiato)
+        meta = {k: v for k, v in state.items() if k not in SEZIONI_TABELLE}
+        presenti = list(meta) + ["revisione"]
+        conn.execute(f"DELETE FROM meta WHERE chiave NOT IN ({','.join('?' * len(presenti))})",
+                     presenti)
+        conn.executemany("INSERT OR REPLACE INTO meta VALUES (?,?)",
+                         [(k, json.dumps(v, ensure_ascii=False)) for k, v in meta.items()
+                          if tutte or k in sezioni])
+        conn.execute("INSERT OR REPLACE INTO meta VALUES ('revisione', ?)", (json.dumps(revisione),))
+        if tutte or "atleti" in sezioni:
+            _scrivi_atleti(conn, state.get("atleti", []), None if tutte else atleti_modificati)
+        if tutte or "squadre" in sezioni:
+            conn.execute("DELETE FROM squadre")
+            for i, sq in enumerate(state.get("squadre", [])):
+                _scrivi_squadra(conn, sq, i)
+        if tutte or "gironi" in sezioni:
+            conn.execute("DELETE FROM gironi")
+            conn.execute("DELETE FROM set_punteggi WHERE partita_id IN "
+                         "(SELECT id FROM partite WHERE fase IS NOT 'eliminazione')")
+            conn.execute("DELETE FROM partite WHERE fase IS NOT 'eliminazione'")
+            ordine = 0
+            for idx, g in enumerate(state.get("gironi", [])):
+                conn.execute("INSERT INTO gironi VALUES (?,?,?,?)", (
+                    idx, g.get("nome"), json.dumps(g.get("squadre", [])),
+                    _extra(g, ("nome", "squadre", "partite"))))
+                for p in g.get("partite", []):
+                    _scrivi_partita(conn, p, ordine, torneo)
+                    ordine += 1
+        if tutte or "bracket" in sezioni:
+            conn.execute("DELETE FROM set_punteggi WHERE partita_id IN "
+                         "(SELECT id FROM partite WHERE fase = 'eliminazione')")
+            conn.execute("DELETE FROM partite WHERE fase = 'eliminazione'")
+            for i, p in enumerate(state.get("bracket", [])):
+                _scrivi_partita(conn, p, 100000 + i, torneo)
+
+
+def salva_record(record, torneo=""):
+    """
+    Applica un record di modifiche (stesso formato del journal JSON) come
+    aggiornamenti di singole righe in una transazione.
+    """
+    with closing(_connetti()) as conn, conn:
+        for p in record.get("partite", []):
+            riga = conn.execute("SELECT ordine FROM partite WHERE id=?", (p["id"],)).fetchone()
+            if riga:
+                ordine = riga[0]
+            else:
+                ordine = conn.execute("SELECT COALESCE(MAX(ordine), 100000) + 1 FROM partite").fetchone()[0]
+            _scrivi_partita(conn, p, ordine, torneo)
+        for sq in record.get("squadre", []):
+            riga = conn.execute("SELECT ordine FROM squadre WHERE id=?", (sq["id"],)).fetchone()
+            ordine = riga[0] if riga else conn.execute(
+                "SELECT COALESCE(MAX(ordine), -1) + 1 FROM squadre").fetchone()[0]
+            _scrivi_squadra(conn, sq, ordine)
+        for a in record.get("atleti", []):
+            riga = conn.execute("SELECT ordine FROM atleti WHERE id=?", (a["id"],)).fetchone()
+            ordine = riga[0] if riga else conn.execute(
+                "SELECT COALESCE(MAX(ordine), -1) + 1 FROM atleti").fetchone()[0]
+            _scrivi_atleta(conn, a, ordine)
+        for sid in record.get("squadre_rimosse", []):
+            conn.execute("DELETE FROM squadre WHERE id=?", (sid,))
+        conn.execute("INSERT OR REPLACE INTO meta VALUES ('revisione', ?)",
+                     (json.dumps(record.get("rev", 0)),))
+
+# ─── QUERY ───────────────────────────────────────────────────────────────────
+
+def partite_girone(nome_girone, path=None):
+    """Tutte le partite di un girone, es. partite_girone("Girone A")."""
+    with closing(_connetti(path)) as conn:
+        riga = conn.execute("SELECT idx FROM gironi WHERE nome=?", (nome_girone,)).fetchone()
+        if not riga:
+            return []
+        return _leggi_partite(conn, "WHERE fase='girone' AND girone=?", (riga[0],))
+
+
+def partite_torneo(torneo, fase=None, path=None):
+    """Partite di un torneo, opzionalmente filtrate per fase (girone | eliminazione)."""
+    with closing(_connetti(path)) as conn:
+        if fase:
+            return _leggi_partite(conn, "WHERE torneo=? AND fase=?", (torneo, fase))
+        return _leggi_partite(conn, "WHERE torneo=?", (torneo,))
+
+
+def storico_atleta(atleta_id, path=None):
+    """Piazzamenti [(torneo, posizione)] di un atleta."""
+    with closing(_connetti(path)) as conn:
+        return [tuple(r) for r in conn.execute(
+            "SELECT torneo, posizione FROM storico_posizioni WHERE atleta_id=? ORDER BY n",
+            (atleta_id,))]
+
+# ─── IMPORT / EXPORT JSON ────────────────────────────────────────────────────
+
+def importa_da_json(path_json, path_db=None):
+    """Importa un file beach_volley_data.json (formato storico) nel DB."""
+    with open(path_json, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    revisione = data.pop("revisione", 0)
+    salva(data, revisione, path=path_db)
+
+
+def esporta_in_json(path_json, path_db=None):
+    """Esporta il DB nel formato JSON monolitico (compatibile con load_state JSON)."""
+    data = carica(path_db)
+    if data is None:
+        raise FileNotFoundError(path_db or DB_FILE)
+    with open(path_json, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
@@ -0,0 +1,13 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+
+@pytest.fixture(autouse=True)
+def archivio(tmp_path, monkeypatch):
+    """Ogni test lavora su un archivio vuoto in una cartella temporanea."""
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
@@ -0,0 +1,55 @@
+"""Archivio condiviso tra sessioni: storico in sola lettura, copy-on-write, una lettura per modifica."""
+import pytest
+
+from data_manager import (
+    empty_state, new_atleta, new_squadra, save_state, salva_modifiche, ricostruisci_ranking,
+    ArchivioCondiviso, StoricoInSolaLettura, storico_modificabile,
+)
+
+
+@pytest.fixture
+def condiviso():
+    state = empty_state()
+    state["atleti"] = [new_atleta(f"Atleta {i}") for i in range(20)]
+    ricostruisci_ranking(state)
+    state["squadre"] = [new_squadra("Team 0", state["atleti"][0]["id"], state["atleti"][1]["id"])]
+    save_state(state)
+    return ArchivioCondiviso()
+
+
+def test_storico_condiviso_e_torneo_privato(condiviso):
+    a, b = condiviso.nuova_sessione(), condiviso.nuova_sessione()
+    assert condiviso.letture == 1
+    assert a["atleti"] is b["atleti"] and a["ranking_globale"] is b["ranking_globale"]
+    assert a["squadre"] is not b["squadre"]
+    a["squadre"][0]["nome"] = "Rinominata"
+    assert b["squadre"][0]["nome"] == "Team 0"
+    with pytest.raises(StoricoInSolaLettura):
+        a["atleti"][0]["nome"] = "Senza copia"
+    with pytest.raises(StoricoInSolaLettura):
+        a["atleti"].append(new_atleta("Senza copia"))
+    assert len(b["atleti"]) == 20 and b["atleti"][0]["nome"] == "Atleta 0"
+
+
+def test_copy_on_write_e_nuovo_storico_dopo_il_salvataggio(condiviso):
+    a, b = condiviso.nuova_sessione(), condiviso.nuova_sessione()
+    storico_modificabile(a)
+    a["atleti"].append(new_atleta("Nuovo iscritto"))
+    assert a["atleti"] is not b["atleti"] and len(b["atleti"]) == 20
+    condiviso.aggiorna_sessione(a)                       # non ancora salvata: resta la copia privata
+    assert a["atleti"][-1]["nome"] == "Nuovo iscritto"
+
+    salva_modifiche(a, atleti=[a["atleti"][-1]])
+    letture = condiviso.letture
+    condiviso.aggiorna_sessione(a)
+    condiviso.aggiorna_sessione(b)
+    condiviso.aggiorna_sessione(b)
+    assert condiviso.letture == letture + 1             # riletto una volta sola per modifica
+    assert a["atleti"] is b["atleti"] and b["atleti"][-1]["nome"] == "Nuovo iscritto"
+    assert condiviso.nuova_sessione()["atleti"] is b["atleti"]
+
+
+def test_archivio_vuoto_al_primo_avvio():
+    state = ArchivioCondiviso().nuova_sessione()
+    assert state["atleti"] == [] and state["fase"] == "setup"
+    state["atleti"].append(new_atleta("Primo"))          # niente storico condiviso: modificabile
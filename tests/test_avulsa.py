@@ -0,0 +1,85 @@
+"""Classifica avulsa: matrice degli scontri diretti aggiornata a ogni conferma e correzione."""
+import copy
+import random
+
+from data_manager import (
+    empty_state, new_squadra, genera_gironi, traccia_stato, aggiorna_classifica_squadra,
+    classifica_girone, chiave_classifica, ricostruisci_scontri, get_squadra_by_id,
+)
+
+
+def mini_classifica(girone, pari):
+    """Riferimento: mini-classifica rileggendo le partite, ricorsiva sui sottogruppi ancora pari."""
+    ids = {sq["id"] for sq in pari}
+    tot = {sid: [0, 0, 0] for sid in ids}
+    for p in girone["partite"]:
+        if p["confermata"] and p["sq1"] in ids and p["sq2"] in ids:
+            vince_1 = p["vincitore"] == p["sq1"]
+            ds, dp = p["set_sq1"] - p["set_sq2"], sum(a - b for a, b in p["punteggi"])
+            for sid, segno, pti in ((p["sq1"], 1, 3 if vince_1 else 1), (p["sq2"], -1, 1 if vince_1 else 3)):
+                tot[sid][0] += pti; tot[sid][1] += segno * ds; tot[sid][2] += segno * dp
+    chiave = {sid: tuple(-x for x in t) for sid, t in tot.items()}
+    if len(set(chiave.values())) == 1:
+        return sorted(pari, key=chiave_classifica)
+    gruppi = {}
+    for sq in sorted(pari, key=lambda s: (chiave[s["id"]], chiave_classifica(s))):
+        gruppi.setdefault(chiave[sq["id"]], []).append(sq)
+    return [sq for g in gruppi.values() for sq in (mini_classifica(girone, g) if len(g) > 1 else g)]
+
+
+def riferimento(state, girone):
+    squadre = sorted((get_squadra_by_id(state, sid) for sid in girone["squadre"]), key=chiave_classifica)
+    blocchi = {}
+    for sq in squadre:
+        blocchi.setdefault(sq["punti_classifica"], []).append(sq)
+    return [sq["id"] for b in blocchi.values() for sq in mini_classifica(girone, b)]
+
+
+def conferma(state, p, a, b, segno=1):
+    p.update(punteggi=[(a, b)], set_sq1=int(a > b), set_sq2=int(b > a),
+             vincitore=p["sq1"] if a > b else p["sq2"], confermata=segno > 0)
+    aggiorna_classifica_squadra(state, p, segno)
+
+
+def test_avulsa_come_il_riferimento_con_correzioni():
+    random.seed(11)
+    state = empty_state()
+    state["torneo"]["criterio_passaggio"] = "avulsa"
+    state["squadre"] = [new_squadra(f"Team {i}", f"a{2 * i}", f"a{2 * i + 1}") for i in range(10)]
+    state["gironi"] = genera_gironi([s["id"] for s in state["squadre"]], girone_unico=True)
+    state = traccia_stato(state)
+    girone = state["gironi"][0]
+    for p in girone["partite"]:
+        a, b = random.choice([(3, 1), (1, 3), (4, 2), (2, 4)])   # set corti: tanti pari punti
+        conferma(state, p, a, b)
+        if random.random() < 0.3:                                  # correzione: tolta e rimessa ribaltata
+            conferma(state, p, a, b, segno=-1)
+            conferma(state, p, b, a)
+        assert [sq["id"] for sq in classifica_girone(state, girone)] == riferimento(state, girone)
+    incrementale = copy.deepcopy(girone["scontri"])
+    ricostruisci_scontri(girone)
+    pulita = {sid: {avv: c for avv, c in riga.items() if any(c)} for sid, riga in incrementale.items()}
+    assert pulita == girone["scontri"]
+
+
+def test_giro_circolare_deciso_dalla_differenza_set():
+    state = empty_state()
+    state["torneo"].update(criterio_passaggio="avulsa", formato_set="Best of 3")
+    state["squadre"] = [new_squadra(n, f"{n}1", f"{n}2") for n in "ABCD"]
+    state["gironi"] = genera_gironi([s["id"] for s in state["squadre"]], girone_unico=True)
+    girone = state["gironi"][0]
+    sid = {sq["nome"]: sq["id"] for sq in state["squadre"]}
+    risultati = {("A", "B"): [(21, 10), (21, 10)], ("B", "C"): [(21, 19), (19, 21), (15, 13)],
+                 ("C", "A"): [(21, 19), (19, 21), (15, 13)], ("A", "D"): [(21, 0), (21, 0)],
+                 ("B", "D"): [(21, 0), (21, 0)], ("C", "D"): [(21, 0), (21, 0)]}
+    for p in girone["partite"]:
+        nomi = next(k for k in risultati if {sid[k[0]], sid[k[1]]} == {p["sq1"], p["sq2"]})
+        punteggi = risultati[nomi] if sid[nomi[0]] == p["sq1"] else [(b, a) for a, b in risultati[nomi]]
+        vinti = sum(a > b for a, b in punteggi)
+        p.update(punteggi=punteggi, set_sq1=vinti, set_sq2=len(punteggi) - vinti, confermata=True,
+                 vincitore=p["sq1"] if 2 * vinti > len(punteggi) else p["sq2"])
+        aggiorna_classifica_squadra(state, p)
+    # A, B, C a 7 punti e 4 tra loro: differenza set A +1, C 0, B -1
+    classifica = classifica_girone(state, girone)
+    assert [sq["nome"] for sq in classifica] == ["A", "C", "B", "D"]
+    assert [sq["id"] for sq in classifica] == riferimento(state, girone)
@@ -0,0 +1,40 @@
+"""Avvio a freddo: app.py importa solo la pagina della fase attiva."""
+import json
+import os
+import random
+import subprocess
+import sys
+
+import pytest
+
+from data_manager import empty_state, new_squadra, genera_gironi, traccia_stato, save_state
+
+RADICE = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+PAGINE = ("fase_setup", "fase_gironi", "fase_eliminazione", "fase_proclamazione",
+          "previsioni_page", "calendario_page", "segnapunti_live")
+# Processo nuovo: nel processo dei test le pagine possono essere già importate
+PRIMO_RENDER = f"""
+import json, sys
+sys.path.insert(0, {RADICE!r})
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file({os.path.join(RADICE, "app.py")!r}, default_timeout=60)
+at.run()
+assert not at.exception, at.exception
+print(json.dumps(sorted(m for m in {PAGINE!r} + ("pandas",) if m in sys.modules)))
+"""
+
+
+@pytest.mark.parametrize("fase,importate", [
+    ("setup", ["fase_setup"]),
+    ("gironi", ["fase_gironi", "segnapunti_live"]),        # punteggio rally per rally nelle partite
+])
+def test_solo_la_pagina_della_fase(fase, importate):
+    random.seed(2)
+    state = empty_state()
+    if fase == "gironi":
+        state["squadre"] = [new_squadra(f"Team {i}", f"a{2 * i}", f"a{2 * i + 1}") for i in range(4)]
+        state["gironi"] = genera_gironi([s["id"] for s in state["squadre"]], girone_unico=True)
+    state["fase"] = fase
+    save_state(traccia_stato(state))
+    uscita = subprocess.run([sys.executable, "-c", PRIMO_RENDER], capture_output=True, text=True, check=True)
+    assert json.loads(uscita.stdout.strip().splitlines()[-1]) == importate
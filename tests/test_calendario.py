@@ -0,0 +1,83 @@
+"""Calendario sui campi: vincoli rispettati e ripianificazione dal vivo."""
+import random
+
+import pytest
+
+from calendario import pianifica, utilizzo_campi, _partite
+from data_manager import (
+    empty_state, new_squadra, genera_gironi, simula_partita, aggiorna_classifica_squadra,
+    genera_bracket_da_gironi, get_squadra_by_id,
+)
+
+
+def torneo(n_squadre=12, num_gironi=3, campi=3):
+    random.seed(6)
+    state = empty_state()
+    state["torneo"].update(campi=campi, passano_per_girone=2)
+    state["squadre"] = [new_squadra(f"Team {i}", f"a{2 * i}", f"a{2 * i + 1}") for i in range(n_squadre)]
+    state["gironi"] = genera_gironi([s["id"] for s in state["squadre"]], num_gironi=num_gironi)
+    state["fase"] = "gironi"
+    return state
+
+
+def controlla_vincoli(state, calendario):
+    slot, riposo = calendario["slot"], calendario["riposo"]
+    per_campo, per_squadra = {}, {}
+    for p in _partite(state):
+        s = slot[p["id"]]
+        per_campo.setdefault(s["campo"], []).append((s["inizio"], s["fine"]))
+        for sid in (p["sq1"], p["sq2"]):
+            if sid:
+                per_squadra.setdefault(sid, []).append((s["inizio"], s["fine"]))
+        for dest in (p.get("next_id"), p.get("loser_id")):
+            if dest in slot:
+                assert slot[dest]["inizio"] >= s["fine"]
+    for intervalli in per_campo.values():
+        intervalli.sort()
+        assert all(a[1] <= b[0] for a, b in zip(intervalli, intervalli[1:]))
+    for intervalli in per_squadra.values():
+        intervalli.sort()
+        assert all(a[1] + riposo <= b[0] for a, b in zip(intervalli, intervalli[1:]))
+
+
+def test_gironi_senza_sovrapposizioni_e_vicino_al_limite():
+    state = torneo()
+    calendario = pianifica(state)
+    controlla_vincoli(state, calendario)
+    n_partite = len(_partite(state))
+    assert len(calendario["slot"]) == n_partite
+    limite = -(-n_partite // calendario["campi"]) * calendario["durata"]
+    assert limite <= calendario["fine_prevista"] <= limite + calendario["durata"] + calendario["riposo"]
+    assert utilizzo_campi(calendario) > 0.8
+
+
+def test_tabellone_dopo_i_gironi_e_ripianificazione():
+    state = torneo()
+    state["calendario"] = pianifica(state)
+    for g in state["gironi"]:
+        for p in g["partite"]:
+            simula_partita(state, p)
+            aggiorna_classifica_squadra(state, p)
+    state["bracket"] = genera_bracket_da_gironi(state)
+    adesso = state["calendario"]["fine_prevista"] + 7
+    calendario = pianifica(state, adesso=adesso)
+    controlla_vincoli(state, calendario)
+    for g in state["gironi"]:                             # giocate: restano dove erano
+        for p in g["partite"]:
+            assert calendario["slot"][p["id"]] == state["calendario"]["slot"][p["id"]]
+    tabellone = [calendario["slot"][p["id"]] for p in state["bracket"] if not p["confermata"]]
+    assert min(s["inizio"] for s in tabellone) >= adesso
+
+
+def test_partita_in_corso_oltre_la_fine_prevista():
+    state = torneo(campi=1)
+    state["calendario"] = pianifica(state)
+    prima = state["gironi"][0]["partite"][0]
+    s = state["calendario"]["slot"][prima["id"]]
+    assert s["inizio"] == 0
+    adesso = s["fine"] + 3                                # ancora in corso: sfora
+    calendario = pianifica(state, adesso=adesso)
+    assert calendario["slot"][prima["id"]]["fine"] > adesso
+    seconda = min((v for k, v in calendario["slot"].items() if k != prima["id"]), key=lambda v: v["inizio"])
+    assert seconda["inizio"] >= calendario["slot"][prima["id"]]["fine"]
+    controlla_vincoli(state, calendario)
@@ -0,0 +1,75 @@
+"""Classifiche dei gironi mantenute in modo incrementale, come un ricalcolo da zero."""
+import random
+
+from data_manager import (
+    empty_state, new_squadra, genera_gironi, simula_partita, aggiorna_classifica_squadra, chiave_classifica,
+    classifica_girone, ricostruisci_classifica_girone, verifica_coerenza, get_squadra_by_id,
+    traccia_stato, save_state, load_state, genera_bracket_da_gironi,
+)
+
+
+def gironi(n_squadre=10, n_gironi=2, seed=3):
+    random.seed(seed)
+    state = empty_state()
+    state["squadre"] = [new_squadra(f"Team {i}", f"a{2 * i}", f"a{2 * i + 1}") for i in range(n_squadre)]
+    state["gironi"] = genera_gironi([s["id"] for s in state["squadre"]], num_gironi=n_gironi)
+    state["fase"] = "gironi"
+    return state
+
+
+def ordinata(state, girone):
+    return [sq["id"] for sq in sorted((get_squadra_by_id(state, sid) for sid in girone["squadre"]),
+                                      key=chiave_classifica)]
+
+
+def test_classifica_ordinata_dopo_ogni_conferma():
+    state = gironi()
+    for g in state["gironi"]:
+        ricostruisci_classifica_girone(state, g)
+        for partita in g["partite"]:
+            simula_partita(state, partita)
+            aggiorna_classifica_squadra(state, partita)
+            assert list(g["classifica"]) == ordinata(state, g)
+    assert verifica_coerenza(state) == []
+
+
+def test_risultato_tolto_e_rimesso():
+    state = gironi()
+    g = state["gironi"][0]
+    for partita in g["partite"]:
+        simula_partita(state, partita)
+        aggiorna_classifica_squadra(state, partita)
+    prima = list(g["classifica"])
+    partita = g["partite"][0]
+    aggiorna_classifica_squadra(state, partita, -1)       # come correggi_risultato
+    assert list(g["classifica"]) == ordinata(state, g)
+    assert verifica_coerenza(state) == []                 # partita non più conteggiata
+    aggiorna_classifica_squadra(state, partita)
+    assert list(g["classifica"]) == prima
+
+
+def test_playoff_riposizionano_le_squadre_nel_girone():
+    state = gironi(8)
+    for g in state["gironi"]:
+        for partita in g["partite"]:
+            simula_partita(state, partita)
+            aggiorna_classifica_squadra(state, partita)
+    state["bracket"] = genera_bracket_da_gironi(state)
+    partita = next(p for p in state["bracket"] if p["sq1"] and p["sq2"] and not p["confermata"])
+    simula_partita(state, partita)
+    aggiorna_classifica_squadra(state, partita)
+    assert all(list(g["classifica"]) == ordinata(state, g) for g in state["gironi"])
+
+
+def test_classifica_ricostruita_al_caricamento():
+    state = gironi()
+    save_state(traccia_stato(state))
+    state = load_state()
+    for g in state["gironi"]:
+        for partita in g["partite"][:4]:
+            simula_partita(state, partita)
+            aggiorna_classifica_squadra(state, partita)
+    save_state(state)
+    riletto = load_state()
+    for g, r in zip(state["gironi"], riletto["gironi"]):
+        assert [sq["id"] for sq in classifica_girone(riletto, r)] == [sq["id"] for sq in classifica_girone(state, g)]
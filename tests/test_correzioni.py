@@ -0,0 +1,168 @@
+"""Correzioni dei gironi con tabellone già generato: shard e versioni delle partite."""
+import random
+
+import pytest
+
+from data_manager import (
+    empty_state, new_squadra, genera_gironi, traccia_stato, save_state, load_state, salva_partita,
+    simula_partita, aggiorna_classifica_squadra, genera_bracket_da_gironi, correggi_risultato,
+    conferma_risultati, annulla_se_in_conflitto, ConflittoPartita, verifica_coerenza, avanza_vincitore,
+)
+
+
+def gironi_conclusi():
+    random.seed(5)
+    state = empty_state()
+    state["squadre"] = [new_squadra(f"Team {i}", f"a{2 * i}", f"a{2 * i + 1}") for i in range(8)]
+    state["gironi"] = genera_gironi([s["id"] for s in state["squadre"]], num_gironi=2)
+    state["fase"] = "gironi"
+    save_state(traccia_stato(state))
+    state = load_state()
+    for g in state["gironi"]:
+        for partita in g["partite"]:
+            simula_partita(state, partita)
+            aggiorna_classifica_squadra(state, partita)
+            salva_partita(state, partita)
+    state["bracket"] = genera_bracket_da_gironi(state)
+    state["fase"] = "eliminazione"
+    save_state(state)
+    return state
+
+
+def ribalta(state, partita):
+    """Correzione col risultato ribaltato; salvata come in render_correzione."""
+    modificate = correggi_risultato(state, partita, [(b, a) for a, b in partita["punteggi"]])
+    salva_partita(state, *modificate)
+    save_state(state)
+    return modificate
+
+
+def test_tabellone_rigenerato_due_volte():
+    state = gironi_conclusi()
+    for partita in [p for g in state["gironi"] for p in g["partite"]]:
+        if any(m.get("fase") == "eliminazione" for m in ribalta(state, partita)):
+            break                                   # correzione → tabellone rigenerato
+    else:
+        pytest.fail("nessuna correzione cambia il tabellone")
+    primo = [(p["sq1"], p["sq2"]) for p in state["bracket"]]
+    rigenerate = ribalta(state, partita)            # correzione → tabellone rigenerato di nuovo
+    assert any(p.get("fase") == "eliminazione" for p in rigenerate)
+    assert [(p["sq1"], p["sq2"]) for p in state["bracket"]] != primo
+
+    riletto = load_state()
+    quarto = next(p for p in riletto["bracket"] if p["id"] == "e_r0_0")
+    assert conferma_risultati(riletto, [(quarto, [(21, 15)])]) == {}
+    assert load_state()["bracket"][0]["confermata"]
+
+
+def punteggi(partita):
+    return [tuple(s) for s in partita["punteggi"]]      # liste dopo il giro da disco
+
+
+def statistiche(state):
+    return {sq["id"]: (sq["punti_classifica"], sq["set_vinti"], sq["punti_fatti"]) for sq in state["squadre"]}
+
+
+def test_simulazione_in_blocco_annullata_se_in_conflitto():
+    random.seed(8)
+    state = empty_state()
+    state["squadre"] = [new_squadra(f"Team {i}", f"a{2 * i}", f"a{2 * i + 1}") for i in range(8)]
+    state["gironi"] = genera_gironi([s["id"] for s in state["squadre"]], num_gironi=2)
+    state["fase"] = "gironi"
+    save_state(traccia_stato(state))
+    a, b = load_state(), load_state()
+    altra = b["gironi"][1]["partite"][2]
+    simula_partita(b, altra)
+    aggiorna_classifica_squadra(b, altra)
+    salva_partita(b, altra)                          # confermata da un altro dispositivo
+
+    simulate = [p for g in a["gironi"] for p in g["partite"] if not p["confermata"]]
+    with pytest.raises(ConflittoPartita):
+        with annulla_se_in_conflitto(a):             # come _simula_tutti
+            for partita in simulate:
+                simula_partita(a, partita)
+                aggiorna_classifica_squadra(a, partita)
+            salva_partita(a, *simulate)
+    confermate = [p["id"] for g in a["gironi"] for p in g["partite"] if p["confermata"]]
+    assert confermate == [altra["id"]]
+    assert punteggi(a["gironi"][1]["partite"][2]) == punteggi(b["gironi"][1]["partite"][2])
+    assert statistiche(a) == statistiche(b) == statistiche(load_state())
+    assert verifica_coerenza(a) == []
+
+
+def test_correzione_annullata_se_in_conflitto():
+    state = gironi_conclusi()
+    altro = load_state()
+    partita = altro["gironi"][0]["partite"][0]
+    salva_partita(altro, *correggi_risultato(altro, partita, [(b, a) for a, b in partita["punteggi"]]))
+    bracket = [(p["sq1"], p["sq2"]) for p in state["bracket"]]
+
+    mia = state["gironi"][0]["partite"][0]
+    with pytest.raises(ConflittoPartita):
+        with annulla_se_in_conflitto(state):         # come render_correzione
+            salva_partita(state, *correggi_risultato(state, mia, [(21, 0)]))
+    assert punteggi(state["gironi"][0]["partite"][0]) == punteggi(partita)
+    assert statistiche(state) == statistiche(altro)
+    assert [(p["sq1"], p["sq2"]) for p in state["bracket"]] == bracket
+
+
+def test_correzione_girone_uguale_al_ricalcolo():
+    state = gironi_conclusi()
+    partita = state["gironi"][1]["partite"][3]
+    stessa_vincitrice = [(a + 2, b) if a > b else (a, b + 2) for a, b in partita["punteggi"]]
+    assert correggi_risultato(state, partita, stessa_vincitrice) == [partita]   # tabellone invariato
+    assert verifica_coerenza(state) == []
+    correggi_risultato(state, partita, [(b, a) for a, b in partita["punteggi"]])
+    assert verifica_coerenza(state) == []
+
+
+@pytest.mark.parametrize("set_corretti", [[], [(21, 21)], [(21, 15), (15, 21)]])
+def test_correzione_non_valida_non_modifica_nulla(set_corretti):
+    state = gironi_conclusi()
+    partita = state["gironi"][0]["partite"][0]
+    prima = (punteggi(partita), statistiche(state))
+    with pytest.raises(ValueError):
+        correggi_risultato(state, partita, set_corretti)
+    assert (punteggi(partita), statistiche(state)) == prima
+
+
+def test_niente_correzioni_dopo_la_proclamazione():
+    state = gironi_conclusi()
+    state["vincitore"] = state["squadre"][0]["id"]      # dati già passati al ranking atleti
+    with pytest.raises(ValueError):
+        correggi_risultato(state, state["gironi"][0]["partite"][0], [(21, 0)])
+
+
+def test_correzione_nel_tabellone_aggiorna_la_partita_successiva():
+    state = gironi_conclusi()
+    quarto = next(p for p in state["bracket"] if p["sq1"] and p["sq2"] and not p["confermata"])
+    simula_partita(state, quarto)
+    aggiorna_classifica_squadra(state, quarto)
+    avanza_vincitore(state, quarto)
+    successiva = next(p for p in state["bracket"] if p["id"] == quarto["next_id"])
+    slot = quarto["next_slot"]
+    assert successiva[slot] == quarto["vincitore"]
+    perdente = quarto["sq2"] if quarto["vincitore"] == quarto["sq1"] else quarto["sq1"]
+
+    correggi_risultato(state, quarto, [(b, a) for a, b in quarto["punteggi"]])
+    assert quarto["vincitore"] == perdente and successiva[slot] == perdente
+    assert verifica_coerenza(state) == []
+
+    with pytest.raises(ValueError):                  # girone dopo l'inizio del tabellone
+        correggi_risultato(state, state["gironi"][0]["partite"][0], [(21, 0)])
+
+
+def test_correzione_bloccata_se_la_successiva_e_giocata():
+    state = gironi_conclusi()
+    for _ in range(len(state["bracket"])):
+        pronte = [p for p in state["bracket"] if p["sq1"] and p["sq2"] and not p["confermata"]]
+        if not pronte:
+            break
+        for p in pronte:
+            simula_partita(state, p)
+            aggiorna_classifica_squadra(state, p)
+            avanza_vincitore(state, p)
+    quarto = next(p for p in state["bracket"] if p.get("round_elim", 0) == 0)
+    with pytest.raises(ValueError):
+        correggi_risultato(state, quarto, [(b, a) for a, b in quarto["punteggi"]])
+    assert verifica_coerenza(state) == []
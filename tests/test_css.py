@@ -0,0 +1,45 @@
+"""Foglio di stile statico con impronta nel nome, al posto del CSS in linea a ogni rerun."""
+import hashlib
+
+import pytest
+
+import ui_components
+from theme_manager import THEMES
+
+
+@pytest.fixture
+def cartella_static(tmp_path, monkeypatch):
+    monkeypatch.setattr(ui_components, "STATIC_DIR", str(tmp_path / "static"))
+    for f in (ui_components.foglio_di_stile, ui_components._blocco_css):
+        f.cache_clear()
+    yield tmp_path / "static"
+    for f in (ui_components.foglio_di_stile, ui_components._blocco_css):
+        f.cache_clear()
+
+
+def test_file_con_impronta_e_vecchie_versioni_rimosse(cartella_static):
+    cartella_static.mkdir()
+    (cartella_static / "bvl-vecchia.css").write_text("body{}")
+    (cartella_static / "altro.css").write_text("body{}")
+    url = ui_components.foglio_di_stile()
+    impronta = hashlib.sha1(ui_components._CSS_BASE.encode("utf-8")).hexdigest()[:12]
+    assert url == f"app/static/bvl-{impronta}.css"
+    assert sorted(p.name for p in cartella_static.iterdir()) == ["altro.css", f"bvl-{impronta}.css"]
+    assert (cartella_static / f"bvl-{impronta}.css").read_text(encoding="utf-8") == ui_components._CSS_BASE
+
+
+def test_blocco_piccolo_col_servizio_statico(cartella_static):
+    tema = next(t for t, v in THEMES.items() if v.get("variabili"))
+    statico = ui_components._blocco_css(tema, True)
+    assert "@import" in statico and ui_components.css_tema(tema) in statico
+    assert len(statico) < len(ui_components._CSS_BASE) // 10
+    in_linea = ui_components._blocco_css(tema, False)
+    assert ui_components._CSS_BASE in in_linea and "app/static" not in in_linea
+
+
+def test_cartella_non_scrivibile_css_in_linea(cartella_static, monkeypatch):
+    def rifiuta(*args, **kwargs):
+        raise OSError("sola lettura")
+    monkeypatch.setattr(ui_components.os, "makedirs", rifiuta)
+    assert ui_components.foglio_di_stile() is None
+    assert ui_components._CSS_BASE in ui_components._blocco_css("dazn_dark", True)
@@ -0,0 +1,97 @@
+"""Doppia eliminazione: discese nel tabellone perdenti, finalissima e reset."""
+import pytest
+
+from data_manager import BYE_ID, genera_doppia_eliminazione, avanza_vincitore, podio_bracket, _cerca_per_id
+
+
+def tabellone(n, reset=True):
+    return {"bracket": genera_doppia_eliminazione([f"S{i}" for i in range(1, n + 1)], reset=reset)}
+
+
+def gioca(state, pid, vincitore):
+    """Conferma `pid` con la vittoria di `vincitore` 2-0 e fa avanzare il tabellone."""
+    p = _cerca_per_id(state["bracket"], pid)
+    assert vincitore in (p["sq1"], p["sq2"]) and not p["confermata"]
+    vince_sq1 = vincitore == p["sq1"]
+    p.update(vincitore=vincitore, confermata=True, set_sq1=2 if vince_sq1 else 0, set_sq2=0 if vince_sq1 else 2,
+             punteggi=[(21, 15), (21, 15)] if vince_sq1 else [(15, 21), (15, 21)])
+    return avanza_vincitore(state, p)
+
+
+def squadre(state, pid):
+    p = _cerca_per_id(state["bracket"], pid)
+    return p["sq1"], p["sq2"]
+
+
+def tabellone_a_4_fino_alla_finalissima(reset=True):
+    state = tabellone(4, reset)
+    assert squadre(state, "de_w0_0") == ("S1", "S4") and squadre(state, "de_w0_1") == ("S2", "S3")
+    gioca(state, "de_w0_0", "S1")
+    gioca(state, "de_w0_1", "S3")
+    gioca(state, "de_w1_0", "S1")
+    gioca(state, "de_l0_0", "S2")
+    gioca(state, "de_l1_0", "S3")
+    return state
+
+
+def test_perdenti_scendono_nel_tabellone_perdenti():
+    state = tabellone(4)
+    gioca(state, "de_w0_0", "S1")
+    gioca(state, "de_w0_1", "S3")
+    assert squadre(state, "de_w1_0") == ("S1", "S3")
+    assert squadre(state, "de_l0_0") == ("S4", "S2")      # perdenti del primo turno tra loro
+    gioca(state, "de_w1_0", "S1")
+    gioca(state, "de_l0_0", "S2")
+    assert squadre(state, "de_l1_0") == ("S2", "S3")      # il perdente della finale vincenti in sq2
+    gioca(state, "de_l1_0", "S3")
+    assert squadre(state, "de_gf") == ("S1", "S3")        # vincenti in sq1, perdenti in sq2
+
+
+def test_discese_invertite_a_turni_alterni():
+    state = tabellone(8)
+    for i, vincitore in enumerate(("S1", "S4", "S2", "S3")):
+        gioca(state, f"de_w0_{i}", vincitore)
+    gioca(state, "de_w1_0", "S1")
+    gioca(state, "de_w1_1", "S2")
+    # turno perdenti 1: perdenti del secondo turno vincenti in ordine invertito
+    assert _cerca_per_id(state["bracket"], "de_l1_0")["sq2"] == "S3"
+    assert _cerca_per_id(state["bracket"], "de_l1_1")["sq2"] == "S4"
+
+
+def test_bye_alle_teste_di_serie_anche_nei_perdenti():
+    state = tabellone(6)
+    chiuse = {p["id"] for p in state["bracket"] if p["confermata"]}
+    assert chiuse == {"de_w0_0", "de_w0_2"}
+    assert _cerca_per_id(state["bracket"], "de_l0_0")["sq1"] == BYE_ID
+    toccate = gioca(state, "de_w0_1", "S4")                # S5 scende e supera il BYE a tavolino
+    assert {"de_w1_0", "de_l0_0", "de_l1_0"} <= {p["id"] for p in toccate}
+    assert _cerca_per_id(state["bracket"], "de_l0_0")["confermata"]
+    assert _cerca_per_id(state["bracket"], "de_l1_0")["sq1"] == "S5"
+
+
+def test_finalissima_vinta_dai_vincenti_senza_reset():
+    state = tabellone_a_4_fino_alla_finalissima()
+    assert gioca(state, "de_gf", "S1") == []
+    assert _cerca_per_id(state["bracket"], "de_gf2") is None
+    assert podio_bracket(state) == [(1, "S1"), (2, "S3"), (3, "S2"), (4, "S4")]
+
+
+def test_reset_se_vince_chi_arriva_dai_perdenti():
+    state = tabellone_a_4_fino_alla_finalissima()
+    nuove = gioca(state, "de_gf", "S3")
+    assert [p["id"] for p in nuove] == ["de_gf2"]
+    assert squadre(state, "de_gf2") == ("S1", "S3")
+    assert podio_bracket(state) == []                      # reset ancora da giocare
+    gioca(state, "de_gf2", "S3")
+    assert podio_bracket(state) == [(1, "S3"), (2, "S1"), (3, "S2"), (4, "S4")]
+
+
+def test_senza_reset_la_finalissima_decide():
+    state = tabellone_a_4_fino_alla_finalissima(reset=False)
+    assert gioca(state, "de_gf", "S3") == []
+    assert podio_bracket(state) == [(1, "S3"), (2, "S1"), (3, "S2"), (4, "S4")]
+
+
+def test_servono_almeno_4_squadre():
+    with pytest.raises(ValueError):
+        genera_doppia_eliminazione(["S1", "S2", "S3"])
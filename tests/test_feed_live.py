@@ -0,0 +1,68 @@
+"""Feed dei maxi-schermi: versioni, differenze e risposte HTTP."""
+import json
+import random
+import urllib.error
+import urllib.request
+
+import pytest
+
+from data_manager import (
+    empty_state, new_squadra, genera_gironi, traccia_stato, save_state, load_state, salva_partita,
+)
+from feed_live import Feed, avvia_server
+from punteggio_live import segna_punto, avvia_rally
+
+
+def torneo():
+    random.seed(2)
+    state = empty_state()
+    state["torneo"]["nome"] = "Feed"
+    state["squadre"] = [new_squadra(f"Team {i}", f"a{2 * i}", f"a{2 * i + 1}") for i in range(4)]
+    state["gironi"] = genera_gironi([s["id"] for s in state["squadre"]], girone_unico=True)
+    state["fase"] = "gironi"
+    save_state(traccia_stato(state))
+    return load_state()
+
+
+def test_versioni_con_le_sole_partite_cambiate():
+    state = torneo()
+    feed = Feed()
+    assert feed.aggiorna() and feed.versione == 1
+    assert not feed.aggiorna()                          # archivio invariato: nessuna rilettura
+    assert feed.letture == 1
+
+    partita = state["gironi"][0]["partite"][0]
+    avvia_rally(partita, battuta=1, adesso=0)
+    segna_punto(state["torneo"], partita, 2, adesso=5)
+    salva_partita(state, partita)
+    assert feed.aggiorna() and feed.versione == 2
+    versione, evento, dati = feed.attendi(1, timeout=0)
+    assert (versione, evento) == (2, "partite")
+    assert [p["id"] for p in dati["partite"]] == [partita["id"]]
+    assert dati["partite"][0]["in_corso"] == [0, 1] and dati["partite"][0]["in_battuta"] == 2
+    # schermo rimasto indietro di più versioni: stato completo
+    assert feed.attendi(0, timeout=0)[1] == "stato"
+    assert feed.attendi(2, timeout=0) == (2, None, None)
+
+    state["atleti"].append({"id": "x", "nome": "X", "stats": {}})   # non visibile sugli schermi
+    save_state(state)
+    assert not feed.aggiorna() and feed.versione == 2
+
+
+def test_stato_http_con_etag():
+    torneo()
+    server, feed, fermo = avvia_server(porta=0, host="127.0.0.1")
+    try:
+        url = f"http://127.0.0.1:{server.server_address[1]}/stato"
+        with urllib.request.urlopen(url, timeout=5) as risposta:
+            etag = risposta.headers["ETag"]
+            stato = json.loads(risposta.read())
+        assert stato["torneo"] == "Feed" and len(stato["partite"]) == 6
+        richiesta = urllib.request.Request(url, headers={"If-None-Match": etag})
+        with pytest.raises(urllib.error.HTTPError) as errore:
+            urllib.request.urlopen(richiesta, timeout=5)
+        assert errore.value.code == 304
+    finally:
+        fermo.set()
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,39 @@
+"""Scoreboard in un frammento: gli input non toccano lo stato, la conferma salva e ridisegna."""
+import os
+import random
+
+from streamlit.testing.v1 import AppTest
+
+from data_manager import (
+    empty_state, new_atleta, new_squadra, genera_gironi, traccia_stato, save_state, load_state,
+)
+
+APP = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app.py")
+
+
+def test_punteggio_digitato_e_confermato():
+    random.seed(3)
+    state = empty_state()
+    state["atleti"] = [new_atleta(f"Atleta {i}") for i in range(8)]
+    state["squadre"] = [new_squadra(f"Team {i}", state["atleti"][2 * i]["id"], state["atleti"][2 * i + 1]["id"])
+                        for i in range(4)]
+    state["gironi"] = genera_gironi([s["id"] for s in state["squadre"]], girone_unico=True)
+    state["fase"] = "gironi"
+    save_state(traccia_stato(state))
+
+    at = AppTest.from_file(APP, default_timeout=60)
+    at.run()
+    assert not at.exception, at.exception
+    at.number_input(key="g0_p0_s0_p1").set_value(21).run()
+    at.number_input(key="g0_p0_s0_p2").set_value(15).run()
+    assert not at.exception, at.exception
+    partita = at.session_state["state"]["gironi"][0]["partite"][0]
+    assert not partita["confermata"]                       # digitare non conferma né salva
+    assert not load_state()["gironi"][0]["partite"][0]["confermata"]
+
+    at.button(key="g0_p0_confirm").click().run()
+    assert not at.exception, at.exception
+    partita = at.session_state["state"]["gironi"][0]["partite"][0]
+    assert partita["confermata"] and [tuple(s) for s in partita["punteggi"]] == [(21, 15)]
+    assert load_state()["gironi"][0]["partite"][0]["confermata"]
+    assert not any(b.key == "g0_p0_confirm" for b in at.button)   # ridisegnata come confermata
@@ -0,0 +1,49 @@
+"""Indici id → oggetto di atleti e squadre: sempre uguali alla scansione lineare."""
+import random
+
+from data_manager import empty_state, new_atleta, new_squadra, traccia_stato, get_atleta_by_id, get_squadra_by_id
+
+
+def lineare(lista, oid):
+    return next((x for x in lista if x["id"] == oid), None)
+
+
+def test_indice_segue_le_modifiche_della_lista():
+    random.seed(1)
+    state = traccia_stato(empty_state())
+    atleti = state["atleti"]
+    ids = set()
+    for passo in range(400):
+        mossa = random.randrange(7)
+        if mossa == 0 or not atleti:
+            a = new_atleta(f"Atleta {passo}")
+            atleti.append(a)
+        elif mossa == 1:
+            atleti.insert(random.randrange(len(atleti) + 1), new_atleta(f"Atleta {passo}"))
+        elif mossa == 2:
+            atleti.pop(random.randrange(len(atleti)))
+        elif mossa == 3:
+            atleti[random.randrange(len(atleti))] = new_atleta(f"Atleta {passo}")
+        elif mossa == 4:
+            i = random.randrange(len(atleti))
+            del atleti[i:i + 2]
+        elif mossa == 5:
+            atleti.sort(key=lambda a: random.random())
+        else:
+            atleti.append(dict(random.choice(atleti), nome="duplicato"))   # stesso id: vince il primo
+        ids |= {a["id"] for a in atleti}
+    for aid in ids:
+        assert get_atleta_by_id(state, aid) is lineare(atleti, aid)
+
+
+def test_sezione_riassegnata_e_stato_non_tracciato():
+    state = traccia_stato(empty_state())
+    squadre = [new_squadra("A", "a1", "a2"), new_squadra("B", "b1", "b2")]
+    state["squadre"] = squadre
+    assert get_squadra_by_id(state, squadre[1]["id"])["nome"] == "B"
+    state["squadre"].clear()
+    assert get_squadra_by_id(state, squadre[1]["id"]) is None
+
+    semplice = empty_state()                     # senza traccia: scansione lineare
+    semplice["squadre"] = squadre
+    assert get_squadra_by_id(semplice, squadre[0]["id"]) is squadre[0]
@@ -0,0 +1,78 @@
+"""Inserimento in blocco: regole dei punteggi e conferma tutto o niente con un solo salvataggio."""
+import random
+
+import pytest
+
+from data_manager import (
+    JOURNAL_FILE, empty_state, new_squadra, genera_gironi, traccia_stato, save_state, load_state,
+    valida_punteggi, conferma_risultati, aggiorna_classifica_squadra,
+)
+
+BEST_OF_3 = {"formato_set": "Best of 3", "punteggio_max": 21, "punteggio_tie_break": 15}
+
+
+@pytest.mark.parametrize("punteggi,atteso", [
+    ([(21, 15), (21, 19)], (2, 0)),
+    ([(21, 23), (24, 22), (15, 10)], (2, 1)),
+    ([(30, 28), (0, 0), (17, 21), (15, 17)], (1, 2)),        # righe vuote ignorate
+])
+def test_punteggi_validi(punteggi, atteso):
+    assert valida_punteggi(BEST_OF_3, punteggi)[1:] == atteso
+
+
+@pytest.mark.parametrize("punteggi", [
+    [],                                     # nessun set
+    [(21, 15)],                             # partita incompleta
+    [(20, 15), (21, 15)],                   # set sotto il limite
+    [(21, 20), (21, 15)],                   # un solo punto di scarto
+    [(25, 21), (21, 15)],                   # oltre il limite si chiude a +2
+    [(21, 15), (21, 15), (15, 10)],         # set di troppo
+    [(21, 15), (15, 21), (21, 15)],         # terzo set a 15
+])
+def test_punteggi_non_validi(punteggi):
+    with pytest.raises(ValueError):
+        valida_punteggi(BEST_OF_3, punteggi)
+
+
+def girone():
+    random.seed(9)
+    state = empty_state()
+    state["torneo"].update(BEST_OF_3)
+    state["squadre"] = [new_squadra(f"Team {i}", f"a{2 * i}", f"a{2 * i + 1}") for i in range(5)]
+    state["gironi"] = genera_gironi([s["id"] for s in state["squadre"]], girone_unico=True)
+    state["fase"] = "gironi"
+    save_state(traccia_stato(state))
+    return load_state()
+
+
+def referti(state):
+    return [(p, random.choice([[(21, 15), (21, 18)], [(18, 21), (21, 16), (13, 15)]]))
+            for p in state["gironi"][0]["partite"]]
+
+
+def test_una_riga_non_valida_blocca_tutto():
+    state = girone()
+    righe = referti(state)
+    righe[3] = (righe[3][0], [(21, 20), (21, 15)])
+    errori = conferma_risultati(state, righe)
+    assert list(errori) == [righe[3][0]["id"]] and "scarto" in errori[righe[3][0]["id"]]
+    assert not any(p["confermata"] for p in state["gironi"][0]["partite"])
+    assert all(sq["punti_classifica"] == 0 for sq in state["squadre"])
+
+
+def test_classifica_come_una_conferma_alla_volta():
+    state, singole = girone(), girone()
+    random.seed(1)
+    righe = referti(state)
+    assert conferma_risultati(state, righe) == {}
+    with open(JOURNAL_FILE, encoding="utf-8") as f:
+        assert len(f.readlines()) == 1                     # un solo salvataggio
+    for (p, punteggi), q in zip(righe, singole["gironi"][0]["partite"]):
+        vinti = sum(a > b for a, b in punteggi)
+        q.update(punteggi=punteggi, set_sq1=vinti, set_sq2=len(punteggi) - vinti, confermata=True,
+                 vincitore=q["sq1"] if vinti == 2 else q["sq2"])
+        aggiorna_classifica_squadra(singole, q)
+    assert state["squadre"] == singole["squadre"]
+    assert state["gironi"][0]["classifica"] == singole["gironi"][0]["classifica"]
+    assert conferma_risultati(state, righe[:1]) == {righe[0][0]["id"]: "già confermata"}
+    assert load_state()["squadre"] == state["squadre"]
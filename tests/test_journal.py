@@ -0,0 +1,64 @@
+"""Journal in append: riga troncata da un crash e compattazione nello snapshot."""
+import os
+import random
+
+import data_manager
+from data_manager import (
+    DATA_FILE, JOURNAL_FILE, empty_state, new_squadra, genera_gironi, traccia_stato, save_state, load_state,
+    salva_partita, simula_partita, aggiorna_classifica_squadra,
+)
+
+
+def torneo():
+    random.seed(7)
+    state = empty_state()
+    state["squadre"] = [new_squadra(f"Team {i}", f"a{2 * i}", f"a{2 * i + 1}") for i in range(6)]
+    state["gironi"] = genera_gironi([s["id"] for s in state["squadre"]], girone_unico=True)
+    state["fase"] = "gironi"
+    save_state(traccia_stato(state))
+    return load_state()
+
+
+def conferma(state, partita):
+    simula_partita(state, partita)
+    aggiorna_classifica_squadra(state, partita)
+    salva_partita(state, partita)
+
+
+def test_conferme_nel_journal_senza_riscrivere_lo_snapshot():
+    state = torneo()
+    snapshot = os.stat(DATA_FILE).st_mtime_ns, os.path.getsize(DATA_FILE)
+    for partita in state["gironi"][0]["partite"][:5]:
+        conferma(state, partita)
+    assert (os.stat(DATA_FILE).st_mtime_ns, os.path.getsize(DATA_FILE)) == snapshot
+    with open(JOURNAL_FILE, encoding="utf-8") as f:
+        assert len(f.readlines()) == 5
+    riletto = load_state()
+    assert [p["punteggi"] for p in riletto["gironi"][0]["partite"][:5]] == \
+           [[list(s) for s in p["punteggi"]] for p in state["gironi"][0]["partite"][:5]]
+
+
+def test_riga_troncata_ignorata_e_compattata(monkeypatch):
+    state = torneo()
+    for partita in state["gironi"][0]["partite"][:3]:
+        conferma(state, partita)
+    with open(JOURNAL_FILE, "a", encoding="utf-8") as f:
+        f.write('{"rev": 99, "partite": [{"id"')            # scrittura interrotta da un crash
+    monkeypatch.setattr(data_manager.shard_partite, "SHARD_DIR", "altrove")   # solo journal
+    riletto = load_state()
+    assert sum(p["confermata"] for p in riletto["gironi"][0]["partite"]) == 3
+    assert os.path.getsize(JOURNAL_FILE) == 0               # snapshot pulito al caricamento
+    assert sum(p["confermata"] for p in load_state()["gironi"][0]["partite"]) == 3
+
+
+def test_compattazione_oltre_la_soglia(monkeypatch):
+    state = torneo()
+    conferma(state, state["gironi"][0]["partite"][0])
+    assert os.path.getsize(JOURNAL_FILE) > 0
+    monkeypatch.setattr(data_manager, "SOGLIA_COMPATTAZIONE", 1)
+    riletto = load_state()                                  # al caricamento
+    assert os.path.getsize(JOURNAL_FILE) == 0
+    assert riletto["gironi"][0]["partite"][0]["confermata"]
+    conferma(riletto, riletto["gironi"][0]["partite"][1])  # e al salvataggio
+    assert os.path.getsize(JOURNAL_FILE) == 0
+    assert [p["confermata"] for p in load_state()["gironi"][0]["partite"][:3]] == [True, True, False]
@@ -0,0 +1,67 @@
+"""Motore vettoriale: stessa distribuzione dei punteggi del ciclo rally per rally."""
+import numpy as np
+import pytest
+
+from data_manager import empty_state, new_squadra, genera_gironi
+from motore_simulazione import simula_set_batch, probabilita_set, probabilita_partita, simula_partite
+
+
+def distribuzione_ciclo(limit, p):
+    """{(a, b): probabilità} esatta del ciclo di data_manager.simula_set con rally vinto da A con prob. p."""
+    finali, aperti = {}, {(0, 0): 1.0}
+    while aperti:
+        prossimi = {}
+        for (a, b), pr in aperti.items():
+            for punto, pp in (((a + 1, b), p), ((a, b + 1), 1 - p)):
+                x, y = punto
+                if x >= limit or y >= limit:
+                    if abs(x - y) >= 2:
+                        finali[punto] = finali.get(punto, 0) + pr * pp
+                        continue
+                    if x > limit + 6 or y > limit + 6:
+                        chiuso = (x, y) if x > y else (y, x)
+                        finali[chiuso] = finali.get(chiuso, 0) + pr * pp
+                        continue
+                prossimi[punto] = prossimi.get(punto, 0) + pr * pp
+        aperti = prossimi
+    return finali
+
+
+@pytest.mark.parametrize("limit,p", [(7, 0.5), (7, 0.65), (15, 0.5)])
+def test_distribuzione_del_set(limit, p):
+    attesa = distribuzione_ciclo(limit, p)
+    assert sum(attesa.values()) == pytest.approx(1)
+    n = 200_000
+    a, b = simula_set_batch(n, limit, p=p, rng=np.random.default_rng(1))
+    esiti, conteggi = np.unique(np.stack([a, b], axis=1), axis=0, return_counts=True)
+    osservata = {(int(x), int(y)): c / n for (x, y), c in zip(esiti, conteggi)}
+    assert set(osservata) <= set(attesa)
+    for esito, pr in attesa.items():
+        assert abs(osservata.get(esito, 0) - pr) < 5 * (pr * (1 - pr) / n) ** 0.5 + 1e-4, esito
+    vince_a = sum(pr for (x, y), pr in attesa.items() if x > y)
+    assert probabilita_set(limit, p).item() == pytest.approx(vince_a)
+
+
+def test_probabilita_partita_best_of_3():
+    s, t = probabilita_set(21, 0.55).item(), probabilita_set(21, 0.55, tie_break=True).item()
+    assert probabilita_partita(21, "Best of 3", 0.55).item() == pytest.approx(s * s + 2 * s * (1 - s) * t)
+    # al cap dei vantaggi il ciclo originale dà il set ad A: a p=0.5 non è esattamente metà
+    assert 0.5 < probabilita_partita(21, "Best of 3", 0.5).item() < 0.501
+
+
+def test_simula_partite_riproducibile_e_coerente():
+    state = empty_state()
+    state["torneo"].update(formato_set="Best of 3", punteggio_max=21)
+    state["squadre"] = [new_squadra(f"Team {i}", f"a{2 * i}", f"a{2 * i + 1}") for i in range(6)]
+    state["gironi"] = genera_gironi([s["id"] for s in state["squadre"]], girone_unico=True)
+    partite = state["gironi"][0]["partite"]
+    simula_partite(state, partite, seed=7)
+    copia = [dict(p) for p in partite]
+    simula_partite(state, partite, seed=7)
+    assert [p["punteggi"] for p in partite] == [p["punteggi"] for p in copia]
+    for p in partite:
+        vinti_1 = sum(1 for x, y in p["punteggi"] if x > y)
+        assert (p["set_sq1"], p["set_sq2"]) == (vinti_1, len(p["punteggi"]) - vinti_1)
+        assert 2 in (p["set_sq1"], p["set_sq2"]) and p["confermata"]
+        assert p["vincitore"] == (p["sq1"] if p["set_sq1"] == 2 else p["sq2"])
+        assert len(p["punteggi"]) < 3 or max(p["punteggi"][2]) <= 15 + 7
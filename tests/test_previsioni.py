@@ -0,0 +1,124 @@
+"""Previsioni Monte Carlo: stessa classifica (anche avulsa) dell'app."""
+import random
+
+import pytest
+
+from data_manager import (
+    empty_state, new_squadra, genera_gironi, aggiorna_classifica_squadra, classifica_girone,
+    chiave_classifica, ricostruisci_scontri,
+)
+from previsioni import prevedi_torneo, _scontri_simulati
+
+# Girone a 4: A vince tutto, B/C/D a pari punti in un giro circolare. Negli
+# scontri diretti C è davanti (2ª), con i criteri generali passa D (miglior
+# differenza punti): le previsioni devono seguire il criterio scelto.
+RISULTATI = {
+    ("A", "B"): [(21, 19), (19, 21), (15, 13)],
+    ("A", "C"): [(21, 5), (21, 5)],
+    ("A", "D"): [(21, 19), (19, 21), (15, 13)],
+    ("B", "D"): [(21, 19), (19, 21), (15, 13)],
+    ("C", "B"): [(21, 19), (21, 19)],
+    ("D", "C"): [(21, 19), (19, 21), (15, 13)],
+}
+
+
+def girone_con(risultati, criterio, formato="Best of 3"):
+    """Girone unico con i risultati dati confermati; le altre partite restano da giocare."""
+    random.seed(2)
+    nomi_squadre = sorted({nome for coppia in risultati for nome in coppia})
+    state = empty_state()
+    state["torneo"].update(formato_set=formato, criterio_passaggio=criterio, passano_per_girone=2)
+    state["squadre"] = [new_squadra(nome, f"{nome}1", f"{nome}2") for nome in nomi_squadre]
+    state["gironi"] = genera_gironi([s["id"] for s in state["squadre"]], num_gironi=1)
+    nomi = {sq["id"]: sq["nome"] for sq in state["squadre"]}
+    for partita in state["gironi"][0]["partite"]:
+        coppia = (nomi[partita["sq1"]], nomi[partita["sq2"]])
+        if coppia in risultati:
+            punteggi = risultati[coppia]
+        elif coppia[::-1] in risultati:
+            punteggi = [(b, a) for a, b in risultati[coppia[::-1]]]
+        else:
+            continue
+        set_1 = sum(1 for a, b in punteggi if a > b)
+        partita.update(punteggi=punteggi, set_sq1=set_1, set_sq2=len(punteggi) - set_1, confermata=True,
+                       vincitore=partita["sq1"] if 2 * set_1 > len(punteggi) else partita["sq2"])
+        aggiorna_classifica_squadra(state, partita)
+    state["fase"] = "gironi"
+    return state
+
+
+def girone_circolare(criterio):
+    return girone_con(RISULTATI, criterio)
+
+
+def qualificate(previsione):
+    return {sq["nome"] for sq in previsione["squadre"] if sq["qualificazione"] == 1.0}
+
+
+def test_previsioni_con_classifica_avulsa():
+    state = girone_circolare("avulsa")
+    assert [sq["nome"] for sq in classifica_girone(state, state["gironi"][0])] == ["A", "C", "D", "B"]
+    assert qualificate(prevedi_torneo(state, n_simulazioni=50, seed=1, max_workers=1)) == {"A", "C"}
+
+
+def test_previsioni_con_criteri_generali():
+    state = girone_circolare("classifica")
+    assert [sq["nome"] for sq in classifica_girone(state, state["gironi"][0])][:2] == ["A", "D"]
+    assert qualificate(prevedi_torneo(state, n_simulazioni=50, seed=1, max_workers=1)) == {"A", "D"}
+
+
+def test_scontri_simulati_come_quelli_confermati():
+    state = girone_circolare("avulsa")
+    girone = state["gironi"][0]
+    ricostruisci_scontri(girone)
+    aperte = girone["partite"][3:]
+    parziale = {"partite": [dict(p, conteggiata=False) if p in aperte else p for p in girone["partite"]]}
+    ricostruisci_scontri(parziale)
+    esiti = [(p["set_sq1"], p["set_sq2"], sum(a for a, _ in p["punteggi"]), sum(b for _, b in p["punteggi"]))
+             for p in aperte]
+    partite = [(0, p["sq1"], p["sq2"]) for p in aperte]
+    assert _scontri_simulati(parziale["scontri"], partite, esiti) == girone["scontri"]
+    assert sorted(state["squadre"], key=chiave_classifica)[0]["nome"] == "A"
+
+
+# Girone a 5 (Set Unico) con X-Y ancora da giocare: se vince X, X e Y chiudono a
+# pari punti e X passa per lo scontro diretto, anche se Y ha una differenza
+# punti molto migliore; se vince Y passa Y. X deve passare in circa metà dei tornei.
+APERTO = {
+    ("A", "X"): [(21, 0)], ("A", "Y"): [(21, 19)], ("A", "Z"): [(21, 0)], ("A", "W"): [(21, 0)],
+    ("X", "Z"): [(21, 19)], ("W", "X"): [(21, 0)],
+    ("Y", "Z"): [(21, 0)], ("Y", "W"): [(21, 0)], ("Z", "W"): [(21, 0)],
+}
+
+
+def test_previsioni_avulsa_con_scontro_diretto_da_giocare():
+    state = girone_con(APERTO, "avulsa", formato="Set Unico")
+    previsione = {sq["nome"]: sq["qualificazione"]
+                  for sq in prevedi_torneo(state, n_simulazioni=400, seed=3, max_workers=1)["squadre"]}
+    assert previsione["A"] == 1.0
+    assert previsione["X"] + previsione["Y"] == 1.0
+    assert 0.3 < previsione["X"] < 0.7
+
+
+def test_previsioni_criteri_generali_con_scontro_diretto_da_giocare():
+    state = girone_con(APERTO, "classifica", formato="Set Unico")
+    previsione = {sq["nome"]: sq["qualificazione"]
+                  for sq in prevedi_torneo(state, n_simulazioni=400, seed=3, max_workers=1)["squadre"]}
+    assert previsione["A"] == previsione["Y"] == 1.0
+
+
+def test_fasi_finali_con_bye_dal_tabellone_modello():
+    random.seed(4)
+    state = empty_state()
+    state["torneo"].update(passano_per_girone=2)
+    state["squadre"] = [new_squadra(f"Team {i}", f"a{2 * i}", f"a{2 * i + 1}") for i in range(12)]
+    state["gironi"] = genera_gironi([s["id"] for s in state["squadre"]], num_gironi=3)
+    state["fase"] = "gironi"
+    previsione = prevedi_torneo(state, n_simulazioni=600, seed=9, max_workers=1)
+    squadre = previsione["squadre"]
+    # 6 qualificate su un tabellone da 8: le prime due teste di serie passano il turno col BYE
+    assert sum(sq["qualificazione"] for sq in squadre) == pytest.approx(6)
+    assert sum(sq["finale"] for sq in squadre) == pytest.approx(2)
+    assert sum(sq["vittoria"] for sq in squadre) == pytest.approx(1)
+    assert all(sq["vittoria"] <= sq["finale"] <= sq["qualificazione"] for sq in squadre)
+    assert prevedi_torneo(state, n_simulazioni=600, seed=9)["squadre"] == squadre   # senza pool sotto soglia
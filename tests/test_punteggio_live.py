@@ -0,0 +1,67 @@
+"""Punteggio rally per rally: regole dei set, servizio, cambi campo e annullamento."""
+import random
+
+import pytest
+
+from punteggio_live import avvia_rally, segna_punto, annulla_punto, ricostruisci_rally, registro
+
+TORNEO = {"formato_set": "Best of 3", "punteggio_max": 11, "punteggio_tie_break": 7}
+
+
+def nuova_partita():
+    return {"confermata": False, "punteggi": [], "set_sq1": 0, "set_sq2": 0, "in_battuta": 1}
+
+
+def stato(partita):
+    r = partita["rally"]
+    return (list(partita["punteggi"]), partita["set_sq1"], partita["set_sq2"], partita["in_battuta"],
+            list(r["corrente"]), list(r["prime"]), r["fine"])
+
+
+def test_incrementale_come_il_registro_e_annullamento_fino_all_inizio():
+    random.seed(4)
+    partita = nuova_partita()
+    avvia_rally(partita, battuta=2, adesso=0)
+    storia = [stato(partita)]
+    secondi = 0
+    while not partita["rally"]["fine"]:
+        secondi += random.randint(5, 40)
+        segna_punto(TORNEO, partita, random.choice((1, 2)), adesso=secondi)
+        assert stato(ricostruisci_rally(TORNEO, partita)) == stato(partita)
+        storia.append(stato(partita))
+    with pytest.raises(ValueError):
+        segna_punto(TORNEO, partita, 1, adesso=secondi + 1)
+    for atteso in reversed(storia[:-1]):
+        annulla_punto(partita)
+        assert stato(partita) == atteso
+    with pytest.raises(ValueError):
+        annulla_punto(partita)
+
+
+def test_set_servizio_e_cambi_campo():
+    partita = nuova_partita()
+    avvia_rally(partita, battuta=1, adesso=0)
+    cambi = [segna_punto(TORNEO, partita, 1, adesso=i)["cambio_campo"] for i in range(10)]
+    assert cambi == [i + 1 == 7 for i in range(10)]
+    evento = segna_punto(TORNEO, partita, 1, adesso=10)                     # 11-0
+    assert evento["fine_set"] and not evento["fine_partita"]
+    assert partita["punteggi"] == [(11, 0)] and partita["in_battuta"] == 2  # ha ricevuto per prima
+    for i in range(11):
+        segna_punto(TORNEO, partita, 2, adesso=20 + i)
+    assert partita["punteggi"][-1] == (0, 11) and partita["in_battuta"] == 1   # terzo set: alterna
+    for i in range(6):                                                     # tie-break a 7, vantaggi
+        segna_punto(TORNEO, partita, 1 + i % 2, adesso=40 + i)
+    assert segna_punto(TORNEO, partita, 1, adesso=50)["cambio_campo"] is False   # 4-3: cambio ogni 5
+    segna_punto(TORNEO, partita, 2, adesso=51)
+    assert not partita["rally"]["fine"]                                    # 4-4
+    for lato in (1, 1, 1):
+        evento = segna_punto(TORNEO, partita, lato, adesso=52)
+    assert evento["fine_partita"] and partita["punteggi"][-1] == (7, 4)
+    assert (partita["set_sq1"], partita["set_sq2"]) == (2, 1)
+    assert registro(partita)[0] == (1, 1, 0)
+
+
+def test_partita_confermata_bloccata():
+    partita = dict(nuova_partita(), confermata=True)
+    with pytest.raises(ValueError):
+        segna_punto(TORNEO, partita, 1)
@@ -0,0 +1,41 @@
+"""Ranking globale e Overall delle carte."""
+from data_manager import (
+    new_atleta, compute_overall, punti_ranking, empty_state, traccia_stato, ricostruisci_ranking, voci_ranking,
+    top_ranking,
+)
+
+
+def atleta_con(posizioni, **stats):
+    atleta = new_atleta("Prova")
+    atleta["stats"]["storico_posizioni"] = [(f"Torneo {i}", p) for i, p in enumerate(posizioni)]
+    atleta["stats"]["tornei"] = len(posizioni)
+    atleta["stats"].update(stats)
+    return atleta
+
+
+def test_overall_con_la_scala_storica():
+    # 4 secondi posti: 4×18 punti carta (con i punti ranking 4×70 // 4 sarebbe 60)
+    assert compute_overall(atleta_con([2, 2, 2, 2])) == 61
+    assert compute_overall(atleta_con([1], vittorie=1, set_vinti=6, punti_fatti=300)) == 54
+
+
+def test_nuovo_giocatore():
+    assert compute_overall(new_atleta("Esordiente")) == 40
+
+
+def test_punti_ranking():
+    assert punti_ranking([("A", 1), ("B", 2), ("C", 3), ("D", 9)]) == 100 + 70 + 50 + 20
+
+
+def test_ranking_con_nomi_attuali_e_senza_orfani():
+    state = empty_state()
+    state["atleti"] = [atleta_con([pos]) for pos in (1, 2, 3)]
+    for i, a in enumerate(state["atleti"]):
+        a["nome"] = f"Atleta {i}"
+    state = traccia_stato(state)
+    ricostruisci_ranking(state)
+    state["atleti"][0]["nome"] = "Rinominato"
+    del state["atleti"][1]
+    assert [v["nome"] for v in voci_ranking(state)] == ["Rinominato", "Atleta 2"]
+    assert [v["nome"] for v in top_ranking(state, 1)] == ["Rinominato"]
+    assert state["ranking_globale"][0]["nome"] == "Atleta 0"     # voce salvata non toccata dalla vista
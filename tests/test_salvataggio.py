@@ -0,0 +1,100 @@
+"""Autosave e journal: cosa resta da salvare dopo salva_modifiche."""
+import random
+
+from data_manager import (
+    empty_state, new_squadra, genera_gironi, traccia_stato, load_state, save_state, salva_modifiche,
+    salva_partita, salva_rally, salva_se_modificato, stato_modificato, simula_partita,
+    aggiorna_classifica_squadra,
+)
+from punteggio_live import avvia_rally, segna_punto, annulla_punto
+import shard_partite
+
+
+def torneo():
+    random.seed(1)
+    state = empty_state()
+    state["squadre"] = [new_squadra(f"Team {i}", f"a{2 * i}", f"a{2 * i + 1}") for i in range(8)]
+    state["gironi"] = genera_gironi([s["id"] for s in state["squadre"]], num_gironi=2)
+    state["fase"] = "gironi"
+    save_state(traccia_stato(state))
+    return load_state()
+
+
+def test_conferma_registrata_non_richiede_snapshot():
+    state = torneo()
+    partita = state["gironi"][0]["partite"][0]
+    simula_partita(state, partita)
+    aggiorna_classifica_squadra(state, partita)
+    salva_partita(state, partita)
+    assert not stato_modificato(state)
+
+
+def test_modifiche_non_registrate_restano_per_l_autosave():
+    state = torneo()
+    state["squadre"][5]["nome"] = "Rinominata"
+    state["torneo"]["nome"] = "Coppa"
+    partita = state["gironi"][0]["partite"][0]
+    simula_partita(state, partita)
+    salva_modifiche(state, partite=[partita])
+    assert stato_modificato(state)
+    assert salva_se_modificato(state)
+    riletto = load_state()
+    assert riletto["squadre"][5]["nome"] == "Rinominata"
+    assert riletto["torneo"]["nome"] == "Coppa"
+    assert riletto["gironi"][0]["partite"][0]["confermata"]
+
+
+def test_stesso_oggetto_in_piu_record():
+    state = torneo()
+    a, b = state["gironi"][0]["partite"][:2]
+    simula_partita(state, a)
+    simula_partita(state, b)
+    salva_modifiche(state, partite=[a])
+    assert stato_modificato(state)            # b modificata ma non registrata
+    salva_modifiche(state, partite=[b])
+    assert not stato_modificato(state)
+
+
+def test_record_di_altra_sessione_dopo_snapshot():
+    torneo()
+    a, b = load_state(), load_state()
+    for i in range(3):
+        a["torneo"]["nome"] = f"Salvataggio {i}"
+        save_state(a)
+    nuova = new_squadra("Nuova", "x1", "x2")
+    b["squadre"].append(nuova)
+    salva_modifiche(b, squadre=[b["squadre"][-1]])
+    riletto = load_state()
+    assert nuova["id"] in {sq["id"] for sq in riletto["squadre"]}
+    assert riletto["torneo"]["nome"] == "Salvataggio 2"
+
+
+def test_revisioni_crescenti_tra_sessioni():
+    torneo()
+    a, b = load_state(), load_state()
+    save_state(a)
+    partita = b["gironi"][0]["partite"][0]
+    simula_partita(b, partita)
+    salva_modifiche(b, partite=[partita])
+    assert b._traccia.revisione > a._traccia.revisione
+    save_state(a)
+    assert a._traccia.revisione > b._traccia.revisione
+    assert load_state()._traccia.revisione == a._traccia.revisione
+
+
+def test_rally_registrati_uno_alla_volta():
+    state = torneo()
+    partita = state["gironi"][0]["partite"][0]
+    avvia_rally(partita, battuta=1, adesso=1000)
+    salva_partita(state, partita)
+    versione = shard_partite.leggi_shard(partita["id"])["versione"]
+    for i, lato in enumerate((1, 2, 2, 1, 1)):
+        segna_punto(state["torneo"], partita, lato, adesso=1010 + 7 * i)
+        salva_rally(state, partita)
+        assert not stato_modificato(state)
+    annulla_punto(partita)
+    salva_rally(state, partita, annullato=True)
+    assert shard_partite.leggi_shard(partita["id"])["versione"] == versione   # niente shard dentro il set
+    riletta = load_state()["gironi"][0]["partite"][0]
+    assert riletta["rally"]["log"] == partita["rally"]["log"]
+    assert riletta["rally"]["corrente"] == [2, 2] and riletta["in_battuta"] == partita["in_battuta"] == 1
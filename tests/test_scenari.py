@@ -0,0 +1,80 @@
+"""Scenari di qualificazione: stati certi e condizioni, confrontati con la forza bruta."""
+import itertools
+import random
+
+import pytest
+
+from data_manager import empty_state, new_squadra, genera_gironi, simula_partita, aggiorna_classifica_squadra
+from scenari import scenari_girone, N_CAMPIONI
+
+
+def girone(n_squadre, giocate, seed, formato="Set Unico"):
+    random.seed(seed)
+    state = empty_state()
+    state["torneo"].update(formato_set=formato, passano_per_girone=2)
+    state["squadre"] = [new_squadra(f"Team {i}", f"a{2 * i}", f"a{2 * i + 1}") for i in range(n_squadre)]
+    state["gironi"] = genera_gironi([s["id"] for s in state["squadre"]], girone_unico=True)
+    for p in random.sample(list(state["gironi"][0]["partite"]), giocate):
+        simula_partita(state, p)
+        aggiorna_classifica_squadra(state, p)
+    return state
+
+
+def forza_bruta(state):
+    """Stati esatti in Set Unico: tutti gli esiti delle partite aperte, parità non risolte in entrambi i sensi."""
+    g = state["gironi"][0]
+    squadre = {sq["id"]: sq for sq in state["squadre"]}
+    aperte = [(p["sq1"], p["sq2"]) for p in g["partite"] if not p["confermata"]]
+    possibile = {sid: [False, False] for sid in g["squadre"]}
+    for esiti in itertools.product((True, False), repeat=len(aperte)):
+        stat = {sid: [squadre[sid]["punti_classifica"], squadre[sid]["vittorie"],
+                      squadre[sid]["set_vinti"] - squadre[sid]["set_persi"]] for sid in g["squadre"]}
+        for (a, b), vince_a in zip(aperte, esiti):
+            v, p = (a, b) if vince_a else (b, a)
+            stat[v][0] += 3; stat[v][1] += 1; stat[v][2] += 1
+            stat[p][0] += 1; stat[p][2] -= 1
+        for sid, chiave in stat.items():
+            sopra = sum(1 for c in stat.values() if c > chiave)
+            pari = sum(1 for c in stat.values() if c == chiave) - 1
+            possibile[sid][0] |= sopra < 2
+            possibile[sid][1] |= sopra + pari >= 2
+    return {sid: "qualificata" if not fuori else "eliminata" if not dentro else "in corsa"
+            for sid, (dentro, fuori) in possibile.items()}
+
+
+@pytest.mark.parametrize("seed", range(6))
+def test_stati_come_la_forza_bruta(seed):
+    state = girone(5, 4, seed)
+    ris = scenari_girone(state, state["gironi"][0])
+    assert ris["esatto"] and ris["scenari"] == 2 ** 6
+    assert {sq["id"]: sq["stato"] for sq in ris["squadre"]} == forza_bruta(state)
+
+
+def test_condizioni_dello_scontro_decisivo():
+    state = girone(4, 0, 1)
+    nomi = {sq["id"]: sq["nome"] for sq in state["squadre"]}
+    per_nome = {v: k for k, v in nomi.items()}
+    vincitrici = {("Team 0", "Team 1"): "Team 0", ("Team 0", "Team 2"): "Team 0", ("Team 0", "Team 3"): "Team 0",
+                  ("Team 1", "Team 3"): "Team 1", ("Team 2", "Team 3"): "Team 2"}
+    for p in state["gironi"][0]["partite"]:
+        coppia = tuple(sorted((nomi[p["sq1"]], nomi[p["sq2"]])))
+        if coppia in vincitrici:
+            vince_1 = nomi[p["sq1"]] == vincitrici[coppia]
+            p.update(punteggi=[(21, 15)] if vince_1 else [(15, 21)], set_sq1=int(vince_1), set_sq2=int(not vince_1),
+                     vincitore=per_nome[vincitrici[coppia]], confermata=True)
+            aggiorna_classifica_squadra(state, p)
+    stati = {sq["nome"]: sq for sq in scenari_girone(state, state["gironi"][0])["squadre"]}
+    assert stati["Team 0"]["stato"] == "qualificata"
+    assert stati["Team 3"]["stato"] == "eliminata"
+    assert stati["Team 1"]["stato"] == stati["Team 2"]["stato"] == "in corsa"
+    assert set(stati["Team 1"]["condizioni"]) == {"qualificata se vince contro Team 2",
+                                                  "eliminata se perde contro Team 2"}
+
+
+def test_campionamento_oltre_il_limite_di_nodi():
+    state = girone(12, 26, 1)
+    ris = scenari_girone(state, state["gironi"][0], seed=1)
+    assert not ris["esatto"] and ris["scenari"] == N_CAMPIONI
+    # col campionamento "qualificata"/"eliminata" solo se decise dai limiti di punti
+    esatti = {sq["id"]: sq["stato"] for sq in scenari_girone(state, state["gironi"][0], seed=2)["squadre"]}
+    assert {sq["id"]: sq["stato"] for sq in ris["squadre"]} == esatti
@@ -0,0 +1,49 @@
+"""Segnapunti live: firma dell'archivio come versione e card rigenerate solo se cambiate."""
+import random
+
+from data_manager import (
+    empty_state, new_squadra, genera_gironi, traccia_stato, save_state, load_state, salva_partita,
+    firma_archivio, leggi_stato_salvato,
+)
+from punteggio_live import avvia_rally, segna_punto
+from ui_components import match_card_html_in_cache
+
+
+def torneo():
+    random.seed(1)
+    state = empty_state()
+    state["squadre"] = [new_squadra(f"Team {i}", f"a{2 * i}", f"a{2 * i + 1}") for i in range(4)]
+    state["gironi"] = genera_gironi([s["id"] for s in state["squadre"]], girone_unico=True)
+    state["fase"] = "gironi"
+    save_state(traccia_stato(state))
+    return load_state()
+
+
+def test_firma_e_revisione_cambiano_a_ogni_salvataggio():
+    state = torneo()
+    firma = firma_archivio()
+    dati, revisione = leggi_stato_salvato()
+    assert firma_archivio() == firma                     # lettura: nessun cambiamento
+    partita = state["gironi"][0]["partite"][0]
+    avvia_rally(partita, battuta=1, adesso=0)
+    segna_punto(state["torneo"], partita, 1, adesso=3)
+    salva_partita(state, partita)
+    assert firma_archivio() != firma
+    dati, nuova = leggi_stato_salvato()
+    assert nuova > revisione
+    assert dati["gironi"][0]["partite"][0]["rally"]["corrente"] == [1, 0]
+
+
+def test_card_rigenerata_solo_se_la_partita_cambia():
+    state = torneo()
+    partite = state["gironi"][0]["partite"]
+    cache = {}
+    prime = [match_card_html_in_cache(state, p, f"Match {i}", cache) for i, p in enumerate(partite)]
+    voci = dict(cache)
+    avvia_rally(partite[2], battuta=1, adesso=0)
+    segna_punto(state["torneo"], partite[2], 2, adesso=4)
+    seconde = [match_card_html_in_cache(state, p, f"Match {i}", cache) for i, p in enumerate(partite)]
+    assert [cache[p["id"]] is voci[p["id"]] for p in partite] == [i != 2 for i in range(len(partite))]
+    assert seconde[2] != prime[2] and seconde[:2] == prime[:2]
+    # un solo blocco HTML (a colonna 0, senza righe vuote): unibile alle altre in un solo markdown
+    assert all(c.startswith("<div") and all(r.strip() for r in c.split("\n")) for c in seconde)
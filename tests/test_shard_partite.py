@@ -0,0 +1,104 @@
+"""Shard delle partite: versioni, conflitti tra dispositivi e sincronizzazione."""
+import random
+
+import pytest
+
+import shard_partite
+from shard_partite import ConflittoPartita
+from data_manager import (
+    empty_state, new_squadra, genera_gironi, traccia_stato, save_state, load_state, salva_partita,
+    simula_partita, aggiorna_classifica_squadra, correggi_risultato, conferma_risultati,
+    sincronizza_partite, riprendi_versioni, verifica_coerenza,
+)
+
+
+def partita(pid, vincitore="S1"):
+    return {"id": pid, "sq1": "S1", "sq2": "S2", "punteggi": [(21, 15)], "set_sq1": 1, "set_sq2": 0,
+            "vincitore": vincitore, "confermata": True}
+
+
+def test_versioni_e_conflitti():
+    mia, altra = partita("g0_0"), partita("g0_1")
+    assert shard_partite.scrivi([mia, altra]) == (0, 1)
+    assert mia["versione"] == altra["versione"] == 1
+    assert shard_partite.leggi_shard("g0_0")["vincitore"] == "S1"
+
+    vecchia = dict(mia, versione=0, vincitore="S2")     # copia letta prima della scrittura
+    altra["vincitore"] = "S2"
+    with pytest.raises(ConflittoPartita) as errore:
+        shard_partite.scrivi([altra, vecchia])
+    assert errore.value.ids == ["g0_0"]
+    # tutto o niente: neanche la partita senza conflitto è stata scritta
+    assert shard_partite.leggi_shard("g0_1")["vincitore"] == "S1"
+    assert shard_partite.generazione_corrente() == 1
+    assert shard_partite.conflitti([vecchia, altra]) == ["g0_0"]
+
+    shard_partite.scrivi([altra])
+    assert shard_partite.leggi_shard("g0_1")["versione"] == altra["versione"] == 2
+
+
+def test_cambiate_dal():
+    shard_partite.scrivi([partita("a")])
+    shard_partite.scrivi([partita("b")])
+    assert shard_partite.cambiate_dal(None) == (2, {"a": shard_partite.leggi_shard("a"),
+                                                   "b": shard_partite.leggi_shard("b")})
+    assert set(shard_partite.cambiate_dal(1)[1]) == {"b"}
+    assert shard_partite.cambiate_dal(2) == (2, {})
+    shard_partite.azzera()
+    assert shard_partite.cambiate_dal(None) == (0, {})
+
+
+def due_dispositivi():
+    random.seed(3)
+    state = empty_state()
+    state["squadre"] = [new_squadra(f"Team {i}", f"a{2 * i}", f"a{2 * i + 1}") for i in range(8)]
+    state["gironi"] = genera_gironi([s["id"] for s in state["squadre"]], num_gironi=2)
+    state["fase"] = "gironi"
+    save_state(traccia_stato(state))
+    return load_state(), load_state()
+
+
+def statistiche(state):
+    return {sq["id"]: (sq["punti_classifica"], sq["set_vinti"], sq["punti_fatti"]) for sq in state["squadre"]}
+
+
+def test_sincronizza_risultati_e_correzioni_altrui():
+    a, b = due_dispositivi()
+    p_b = b["gironi"][0]["partite"][0]
+    simula_partita(b, p_b)
+    aggiorna_classifica_squadra(b, p_b)
+    salva_partita(b, p_b)
+
+    assert [p["id"] for p in sincronizza_partite(a)] == [p_b["id"]]
+    assert a["gironi"][0]["partite"][0]["vincitore"] == p_b["vincitore"]
+    assert statistiche(a) == statistiche(b)
+    assert sincronizza_partite(a) == []                  # niente di nuovo
+
+    salva_partita(b, *correggi_risultato(b, p_b, [(y, x) for x, y in p_b["punteggi"]]))
+    sincronizza_partite(a)                               # vecchio contributo tolto, nuovo sommato
+    assert statistiche(a) == statistiche(b) == statistiche(load_state())
+    assert verifica_coerenza(a) == []
+
+
+def test_salvataggio_in_conflitto_riallinea_la_copia_in_memoria():
+    a, b = due_dispositivi()
+    p_a, p_b = a["gironi"][1]["partite"][0], b["gironi"][1]["partite"][0]
+    simula_partita(b, p_b)
+    aggiorna_classifica_squadra(b, p_b)
+    salva_partita(b, p_b)
+
+    assert set(conferma_risultati(a, [(p_a, [(21, 0)])])) == {p_a["id"]}   # rifiutata senza modifiche
+    assert not p_a["confermata"]
+    with pytest.raises(ConflittoPartita):
+        salva_partita(a, p_a)                            # versione vecchia: torna al risultato su disco
+    assert p_a["vincitore"] == p_b["vincitore"] and p_a["versione"] == p_b["versione"]
+    assert statistiche(a) == statistiche(b)
+
+
+def test_partite_nuove_con_id_gia_usati():
+    shard_partite.scrivi([partita("e_r0_0")])
+    shard_partite.scrivi([dict(partita("e_r0_0", vincitore="S2"), versione=1)])
+    nuova = riprendi_versioni([partita("e_r0_0")])[0]   # tabellone rigenerato: stesso id
+    assert nuova["versione"] == 2
+    shard_partite.scrivi([nuova])
+    assert shard_partite.leggi_shard("e_r0_0")["versione"] == 3
@@ -0,0 +1,67 @@
+"""Backend SQLite: atleti riscritti per oggetto, storico letto solo da chi lo usa."""
+import sqlite3
+
+import pytest
+
+import data_manager
+import storage_sqlite
+from data_manager import empty_state, new_atleta, traccia_stato, save_state, load_state
+
+
+@pytest.fixture(autouse=True)
+def backend_sqlite(monkeypatch):
+    monkeypatch.setattr(data_manager, "STORAGE_BACKEND", "sqlite")
+
+
+def archivio_con_atleti(n=5):
+    state = empty_state()
+    state["atleti"] = [new_atleta(f"Atleta {i}") for i in range(n)]
+    for i, a in enumerate(state["atleti"]):
+        a["stats"]["tornei"] = 1
+        a["stats"]["storico_posizioni"] = [(f"Torneo {i}", i + 1)]
+    save_state(traccia_stato(state))
+    return load_state()
+
+
+def righe():
+    """rowid di atleti e storico: INSERT OR REPLACE li cambia, una riga non toccata no."""
+    with sqlite3.connect(storage_sqlite.DB_FILE) as conn:
+        atleti = dict(conn.execute("SELECT id, rowid FROM atleti"))
+        storico = dict(conn.execute("SELECT atleta_id, rowid FROM storico_posizioni"))
+    return atleti, storico
+
+
+def test_riscritto_solo_l_atleta_modificato():
+    state = archivio_con_atleti()
+    prima = righe()
+    modificato = state["atleti"][2]
+    modificato["stats"]["storico_posizioni"].append(("Torneo X", 1))
+    save_state(state)
+    dopo = righe()
+    for tabella_prima, tabella_dopo in zip(prima, dopo):
+        cambiati = {aid for aid in tabella_prima if tabella_prima[aid] != tabella_dopo[aid]}
+        assert cambiati == {modificato["id"]}
+    riletto = load_state()
+    assert [tuple(x) for x in riletto["atleti"][2]["stats"]["storico_posizioni"]] == [("Torneo 2", 3), ("Torneo X", 1)]
+
+
+def test_atleti_aggiunti_e_rimossi():
+    state = archivio_con_atleti()
+    prima, _ = righe()
+    rimosso = state["atleti"].pop(0)
+    state["atleti"].append(new_atleta("Nuovo"))
+    save_state(state)
+    dopo, storico = righe()
+    assert rimosso["id"] not in dopo and rimosso["id"] not in storico
+    assert all(dopo[aid] == prima[aid] for aid in dopo if aid in prima)
+    assert [a["nome"] for a in load_state()["atleti"]] == [f"Atleta {i}" for i in range(1, 5)] + ["Nuovo"]
+
+
+def test_lettori_senza_storico():
+    archivio_con_atleti()
+    data = storage_sqlite.carica(storico=False)
+    assert all("storico_posizioni" not in a["stats"] for a in data["atleti"])
+    data.pop("revisione")
+    storage_sqlite.salva(data, 99)                      # chi salva ciò che ha letto non cancella lo storico
+    assert storage_sqlite.storico_atleta(data["atleti"][3]["id"]) == [("Torneo 3", 4)]
+    assert len(load_state()["atleti"][0]["stats"]["storico_posizioni"]) == 1
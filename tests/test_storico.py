@@ -0,0 +1,58 @@
+"""Storico atleti in un file separato dal torneo in corso."""
+import json
+import os
+
+from data_manager import (
+    DATA_FILE, STORICO_FILE, empty_state, new_atleta, new_squadra, genera_gironi, traccia_stato, save_state,
+    load_state, salva_partita, simula_partita, aggiorna_classifica_squadra, ricostruisci_ranking,
+)
+
+
+def firma(path):
+    return os.stat(path).st_mtime_ns, os.path.getsize(path)
+
+
+def torneo():
+    state = empty_state()
+    state["atleti"] = [new_atleta(f"Atleta {i}") for i in range(8)]
+    ricostruisci_ranking(state)
+    ids = [a["id"] for a in state["atleti"]]
+    state["squadre"] = [new_squadra(f"Team {i}", ids[2 * i], ids[2 * i + 1]) for i in range(4)]
+    state["gironi"] = genera_gironi([s["id"] for s in state["squadre"]], girone_unico=True)
+    state["fase"] = "gironi"
+    save_state(traccia_stato(state))
+    return load_state()
+
+
+def test_torneo_salvato_senza_riscrivere_lo_storico():
+    state = torneo()
+    with open(DATA_FILE, encoding="utf-8") as f:
+        assert "atleti" not in json.load(f)
+    storico = firma(STORICO_FILE)
+    partita = state["gironi"][0]["partite"][0]
+    simula_partita(state, partita)
+    aggiorna_classifica_squadra(state, partita)
+    salva_partita(state, partita)
+    state["torneo"]["nome"] = "Rinominato"
+    save_state(state)                                   # snapshot del torneo
+    assert firma(STORICO_FILE) == storico
+
+    state["atleti"][0]["nome"] = "Nome nuovo"
+    save_state(state)
+    assert firma(STORICO_FILE) != storico
+    riletto = load_state()
+    assert riletto["atleti"][0]["nome"] == "Nome nuovo" and riletto["torneo"]["nome"] == "Rinominato"
+
+
+def test_migrazione_dal_file_unico():
+    vecchio = empty_state()
+    vecchio["atleti"] = [new_atleta("Storico")]
+    vecchio["torneo"]["nome"] = "Vecchio formato"
+    with open(DATA_FILE, "w", encoding="utf-8") as f:
+        json.dump(vecchio, f)
+    state = load_state()
+    assert state["atleti"][0]["nome"] == "Storico" and state["torneo"]["nome"] == "Vecchio formato"
+    with open(DATA_FILE, encoding="utf-8") as f:
+        assert "atleti" not in json.load(f)             # riscritto su due file al caricamento
+    with open(STORICO_FILE, encoding="utf-8") as f:
+        assert json.load(f)["atleti"][0]["nome"] == "Storico"
@@ -0,0 +1,71 @@
+"""Sistema svizzero: accoppiamenti, turni futuri in calendario e nelle previsioni."""
+import random
+
+from data_manager import (
+    BYE_ID, empty_state, new_squadra, nuovo_girone_svizzero, accoppia_turno_svizzera, classifica_svizzera,
+    simula_partita, aggiorna_classifica_squadra, _accoppia_svizzera,
+)
+from calendario import pianifica
+from previsioni import prevedi_torneo, MAX_RUN_SVIZZERA
+
+
+def torneo_svizzero(n_squadre=8, turni=3, giocati=1):
+    random.seed(6)
+    state = empty_state()
+    state["torneo"].update(turni_svizzera=turni, qualificate_svizzera=4)
+    state["squadre"] = [new_squadra(f"Team {i}", f"a{2 * i}", f"a{2 * i + 1}") for i in range(n_squadre)]
+    state["gironi"] = [nuovo_girone_svizzero([sq["id"] for sq in state["squadre"]])]
+    state["fase"] = "gironi"
+    for _ in range(giocati):
+        for partita in accoppia_turno_svizzera(state, state["gironi"][0]):
+            if not partita["confermata"]:
+                simula_partita(state, partita)
+                aggiorna_classifica_squadra(state, partita)
+    return state
+
+
+def test_budget_di_passi_condiviso():
+    # 4 squadre che si sono già incontrate tutte: nessun accoppiamento senza rivincite
+    avversari = [{1, 2, 3}, {0, 2, 3}, {0, 1, 3}, {0, 1, 2}]
+    budget = [10]
+    assert _accoppia_svizzera([0, 1, 2, 3], [0] * 4, avversari, budget=budget) is None
+    assert budget[0] < 10
+    assert _accoppia_svizzera([0, 1, 2, 3], [0] * 4, avversari, rivincite=True, budget=[0]) is None
+    assert _accoppia_svizzera([0, 1, 2, 3], [0] * 4, avversari, rivincite=True) == [(0, 2), (1, 3)]
+
+
+def test_turni_futuri_segnaposto_in_calendario():
+    state = torneo_svizzero(n_squadre=9, turni=3, giocati=0)
+    accoppia_turno_svizzera(state, state["gironi"][0])    # turno 1 in corso
+    state["torneo"]["campi"] = 2
+    slot = pianifica(state)["slot"]
+    turno = {t: [s for pid, s in slot.items() if pid.startswith(f"sv_t{t}_")] for t in (2, 3)}
+    assert len(turno[2]) == len(turno[3]) == 4            # 9 squadre: 4 partite e un BYE per turno
+    primo = [slot[p["id"]] for p in state["gironi"][0]["partite"] if BYE_ID not in (p["sq1"], p["sq2"])]
+    assert min(s["inizio"] for s in turno[2]) >= max(s["fine"] for s in primo)
+    assert min(s["inizio"] for s in turno[3]) >= max(s["fine"] for s in turno[2])
+
+    for partita in state["gironi"][0]["partite"]:
+        if not partita["confermata"]:
+            simula_partita(state, partita)
+            aggiorna_classifica_squadra(state, partita)
+    accoppia_turno_svizzera(state, state["gironi"][0])    # turno 2 vero: il suo segnaposto sparisce
+    slot = pianifica(state)["slot"]
+    assert not any(pid.startswith("sv_t2_") for pid in slot)
+    assert sum(pid.startswith("sv_t3_") for pid in slot) == 4
+
+
+def test_previsioni_simulano_i_turni_mancanti():
+    state = torneo_svizzero(turni=3, giocati=1)
+    previsione = prevedi_torneo(state, n_simulazioni=5000, seed=2, max_workers=1)
+    assert previsione["n_simulazioni"] == MAX_RUN_SVIZZERA
+    qualificazione = [sq["qualificazione"] for sq in previsione["squadre"]]
+    assert abs(sum(qualificazione) - 4) < 1e-9
+    assert any(0 < q < 1 for q in qualificazione)         # due turni ancora da giocare
+
+
+def test_previsioni_a_turni_finiti_seguono_la_classifica():
+    state = torneo_svizzero(turni=2, giocati=2)
+    attese = {sq["nome"] for sq in classifica_svizzera(state, state["gironi"][0])[:4]}
+    previsione = prevedi_torneo(state, n_simulazioni=200, seed=2, max_workers=1)
+    assert {sq["nome"] for sq in previsione["squadre"] if sq["qualificazione"] == 1.0} == attese
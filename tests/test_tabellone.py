@@ -0,0 +1,59 @@
+"""Tabellone a eliminazione diretta con N turni: teste di serie, BYE e podio."""
+import pytest
+
+from data_manager import (
+    BYE_ID, genera_tabellone, avanza_vincitore, podio_bracket, ordine_teste_di_serie, nome_turno, _cerca_per_id,
+)
+
+
+def gioca_tutto(state, migliore=min):
+    """Conferma le partite pronte facendo vincere la testa di serie migliore (S1 < S2 < ...)."""
+    while True:
+        pronte = [p for p in state["bracket"] if p["sq1"] and p["sq2"] and not p["confermata"]]
+        if not pronte:
+            return
+        for p in pronte:
+            vincitore = migliore(p["sq1"], p["sq2"], key=lambda s: int(s[1:]))
+            p.update(vincitore=vincitore, confermata=True)
+            avanza_vincitore(state, p)
+
+
+def test_ordine_teste_di_serie():
+    assert ordine_teste_di_serie(8) == [1, 8, 4, 5, 2, 7, 3, 6]
+    for n in (2, 4, 16, 32):
+        ordine = ordine_teste_di_serie(n)
+        assert sorted(ordine) == list(range(1, n + 1))
+        assert all(a + b == n + 1 for a, b in zip(ordine[::2], ordine[1::2]))
+    assert nome_turno(16) == "Ottavi" and nome_turno(128) == "Turno a 128"
+
+
+@pytest.mark.parametrize("n", [2, 3, 5, 8, 12, 16, 33])
+def test_tabellone_di_ogni_dimensione(n):
+    squadre = [f"S{i}" for i in range(1, n + 1)]
+    state = {"bracket": genera_tabellone(squadre)}
+    dim = 1 << (n - 1).bit_length()
+    primo_turno = [p for p in state["bracket"] if p["id"].startswith("e_r0_") or dim == 2]
+    assert len(primo_turno) == dim // 2
+    # i BYE toccano alle teste di serie migliori e quelle partite sono già chiuse
+    con_bye = {p["sq1"] for p in primo_turno if p["sq2"] == BYE_ID}
+    assert con_bye == set(squadre[:dim - n]) and all(p["confermata"] for p in primo_turno if p["sq2"] == BYE_ID)
+    gioca_tutto(state)
+    podio = podio_bracket(state)
+    assert podio[:2] == [(1, "S1"), (2, "S2")]
+    if n >= 4:
+        assert podio[2:] == [(3, "S3"), (4, "S4")]
+
+
+def test_perdenti_delle_semifinali_nella_finale_34():
+    state = {"bracket": genera_tabellone([f"S{i}" for i in range(1, 5)])}
+    gioca_tutto(state, migliore=max)                      # vincono sempre le peggiori
+    f34 = _cerca_per_id(state["bracket"], "e_finale_34")
+    assert {f34["sq1"], f34["sq2"]} == {"S1", "S2"}
+    assert podio_bracket(state) == [(1, "S4"), (2, "S3"), (3, "S2"), (4, "S1")]
+
+
+def test_senza_finale_34():
+    state = {"bracket": genera_tabellone(["S1", "S2", "S3", "S4"], finale_34=False)}
+    assert _cerca_per_id(state["bracket"], "e_finale_34") is None
+    gioca_tutto(state)
+    assert podio_bracket(state) == [(1, "S1"), (2, "S2")]
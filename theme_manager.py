@@ -3,11 +3,18 @@ theme_manager.py — Gestione centralizzata dei temi UI
 """
 import streamlit as st
 
+# "variabili": override delle variabili CSS del foglio comune (ui_components)
 THEMES = {
-    "dazn_dark": {"label": "Scuro DAZN", "description": "Sfondo scuro, accento rosso."},
-    "dazn_red": {"label": "Rosso DAZN", "description": "Rosso più intenso, look caldo."},
-    "dark_blue": {"label": "Blu scuro", "description": "Blu notte con accenti azzurri."},
-    "dark_green": {"label": "Verde scuro", "description": "Verde scuro con accenti lime."},
+    "dazn_dark": {"label": "Scuro DAZN", "description": "Sfondo scuro, accento rosso.",
+                  "variabili": {}},
+    "dazn_red": {"label": "Rosso DAZN", "description": "Rosso più intenso, look caldo.",
+                 "variabili": {"--accent-red": "#ff2244", "--bg-primary": "#0f0a0a", "--border": "#3a2a2a"}},
+    "dark_blue": {"label": "Blu scuro", "description": "Blu notte con accenti azzurri.",
+                  "variabili": {"--accent-red": "#0070f3", "--accent-blue": "#00aaff",
+                                "--bg-primary": "#0a0f1a", "--border": "#2a3a4a"}},
+    "dark_green": {"label": "Verde scuro", "description": "Verde scuro con accenti lime.",
+                   "variabili": {"--accent-red": "#00c851", "--accent-blue": "#00e676",
+                                 "--bg-primary": "#0a0f0a", "--border": "#2a3a2a", "--green": "#00e676"}},
 }
 
 
@@ -1,8 +1,15 @@
 """
 ui_components.py — Stile DAZN Dark Mode + componenti riutilizzabili + Carte FC26
 """
+import functools
+import glob
+import hashlib
+import os
+import textwrap
+
 import streamlit as st
-from data_manager import nome_squadra, get_squadra_by_id, compute_overall, compute_attributes, BYE_ID
+from theme_manager import THEMES
+from data_manager import nome_squadra, get_squadra_by_id, compute_overall, compute_attributes, BYE_ID, fase_raggiunta
 
 # ─── CARTE FC26: STILE DA OVERALL ─────────────────────────────────────────────
 
@@ -115,38 +122,10 @@ def render_player_card_html(atleta, photo_url=None):
 
 # ─── CSS DARK MODE STILE DAZN ────────────────────────────────────────────────
 
-def inject_css(theme="dazn_dark"):
-    try:
-        theme = (theme or "dazn_dark").strip()
-    except Exception:
-        theme = "dazn_dark"
-    theme_overrides = ""
-    if theme == "dazn_red":
-        theme_overrides = """
-    :root {
-        --accent-red: #ff2244;
-        --bg-primary: #0f0a0a;
-        --border: #3a2a2a;
-    }"""
-    elif theme == "dark_blue":
-        theme_overrides = """
-    :root {
-        --accent-red: #0070f3;
-        --accent-blue: #00aaff;
-        --bg-primary: #0a0f1a;
-        --border: #2a3a4a;
-    }"""
-    elif theme == "dark_green":
-        theme_overrides = """
-    :root {
-        --accent-red: #00c851;
-        --accent-blue: #00e676;
-        --bg-primary: #0a0f0a;
-        --border: #2a3a2a;
-        --green: #00e676;
-    }"""
-    st.markdown("""
-    <style>
+# Foglio di stile comune a tutti i temi: scritto una volta in static/ con
+# l'impronta del contenuto nel nome e importato dal browser (in cache tra i
+# rerun). A ogni esecuzione viaggia solo l'@import + le variabili del tema.
+_CSS_BASE = """
     @import url('https://fonts.googleapis.com/css2?family=Barlow+Condensed:wght@400;600;800&family=Barlow:wght@400;500;600&display=swap');
 
     :root {
@@ -161,7 +140,6 @@ def inject_css(theme="dazn_dark"):
         --border: #2a2a3a;
         --green: #00c851;
     }
-    """ + theme_overrides + """
 
     html, body, [class*="css"] {
         background-color: var(--bg-primary) !important;
@@ -722,8 +700,58 @@ def inject_css(theme="dazn_dark"):
         border-radius: 8px !important;
         padding: 12px !important;
     }
-    </style>
-    """, unsafe_allow_html=True)
+"""
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static")
+
+
+@functools.lru_cache(maxsize=None)
+def foglio_di_stile():
+    """URL del CSS statico (static/bvl-<impronta>.css), None se la cartella non è scrivibile."""
+    impronta = hashlib.sha1(_CSS_BASE.encode("utf-8")).hexdigest()[:12]
+    nome = f"bvl-{impronta}.css"
+    percorso = os.path.join(STATIC_DIR, nome)
+    if not os.path.exists(percorso):
+        try:
+            os.makedirs(STATIC_DIR, exist_ok=True)
+            tmp = f"{percorso}.{os.getpid()}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.write(_CSS_BASE)
+            os.replace(tmp, percorso)          # scrittura atomica: mai un file a metà
+            for vecchio in glob.glob(os.path.join(STATIC_DIR, "bvl-*.css")):
+                if vecchio != percorso:
+                    os.remove(vecchio)         # versioni precedenti del CSS
+        except OSError:
+            return None
+    return f"app/static/{nome}"
+
+
+@functools.lru_cache(maxsize=None)
+def css_tema(theme):
+    """Override delle variabili CSS del tema (poche righe)."""
+    variabili = THEMES.get(theme, {}).get("variabili", {})
+    if not variabili:
+        return ""
+    return ":root { " + " ".join(f"{k}: {v};" for k, v in variabili.items()) + " }"
+
+
+@functools.lru_cache(maxsize=None)
+def _blocco_css(theme, statico):
+    if statico:
+        url = foglio_di_stile()
+        if url:
+            return f'<style>@import url("{url}");\n{css_tema(theme)}</style>'
+    # Servizio statico disattivato o cartella non scrivibile: tutto in linea
+    return f"<style>{_CSS_BASE}\n{css_tema(theme)}</style>"
+
+
+def inject_css(theme="dazn_dark"):
+    try:
+        theme = (theme or "dazn_dark").strip()
+    except Exception:
+        theme = "dazn_dark"
+    statico = bool(st.get_option("server.enableStaticServing"))
+    st.markdown(_blocco_css(theme, statico), unsafe_allow_html=True)
 
 
 # ─── HEADER ──────────────────────────────────────────────────────────────────
@@ -739,7 +767,7 @@ def render_header(state):
     
     fasi = [("setup","⚙️ Setup"), ("gironi","🔵 Gironi"), ("eliminazione","⚡ Eliminazione"), ("proclamazione","🏆 Finale")]
     stati = []
-    fase_corrente = state["fase"]
+    fase_corrente = fase_raggiunta(state)   # profili/previsioni: mostra la fase del torneo
     ordine = ["setup","gironi","eliminazione","proclamazione"]
     idx_corrente = ordine.index(fase_corrente)
     
@@ -762,12 +790,17 @@ def render_header(state):
 # ─── MATCH CARD ──────────────────────────────────────────────────────────────
 
 def render_match_card(state, partita, label=""):
+    st.markdown(match_card_html(state, partita, label), unsafe_allow_html=True)
+
+
+def match_card_html(state, partita, label=""):
+    """HTML della match card (senza streamlit: usato anche dai benchmark)."""
     from data_manager import get_atleta_by_id, BYE_ID
 
     def safe_sq(sid):
-        if sid == BYE_ID or not sid:
+        if sid == BYE_ID:
             return {"nome": "— BYE —", "atleti": []}
-        return get_squadra_by_id(state, sid)
+        return get_squadra_by_id(state, sid) if sid else None   # None → "Squadra da definire"
 
     sq1 = safe_sq(partita.get("sq1"))
     sq2 = safe_sq(partita.get("sq2"))
@@ -782,7 +815,11 @@ def render_match_card(state, partita, label=""):
         names = [get_atleta_by_id(state, aid)["nome"] for aid in sq.get("atleti", []) if get_atleta_by_id(state, aid)]
         return " / ".join(names) if names else "—"
 
-    parziali = " | ".join([f"{p[0]}-{p[1]}" for p in partita.get("punteggi", [])]) if partita.get("punteggi") else "—"
+    set_giocati = [f"{p[0]}-{p[1]}" for p in partita.get("punteggi", [])]
+    rally = partita.get("rally")
+    if rally and not rally["fine"] and not partita.get("confermata"):
+        set_giocati.append("🏐 {}-{}".format(*rally["corrente"]))   # set in corso (punteggio live)
+    parziali = " | ".join(set_giocati) if set_giocati else "—"
     confirmed_class = "confirmed" if partita.get("confermata") else ""
 
     nome1 = (sq1.get("nome") or "—").replace("<", "&lt;").replace(">", "&gt;")
@@ -790,7 +827,7 @@ def render_match_card(state, partita, label=""):
     header_label = (label or "").replace("<", "&lt;").replace(">", "&gt;")
     status = "✅ CONFERMATA" if partita.get("confermata") else "🔴 LIVE"
 
-    st.markdown(f"""
+    return f"""
     <div class="match-card {confirmed_class}">
         <div class="match-card-header">{header_label} {status}</div>
         <div class="match-body">
@@ -812,7 +849,65 @@ def render_match_card(state, partita, label=""):
             </div>
         </div>
     </div>
-    """, unsafe_allow_html=True)
+    """
+
+
+def impronta_card(partita):
+    """Dati della partita che compaiono nella match card (del registro rally solo il set in corso)."""
+    rally = partita.get("rally") or {}
+    return (partita.get("sq1"), partita.get("sq2"), partita.get("set_sq1", 0), partita.get("set_sq2", 0),
+            tuple(tuple(x) for x in partita.get("punteggi", [])), bool(partita.get("confermata")),
+            tuple(rally.get("corrente", ())), rally.get("fine"))
+
+
+def match_card_html_in_cache(state, partita, label, cache):
+    """
+    match_card_html senza rientri (pronta da unire ad altre card in un solo
+    st.markdown), rigenerata solo se la partita è cambiata; cache = {id
+    partita: (etichetta e impronta, html)}. Nomi di squadre e atleti non sono
+    nell'impronta: chi usa la cache la svuota quando cambiano.
+    """
+    chiave = (label, impronta_card(partita))
+    voce = cache.get(partita["id"])
+    if voce is None or voce[0] != chiave:
+        html = textwrap.dedent(match_card_html(state, partita, label)).strip()
+        voce = cache[partita["id"]] = (chiave, html)
+    return voce[1]
+
+
+# ─── CORREZIONE RISULTATO ────────────────────────────────────────────────────
+
+def render_correzione(state, partita, key_prefix):
+    """Expander "✏️ Correggi risultato" per una partita già confermata (BYE esclusi)."""
+    from data_manager import correggi_risultato, save_state, salva_partita, annulla_se_in_conflitto
+    if BYE_ID in (partita.get("sq1"), partita.get("sq2")) or state.get("vincitore"):
+        return
+    sq1 = get_squadra_by_id(state, partita["sq1"])
+    sq2 = get_squadra_by_id(state, partita["sq2"])
+    if not sq1 or not sq2:
+        return
+    n_set = 1 if state["torneo"]["formato_set"] == "Set Unico" else 3
+    attuali = list(partita.get("punteggi") or [])
+    attuali += [(0, 0)] * (n_set - len(attuali))
+
+    with st.expander("✏️ Correggi risultato", expanded=False):
+        punteggi = []
+        for s, (v1, v2) in enumerate(attuali):
+            col1, col2 = st.columns(2)
+            with col1:
+                p1 = st.number_input(f"Set {s+1} — {sq1['nome']}", 0, 50, int(v1), key=f"{key_prefix}_fix_s{s}_p1")
+            with col2:
+                p2 = st.number_input(f"Set {s+1} — {sq2['nome']}", 0, 50, int(v2), key=f"{key_prefix}_fix_s{s}_p2")
+            punteggi.append((p1, p2))
+        if st.button("💾 SALVA CORREZIONE", key=f"{key_prefix}_fix", use_container_width=True):
+            try:
+                with annulla_se_in_conflitto(state):    # in conflitto: correzione e tabellone annullati
+                    salva_partita(state, *correggi_risultato(state, partita, punteggi))
+            except ValueError as e:     # anche ConflittoPartita: corretta nel frattempo da un altro dispositivo
+                st.error(str(e))
+                return
+            save_state(state)   # può cambiare la struttura del tabellone: snapshot completo
+            st.rerun()
 
 
 # ─── PODIO ───────────────────────────────────────────────────────────────────